@@ -22,6 +22,18 @@ class BulkImportAdmin(HostOnlyAdmin):
         'source_imported_from', 'table_imported_from', 'pk_imported_from', 'table_imported_to', 'pk_imported_to'
     ]
     ordering = ['timestamp', 'table_imported_to', 'pk_imported_to']
+    exclude = ['data_imported']
+    readonly_fields = ['imported_data', 'archived_data_file']
+
+    def imported_data(self, obj):
+        """ Retrieves the data that was imported, regardless of the format in which it was recorded.
+
+        :param obj: Bulk import record for which to retrieve data.
+        :return: Data that was imported.
+        """
+        return obj.imported_data
+
+    imported_data.short_description = _('Imported data')
 
 
 @admin.register(FdpImportFile)
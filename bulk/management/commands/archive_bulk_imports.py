@@ -0,0 +1,71 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.timezone import now
+from inheritable.models import AbstractConfiguration
+from bulk.models import BulkImport
+from datetime import timedelta
+
+
+class Command(BaseCommand):
+    """ Moves the data that was imported for old bulk import records into gzipped archive files, and optionally
+    converts the data that was imported for the remaining bulk import records into a compressed format.
+
+    The columns mapping external IDs to FDP records are always kept in the bulk import table.
+
+    Usage: python manage.py archive_bulk_imports [--days 90] [--batch-size 1000] [--compress]
+
+    """
+    help = 'Moves the data imported for old bulk import records into archive files, and optionally compresses the ' \
+           'data imported for the remaining bulk import records.'
+
+    def add_arguments(self, parser):
+        """ Adds the command line arguments.
+
+        :param parser: Command line argument parser.
+        :return: Nothing.
+        """
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=None,
+            help='Bulk import records older than this number of days are archived. Defaults to the '
+                 'FDP_BULK_IMPORT_RETENTION_DAYS setting.'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Number of bulk import records processed with each database update.'
+        )
+        parser.add_argument(
+            '--compress',
+            action='store_true',
+            help='Compress the data imported for bulk import records that remain in the bulk import table.'
+        )
+
+    def handle(self, *args, **options):
+        """ Archives, and optionally compresses, the data imported for bulk import records.
+
+        :param args: Positional arguments.
+        :param options: Keyword arguments.
+        :return: Nothing.
+        """
+        batch_size = options['batch_size']
+        if batch_size < 1:
+            raise CommandError('Batch size must be at least 1')
+        days = options['days'] if options['days'] is not None else AbstractConfiguration.bulk_import_retention_days()
+        # archive the data imported for old bulk import records
+        if days is not None:
+            archived_data_files = BulkImport.archive_data(
+                older_than=now() - timedelta(days=days), batch_size=batch_size
+            )
+            self.stdout.write(
+                'Wrote {n} archive file(s) into {d}'.format(
+                    n=len(archived_data_files), d=AbstractConfiguration.bulk_import_archive_dir()
+                )
+            )
+        else:
+            self.stdout.write('No retention period is configured, so no bulk import records were archived')
+        # compress the data imported for the remaining bulk import records
+        if options['compress']:
+            num_of_converted = BulkImport.compress_uncompressed_data(batch_size=batch_size)
+            self.stdout.write('Compressed the data imported for {n} bulk import record(s)'.format(n=num_of_converted))
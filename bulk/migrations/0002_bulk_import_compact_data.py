@@ -0,0 +1,28 @@
+# Generated by Django 3.1.7 on 2026-10-18 21:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bulk', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bulkimport',
+            name='archived_data_file',
+            field=models.CharField(blank=True, default='', editable=False, help_text='Name of the archive file into which the data that was imported was moved.', max_length=254, verbose_name='Archive file'),
+        ),
+        migrations.AddField(
+            model_name='bulkimport',
+            name='compressed_data_imported',
+            field=models.BinaryField(blank=True, help_text='Compressed JSON representation of data that was imported.', null=True, verbose_name='Compressed imported data'),
+        ),
+        migrations.AlterField(
+            model_name='bulkimport',
+            name='data_imported',
+            field=models.JSONField(blank=True, help_text='JSON representation of data that was imported.', null=True, verbose_name='Imported data'),
+        ),
+    ]
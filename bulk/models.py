@@ -7,7 +7,12 @@ from django.core.exceptions import ValidationError
 from rest_framework.permissions import BasePermission
 from data_wizard.models import Identifier, Run
 from data_wizard.sources.models import FileSource
-from inheritable.models import AbstractFileValidator
+from inheritable.models import AbstractFileValidator, AbstractConfiguration
+from json import dumps as json_dumps, loads as json_loads
+from zlib import compress as zlib_compress, decompress as zlib_decompress
+from gzip import open as gzip_open
+from os import makedirs as os_makedirs
+from os.path import exists as path_exists
 
 
 class BulkImport(models.Model):
@@ -22,9 +27,17 @@ class BulkImport(models.Model):
         :pk_imported_from (str): Primary key in external source uniquely identifying data that was imported.
         :table_imported_to (str): Table in FDP to which data was imported.
         :pk_imported_to (int): Primary key in FDP uniquely identifying data that was imported.
-        :data_imported (json): JSON representation of data that was imported.
+        :data_imported (json): JSON representation of data that was imported. Empty if the data was recorded in a
+        compressed format, or was archived.
+        :compressed_data_imported (bytes): Compressed JSON representation of data that was imported. Empty if the data
+        was recorded in an uncompressed format, or was archived.
+        :archived_data_file (str): Name of the archive file into which the data that was imported was moved. Blank if
+        the data has not been archived.
         :timestamp (datetime): Automatically added timestamp recording when imported was performed.
         :notes (str): Explanatory notes for the import.
+
+    Properties:
+        :imported_data (dict): Retrieves the data that was imported, regardless of the format in which it was recorded.
     """
     source_imported_from = models.CharField(
         null=False,
@@ -67,12 +80,30 @@ class BulkImport(models.Model):
     )
 
     data_imported = models.JSONField(
-        blank=False,
-        null=False,
+        blank=True,
+        null=True,
         help_text=_('JSON representation of data that was imported.'),
         verbose_name=_('Imported data')
     )
 
+    compressed_data_imported = models.BinaryField(
+        blank=True,
+        null=True,
+        editable=False,
+        help_text=_('Compressed JSON representation of data that was imported.'),
+        verbose_name=_('Compressed imported data')
+    )
+
+    archived_data_file = models.CharField(
+        null=False,
+        blank=True,
+        default='',
+        editable=False,
+        help_text=_('Name of the archive file into which the data that was imported was moved.'),
+        max_length=settings.MAX_NAME_LEN,
+        verbose_name=_('Archive file')
+    )
+
     timestamp = models.DateTimeField(
         null=False,
         blank=False,
@@ -107,6 +138,134 @@ class BulkImport(models.Model):
             f='{a} {t}'.format(a=_('at'), t=self.timestamp)
         )
 
+    @staticmethod
+    def compress_data(data):
+        """ Compresses a JSON-serializable representation of data that was imported.
+
+        :param data: JSON-serializable representation of data, such as a dictionary or a JSON string.
+        :return: Compressed bytes.
+        """
+        json_str = data if isinstance(data, str) else json_dumps(data, default=str)
+        return zlib_compress(json_str.encode('utf-8'))
+
+    @staticmethod
+    def decompress_data(compressed_data):
+        """ Decompresses a compressed JSON representation of data that was imported.
+
+        :param compressed_data: Bytes that were compressed through compress_data(...).
+        :return: Data that was imported, usually a dictionary.
+        """
+        return json_loads(zlib_decompress(bytes(compressed_data)).decode('utf-8'))
+
+    @classmethod
+    def get_data_imported_kwargs(cls, data):
+        """ Retrieves the keyword arguments with which to record the data that was imported, in the format that is
+        configured through the FDP_BULK_IMPORT_DATA_FORMAT setting.
+
+        :param data: Data that was imported, such as a dictionary of validated data.
+        :return: Dictionary of keyword arguments that can be passed when creating a bulk import record.
+        """
+        json_str = json_dumps(data, default=str)
+        # data is recorded in a compressed format
+        if AbstractConfiguration.compress_bulk_import_data():
+            return {'data_imported': None, 'compressed_data_imported': cls.compress_data(data=json_str)}
+        # data is recorded in an uncompressed format
+        else:
+            return {'data_imported': json_str, 'compressed_data_imported': None}
+
+    def __get_archived_data(self):
+        """ Retrieves the data that was imported from the archive file into which it was moved.
+
+        :return: Data that was imported, or None if it could not be found in the archive file.
+        """
+        archive_file_path = AbstractConfiguration.bulk_import_archive_dir() / self.archived_data_file
+        if not path_exists(archive_file_path):
+            return None
+        with gzip_open(archive_file_path, 'rt', encoding='utf-8') as archive_file:
+            for line in archive_file:
+                archived_record = json_loads(line)
+                if archived_record['pk'] == self.pk:
+                    return archived_record['data_imported']
+        return None
+
+    @property
+    def imported_data(self):
+        """ Retrieves the data that was imported, regardless of the format in which it was recorded.
+
+        :return: Data that was imported, usually a dictionary.
+        """
+        if self.compressed_data_imported is not None:
+            return self.decompress_data(compressed_data=self.compressed_data_imported)
+        elif self.archived_data_file:
+            return self.__get_archived_data()
+        # data stored as a JSON string in the JSON field
+        elif isinstance(self.data_imported, str):
+            return json_loads(self.data_imported)
+        else:
+            return self.data_imported
+
+    @classmethod
+    def compress_uncompressed_data(cls, batch_size):
+        """ Converts data that was imported and recorded in an uncompressed format, into a compressed format.
+
+        :param batch_size: Number of bulk import records to convert with each database update.
+        :return: Number of bulk import records that were converted.
+        """
+        num_of_converted = 0
+        while True:
+            batch = list(
+                cls.objects.filter(data_imported__isnull=False).only('pk', 'data_imported').order_by('pk')[:batch_size]
+            )
+            if not batch:
+                break
+            for bulk_import in batch:
+                bulk_import.compressed_data_imported = cls.compress_data(data=bulk_import.data_imported)
+                bulk_import.data_imported = None
+            cls.objects.bulk_update(batch, ['compressed_data_imported', 'data_imported'])
+            num_of_converted += len(batch)
+        return num_of_converted
+
+    @classmethod
+    def archive_data(cls, older_than, batch_size):
+        """ Moves the data that was imported for old bulk import records into gzipped archive files.
+
+        The columns that map external IDs to FDP records (i.e. pk_imported_from, table_imported_to and pk_imported_to)
+        remain in the table, so that future imports can continue to reference the imported records.
+
+        :param older_than: Bulk import records with a timestamp before this date/time will be archived.
+        :param batch_size: Number of bulk import records to write into each archive file.
+        :return: List of names of archive files that were written.
+        """
+        archive_dir = AbstractConfiguration.bulk_import_archive_dir()
+        os_makedirs(archive_dir, exist_ok=True)
+        archived_data_files = []
+        queryset = cls.objects.filter(timestamp__lt=older_than, archived_data_file='').order_by('pk')
+        while True:
+            batch = list(queryset.only('pk', 'timestamp', 'data_imported', 'compressed_data_imported')[:batch_size])
+            if not batch:
+                break
+            archived_data_file = 'bulk_import_{f}_{l}.jsonl.gz'.format(f=batch[0].pk, l=batch[-1].pk)
+            # archive file is written completely before the data is removed from the table
+            with gzip_open(archive_dir / archived_data_file, 'wt', encoding='utf-8') as archive_file:
+                for bulk_import in batch:
+                    archive_file.write(
+                        json_dumps(
+                            {
+                                'pk': bulk_import.pk,
+                                'timestamp': bulk_import.timestamp,
+                                'data_imported': bulk_import.imported_data
+                            },
+                            default=str
+                        ) + '\n'
+                    )
+            cls.objects.filter(pk__in=[bulk_import.pk for bulk_import in batch]).update(
+                data_imported=None,
+                compressed_data_imported=None,
+                archived_data_file=archived_data_file
+            )
+            archived_data_files.append(archived_data_file)
+        return archived_data_files
+
     @classmethod
     def filter_for_admin(cls, queryset, user):
         """ Filter a queryset for the admin interfaces.
@@ -20,7 +20,6 @@ from rest_framework.serializers import ModelSerializer, CharField, EmailField
 from rest_framework.fields import empty
 from reversion.revisions import create_revision
 from datetime import datetime
-from json import dumps as json_dumps
 from re import compile as re_compile
 from urllib.request import urlretrieve
 from urllib.parse import urlparse
@@ -98,8 +97,8 @@ class FdpModelSerializer(ModelSerializer):
             table_imported_to=str(model_class.get_db_table()),
             pk_imported_from=str(external_id),
             pk_imported_to=int(instance.pk),
-            data_imported=json_dumps(self.original_validated_data, default=str),
-            notes=''
+            notes='',
+            **BulkImport.get_data_imported_kwargs(data=self.original_validated_data)
         )
         bulk_import.full_clean()
         bulk_import.save()
@@ -1,15 +1,20 @@
-from django.test import Client
+from django.test import Client, override_settings
 from django.utils.translation import ugettext_lazy as _
 from django.urls import reverse
+from django.utils.timezone import now
 from bulk.models import BulkImport, FdpImportFile, FdpImportMapping, FdpImportRun
 from inheritable.tests import AbstractTestCase, local_test_settings_required
 from fdpuser.models import FdpUser, FdpOrganization
+from datetime import timedelta
+from pathlib import Path
+from tempfile import TemporaryDirectory
 
 
 class BulkTestCase(AbstractTestCase):
     """ Performs following tests:
 
     (1) Test Bulk Import access is host-only
+    (2) Test Bulk Import data can be compressed and archived
 
     """
     def setUp(self):
@@ -88,3 +93,58 @@ class BulkTestCase(AbstractTestCase):
         # test downloading Fdp Import File for host administrator
         self.__check_if_can_download_fdp_import_file(fdp_user=host_admin)
         print(_('\nSuccessfully finished test for bulk import access is host-only\n\n'))
+
+    @local_test_settings_required
+    def test_bulk_import_data_compression_and_archival(self):
+        """ Test that the data imported through bulk imports can be recorded in compressed and uncompressed formats,
+        converted into the compressed format, and archived, while remaining retrievable.
+
+        :return: Nothing
+        """
+        print(_('\nStarting test for bulk import data compression and archival'))
+        data = {'name': 'BulkImportDataName', 'external_id': 'BulkImportDataExternalId'}
+        bulk_imports = []
+        for data_format in ['compressed', 'json']:
+            with override_settings(FDP_BULK_IMPORT_DATA_FORMAT=data_format):
+                bulk_import = BulkImport(
+                    source_imported_from='BulkImportSource',
+                    table_imported_from='BulkImportSourceTable',
+                    table_imported_to='BulkImportTable',
+                    pk_imported_from=data['external_id'],
+                    pk_imported_to=len(bulk_imports) + 1,
+                    notes='',
+                    **BulkImport.get_data_imported_kwargs(data=data)
+                )
+                bulk_import.full_clean()
+                bulk_import.save()
+                bulk_imports.append(bulk_import)
+        compressed_bulk_import, uncompressed_bulk_import = [BulkImport.objects.get(pk=b.pk) for b in bulk_imports]
+        self.assertIsNone(compressed_bulk_import.data_imported)
+        self.assertIsNone(uncompressed_bulk_import.compressed_data_imported)
+        self.assertEqual(compressed_bulk_import.imported_data, data)
+        self.assertEqual(uncompressed_bulk_import.imported_data, data)
+        print(_('Bulk import data recording in compressed and uncompressed formats check is successful'))
+        # convert uncompressed data into compressed data
+        self.assertEqual(BulkImport.compress_uncompressed_data(batch_size=1), 1)
+        uncompressed_bulk_import.refresh_from_db()
+        self.assertIsNone(uncompressed_bulk_import.data_imported)
+        self.assertEqual(uncompressed_bulk_import.imported_data, data)
+        print(_('Bulk import data compression check is successful'))
+        # archive data
+        with TemporaryDirectory() as archive_dir:
+            with override_settings(FDP_BULK_IMPORT_ARCHIVE_DIR=archive_dir):
+                archived_data_files = BulkImport.archive_data(older_than=now() + timedelta(days=1), batch_size=1)
+                self.assertEqual(len(archived_data_files), 2)
+                for archived_data_file in archived_data_files:
+                    self.assertTrue((Path(archive_dir) / archived_data_file).exists())
+                for bulk_import in BulkImport.objects.filter(pk__in=[b.pk for b in bulk_imports]):
+                    self.assertIsNone(bulk_import.data_imported)
+                    self.assertIsNone(bulk_import.compressed_data_imported)
+                    self.assertIn(bulk_import.archived_data_file, archived_data_files)
+                    self.assertEqual(bulk_import.imported_data, data)
+                # external IDs continue to be mapped
+                self.assertEqual(BulkImport.objects.filter(pk_imported_from=data['external_id']).count(), 2)
+                # archived records are not archived again
+                self.assertEqual(BulkImport.archive_data(older_than=now() + timedelta(days=1), batch_size=1), [])
+        print(_('Bulk import data archival check is successful'))
+        print(_('\nSuccessfully finished test for bulk import data compression and archival\n\n'))
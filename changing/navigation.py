@@ -0,0 +1,207 @@
+"""
+
+Navigation through the incidents linked to content, after allegations and penalties are linked to the content through
+the data management wizard, so that persons suggested through the content can be linked to each incident in turn.
+
+The accessible incidents, and the persons suggested for each incident, are computed once for all incidents and kept in
+the user's session for the number of seconds configured through FDP_INCIDENT_NAVIGATION_SECS. Each subsequent step only
+looks up the next incident and its suggested persons, filtering the persons again for confidentiality.
+
+Example:
+
+    navigation = IncidentNavigation.build(content_id=content_id, user=request.user)
+    navigation.save(request=request)
+    ...
+    navigation = IncidentNavigation.load(request=request, content_id=content_id, incident_id=incident_id)
+    if navigation is not None:
+        next_incident_id = navigation.get_next_incident_id(cur_incident_id=incident_id)
+
+"""
+from core.models import Person, PersonIncident, Incident
+from sourcing.models import Content, ContentPerson
+from inheritable.models import AbstractConfiguration
+from time import time
+
+
+class IncidentNavigation:
+    """ State of the navigation through the incidents linked to a content, for a user.
+
+    """
+    #: Key in the session for the state of the navigation.
+    session_key = 'fdp_incident_navigation'
+
+    def __init__(self, user_pk, content_id, incident_ids, suggested_person_ids, expires):
+        """ Initializes the state of the navigation.
+
+        :param user_pk: Primary key of user navigating through the incidents.
+        :param content_id: Id of content to which the incidents are linked.
+        :param incident_ids: List of ids of incidents that are accessible by the user, in ascending order.
+        :param suggested_person_ids: Dictionary whose keys are incident ids and whose values are lists of ids of persons
+        that are suggested for the incident.
+        :param expires: Time at which the state expires, in seconds since the epoch.
+        """
+        self.user_pk = user_pk
+        self.content_id = content_id
+        self.incident_ids = incident_ids
+        self.suggested_person_ids = suggested_person_ids
+        self.expires = expires
+
+    @classmethod
+    def build(cls, content_id, user):
+        """ Computes the state of the navigation through the incidents linked to a content.
+
+        Incidents and suggested persons are filtered for direct and indirect confidentiality in the same manner as in
+        IncidentUpdateView.
+
+        :param content_id: Id of content to which the incidents are linked.
+        :param user: User navigating through the incidents.
+        :return: State of the navigation, or None if the content is inaccessible or has no people linked to it.
+        """
+        # content is inaccessible
+        content_qs = Content.filter_for_admin(
+            queryset=Content.active_objects.filter(pk=content_id).filter_for_confidential_by_user(user=user),
+            user=user
+        )
+        if not content_qs.exists():
+            return None
+        # content has no people linked
+        if not ContentPerson.filter_for_admin(
+            queryset=ContentPerson.active_objects.filter(content_id=content_id),
+            user=user
+        ).exists():
+            return None
+        # incidents linked to the content, filtered for direct and indirect confidentiality
+        incident_ids = list(
+            Incident.filter_for_admin(
+                queryset=Incident.objects.filter(content__pk=content_id).filter_for_confidential_by_user(user=user),
+                user=user
+            ).order_by('pk').values_list('pk', flat=True).distinct()
+        )
+        # accessible content linked to each incident
+        content_ids_by_incident = {}
+        for incident_id, linked_content_id in Content.incidents.through.objects.filter(
+            incident_id__in=incident_ids,
+            content_id__in=Content.filter_for_admin(
+                queryset=Content.active_objects.all().filter_for_confidential_by_user(user=user),
+                user=user
+            ).values('pk')
+        ).values_list('incident_id', 'content_id'):
+            content_ids_by_incident.setdefault(incident_id, set()).add(linked_content_id)
+        # accessible persons linked to each content
+        person_ids_by_content = {}
+        for linked_content_id, person_id in ContentPerson.filter_for_admin(
+            queryset=ContentPerson.active_objects.filter(
+                content_id__in={i for content_ids in content_ids_by_incident.values() for i in content_ids}
+            ),
+            user=user
+        ).values_list('content_id', 'person_id'):
+            person_ids_by_content.setdefault(linked_content_id, set()).add(person_id)
+        accessible_person_ids = set(
+            Person.filter_for_admin(
+                queryset=Person.active_objects.filter(
+                    pk__in={i for person_ids in person_ids_by_content.values() for i in person_ids}
+                ).filter_for_confidential_by_user(user=user),
+                user=user
+            ).values_list('pk', flat=True)
+        )
+        # persons already linked to each incident
+        linked_person_ids_by_incident = {}
+        for incident_id, person_id in PersonIncident.active_objects.filter(
+            incident_id__in=incident_ids
+        ).values_list('incident_id', 'person_id'):
+            linked_person_ids_by_incident.setdefault(incident_id, set()).add(person_id)
+        suggested_person_ids = {}
+        for incident_id in incident_ids:
+            person_ids = set()
+            for linked_content_id in content_ids_by_incident.get(incident_id, set()):
+                person_ids |= person_ids_by_content.get(linked_content_id, set())
+            suggested_person_ids[incident_id] = sorted(
+                (person_ids & accessible_person_ids) - linked_person_ids_by_incident.get(incident_id, set())
+            )
+        return cls(
+            user_pk=user.pk,
+            content_id=content_id,
+            incident_ids=incident_ids,
+            suggested_person_ids=suggested_person_ids,
+            expires=time() + AbstractConfiguration.incident_navigation_secs()
+        )
+
+    def save(self, request):
+        """ Keeps the state of the navigation in the user's session.
+
+        :param request: Http request object.
+        :return: Nothing.
+        """
+        request.session[self.session_key] = {
+            'user_pk': self.user_pk,
+            'content_id': self.content_id,
+            'incident_ids': self.incident_ids,
+            # keys of dictionaries serialized in sessions are strings
+            'suggested_person_ids': {str(k): v for k, v in self.suggested_person_ids.items()},
+            'expires': self.expires
+        }
+
+    @classmethod
+    def load(cls, request, content_id, incident_id):
+        """ Retrieves the state of the navigation from the user's session, if it is still valid for an incident that is
+        linked to a content.
+
+        :param request: Http request object.
+        :param content_id: Id of content to which the incident is linked.
+        :param incident_id: Id of incident that is being updated.
+        :return: State of the navigation, or None if there is no valid state.
+        """
+        if AbstractConfiguration.incident_navigation_secs() <= 0:
+            return None
+        state = request.session.get(cls.session_key)
+        if not isinstance(state, dict) \
+                or state.get('user_pk') != request.user.pk \
+                or state.get('content_id') != content_id \
+                or incident_id not in state.get('incident_ids', []) \
+                or state.get('expires', 0) <= time():
+            return None
+        return cls(
+            user_pk=state['user_pk'],
+            content_id=state['content_id'],
+            incident_ids=state['incident_ids'],
+            suggested_person_ids={int(k): v for k, v in state['suggested_person_ids'].items()},
+            expires=state['expires']
+        )
+
+    @classmethod
+    def clear(cls, request):
+        """ Removes the state of the navigation from the user's session.
+
+        :param request: Http request object.
+        :return: Nothing.
+        """
+        request.session.pop(cls.session_key, None)
+
+    def get_next_incident_id(self, cur_incident_id):
+        """ Retrieves the ID of the next incident to update.
+
+        :param cur_incident_id: Id of incident that is currently being updated. May be 0 if no incident has yet been
+        updated.
+        :return: ID of the next incident to update, or None if no such ID exists.
+        """
+        if not cur_incident_id:
+            return self.incident_ids[0] if self.incident_ids else None
+        position = self.incident_ids.index(cur_incident_id) + 1
+        return self.incident_ids[position] if position < len(self.incident_ids) else None
+
+    def get_suggested_persons(self, incident_id, user):
+        """ Retrieves a queryset of persons that are suggested for an incident, excluding persons that were linked to
+        the incident, or that became inaccessible to the user, since the state of the navigation was computed.
+
+        :param incident_id: Id of incident.
+        :param user: User navigating through the incidents.
+        :return: Queryset of persons.
+        """
+        return Person.filter_for_admin(
+            queryset=Person.active_objects.filter(
+                pk__in=self.suggested_person_ids.get(incident_id, [])
+            ).exclude(
+                pk__in=PersonIncident.active_objects.filter(incident_id=incident_id).values_list('person_id', flat=True)
+            ).filter_for_confidential_by_user(user=user),
+            user=user
+        )
@@ -259,55 +259,64 @@ class ContentChangingSearch(AbstractChangingSearch):
         from_params = []
         # Temporary Table portion of the SQL query to retrieve content matching search criteria
         temp_table_query = """
-        {create_temp_table_sql} "{tmp_content_score}" ("id" INTEGER NOT NULL, "score" INTEGER NOT NULL)
-        {on_commit_temp_table_sql} INSERT INTO "{tmp_content_score}" ("id", "score")
+        {tmp_content_score_start}
         SELECT "id" AS "id", CASE {content_name_whens} ELSE 0 END AS "score"
         FROM "{content}" 
         WHERE ({content_confidential_filter}) 
         AND ("{content}".{active_filter}) 
-        AND ({content_name_check});            
+        AND ({content_name_check})
+        {score_table_end}
 
-        {create_temp_table_sql} "{tmp_content_case_score}" ("id" INTEGER NOT NULL, "score" INTEGER NOT NULL)
-        {on_commit_temp_table_sql} INSERT INTO "{tmp_content_case_score}" ("id", "score")
+        {tmp_content_case_score_start}
         SELECT "content_id" AS "id", {content_case_dates_score} AS "score"
-        FROM "{content_case}" WHERE ("{content_case}".{active_filter}) AND ({content_case_dates_check});        
+        FROM "{content_case}" WHERE ("{content_case}".{active_filter}) AND ({content_case_dates_check})
+        {score_table_end}
 
-        {create_temp_table_sql} "{tmp_content_identifier_score}" ("id" INTEGER NOT NULL, "score" INTEGER NOT NULL)
-        {on_commit_temp_table_sql} INSERT INTO "{tmp_content_identifier_score}" ("id", "score")
+        {tmp_content_identifier_score_start}
         SELECT "content_id" AS "id", CASE {content_identifier_whens} ELSE 0 END AS "score"
         FROM "{content_identifier}" 
         WHERE ({content_identifier_confidential_filter}) 
         AND ("{content_identifier}".{active_filter}) 
-        AND ({content_identifier_check});            
+        AND ({content_identifier_check})
+        {score_table_end}
 
-        {create_temp_table_sql} "{tmp_attachment_score}" ("id" INTEGER NOT NULL, "score" INTEGER NOT NULL)
-        {on_commit_temp_table_sql} INSERT INTO "{tmp_attachment_score}" ("id", "score")
+        {tmp_attachment_score_start}
         SELECT "id" AS "id", CASE {attachment_name_whens} ELSE 0 END AS "score"
         FROM "{attachment}" 
         WHERE  ({attachment_confidential_filter})
         AND ("{attachment}".{active_filter})
-        AND ({attachment_name_check});
+        AND ({attachment_name_check})
+        {score_table_end}
         
-        {create_temp_table_sql} "{tmp_person_score}" ("id" INTEGER NOT NULL, "score" INTEGER NOT NULL)
-        {on_commit_temp_table_sql} INSERT INTO "{tmp_person_score}" ("id", "score")
+        {tmp_person_score_start}
         SELECT "id" AS "id", CASE {person_name_whens} ELSE 0 END AS "score"
         FROM "{person}" 
         WHERE ({person_confidential_filter}) 
         AND ("{person}".{active_filter}) 
-        AND ({person_name_check});            
+        AND ({person_name_check})
+        {score_table_end}
         """.format(
             content_confidential_filter=content_confidential_filter,
             content_identifier_confidential_filter=content_identifier_confidential_filter,
             attachment_confidential_filter=attachment_confidential_filter,
             person_confidential_filter=person_confidential_filter,
             active_filter=Archivable.ACTIVE_FILTER,
-            create_temp_table_sql=self.create_temp_table_sql,
-            on_commit_temp_table_sql=self.on_commit_temp_table_sql,
-            tmp_content_score=self._tmp_content_score.format(prefix=prefix, suffix=suffix),
-            tmp_content_case_score=self._tmp_content_case_score.format(prefix=prefix, suffix=suffix),
-            tmp_content_identifier_score=self._tmp_content_identifier_score.format(prefix=prefix, suffix=suffix),
-            tmp_person_score=self._tmp_person_score.format(prefix=prefix, suffix=suffix),
-            tmp_attachment_score=self._tmp_attachment_score.format(prefix=prefix, suffix=suffix),
+            tmp_content_score_start=self.get_score_table_start_sql(
+                table=self._tmp_content_score.format(prefix=prefix, suffix=suffix), is_first=True
+            ),
+            tmp_content_case_score_start=self.get_score_table_start_sql(
+                table=self._tmp_content_case_score.format(prefix=prefix, suffix=suffix), is_first=False
+            ),
+            tmp_content_identifier_score_start=self.get_score_table_start_sql(
+                table=self._tmp_content_identifier_score.format(prefix=prefix, suffix=suffix), is_first=False
+            ),
+            tmp_attachment_score_start=self.get_score_table_start_sql(
+                table=self._tmp_attachment_score.format(prefix=prefix, suffix=suffix), is_first=False
+            ),
+            tmp_person_score_start=self.get_score_table_start_sql(
+                table=self._tmp_person_score.format(prefix=prefix, suffix=suffix), is_first=False
+            ),
+            score_table_end=self.score_table_end_sql,
             content=Content.get_db_table(),
             content_case=ContentCase.get_db_table(),
             attachment=Attachment.get_db_table(),
@@ -173,24 +173,23 @@ class GroupingChangingSearch(AbstractChangingSearch):
         from_params = []
         # Temporary Table portion of the SQL query to retrieve groupings matching search criteria
         temp_table_query = """
-        {create_temp_table_sql} "{tmp_grouping_score}" ("id" INTEGER NOT NULL, "score" INTEGER NOT NULL)
-        {on_commit_temp_table_sql} INSERT INTO "{tmp_grouping_score}" ("id", "score")
+        {tmp_grouping_score_start}
         SELECT "id" AS "id", CASE {grouping_name_whens} ELSE 0 END AS "score"
-        FROM "{grouping}" WHERE ("{grouping}".{active_filter}) AND ({grouping_name_check});            
+        FROM "{grouping}" WHERE ("{grouping}".{active_filter}) AND ({grouping_name_check})
+        {score_table_end}
 
-        {create_temp_table_sql} "{tmp_grouping_alias_score}" ("id" INTEGER NOT NULL, "score" INTEGER NOT NULL)
-        {on_commit_temp_table_sql} INSERT INTO "{tmp_grouping_alias_score}" ("id", "score")
+        {tmp_grouping_alias_score_start}
         SELECT "grouping_id" AS "id", CASE {grouping_alias_whens} ELSE 0 END AS "score"
-        FROM "{grouping_alias}" WHERE ("{grouping_alias}".{active_filter}) AND ({grouping_alias_check});
+        FROM "{grouping_alias}" WHERE ("{grouping_alias}".{active_filter}) AND ({grouping_alias_check})
+        {score_table_end}
         
-        {create_temp_table_sql} "{tmp_person_alias_score}" ("id" INTEGER NOT NULL, "score" INTEGER NOT NULL)
-        {on_commit_temp_table_sql} INSERT INTO "{tmp_person_alias_score}" ("id", "score")
+        {tmp_person_alias_score_start}
         SELECT "person_id" AS "id", CASE {person_alias_whens} ELSE 0 END AS "score"
         FROM "{person_alias}" 
-        WHERE ({person_confidential_filter}) AND ("{person_alias}".{active_filter}) AND ({person_alias_check});
+        WHERE ({person_confidential_filter}) AND ("{person_alias}".{active_filter}) AND ({person_alias_check})
+        {score_table_end}
 
-        {create_temp_table_sql} "{tmp_person_score}" ("id" INTEGER NOT NULL, "score" INTEGER NOT NULL)
-        {on_commit_temp_table_sql} INSERT INTO "{tmp_person_score}" ("id", "score")
+        {tmp_person_score_start}
         SELECT 
             "{person}"."id" AS "id", 
             CASE {person_name_whens} ELSE 0 END 
@@ -201,15 +200,24 @@ class GroupingChangingSearch(AbstractChangingSearch):
             ON "{person}"."id" = "{tmp_person_alias_score}"."id"
         WHERE ({person_confidential_filter}) 
         AND ("{person}".{active_filter}) 
-        AND (({person_name_check}) OR ("{tmp_person_alias_score}"."id" IS NOT NULL));                                                  
+        AND (({person_name_check}) OR ("{tmp_person_alias_score}"."id" IS NOT NULL))
+        {score_table_end}
         """.format(
             person_confidential_filter=person_confidential_filter,
             active_filter=Archivable.ACTIVE_FILTER,
-            create_temp_table_sql=self.create_temp_table_sql,
-            on_commit_temp_table_sql=self.on_commit_temp_table_sql,
-            tmp_grouping_score=self._tmp_grouping_score.format(prefix=prefix, suffix=suffix),
-            tmp_grouping_alias_score=self._tmp_grouping_alias_score.format(prefix=prefix, suffix=suffix),
-            tmp_person_score=self._tmp_person_score.format(prefix=prefix, suffix=suffix),
+            tmp_grouping_score_start=self.get_score_table_start_sql(
+                table=self._tmp_grouping_score.format(prefix=prefix, suffix=suffix), is_first=True
+            ),
+            tmp_grouping_alias_score_start=self.get_score_table_start_sql(
+                table=self._tmp_grouping_alias_score.format(prefix=prefix, suffix=suffix), is_first=False
+            ),
+            tmp_person_alias_score_start=self.get_score_table_start_sql(
+                table=self._tmp_person_alias_score.format(prefix=prefix, suffix=suffix), is_first=False
+            ),
+            tmp_person_score_start=self.get_score_table_start_sql(
+                table=self._tmp_person_score.format(prefix=prefix, suffix=suffix), is_first=False
+            ),
+            score_table_end=self.score_table_end_sql,
             tmp_person_alias_score=self._tmp_person_alias_score.format(prefix=prefix, suffix=suffix),
             grouping=Grouping.get_db_table(),
             grouping_alias=GroupingAlias.get_db_table(),
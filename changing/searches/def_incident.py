@@ -265,24 +265,23 @@ class IncidentChangingSearch(AbstractChangingSearch):
         from_params = []
         # Temporary Table portion of the SQL query to retrieve content matching search criteria
         temp_table_query = """
-        {create_temp_table_sql} "{tmp_incident_score}" ("id" INTEGER NOT NULL, "score" INTEGER NOT NULL)
-        {on_commit_temp_table_sql} INSERT INTO "{tmp_incident_score}" ("id", "score")
+        {tmp_incident_score_start}
         SELECT "id" AS "id", CASE {incident_description_whens} ELSE 0 END AS "score"
         FROM "{incident}" 
         WHERE ({incident_confidential_filter}) 
         AND ("{incident}".{active_filter}) 
-        AND ({incident_description_check});        
+        AND ({incident_description_check})
+        {score_table_end}
         
-        {create_temp_table_sql} "{tmp_person_score}" ("id" INTEGER NOT NULL, "score" INTEGER NOT NULL)
-        {on_commit_temp_table_sql} INSERT INTO "{tmp_person_score}" ("id", "score")
+        {tmp_person_score_start}
         SELECT "id" AS "id", CASE {person_name_whens} ELSE 0 END AS "score"
         FROM "{person}" 
         WHERE ({person_confidential_filter}) 
         AND ("{person}".{active_filter}) 
-        AND ({person_name_check});
+        AND ({person_name_check})
+        {score_table_end}
 
-        {create_temp_table_sql} "{tmp_attachment_score}" ("id" INTEGER NOT NULL, "score" INTEGER NOT NULL)
-        {on_commit_temp_table_sql} INSERT INTO "{tmp_attachment_score}" ("id", "score")
+        {tmp_attachment_score_start}
         SELECT "{content}"."id" AS "id", CASE {attachment_name_whens} ELSE 0 END AS "score"
         FROM "{attachment}"
         INNER JOIN "{content_attachment}"
@@ -292,18 +291,18 @@ class IncidentChangingSearch(AbstractChangingSearch):
         AND ({content_confidential_filter})        
         WHERE ({attachment_confidential_filter}) 
         AND ("{attachment}".{active_filter}) 
-        AND ({attachment_name_check});
+        AND ({attachment_name_check})
+        {score_table_end}
 
-        {create_temp_table_sql} "{tmp_content_identifier_score}" ("id" INTEGER NOT NULL, "score" INTEGER NOT NULL)
-        {on_commit_temp_table_sql} INSERT INTO "{tmp_content_identifier_score}" ("id", "score")
+        {tmp_content_identifier_score_start}
         SELECT "content_id" AS "id", CASE {content_identifier_whens} ELSE 0 END AS "score"
         FROM "{content_identifier}" 
         WHERE ({content_identifier_confidential_filter}) 
         AND ("{content_identifier}".{active_filter}) 
-        AND ({content_identifier_check});
+        AND ({content_identifier_check})
+        {score_table_end}
         
-        {create_temp_table_sql} "{tmp_content_score}" ("id" INTEGER NOT NULL, "score" INTEGER NOT NULL)
-        {on_commit_temp_table_sql} INSERT INTO "{tmp_content_score}" ("id", "score")
+        {tmp_content_score_start}
         SELECT 
             "{content}"."id" AS "id", 
             CASE {content_name_whens} ELSE 0 END 
@@ -321,7 +320,8 @@ class IncidentChangingSearch(AbstractChangingSearch):
                ({content_name_check})
             OR ("{tmp_content_identifier_score}"."id" IS NOT NULL)
             OR ("{tmp_attachment_score}"."id" IS NOT NULL)
-        );        
+        )
+        {score_table_end}
 
         """.format(
             incident_confidential_filter=incident_confidential_filter,
@@ -330,11 +330,22 @@ class IncidentChangingSearch(AbstractChangingSearch):
             attachment_confidential_filter=attachment_confidential_filter,
             person_confidential_filter=person_confidential_filter,
             active_filter=Archivable.ACTIVE_FILTER,
-            create_temp_table_sql=self.create_temp_table_sql,
-            on_commit_temp_table_sql=self.on_commit_temp_table_sql,
-            tmp_incident_score=self._tmp_incident_score.format(prefix=prefix, suffix=suffix),
-            tmp_person_score=self._tmp_person_score.format(prefix=prefix, suffix=suffix),
-            tmp_content_score=self._tmp_content_score.format(prefix=prefix, suffix=suffix),
+            tmp_incident_score_start=self.get_score_table_start_sql(
+                table=self._tmp_incident_score.format(prefix=prefix, suffix=suffix), is_first=True
+            ),
+            tmp_person_score_start=self.get_score_table_start_sql(
+                table=self._tmp_person_score.format(prefix=prefix, suffix=suffix), is_first=False
+            ),
+            tmp_attachment_score_start=self.get_score_table_start_sql(
+                table=self._tmp_attachment_score.format(prefix=prefix, suffix=suffix), is_first=False
+            ),
+            tmp_content_identifier_score_start=self.get_score_table_start_sql(
+                table=self._tmp_content_identifier_score.format(prefix=prefix, suffix=suffix), is_first=False
+            ),
+            tmp_content_score_start=self.get_score_table_start_sql(
+                table=self._tmp_content_score.format(prefix=prefix, suffix=suffix), is_first=False
+            ),
+            score_table_end=self.score_table_end_sql,
             tmp_content_identifier_score=self._tmp_content_identifier_score.format(prefix=prefix, suffix=suffix),
             tmp_attachment_score=self._tmp_attachment_score.format(prefix=prefix, suffix=suffix),
             content=Content.get_db_table(),
@@ -241,28 +241,27 @@ class PersonChangingSearch(AbstractChangingSearch):
         from_params = []
         # Temporary Table portion of the SQL query to retrieve persons matching search criteria
         temp_table_query = """
-        {create_temp_table_sql} "{tmp_person_score}" ("id" INTEGER NOT NULL, "score" INTEGER NOT NULL)
-        {on_commit_temp_table_sql} INSERT INTO "{tmp_person_score}" ("id", "score")
+        {tmp_person_score_start}
         SELECT "id" AS "id", CASE {person_name_whens} ELSE 0 END AS "score"
-        FROM "{person}" WHERE ({confidential_filter}) AND ("{person}".{active_filter}) AND ({person_name_check});            
+        FROM "{person}" WHERE ({confidential_filter}) AND ("{person}".{active_filter}) AND ({person_name_check})
+        {score_table_end}
 
-        {create_temp_table_sql} "{tmp_person_alias_score}" ("id" INTEGER NOT NULL, "score" INTEGER NOT NULL)
-        {on_commit_temp_table_sql} INSERT INTO "{tmp_person_alias_score}" ("id", "score")
+        {tmp_person_alias_score_start}
         SELECT "person_id" AS "id", CASE {person_alias_whens} ELSE 0 END AS "score"
-        FROM "{person_alias}" WHERE ("{person_alias}".{active_filter}) AND ({person_alias_check});
+        FROM "{person_alias}" WHERE ("{person_alias}".{active_filter}) AND ({person_alias_check})
+        {score_table_end}
 
-        {create_temp_table_sql} "{tmp_person_identifier_score}" ("id" INTEGER NOT NULL, "score" INTEGER NOT NULL)
-        {on_commit_temp_table_sql} INSERT INTO "{tmp_person_identifier_score}" ("id", "score")
+        {tmp_person_identifier_score_start}
         SELECT "person_id" AS "id", CASE {person_identifier_whens} ELSE 0 END AS "score"
-        FROM "{person_identifier}" WHERE ("{person_identifier}".{active_filter}) AND ({person_identifier_check});            
+        FROM "{person_identifier}" WHERE ("{person_identifier}".{active_filter}) AND ({person_identifier_check})
+        {score_table_end}
         
-        {create_temp_table_sql} "{tmp_grouping_alias_score}" ("id" INTEGER NOT NULL, "score" INTEGER NOT NULL)
-        {on_commit_temp_table_sql} INSERT INTO "{tmp_grouping_alias_score}" ("id", "score")
+        {tmp_grouping_alias_score_start}
         SELECT "grouping_id" AS "id", CASE {grouping_alias_whens} ELSE 0 END AS "score"
-        FROM "{grouping_alias}" WHERE ("{grouping_alias}".{active_filter}) AND ({grouping_alias_check});
+        FROM "{grouping_alias}" WHERE ("{grouping_alias}".{active_filter}) AND ({grouping_alias_check})
+        {score_table_end}
 
-        {create_temp_table_sql} "{tmp_grouping_score}" ("id" INTEGER NOT NULL, "score" INTEGER NOT NULL)
-        {on_commit_temp_table_sql} INSERT INTO "{tmp_grouping_score}" ("id", "score")
+        {tmp_grouping_score_start}
         SELECT 
             "{grouping}"."id" AS "id", 
             CASE {grouping_name_whens} ELSE 0 END 
@@ -280,17 +279,28 @@ class PersonChangingSearch(AbstractChangingSearch):
                ({grouping_name_check})
             OR ("{tmp_grouping_alias_score}"."id" IS NOT NULL)
             OR ("{grouping_county}"."id" IS NOT NULL)
-        );                                                  
+        )
+        {score_table_end}
         """.format(
             confidential_filter=confidential_filter,
             active_filter=Archivable.ACTIVE_FILTER,
-            create_temp_table_sql=self.create_temp_table_sql,
-            on_commit_temp_table_sql=self.on_commit_temp_table_sql,
-            tmp_person_score=self._tmp_person_score.format(prefix=prefix, suffix=suffix),
-            tmp_person_identifier_score=self._tmp_person_identifier_score.format(prefix=prefix, suffix=suffix),
-            tmp_grouping_score=self._tmp_grouping_score.format(prefix=prefix, suffix=suffix),
+            tmp_person_score_start=self.get_score_table_start_sql(
+                table=self._tmp_person_score.format(prefix=prefix, suffix=suffix), is_first=True
+            ),
+            tmp_person_alias_score_start=self.get_score_table_start_sql(
+                table=self._tmp_person_alias_score.format(prefix=prefix, suffix=suffix), is_first=False
+            ),
+            tmp_person_identifier_score_start=self.get_score_table_start_sql(
+                table=self._tmp_person_identifier_score.format(prefix=prefix, suffix=suffix), is_first=False
+            ),
+            tmp_grouping_alias_score_start=self.get_score_table_start_sql(
+                table=self._tmp_grouping_alias_score.format(prefix=prefix, suffix=suffix), is_first=False
+            ),
+            tmp_grouping_score_start=self.get_score_table_start_sql(
+                table=self._tmp_grouping_score.format(prefix=prefix, suffix=suffix), is_first=False
+            ),
+            score_table_end=self.score_table_end_sql,
             tmp_grouping_alias_score=self._tmp_grouping_alias_score.format(prefix=prefix, suffix=suffix),
-            tmp_person_alias_score=self._tmp_person_alias_score.format(prefix=prefix, suffix=suffix),
             person=Person.get_db_table(),
             person_identifier=PersonIdentifier.get_db_table(),
             person_alias=PersonAlias.get_db_table(),
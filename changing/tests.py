@@ -1,11 +1,17 @@
 from django.utils.translation import ugettext_lazy as _
 from django.urls import reverse
+from django.test import override_settings, RequestFactory
+from django.contrib.sessions.backends.signed_cookies import SessionStore
+from unittest.mock import patch as mock_patch
+from inheritable.models import AbstractAnySearch, AbstractSql
 from inheritable.tests import AbstractTestCase, local_test_settings_required
 from fdpuser.models import FdpOrganization, FdpUser
-from core.models import Person, PersonRelationship, Incident, PersonIncident
+from core.models import Person, PersonRelationship, Incident, PersonIncident, Grouping, GroupingAlias, PersonGrouping
 from sourcing.models import Content, ContentPerson, Attachment, ContentIdentifier
 from supporting.models import PersonRelationshipType, ContentIdentifierType, Allegation
 from .forms import WizardSearchForm
+from .views import WizardSearchResultsTemplateView, ContentUpdateView, IncidentUpdateView
+from .navigation import IncidentNavigation
 
 
 class ChangingTestCase(AbstractTestCase):
@@ -26,6 +32,17 @@ class ChangingTestCase(AbstractTestCase):
             (B) Attachments with different levels of confidentiality
             (C) Incidents with different levels of confidentiality
 
+    (3) Test that the data management wizard's search results and update views stay within their query budgets.
+
+    (4) Test that the data management wizard's searches retrieve the same results through temporary tables and through
+    common table expressions.
+
+    (5) Test that the data management wizard's search results are checked for accessibility through the select query.
+
+    (6) Test that records linked to content that is edited are verified as accessible in a single query.
+
+    (7) Test that the incidents linked to content and their suggested persons are precomputed for the user's session.
+
     """
     #: Dictionary that can be expanded into keyword arguments to define changing person searching URLs.
     _changing_person_search_url_dict = {
@@ -57,6 +74,17 @@ class ChangingTestCase(AbstractTestCase):
     #: View name parameter for reverse(...) when generating changing linking allegations/penalties URL.
     _changing_link_allegations_penalties_view_name = 'changing:link_allegations_penalties'
 
+    #: Maximum number of SQL queries for each search results and update view in the data management wizard.
+    _query_budgets = {
+        'person_search_results': 13,
+        'incident_search_results': 11,
+        'content_search_results': 11,
+        'edit_person': 33,
+        'edit_incident': 32,
+        'edit_content': 43,
+        'link_allegations_penalties': 52,
+    }
+
     @classmethod
     def setUpTestData(cls):
         """ Create the categories that are necessary for typing the data to be created during tests.
@@ -1339,3 +1367,258 @@ class ChangingTestCase(AbstractTestCase):
         self.__test_attachment_changing_async_view(fdp_org=fdp_org, other_fdp_org=other_fdp_org)
         print(_('\nSuccessfully finished test for asynchronous Changing views for all permutations of user roles, '
                 'confidentiality levels and relevant models\n\n'))
+
+    @local_test_settings_required
+    def test_query_budgets(self):
+        """ Test that the data management wizard's search results and update views stay within their query budgets.
+
+        :return: Nothing
+        """
+        print(_('\nStarting test for query budgets of data management wizard views'))
+        fdp_user = self._create_fdp_user(email_counter=FdpUser.objects.all().count() + 1, **self._host_admin_dict)
+        incident = Incident.objects.create(description='BudgetIncident', **self._not_confidential_dict)
+        content = Content.objects.create(name='BudgetContent', **self._not_confidential_dict)
+        content.incidents.add(incident)
+        attachment = Attachment.objects.create(name='BudgetAttachment', **self._not_confidential_dict)
+        content.attachments.add(attachment)
+        ContentIdentifier.objects.create(
+            identifier='BudgetIdentifier',
+            content_identifier_type=ContentIdentifierType.objects.all().first(),
+            content=content,
+            **self._not_confidential_dict
+        )
+        for i in range(3):
+            person = Person.objects.create(
+                name='BudgetPerson{i}'.format(i=i), **self._is_law_dict, **self._not_confidential_dict
+            )
+            PersonIncident.objects.create(person=person, incident=incident)
+            ContentPerson.objects.create(person=person, content=content)
+        client = self._get_logged_in_client(fdp_user=fdp_user)
+        for key, url_dict, search_type in (
+            ('person_search_results', self._changing_person_search_url_dict, WizardSearchForm.person_type),
+            ('incident_search_results', self._changing_incident_search_url_dict, WizardSearchForm.incident_type),
+            ('content_search_results', self._changing_content_search_url_dict, WizardSearchForm.content_type),
+        ):
+            response = client.post(url_dict['search_url'], {'search': 'Budget', 'type': search_type})
+            self.assertEqual(response.status_code, 302)
+            with self.assertQueryBudget(self._query_budgets[key], msg=key) as recorder:
+                response = client.get(response.url)
+            self.assertEqual(response.status_code, 200)
+            print(_('{k} executed {n} queries'.format(k=key, n=recorder.num_of_queries)))
+        for key, url in (
+            ('edit_person', reverse(self._changing_update_person_view_name, kwargs={'pk': person.pk})),
+            (
+                'edit_incident',
+                reverse(self._changing_update_incident_view_name, kwargs={'pk': incident.pk, 'content_id': 0})
+            ),
+            ('edit_content', reverse(self._changing_update_content_view_name, kwargs={'pk': content.pk})),
+            (
+                'link_allegations_penalties',
+                reverse(self._changing_link_allegations_penalties_view_name, kwargs={'pk': content.pk})
+            ),
+        ):
+            with self.assertQueryBudget(self._query_budgets[key], msg=key) as recorder:
+                response = client.get(url)
+            self.assertEqual(response.status_code, 200)
+            print(_('{k} executed {n} queries'.format(k=key, n=recorder.num_of_queries)))
+        print(_('\nSuccessfully finished test for query budgets of data management wizard views\n\n'))
+
+    @local_test_settings_required
+    def test_search_score_table_strategies(self):
+        """ Test that the data management wizard's searches retrieve the same results through temporary tables and
+        through common table expressions.
+
+        :return: Nothing
+        """
+        print(_('\nStarting test for strategies of search score tables'))
+        fdp_user = self._create_fdp_user(email_counter=FdpUser.objects.all().count() + 1, **self._host_admin_dict)
+        grouping = Grouping.objects.create(name='StrategyGrouping')
+        GroupingAlias.objects.create(grouping=grouping, name='StrategyAlias')
+        incident = Incident.objects.create(description='StrategyIncident', **self._not_confidential_dict)
+        content = Content.objects.create(name='StrategyContent', **self._not_confidential_dict)
+        content.incidents.add(incident)
+        for i in range(3):
+            person = Person.objects.create(
+                name='StrategyPerson{i}'.format(i=i), **self._is_law_dict, **self._not_confidential_dict
+            )
+            PersonGrouping.objects.create(person=person, grouping=grouping)
+            PersonIncident.objects.create(person=person, incident=incident)
+            ContentPerson.objects.create(person=person, content=content)
+        client = self._get_logged_in_client(fdp_user=fdp_user)
+        results = {}
+        for strategy in AbstractAnySearch.SCORE_TABLE_STRATEGIES:
+            with override_settings(FDP_SEARCH_SCORE_TABLE_STRATEGY=strategy):
+                for search_url, search_type in (
+                    (self._changing_person_search_url_dict['search_url'], WizardSearchForm.person_type),
+                    (self._changing_incident_search_url_dict['search_url'], WizardSearchForm.incident_type),
+                    (self._changing_content_search_url_dict['search_url'], WizardSearchForm.content_type),
+                    (reverse('changing:groupings'), WizardSearchForm.grouping_type),
+                ):
+                    response = client.post(search_url, {'search': 'StrategyPerson1 StrategyAlias', 'type': search_type})
+                    self.assertEqual(response.status_code, 302)
+                    response = client.get(response.url)
+                    self.assertEqual(response.status_code, 200)
+                    self.assertTrue(response.context['result_list'], msg='{s}: {t}'.format(s=strategy, t=search_type))
+                    results.setdefault(search_type, []).append(
+                        (response.context['count'], response.context['result_list'])
+                    )
+        for search_type, strategy_results in results.items():
+            self.assertEqual(strategy_results[0], strategy_results[1], msg=search_type)
+        print(_('\nSuccessfully finished test for strategies of search score tables\n\n'))
+
+    @local_test_settings_required
+    def test_search_results_accessibility_check(self):
+        """ Test that the data management wizard's search results are checked for accessibility through a flag retrieved
+        with each result by the select query, and that a search leaking inaccessible results raises an exception.
+
+        :return: Nothing
+        """
+        print(_('\nStarting test for accessibility check of data management wizard search results'))
+        fdp_user = self._create_fdp_user(email_counter=FdpUser.objects.all().count() + 1, **self._host_admin_dict)
+        for i in range(3):
+            Person.objects.create(name='LeakPerson{i}'.format(i=i), **self._is_law_dict, **self._not_confidential_dict)
+        client = self._get_logged_in_client(fdp_user=fdp_user)
+        response = client.post(
+            self._changing_person_search_url_dict['search_url'],
+            {'search': 'LeakPerson', 'type': WizardSearchForm.person_type}
+        )
+        self.assertEqual(response.status_code, 302)
+        results_url = response.url
+        response = client.get(results_url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['result_list']), 3)
+
+        def get_leaking_accessible_queryset(view):
+            """ Retrieves the ids of accessible persons, excluding a person that is matched by the search.
+
+            :param view: View performing the search.
+            :return: Queryset of ids.
+            """
+            return Person.active_objects.exclude(name='LeakPerson1').values('pk')
+
+        with mock_patch.object(
+            WizardSearchResultsTemplateView,
+            '_WizardSearchResultsTemplateView__get_accessible_queryset',
+            new=get_leaking_accessible_queryset
+        ):
+            with self.assertRaisesMessage(Exception, 'attempted to leak confidentiality'):
+                client.get(results_url)
+        print(_('\nSuccessfully finished test for accessibility check of data management wizard search results\n\n'))
+
+    @local_test_settings_required
+    def test_linked_records_access_verification(self):
+        """ Test that the records linked to content that is edited through the data management wizard are verified as
+        accessible by the user, for all relations in a single query.
+
+        :return: Nothing
+        """
+        print(_('\nStarting test for access verification of records linked to content'))
+        num_of_users = FdpUser.objects.all().count() + 1
+        host_admin = self._create_fdp_user(email_counter=num_of_users, **self._host_admin_dict)
+        guest_admin = self._create_fdp_user(email_counter=num_of_users + 1, **self._guest_admin_dict)
+        content = Content.objects.create(name='VerifyContent', **self._not_confidential_dict)
+        content.incidents.add(
+            Incident.objects.create(description='VerifyIncident1', **self._not_confidential_dict),
+            Incident.objects.create(description='VerifyIncident2', for_admin_only=False, for_host_only=True)
+        )
+        content.attachments.add(Attachment.objects.create(name='VerifyAttachment', **self._not_confidential_dict))
+        incidents = content.incidents.all()
+        attachments = content.attachments.all()
+        for user, num_of_inaccessible_incidents in ((host_admin, 0), (guest_admin, 1)):
+            with self.assertNumQueries(1):
+                num_of_inaccessible = AbstractSql.exec_inaccessible_counts_sql(
+                    linked_querysets={
+                        'incidents': (incidents, incidents.filter_for_confidential_by_user(user=user)),
+                        'attachments': (attachments, attachments.filter_for_confidential_by_user(user=user)),
+                    }
+                )
+            self.assertEqual(num_of_inaccessible, {'incidents': num_of_inaccessible_incidents, 'attachments': 0})
+        with self.assertNumQueries(1):
+            ContentUpdateView.filter_for_additional_confidentiality(content=content, user=host_admin)
+        with self.assertRaisesMessage(PermissionError, 'incident'):
+            ContentUpdateView.filter_for_additional_confidentiality(content=content, user=guest_admin)
+        print(_('\nSuccessfully finished test for access verification of records linked to content\n\n'))
+
+    @local_test_settings_required
+    def test_incident_navigation(self):
+        """ Test that the incidents linked to content, and the persons suggested for each incident, are precomputed and
+        kept in the user's session while cycling through the incidents, in the same order and with the same
+        confidentiality filtering as when they are recomputed for each step.
+
+        :return: Nothing
+        """
+        print(_('\nStarting test for navigation through the incidents linked to content'))
+        num_of_users = FdpUser.objects.all().count() + 1
+        host_admin = self._create_fdp_user(email_counter=num_of_users, **self._host_admin_dict)
+        guest_admin = self._create_fdp_user(email_counter=num_of_users + 1, **self._guest_admin_dict)
+        content = Content.objects.create(name='NavigationContent', **self._not_confidential_dict)
+        incidents = [
+            Incident.objects.create(description='NavigationIncident1', **self._not_confidential_dict),
+            Incident.objects.create(description='NavigationIncident2', for_admin_only=False, for_host_only=True),
+            Incident.objects.create(description='NavigationIncident3', **self._not_confidential_dict),
+        ]
+        content.incidents.add(*incidents)
+        persons = [
+            Person.objects.create(name='NavigationPerson1', **self._is_law_dict, **self._not_confidential_dict),
+            Person.objects.create(
+                name='NavigationPerson2', **self._is_law_dict, for_admin_only=False, for_host_only=True
+            ),
+            Person.objects.create(name='NavigationPerson3', **self._is_law_dict, **self._not_confidential_dict),
+        ]
+        for person in persons:
+            ContentPerson.objects.create(person=person, content=content)
+        # first person is already linked to the first incident
+        PersonIncident.objects.create(person=persons[0], incident=incidents[0])
+        for user, accessible_incidents, accessible_persons in (
+            (host_admin, incidents, persons),
+            (guest_admin, [incidents[0], incidents[2]], [persons[0], persons[2]]),
+        ):
+            navigation = IncidentNavigation.build(content_id=content.pk, user=user)
+            self.assertEqual(navigation.incident_ids, [i.pk for i in accessible_incidents])
+            # incidents are cycled through in the same order as when the next incident is recomputed for each step
+            cur_incident_id = 0
+            for incident in accessible_incidents:
+                next_incident_id = navigation.get_next_incident_id(cur_incident_id=cur_incident_id)
+                self.assertEqual(
+                    next_incident_id,
+                    IncidentUpdateView.get_next_incident_id(
+                        content_id=content.pk, cur_incident_id=cur_incident_id, user=user
+                    )
+                )
+                self.assertEqual(next_incident_id, incident.pk)
+                cur_incident_id = next_incident_id
+            self.assertIsNone(navigation.get_next_incident_id(cur_incident_id=cur_incident_id))
+            # persons already linked to an incident are not suggested
+            self.assertEqual(
+                navigation.suggested_person_ids[incidents[0].pk], [p.pk for p in accessible_persons if p != persons[0]]
+            )
+            self.assertEqual(navigation.suggested_person_ids[incidents[2].pk], [p.pk for p in accessible_persons])
+            # state is kept in the session, and is only valid for the same user, content and incidents
+            request = RequestFactory().get('/')
+            request.user = user
+            request.session = SessionStore()
+            navigation.save(request=request)
+            loaded_navigation = IncidentNavigation.load(
+                request=request, content_id=content.pk, incident_id=incidents[2].pk
+            )
+            self.assertEqual(loaded_navigation.suggested_person_ids, navigation.suggested_person_ids)
+            self.assertIsNone(IncidentNavigation.load(request=request, content_id=0, incident_id=incidents[2].pk))
+            request.user = guest_admin if user == host_admin else host_admin
+            self.assertIsNone(
+                IncidentNavigation.load(request=request, content_id=content.pk, incident_id=incidents[2].pk)
+            )
+            # persons linked to an incident since the state was computed are no longer suggested
+            PersonIncident.objects.create(person=persons[2], incident=incidents[2])
+            self.assertNotIn(
+                persons[2], loaded_navigation.get_suggested_persons(incident_id=incidents[2].pk, user=user)
+            )
+            PersonIncident.objects.filter(person=persons[2], incident=incidents[2]).delete()
+            # persons that became inaccessible since the state was computed are no longer suggested
+            self.assertIn(persons[2], loaded_navigation.get_suggested_persons(incident_id=incidents[2].pk, user=user))
+            Person.objects.filter(pk=persons[2].pk).update(for_host_only=True)
+            self.assertEqual(
+                persons[2] in loaded_navigation.get_suggested_persons(incident_id=incidents[2].pk, user=user),
+                user == host_admin
+            )
+            Person.objects.filter(pk=persons[2].pk).update(for_host_only=False)
+        print(_('\nSuccessfully finished test for navigation through the incidents linked to content\n\n'))
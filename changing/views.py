@@ -4,18 +4,21 @@ from django.utils.http import unquote_plus
 from django.urls import reverse
 from django.conf import settings
 from django.db import transaction
+from django.utils.decorators import method_decorator
 from django.db.models import Q
 from django.http import QueryDict
 from django.forms import formsets
 from inheritable.models import Archivable, AbstractImport, AbstractSql, AbstractUrlValidator, AbstractSearchValidator, \
-    JsonData, Confidentiable
+    JsonData, Confidentiable, AbstractConfiguration
 from inheritable.forms import DateWithComponentsField
+from inheritable.replicas import read_replica
 from inheritable.views import AdminSyncTemplateView, AdminSyncFormView, AdminAsyncCreateView, AdminAsyncUpdateView, \
     AdminAsyncJsonView, PopupContextMixin, AdminSyncCreateView, AdminAsyncTemplateView
 from fdpuser.models import FdpOrganization
 from sourcing.models import Attachment, Content, ContentIdentifier, ContentPerson, ContentPersonAllegation, \
     ContentPersonPenalty
 from supporting.models import ContentType, County, Location
+from .navigation import IncidentNavigation
 from .forms import WizardSearchForm, GroupingModelForm, GroupingAliasModelFormSet, GroupingRelationshipModelForm, \
     GroupingRelationshipModelFormSet, PersonModelForm, PersonAliasModelFormSet, PersonIdentifierModelFormSet, \
     PersonContactModelFormSet, PersonPaymentModelFormSet, PersonGroupingModelFormSet, PersonTitleModelFormSet, \
@@ -313,9 +316,11 @@ class WizardSearchResultsTemplateView(AdminSyncTemplateView):
         )
         self._count_params = self.__search_class.temp_table_params + self.__search_class.from_params
 
-    def __get_person_select_query(self):
+    def __get_person_select_query(self, sql_accessible):
         """ Retrieves the select version of the searching query for persons.
 
+        :param sql_accessible: SQL query retrieving the ids of persons that are accessible by the user, through which
+        each result is flagged as accessible or not.
         :return: Nothing.
         """
         # SELECT * FROM ... SQL query to retrieve persons matching search criteria
@@ -341,7 +346,8 @@ class WizardSearchResultsTemplateView(AdminSyncTemplateView):
                     AND ZPPG."person_id" = A."id"
                     AND ZPPG.{active_filter}                    
                     WHERE ZPG.{active_filter}
-                ) AS "groupings"
+                ) AS "groupings",
+                A."id" IN ({sql_accessible}) AS "is_accessible"
             FROM
                 (
                 SELECT
@@ -356,6 +362,7 @@ class WizardSearchResultsTemplateView(AdminSyncTemplateView):
         """.format(
             active_filter=Archivable.ACTIVE_FILTER,
             sql_temp_table=self.__search_class.temp_table_query,
+            sql_accessible=sql_accessible,
             title_sql=Person.get_title_sql(person_table_alias='A'),
             person=Person.get_db_table(),
             person_identifier=PersonIdentifier.get_db_table(),
@@ -394,9 +401,11 @@ class WizardSearchResultsTemplateView(AdminSyncTemplateView):
             for person in records
         ]
 
-    def __get_content_select_query(self):
+    def __get_content_select_query(self, sql_accessible):
         """ Retrieves the select version of the searching query for content.
 
+        :param sql_accessible: SQL query retrieving the ids of content that are accessible by the user, through which
+        each result is flagged as accessible or not.
         :return: Nothing.
         """
         # confidential filter for content identifier
@@ -427,7 +436,8 @@ class WizardSearchResultsTemplateView(AdminSyncTemplateView):
                     AND ({content_identifier_confidential_filter})
                     AND "{content_identifier}".{active_filter}
                     GROUP BY "{content_identifier}"."content_id"
-                ) AS "ids"
+                ) AS "ids",
+                A."id" IN ({sql_accessible}) AS "is_accessible"
             FROM
                 (
                 SELECT
@@ -445,6 +455,7 @@ class WizardSearchResultsTemplateView(AdminSyncTemplateView):
             content_identifier_confidential_filter=content_identifier_confidential_filter,
             active_filter=Archivable.ACTIVE_FILTER,
             sql_temp_table=self.__search_class.temp_table_query,
+            sql_accessible=sql_accessible,
             content=Content.get_db_table(),
             content_identifier=ContentIdentifier.get_db_table(),
             content_type=ContentType.get_db_table(),
@@ -483,9 +494,11 @@ class WizardSearchResultsTemplateView(AdminSyncTemplateView):
             for content in records
         ]
 
-    def __get_incident_select_query(self):
+    def __get_incident_select_query(self, sql_accessible):
         """ Retrieves the select version of the searching query for incidents.
 
+        :param sql_accessible: SQL query retrieving the ids of incidents that are accessible by the user, through which
+        each result is flagged as accessible or not.
         :return: Nothing.
         """
         # SELECT * FROM ... SQL query to retrieve incidents matching search criteria
@@ -495,7 +508,8 @@ class WizardSearchResultsTemplateView(AdminSyncTemplateView):
                 A."id",
                 A."description",
                 A."incident_dates",
-                MAX(A."score")
+                MAX(A."score"),
+                A."id" IN ({sql_accessible}) AS "is_accessible"
             FROM
                 (
                 SELECT
@@ -512,6 +526,7 @@ class WizardSearchResultsTemplateView(AdminSyncTemplateView):
             active_filter=Archivable.ACTIVE_FILTER,
             sql_dates=Incident.sql_dates.format(t='"{incident}"'.format(incident=Incident.get_db_table())),
             sql_temp_table=self.__search_class.temp_table_query,
+            sql_accessible=sql_accessible,
             incident=Incident.get_db_table(),
             sql_from=self.__search_class.sql_from_query,
             sql_score=self.__search_class.sql_score_query,
@@ -538,9 +553,11 @@ class WizardSearchResultsTemplateView(AdminSyncTemplateView):
             for incident in records
         ]
 
-    def __get_grouping_select_query(self):
+    def __get_grouping_select_query(self, sql_accessible):
         """ Retrieves the select version of the searching query for groupings.
 
+        :param sql_accessible: SQL query retrieving the ids of groupings that are accessible by the user, through which
+        each result is flagged as accessible or not.
         :return: Nothing.
         """
         # SELECT * FROM ... SQL query to retrieve groupings matching search criteria
@@ -556,7 +573,8 @@ class WizardSearchResultsTemplateView(AdminSyncTemplateView):
                     WHERE ZGA."grouping_id" = A."id"
                     AND ZGA.{active_filter}
                     GROUP BY ZGA."grouping_id"
-                ) AS "aliases"
+                ) AS "aliases",
+                A."id" IN ({sql_accessible}) AS "is_accessible"
             FROM
                 (
                 SELECT
@@ -571,6 +589,7 @@ class WizardSearchResultsTemplateView(AdminSyncTemplateView):
         """.format(
             active_filter=Archivable.ACTIVE_FILTER,
             sql_temp_table=self.__search_class.temp_table_query,
+            sql_accessible=sql_accessible,
             grouping=Grouping.get_db_table(),
             grouping_alias=GroupingAlias.get_db_table(),
             sql_from=self.__search_class.sql_from_query,
@@ -598,6 +617,22 @@ class WizardSearchResultsTemplateView(AdminSyncTemplateView):
             for grouping in records
         ]
 
+    def __get_accessible_queryset(self):
+        """ Retrieves the queryset of ids of records that are accessible by the user after direct and indirect
+        confidentiality filtering, against which each search result is checked.
+
+        :return: Queryset of ids.
+        """
+        user = self.request.user
+        model = self.__search_class.entity
+        queryset = model.active_objects.all()
+        # direct confidentiality filtering
+        if issubclass(model, Confidentiable):
+            queryset = queryset.filter_for_confidential_by_user(user=user)
+        # indirect confidentiality filtering
+        queryset = model.filter_for_admin(queryset=queryset, user=user)
+        return queryset.values('pk')
+
     def __define_select_query(self):
         """ Defines the select version of the searching query.
 
@@ -607,9 +642,12 @@ class WizardSearchResultsTemplateView(AdminSyncTemplateView):
 
         :return: Nothing.
         """
+        # SQL query to retrieve ids of records that are accessible by the user
+        sql_accessible, accessible_params = AbstractSql.get_queryset_sql(queryset=self.__get_accessible_queryset())
         # SELECT * FROM ... SQL query to retrieve records matching search criteria
-        self._sql_select_query = self.__get_specific_select_query()
+        self._sql_select_query = self.__get_specific_select_query(sql_accessible=sql_accessible)
         self._select_params = self.__search_class.temp_table_params \
+            + accessible_params \
             + self.__search_class.score_params \
             + self.__search_class.from_params
 
@@ -634,19 +672,12 @@ class WizardSearchResultsTemplateView(AdminSyncTemplateView):
         records_count = AbstractSql.exec_single_val_sql(sql_query=self._sql_count_query, sql_params=self._count_params)
         # perform select query
         model = self.__search_class.entity
-        records = model.objects.raw(self._sql_select_query, self._select_params)
+        records = list(model.objects.raw(self._sql_select_query, self._select_params))
         self.__count = records_count
         result_list = self.__get_specific_list(records=records)
-        result_ids = [r[self.__pk_key] for r in result_list]
-        num_of_result_ids = len(result_ids)
-        # perform an extra direct confidentiality filtering for search results
-        queryset = model.active_objects.all()
-        if issubclass(model, Confidentiable):
-            queryset = queryset.filter_for_confidential_by_user(user=user)
-        # perform an extra indirect confidentiality filtering for search results
-        queryset = model.filter_for_admin(queryset=queryset, user=user)
-        # double check that all results are still accessible after direct and indirect confidentiality filtering
-        if queryset.filter(pk__in=result_ids).count() != num_of_result_ids:
+        # double check that all results are still accessible after direct and indirect confidentiality filtering,
+        # through the flag retrieved with each result by the select query
+        if not all(record.is_accessible for record in records):
             raise Exception(
                 _('{c} attempted to leak confidentiality through its search results. '
                   'Please review its search algorithm'.format(c=self.__search_class_model))
@@ -997,25 +1028,28 @@ class GroupingUpdateView(AdminAsyncUpdateView, AbstractGroupingView):
         """
         user = self.request.user
         obj = super(GroupingUpdateView, self).get_object(queryset=queryset)
-        # filter for confidential incidents linked through grouping incidents
-        grouping_incidents_for_grouping = obj.grouping_incidents.all()
-        grouping_incidents_for_user = GroupingIncident.filter_for_admin(
-            queryset=grouping_incidents_for_grouping,
-            user=user
+        grouping_incidents = obj.grouping_incidents.all()
+        person_groupings = obj.person_groupings.all()
+        num_of_inaccessible = AbstractSql.exec_inaccessible_counts_sql(
+            linked_querysets={
+                # confidential incidents linked through grouping incidents
+                'grouping_incidents': (
+                    grouping_incidents, GroupingIncident.filter_for_admin(queryset=grouping_incidents, user=user)
+                ),
+                # confidential persons linked through person groupings
+                'person_groupings': (
+                    person_groupings, PersonGrouping.filter_for_admin(queryset=person_groupings, user=user)
+                ),
+            }
         )
-        if grouping_incidents_for_grouping.difference(grouping_incidents_for_user).exists():
+        if num_of_inaccessible['grouping_incidents']:
             raise PermissionError(_('User does not have permission to a grouping-incident'))
-        # filter for confidential persons linked through person groupings
-        person_groupings_for_grouping = obj.person_groupings.all()
-        person_groupings_for_user = PersonGrouping.filter_for_admin(
-            queryset=person_groupings_for_grouping,
-            user=user
-        )
-        if person_groupings_for_grouping.difference(person_groupings_for_user).exists():
+        if num_of_inaccessible['person_groupings']:
             raise PermissionError(_('User does not have permission to a person-grouping'))
         return obj
 
 
+@method_decorator(read_replica, name='dispatch')
 class AbstractAsyncGetModelView(AdminAsyncJsonView):
     """ Abstract definition of methods and attributes used to define asynchronous retrieval of data used in
     the data wizard ("changing") forms.
@@ -1514,18 +1548,27 @@ class PersonUpdateView(AdminAsyncUpdateView, AbstractPersonView):
         """
         user = self.request.user
         obj = super(PersonUpdateView, self).get_object(queryset=queryset)
-        # filter for confidential incidents linked through person incidents
-        person_incidents_for_person = obj.person_incidents.all()
-        person_incidents_for_user = PersonIncident.filter_for_admin(queryset=person_incidents_for_person, user=user)
-        if person_incidents_for_person.difference(person_incidents_for_user).exists():
+        person_incidents = obj.person_incidents.all()
+        object_persons = obj.subject_person_relationships.all()
+        subject_persons = obj.object_person_relationships.all()
+        num_of_inaccessible = AbstractSql.exec_inaccessible_counts_sql(
+            linked_querysets={
+                # confidential incidents linked through person incidents
+                'person_incidents': (
+                    person_incidents, PersonIncident.filter_for_admin(queryset=person_incidents, user=user)
+                ),
+                # confidential people linked through person relationships
+                'object_persons': (
+                    object_persons, PersonRelationship.filter_for_admin(queryset=object_persons, user=user)
+                ),
+                'subject_persons': (
+                    subject_persons, PersonRelationship.filter_for_admin(queryset=subject_persons, user=user)
+                ),
+            }
+        )
+        if num_of_inaccessible['person_incidents']:
             raise PermissionError(_('User does not have permission to a person-incident'))
-        # filter for confidential people linked through person relationships
-        object_persons_for_person = obj.subject_person_relationships.all()
-        subject_persons_for_person = obj.object_person_relationships.all()
-        object_persons_for_user = PersonRelationship.filter_for_admin(queryset=object_persons_for_person, user=user)
-        subject_persons_for_user = PersonRelationship.filter_for_admin(queryset=subject_persons_for_person, user=user)
-        if subject_persons_for_person.difference(subject_persons_for_user).exists() \
-                or object_persons_for_person.difference(object_persons_for_user).exists():
+        if num_of_inaccessible['object_persons'] or num_of_inaccessible['subject_persons']:
             raise PermissionError(_('User does not have permission to a person-relationship'))
         return obj
 
@@ -1921,12 +1964,20 @@ class IncidentUpdateView(AdminAsyncUpdateView, AbstractIncidentView):
 
         :return: Link to data management home page.
         """
-        # retrieve the ID of the next incident to update
-        next_incident_id = self.get_next_incident_id(
-            content_id=self.content_id,
-            cur_incident_id=self.object.pk,
-            user=self.request.user
+        # retrieve the ID of the next incident to update, through the incidents kept in the session if still valid
+        navigation = IncidentNavigation.load(
+            request=self.request, content_id=self.content_id, incident_id=self.object.pk
         )
+        if navigation is not None:
+            next_incident_id = navigation.get_next_incident_id(cur_incident_id=self.object.pk)
+            if next_incident_id is None:
+                IncidentNavigation.clear(request=self.request)
+        else:
+            next_incident_id = self.get_next_incident_id(
+                content_id=self.content_id,
+                cur_incident_id=self.object.pk,
+                user=self.request.user
+            )
         # there is another incident to update with suggested persons based on the content links
         if next_incident_id is not None:
             return reverse('changing:edit_incident', kwargs={'pk': next_incident_id, 'content_id': self.content_id})
@@ -1938,10 +1989,19 @@ class IncidentUpdateView(AdminAsyncUpdateView, AbstractIncidentView):
         """ Retrieves a queryset of persons that are linked to the content to which this incident is linked, but are
         not yet linked to this incident.
 
+        If the incident is updated while cycling through the incidents linked to content, the persons that were
+        suggested for the incident are retrieved from the session.
+
         :return: Queryset of persons.
         """
         # incident being updated
         incident_id = self.object.pk
+        # persons suggested for the incident, when cycling through the incidents linked to content
+        navigation = IncidentNavigation.load(
+            request=self.request, content_id=self.kwargs.get('content_id', 0), incident_id=incident_id
+        )
+        if navigation is not None:
+            return navigation.get_suggested_persons(incident_id=incident_id, user=self.request.user)
         # user updating incident
         user = self.request.user
         # content that are already linked to the incident
@@ -2024,13 +2084,16 @@ class IncidentUpdateView(AdminAsyncUpdateView, AbstractIncidentView):
         """
         user = self.request.user
         obj = super(IncidentUpdateView, self).get_object(queryset=queryset)
-        # filter for confidential persons linked through person incidents
-        person_incidents_for_incident = obj.person_incidents.all()
-        person_incidents_for_user = PersonIncident.filter_for_admin(
-            queryset=person_incidents_for_incident,
-            user=user
+        person_incidents = obj.person_incidents.all()
+        num_of_inaccessible = AbstractSql.exec_inaccessible_counts_sql(
+            linked_querysets={
+                # confidential persons linked through person incidents
+                'person_incidents': (
+                    person_incidents, PersonIncident.filter_for_admin(queryset=person_incidents, user=user)
+                ),
+            }
         )
-        if person_incidents_for_incident.difference(person_incidents_for_user).exists():
+        if num_of_inaccessible['person_incidents']:
             raise PermissionError(_('User does not have permission to a person-incident'))
         return obj
 
@@ -2378,31 +2441,41 @@ class ContentUpdateView(AdminAsyncUpdateView, AbstractContentView):
 
         Assumes direct and indirect confidentiality filtering is already performed for content elsewhere.
 
-        Used by ContentUpdateView.get_object(...) and AllegationPenaltyLinkTemplateView.get_object(...).
+        Used by ContentUpdateView.get_object(...) and AllegationPenaltyLinkUpdateView.get_object(...).
+
+        Inaccessible linked records are counted for all relations in a single query.
 
         :param content: Content for which to perform additional confidentiality checks.
         :param user: Users requesting content.
         :return: Nothing.
         """
-        # filter for confidential persons linked through content persons
-        content_persons_for_content = content.content_persons.all()
-        content_persons_for_user = ContentPerson.filter_for_admin(queryset=content_persons_for_content, user=user)
-        if content_persons_for_content.difference(content_persons_for_user).exists():
+        content_persons = content.content_persons.all()
+        content_identifiers = content.content_identifiers.all()
+        attachments = content.attachments.all()
+        incidents = content.incidents.all()
+        num_of_inaccessible = AbstractSql.exec_inaccessible_counts_sql(
+            linked_querysets={
+                # confidential persons linked through content persons
+                'content_persons': (
+                    content_persons, ContentPerson.filter_for_admin(queryset=content_persons, user=user)
+                ),
+                # confidential content identifiers linked through content identifiers
+                'content_identifiers': (
+                    content_identifiers, content_identifiers.filter_for_confidential_by_user(user=user)
+                ),
+                # confidential attachments linked directly
+                'attachments': (attachments, attachments.filter_for_confidential_by_user(user=user)),
+                # confidential incidents linked directly
+                'incidents': (incidents, incidents.filter_for_confidential_by_user(user=user)),
+            }
+        )
+        if num_of_inaccessible['content_persons']:
             raise PermissionError(_('User does not have permission to a content-person'))
-        # filter for confidential content identifiers linked through content identifiers
-        content_identifiers_for_content = content.content_identifiers.all()
-        content_identifiers_for_user = content_identifiers_for_content.filter_for_confidential_by_user(user=user)
-        if content_identifiers_for_content.difference(content_identifiers_for_user).exists():
+        if num_of_inaccessible['content_identifiers']:
             raise PermissionError(_('User does not have permission to a content-identifier'))
-        # filter for confidential attachments linked directly
-        attachments_for_content = content.attachments.all()
-        attachments_for_user = attachments_for_content.filter_for_confidential_by_user(user=user)
-        if attachments_for_content.difference(attachments_for_user).exists():
+        if num_of_inaccessible['attachments']:
             raise PermissionError(_('User does not have permission to an attachment'))
-        # filter for confidential incidents linked directly
-        incidents_for_content = content.incidents.all()
-        incidents_for_user = incidents_for_content.filter_for_confidential_by_user(user=user)
-        if incidents_for_content.difference(incidents_for_user).exists():
+        if num_of_inaccessible['incidents']:
             raise PermissionError(_('User does not have permission to an incident'))
 
     def get_object(self, queryset=None):
@@ -2585,12 +2658,22 @@ class AllegationPenaltyLinkUpdateView(ContentUpdateView):
         """
         # primary key of content to which allegations and penalties are being linked
         content_id = self.kwargs['pk']
-        # retrieve the id of the incident to update, after allegations/penalties are linked to the content
-        next_incident_id = IncidentUpdateView.get_next_incident_id(
-            content_id=content_id,
-            cur_incident_id=0,
-            user=self.request.user
-        )
+        # retrieve the id of the incident to update, after allegations/penalties are linked to the content, and keep the
+        # incidents and the persons suggested for each incident in the session to cycle through them
+        if AbstractConfiguration.incident_navigation_secs() > 0:
+            navigation = IncidentNavigation.build(content_id=content_id, user=self.request.user)
+            if navigation is not None:
+                navigation.save(request=self.request)
+                next_incident_id = navigation.get_next_incident_id(cur_incident_id=0)
+            else:
+                IncidentNavigation.clear(request=self.request)
+                next_incident_id = None
+        else:
+            next_incident_id = IncidentUpdateView.get_next_incident_id(
+                content_id=content_id,
+                cur_incident_id=0,
+                user=self.request.user
+            )
         # there is an incident to update, to add the persons that are now linked to the content
         if next_incident_id:
             return reverse('changing:edit_incident', kwargs={'pk': next_incident_id, 'content_id': content_id})
@@ -193,8 +193,7 @@ class PersonIncidentAdmin(FdpInheritableAdmin, ArchivableAdmin):
     list_filter = ['situation_role', 'tags', 'is_guess'] + ArchivableAdmin.list_filter
     search_fields = ['person__name', 'incident__description']
     ordering = [
-        'person__name', 'situation_role__name', 'incident__start_year', 'incident__start_month', 'incident__start_day',
-        'incident__end_year', 'incident__end_month', 'incident__end_day'
+        'person__name', 'situation_role__name', 'incident__start_date_key', 'incident__end_date_key'
     ]
 
 
@@ -209,6 +208,5 @@ class GroupingIncidentAdmin(FdpInheritableAdmin, ArchivableAdmin):
     list_filter = [] + ArchivableAdmin.list_filter
     search_fields = ['grouping__name', 'incident__description']
     ordering = [
-        'grouping__name', 'incident__start_year', 'incident__start_month', 'incident__start_day',
-        'incident__end_year', 'incident__end_month', 'incident__end_day'
+        'grouping__name', 'incident__start_date_key', 'incident__end_date_key'
     ]
@@ -1,4 +1,5 @@
 from django.apps import AppConfig
+from django.db.models.signals import pre_save, post_save, post_delete, m2m_changed
 from django.utils.translation import ugettext_lazy as _
 
 
@@ -8,3 +9,33 @@ class CoreAppConfig(AppConfig):
     """
     name = 'core'
     verbose_name = _('Core data')
+
+    def ready(self):
+        """ Connects signals through which the person and grouping search documents are maintained.
+
+        :return: Nothing.
+        """
+        from .signals import post_save_person, post_delete_person, post_change_person_link, \
+            post_change_person_grouping, pre_save_grouping, post_save_grouping, post_delete_grouping, \
+            post_change_grouping_alias, m2m_changed_person_organizations, m2m_changed_grouping_counties
+        from .models import Person, PersonAlias, PersonIdentifier, PersonTitle, PersonGrouping, Grouping, \
+            GroupingAlias
+        # signals for persons
+        post_save.connect(post_save_person, sender=Person)
+        post_delete.connect(post_delete_person, sender=Person)
+        m2m_changed.connect(m2m_changed_person_organizations, sender=Person.fdp_organizations.through)
+        # signals for person aliases, identifiers and titles
+        for model in (PersonAlias, PersonIdentifier, PersonTitle):
+            post_save.connect(post_change_person_link, sender=model)
+            post_delete.connect(post_change_person_link, sender=model)
+        # signals for links between persons and groupings
+        post_save.connect(post_change_person_grouping, sender=PersonGrouping)
+        post_delete.connect(post_change_person_grouping, sender=PersonGrouping)
+        # signals for groupings
+        pre_save.connect(pre_save_grouping, sender=Grouping)
+        post_save.connect(post_save_grouping, sender=Grouping)
+        post_delete.connect(post_delete_grouping, sender=Grouping)
+        m2m_changed.connect(m2m_changed_grouping_counties, sender=Grouping.counties.through)
+        # signals for grouping aliases
+        post_save.connect(post_change_grouping_alias, sender=GroupingAlias)
+        post_delete.connect(post_change_grouping_alias, sender=GroupingAlias)
@@ -0,0 +1,445 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Count
+from django.urls import reverse
+from django.utils.timezone import now
+from inheritable.instrumentation import redact_sql
+from core.models import Person, PersonIdentifier, Grouping
+from changing.forms import WizardSearchForm
+from .run_benchmarks import create_benchmark_client, get_default_search, get_default_grouping_search
+from hashlib import sha1
+from json import dumps as json_dumps, load as json_load
+from re import compile as re_compile
+from subprocess import run, PIPE
+
+
+#: Names of temporary tables that are unique for each search, e.g. "temp_person_score_5_16345678901234".
+_TEMP_TABLE_SUFFIX_REGEX = re_compile(r'"(temp_[a-z_]+?)_\d+_\d+"')
+
+#: Names of temporary tables in plans, without quotes.
+_TEMP_RELATION_SUFFIX_REGEX = re_compile(r'^(temp_[a-z_]+?)_\d+_\d+$')
+
+#: Whitespace in SQL statements.
+_WHITESPACE_REGEX = re_compile(r'\s+')
+
+#: First keywords of SQL statements whose plans are explained. Other statements, e.g. CREATE TEMP TABLE, are executed.
+EXPLAINABLE_KEYWORDS = ('SELECT', 'INSERT', 'UPDATE', 'DELETE', 'WITH')
+
+#: First keywords of SQL statements that manage transactions, and are neither explained nor executed.
+SKIPPED_KEYWORDS = ('SAVEPOINT', 'RELEASE', 'ROLLBACK', 'BEGIN', 'COMMIT')
+
+
+def split_sql_statements(sql, params):
+    """ Splits a string containing one or more SQL statements, such as the hand-assembled search queries that create
+    temporary tables before selecting from them, into individual statements with their parameters.
+
+    Statements are separated by semicolons that are not within quoted literals or identifiers.
+
+    :param sql: SQL string with %s placeholders for parameters.
+    :param params: List of parameters for the SQL string, or None if it has no parameters.
+    :return: List of tuples (statement, parameters), where parameters is None if the SQL string had none.
+    """
+    parts, current, quote = [], [], None
+    for char in sql:
+        if quote:
+            if char == quote:
+                quote = None
+        elif char in ('\'', '"'):
+            quote = char
+        elif char == ';':
+            parts.append(''.join(current))
+            current = []
+            continue
+        current.append(char)
+    parts.append(''.join(current))
+    statements = []
+    params = list(params) if params is not None else None
+    for part in parts:
+        if not part.strip():
+            continue
+        if params is None:
+            statements.append((part.strip(), None))
+        else:
+            num_of_params = part.replace('%%', '').count('%s')
+            statements.append((part.strip(), params[:num_of_params]))
+            params = params[num_of_params:]
+    return statements
+
+
+def normalize_sql(sql):
+    """ Normalizes a SQL statement so that the same statement is recognized across searches and runs, by removing the
+    unique suffixes of temporary tables, redacting literals, and collapsing whitespace.
+
+    :param sql: SQL statement.
+    :return: Normalized SQL statement.
+    """
+    return _WHITESPACE_REGEX.sub(' ', redact_sql(sql=_TEMP_TABLE_SUFFIX_REGEX.sub(r'"\1"', sql))).strip()
+
+
+def summarize_plan(plan, large_table_rows, nested_loop_rows):
+    """ Summarizes a plan retrieved through EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON).
+
+    The fingerprint of a plan depends only on its shape, i.e. its node types, join types, relations and indexes, so that
+    it changes when the planner chooses a different plan, but not when costs or timings change.
+
+    :param plan: Dictionary with the Plan key, as retrieved for a statement.
+    :param large_table_rows: Sequential scans reading at least this number of rows are reported.
+    :param nested_loop_rows: Nested loops producing at least this number of rows are reported.
+    :return: Dictionary summarizing the plan.
+    """
+    seq_scans, nested_loops = [], []
+
+    def walk(node):
+        loops = node.get('Actual Loops', 1) or 1
+        relation = node.get('Relation Name')
+        if relation:
+            relation = _TEMP_RELATION_SUFFIX_REGEX.sub(r'\1', relation)
+        if node['Node Type'] == 'Seq Scan':
+            rows = (node.get('Actual Rows', 0) + node.get('Rows Removed by Filter', 0)) * loops
+            if rows >= large_table_rows:
+                seq_scans.append({'relation': relation, 'rows': rows})
+        elif node['Node Type'] == 'Nested Loop':
+            rows = node.get('Actual Rows', 0) * loops
+            if rows >= nested_loop_rows:
+                nested_loops.append({'join_type': node.get('Join Type'), 'rows': rows})
+        return [
+            node['Node Type'], node.get('Join Type'), relation, node.get('Index Name'),
+            [walk(child) for child in node.get('Plans', [])]
+        ]
+
+    root = plan['Plan']
+    shape = walk(root)
+    return {
+        'fingerprint': sha1(json_dumps(shape).encode('utf-8')).hexdigest()[:16],
+        'total_cost': root.get('Total Cost', 0),
+        'planning_ms': plan.get('Planning Time'),
+        'execution_ms': plan.get('Execution Time'),
+        'shared_hit_blocks': root.get('Shared Hit Blocks', 0),
+        'shared_read_blocks': root.get('Shared Read Blocks', 0),
+        'large_seq_scans': seq_scans,
+        'large_nested_loops': nested_loops
+    }
+
+
+def compare_plans(report, baseline, max_cost_ratio, min_cost):
+    """ Compares the plans in a report with the plans in a baseline report, and retrieves regressions.
+
+    Regressions are sequential scans on large tables that are new for a statement, nested loops above the row threshold
+    that are new for a statement, and increases of a statement's total cost beyond a ratio.
+
+    :param report: Report with the current plans.
+    :param baseline: Report with the plans from a previous run.
+    :param max_cost_ratio: Total costs may increase by at most this ratio.
+    :param min_cost: Total costs below this value are never reported, since they are dominated by noise.
+    :return: List of dictionaries describing regressions.
+    """
+    regressions = []
+    for case_name, case in report['cases'].items():
+        baseline_statements = {
+            s['key']: s for s in baseline.get('cases', {}).get(case_name, {}).get('statements', [])
+        }
+        for statement in case['statements']:
+            old = baseline_statements.get(statement['key'])
+            if old is None:
+                continue
+            regression = {'case': case_name, 'key': statement['key'], 'sql': statement['sql']}
+            old_relations = {scan['relation'] for scan in old['large_seq_scans']}
+            for scan in statement['large_seq_scans']:
+                if scan['relation'] not in old_relations:
+                    regressions.append(dict(regression, type='new_seq_scan', **scan))
+            if statement['large_nested_loops'] and not old['large_nested_loops']:
+                regressions.append(dict(
+                    regression, type='nested_loop_rows', rows=max(n['rows'] for n in statement['large_nested_loops'])
+                ))
+            if statement['total_cost'] >= min_cost and statement['total_cost'] > old['total_cost'] * max_cost_ratio:
+                regressions.append(dict(
+                    regression, type='cost_jump', total_cost=statement['total_cost'],
+                    baseline_total_cost=old['total_cost']
+                ))
+            if statement['fingerprint'] != old['fingerprint']:
+                statement['baseline_fingerprint'] = old['fingerprint']
+    return regressions
+
+
+class _RollbackExplain(Exception):
+    """ Raised to roll back the records that were created while explaining plans.
+
+    """
+    pass
+
+
+class _StatementCapture:
+    """ Execution wrapper capturing the SQL statements, and their parameters, that are executed while a page is
+    rendered, so that they can be explained afterwards.
+
+    """
+    def __init__(self):
+        """ Initializes the capture.
+
+        """
+        self.statements = []
+
+    def __call__(self, execute, sql, params, many, context):
+        """ Captures a statement and executes it.
+
+        :param execute: Callable executing the statement.
+        :param sql: SQL statement.
+        :param params: Parameters for statement.
+        :param many: True if the statement is executed with multiple sets of parameters.
+        :param context: Dictionary with the connection and cursor.
+        :return: Result of executing the statement.
+        """
+        if not many:
+            self.statements.append((sql, params))
+        return execute(sql, params, many, context)
+
+
+class Command(BaseCommand):
+    """ Explains the plans of the SQL statements that are executed while rendering officer and command search results,
+    data management wizard search results, and officer and command profiles for representative inputs, including the
+    hand-assembled search queries, the person title query and the command allegation counts query.
+
+    Each page is rendered once while its statements are captured. The captured statements are then executed again
+    through EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) in the same order, so that temporary search tables are created and
+    filled as they were. Everything is rolled back afterwards.
+
+    Plans are stored with fingerprints of their shapes in a JSON report. When a report from a previous run is passed as
+    a baseline, new sequential scans on large tables, nested loops producing many rows, and jumps in total cost are
+    reported as regressions, and the command fails.
+
+    Intended to be run against a dataset generated by the generate_synthetic_data command. Requires PostgreSQL.
+
+    Usage: python manage.py explain_plans [--output plans.json] [--baseline old_plans.json] [--max-cost-ratio 2]
+
+    """
+    help = 'Explains the plans of the SQL statements executed by search result and profile pages.'
+
+    def __init__(self, *args, **kwargs):
+        """ Initializes the command.
+
+        :param args: Positional arguments.
+        :param kwargs: Keyword arguments.
+        """
+        super(Command, self).__init__(*args, **kwargs)
+        self.large_table_rows = 0
+        self.nested_loop_rows = 0
+
+    def add_arguments(self, parser):
+        """ Adds the command line arguments.
+
+        :param parser: Command line argument parser.
+        :return: Nothing.
+        """
+        parser.add_argument('--output', default=None, help='Path of file to which to write plans, instead of stdout.')
+        parser.add_argument(
+            '--baseline', default=None, help='Path of plans from a previous run, against which to check regressions.'
+        )
+        parser.add_argument(
+            '--large-table-rows',
+            type=int,
+            default=10000,
+            help='Sequential scans reading at least this number of rows are reported.'
+        )
+        parser.add_argument(
+            '--nested-loop-rows',
+            type=int,
+            default=10000,
+            help='Nested loops producing at least this number of rows are reported.'
+        )
+        parser.add_argument(
+            '--max-cost-ratio', type=float, default=2.0, help='Total cost of a statement may increase by this ratio.'
+        )
+        parser.add_argument(
+            '--min-cost', type=float, default=100.0, help='Cost jumps are ignored for statements below this cost.'
+        )
+        parser.add_argument(
+            '--force', action='store_true', help='Explain plans even if the DEBUG setting is False.'
+        )
+
+    @staticmethod
+    def __get_commit():
+        """ Retrieves the Git commit for which plans are explained.
+
+        :return: Hash of commit, or None if it cannot be retrieved.
+        """
+        try:
+            completed = run(
+                ['git', 'rev-parse', 'HEAD'], stdout=PIPE, stderr=PIPE, cwd=str(settings.BASE_DIR),
+                universal_newlines=True
+            )
+        except OSError:
+            return None
+        return completed.stdout.strip() if completed.returncode == 0 else None
+
+    @staticmethod
+    def __get_cases(search, grouping_search):
+        """ Retrieves the pages for which plans are explained, with representative inputs from the dataset.
+
+        :param search: Search criteria for persons, incidents and content.
+        :param grouping_search: Search criteria for groupings.
+        :return: List of tuples (name of case, URL of search form or None, data for search form or URL of page).
+        """
+        cases = [
+            ('officer_search_name', reverse('profiles:officer_search'), {'search': search}),
+            ('command_search_name', reverse('profiles:command_search'), {'search': grouping_search}),
+        ]
+        identifier = PersonIdentifier.objects.all().order_by('pk').values_list('identifier', flat=True).first()
+        if identifier:
+            cases.append(('officer_search_identifier', reverse('profiles:officer_search'), {'search': identifier}))
+        for view_name, search_type, criteria in (
+            ('changing:persons', WizardSearchForm.person_type, search),
+            ('changing:incidents', WizardSearchForm.incident_type, search),
+            ('changing:content', WizardSearchForm.content_type, search),
+            ('changing:groupings', WizardSearchForm.grouping_type, grouping_search),
+        ):
+            cases.append(('wizard_{t}_search'.format(t=search_type), reverse(view_name), {
+                'search': criteria, 'type': search_type
+            }))
+        for name, view_name, queryset in (
+            ('officer_profile_busiest', 'profiles:officer',
+             Person.objects.filter(is_law_enforcement=True).annotate(num=Count('person_incident'))),
+            ('command_profile_busiest', 'profiles:command',
+             Grouping.objects.all().annotate(num=Count('person_grouping')))
+        ):
+            pk = queryset.order_by('-num', 'pk').values_list('pk', flat=True).first()
+            if pk is not None:
+                cases.append((name, None, reverse(view_name, kwargs={'pk': pk})))
+        return cases
+
+    @staticmethod
+    def __capture(client, url):
+        """ Renders a page while capturing the SQL statements that are executed.
+
+        :param client: Client through which to render the page.
+        :param url: URL of the page.
+        :return: List of tuples (SQL string, parameters).
+        """
+        capture = _StatementCapture()
+        with connection.execute_wrapper(capture):
+            response = client.get(url, secure=True)
+        if response.status_code != 200:
+            raise CommandError('GET {u} returned status {s}'.format(u=url, s=response.status_code))
+        return capture.statements
+
+    def __explain(self, captured):
+        """ Executes captured SQL strings again, explaining the plans of their statements.
+
+        :param captured: List of tuples (SQL string, parameters), in the order in which they were executed.
+        :return: List of dictionaries summarizing the plans, one for each distinct statement.
+        """
+        explained = {}
+        with connection.cursor() as cursor:
+            for sql, params in captured:
+                for statement, statement_params in split_sql_statements(sql=sql, params=params):
+                    keyword = statement.split(None, 1)[0].upper()
+                    if keyword in SKIPPED_KEYWORDS:
+                        continue
+                    if keyword not in EXPLAINABLE_KEYWORDS:
+                        cursor.execute(statement, statement_params)
+                        continue
+                    normalized = normalize_sql(sql=statement)
+                    key = sha1(normalized.encode('utf-8')).hexdigest()[:12]
+                    # the statement must be executed, so that statements depending on it behave as they did
+                    cursor.execute('EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {s}'.format(s=statement), statement_params)
+                    plan = cursor.fetchone()[0][0]
+                    if key in explained:
+                        explained[key]['occurrences'] += 1
+                        continue
+                    explained[key] = dict(
+                        {'key': key, 'sql': normalized, 'occurrences': 1},
+                        **summarize_plan(
+                            plan=plan, large_table_rows=self.large_table_rows, nested_loop_rows=self.nested_loop_rows
+                        )
+                    )
+        return list(explained.values())
+
+    def __explain_case(self, client, form_url, data_or_url):
+        """ Explains the plans for a page.
+
+        :param client: Client through which to render the page.
+        :param form_url: URL of search form that redirects to the page, or None if the page is not a search result.
+        :param data_or_url: Dictionary of search form data, or the URL of the page if it is not a search result.
+        :return: Dictionary with the URL of the page and the summarized plans of its statements.
+        """
+        if form_url is None:
+            url = data_or_url
+        else:
+            response = client.post(form_url, data_or_url, secure=True)
+            if response.status_code != 302:
+                raise CommandError('Search through {u} returned status {s}'.format(u=form_url, s=response.status_code))
+            url = response.url
+        savepoint_id = transaction.savepoint()
+        try:
+            captured = self.__capture(client=client, url=url)
+        finally:
+            # temporary tables and records created while rendering the page are removed before statements are replayed
+            transaction.savepoint_rollback(savepoint_id)
+        savepoint_id = transaction.savepoint()
+        try:
+            statements = self.__explain(captured=captured)
+        finally:
+            transaction.savepoint_rollback(savepoint_id)
+        return {'url': url.split('?')[0], 'statements': statements}
+
+    def handle(self, *args, **options):
+        """ Explains the plans and checks them for regressions.
+
+        :param args: Positional arguments.
+        :param options: Keyword arguments.
+        :return: Nothing.
+        """
+        if not settings.DEBUG and not options['force']:
+            raise CommandError('Plans are only explained if DEBUG is True, or with --force')
+        if connection.vendor != 'postgresql':
+            raise CommandError('Plans can only be explained with PostgreSQL')
+        self.large_table_rows = options['large_table_rows']
+        self.nested_loop_rows = options['nested_loop_rows']
+        baseline = None
+        if options['baseline']:
+            try:
+                with open(options['baseline'], 'r') as baseline_file:
+                    baseline = json_load(baseline_file)
+            except (OSError, ValueError) as err:
+                raise CommandError('Baseline {p} could not be read: {e}'.format(p=options['baseline'], e=err))
+        search = get_default_search()
+        grouping_search = get_default_grouping_search()
+        cases = {}
+        try:
+            with transaction.atomic():
+                client = create_benchmark_client()
+                for name, form_url, data_or_url in self.__get_cases(search=search, grouping_search=grouping_search):
+                    cases[name] = self.__explain_case(client=client, form_url=form_url, data_or_url=data_or_url)
+                    self.stderr.write(
+                        '{n}: explained {s} statement(s)'.format(n=name, s=len(cases[name]['statements']))
+                    )
+                # roll back the temporary user and its sessions
+                raise _RollbackExplain()
+        except _RollbackExplain:
+            pass
+        report = {
+            'commit': self.__get_commit(),
+            'created': now().isoformat(),
+            'thresholds': {'large_table_rows': self.large_table_rows, 'nested_loop_rows': self.nested_loop_rows},
+            'search': search,
+            'grouping_search': grouping_search,
+            'cases': cases,
+            'regressions': []
+        }
+        if baseline is not None:
+            report['regressions'] = compare_plans(
+                report=report, baseline=baseline, max_cost_ratio=options['max_cost_ratio'], min_cost=options['min_cost']
+            )
+        output = json_dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as output_file:
+                output_file.write(output)
+            self.stderr.write('Plans were written to {p}'.format(p=options['output']))
+        else:
+            self.stdout.write(output)
+        for regression in report['regressions']:
+            self.stderr.write(
+                '{c}: {t} in {s:.200}'.format(c=regression['case'], t=regression['type'], s=regression['sql'])
+            )
+        if report['regressions']:
+            raise CommandError('{n} plan regression(s) were found'.format(n=len(report['regressions'])))
@@ -0,0 +1,51 @@
+from django.core.management.base import BaseCommand, CommandError
+from core.models import PersonPhoto
+from core.thumbnails import can_generate_thumbnails, generate_thumbnails
+
+
+class Command(BaseCommand):
+    """ Generates thumbnails for person photos that were uploaded or imported before thumbnails were configured, or for
+    all person photos after the FDP_PERSON_PHOTO_THUMBNAIL_WIDTHS setting changed.
+
+    Usage: python manage.py generate_person_photo_thumbnails [--all]
+
+    """
+    help = 'Generates thumbnails for person photos that do not yet have thumbnails.'
+
+    def add_arguments(self, parser):
+        """ Adds the command line arguments.
+
+        :param parser: Command line argument parser.
+        :return: Nothing.
+        """
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Regenerate thumbnails for all person photos, including those that already have thumbnails.'
+        )
+
+    def handle(self, *args, **options):
+        """ Generates thumbnails for person photos.
+
+        :param args: Positional arguments.
+        :param options: Keyword arguments.
+        :return: Nothing.
+        """
+        if not can_generate_thumbnails():
+            raise CommandError(
+                'Thumbnails cannot be generated. Please install the package: Pillow, and define widths through the '
+                'FDP_PERSON_PHOTO_THUMBNAIL_WIDTHS setting.'
+            )
+        queryset = PersonPhoto.objects.all() if options['all'] else PersonPhoto.objects.filter(has_thumbnails=False)
+        num_of_generated = 0
+        num_of_failed = 0
+        for pk, photo_name in queryset.values_list('pk', 'photo').iterator():
+            has_thumbnails = generate_thumbnails(name=photo_name)
+            PersonPhoto.objects.filter(pk=pk).update(has_thumbnails=has_thumbnails)
+            if has_thumbnails:
+                num_of_generated += 1
+            else:
+                num_of_failed += 1
+        self.stdout.write('Generated thumbnails for {n} person photo(s)'.format(n=num_of_generated))
+        if num_of_failed:
+            self.stdout.write('Thumbnails could not be generated for {n} person photo(s)'.format(n=num_of_failed))
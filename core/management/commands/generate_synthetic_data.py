@@ -0,0 +1,539 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from inheritable.models import AbstractUrlValidator
+from core.models import Person, PersonAlias, PersonIdentifier, PersonTitle, Grouping, GroupingAlias, \
+    PersonGrouping, Incident, PersonIncident, GroupingIncident
+from core.search_documents import rebuild_search_documents
+from sourcing.models import Attachment, Content, ContentIdentifier, ContentPerson, ContentPersonAllegation
+from supporting.models import PersonIdentifierType, Title, PersonGroupingType, Allegation, AllegationOutcome, \
+    ContentType, ContentIdentifierType, AttachmentType
+from fdpuser.models import FdpOrganization
+from itertools import accumulate
+from random import Random
+
+
+#: Description of every record that is generated, through which synthetic records are identified and deleted.
+SYNTHETIC_DESCRIPTION = 'Synthetic record generated for performance testing.'
+
+#: Name of the FDP organization to which some synthetic records are restricted.
+SYNTHETIC_ORGANIZATION_NAME = 'Synthetic FDP organization'
+
+#: First names from which names of persons are composed.
+FIRST_NAMES = [
+    'James', 'Mary', 'Robert', 'Patricia', 'John', 'Jennifer', 'Michael', 'Linda', 'David', 'Elizabeth', 'William',
+    'Barbara', 'Richard', 'Susan', 'Joseph', 'Jessica', 'Thomas', 'Sarah', 'Carlos', 'Karen', 'Luis', 'Nancy', 'Kevin',
+    'Lisa', 'Brian', 'Maria', 'Anthony', 'Sandra', 'Jose', 'Ashley', 'Daniel', 'Kimberly', 'Wei', 'Aisha', 'Mohammed',
+    'Priya', 'Andre', 'Tanisha', 'Hector', 'Mei'
+]
+
+#: Last names from which names of persons are composed.
+LAST_NAMES = [
+    'Smith', 'Johnson', 'Williams', 'Brown', 'Jones', 'Garcia', 'Miller', 'Davis', 'Rodriguez', 'Martinez', 'Hernandez',
+    'Lopez', 'Gonzalez', 'Wilson', 'Anderson', 'Thomas', 'Taylor', 'Moore', 'Jackson', 'Martin', 'Lee', 'Perez',
+    'Thompson', 'White', 'Harris', 'Sanchez', 'Clark', 'Ramirez', 'Lewis', 'Robinson', 'Walker', 'Young', 'Allen',
+    'King', 'Wright', 'Scott', 'Torres', 'Nguyen', 'Hill', 'Flores', 'Green', 'Adams', 'Nelson', 'Baker', 'Hall',
+    'Rivera', 'Campbell', 'Mitchell', 'Carter', 'Roberts', 'Chen', 'Kim', 'Patel', 'Okafor', 'Murphy', 'Cohen'
+]
+
+#: Suffixes from which names of groupings are composed.
+GROUPING_SUFFIXES = ['Precinct', 'Detective Squad', 'Narcotics Unit', 'Patrol Borough', 'Transit District']
+
+#: Names of titles held by officers, from most to least common.
+TITLES = ['Police Officer', 'Detective', 'Sergeant', 'Lieutenant', 'Captain', 'Deputy Inspector', 'Inspector']
+
+#: Names of allegations, from most to least common.
+ALLEGATIONS = ['Force', 'Abuse of Authority', 'Discourtesy', 'Offensive Language', 'Untruthful Statement']
+
+#: Names of allegation outcomes, from most to least common.
+ALLEGATION_OUTCOMES = ['Unsubstantiated', 'Exonerated', 'Unfounded', 'Substantiated']
+
+#: Names of content types, from most to least common.
+CONTENT_TYPES = ['Complaint', 'Lawsuit', 'News Article', 'Disciplinary Record']
+
+
+class Command(BaseCommand):
+    """ Generates a synthetic dataset, so that the performance of searches, profiles and imports can be measured
+    locally at production scale, e.g. through the run_benchmarks command.
+
+    Persons are generated with aliases, identifiers, titles and groupings, as well as incidents, content, allegations
+    and attachments that are linked to them. Links follow skewed distributions, so that a small number of officers and
+    commands are linked to many incidents, and a configurable fraction of records is confidential.
+
+    The same seed always generates the same dataset. Synthetic records are identified by their description, and can be
+    removed with the --delete option.
+
+    Usage: python manage.py generate_synthetic_data [--persons 10000] [--seed 0] [--confidential-fraction 0.1]
+
+    """
+    help = 'Generates a synthetic dataset of persons, groupings, incidents, content and attachments.'
+
+    #: Number of records created through each bulk insert.
+    batch_size = 1000
+
+    def __init__(self, *args, **kwargs):
+        """ Initializes the command.
+
+        :param args: Positional arguments.
+        :param kwargs: Keyword arguments.
+        """
+        super(Command, self).__init__(*args, **kwargs)
+        self.rng = Random()
+        self.confidential_fraction = 0
+        self.fdp_organization = None
+        # confidentiable instances, grouped by model, to restrict to the FDP organization once they are created
+        self.organization_links = {}
+
+    def add_arguments(self, parser):
+        """ Adds the command line arguments.
+
+        :param parser: Command line argument parser.
+        :return: Nothing.
+        """
+        parser.add_argument('--persons', type=int, default=1000, help='Number of persons to generate.')
+        parser.add_argument(
+            '--groupings', type=int, default=None, help='Number of groupings to generate. Defaults to 1 per 25 persons.'
+        )
+        parser.add_argument(
+            '--incidents', type=int, default=None, help='Number of incidents to generate. Defaults to 1 per 2 persons.'
+        )
+        parser.add_argument(
+            '--contents', type=int, default=None, help='Number of content to generate. Defaults to 1 per 2 persons.'
+        )
+        parser.add_argument(
+            '--law-enforcement-fraction',
+            type=float,
+            default=0.8,
+            help='Fraction of persons that are law enforcement, i.e. officers.'
+        )
+        parser.add_argument(
+            '--confidential-fraction',
+            type=float,
+            default=0.1,
+            help='Fraction of persons, incidents, content and attachments that are restricted to administrators, to '
+                 'host users, or to an FDP organization.'
+        )
+        parser.add_argument('--seed', type=int, default=0, help='Seed for the random number generator.')
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Generate or delete synthetic records even if the DEBUG setting is False.'
+        )
+        parser.add_argument('--delete', action='store_true', help='Delete all previously generated synthetic records.')
+
+    def __rand_fraction(self, fraction):
+        """ Randomly decides whether an event with a given probability occurs.
+
+        :param fraction: Probability of the event, between 0 and 1.
+        :return: True if the event occurs, false otherwise.
+        """
+        return self.rng.random() < fraction
+
+    @staticmethod
+    def __get_skewed_cum_weights(num_of_items):
+        """ Retrieves cumulative weights that follow Zipf's law, so that the first items are chosen much more often
+        than the last items.
+
+        :param num_of_items: Number of items from which to choose.
+        :return: List of cumulative weights.
+        """
+        return list(accumulate(1 / (rank + 1) for rank in range(num_of_items)))
+
+    def __choose_skewed(self, items, cum_weights, k):
+        """ Chooses distinct items following skewed cumulative weights.
+
+        :param items: List of items from which to choose.
+        :param cum_weights: Cumulative weights for items.
+        :param k: Maximum number of items to choose.
+        :return: List of distinct chosen items.
+        """
+        chosen = self.rng.choices(items, cum_weights=cum_weights, k=min(k, len(items)))
+        return list({id(item): item for item in chosen}.values())
+
+    @staticmethod
+    def __set_date_keys(records):
+        """ Sets the date keys and date ranges for date bounded records that are created through bulk_create(...), since
+        they are otherwise only set when saving.
+
+        :param records: List of date bounded records.
+        :return: List of records.
+        """
+        for record in records:
+            record.set_date_keys()
+        return records
+
+    def __get_confidentiality_dict(self):
+        """ Retrieves the levels of confidentiality for a confidentiable record.
+
+        Confidential records are restricted equally often to administrators, to host users, or to the synthetic FDP
+        organization.
+
+        :return: Dictionary of keyword arguments that can be expanded into the confidentiable model's constructor, and
+        the FDP organization to which the record should be restricted, if any.
+        """
+        if not self.__rand_fraction(self.confidential_fraction):
+            return {'for_admin_only': False, 'for_host_only': False}, None
+        restriction = self.rng.randrange(3)
+        return {'for_admin_only': restriction == 0, 'for_host_only': restriction == 1}, \
+            self.fdp_organization if restriction == 2 else None
+
+    def __create_confidentiable(self, model, kwargs):
+        """ Initializes a confidentiable record, and remembers whether it should be restricted to an FDP organization.
+
+        :param model: Confidentiable model.
+        :param kwargs: Keyword arguments for the model's constructor.
+        :return: Unsaved instance.
+        """
+        confidentiality_dict, fdp_organization = self.__get_confidentiality_dict()
+        instance = model(description=SYNTHETIC_DESCRIPTION, **kwargs, **confidentiality_dict)
+        if fdp_organization is not None:
+            self.organization_links.setdefault(model, []).append(instance)
+        return instance
+
+    def __link_organizations(self):
+        """ Restricts the records that were chosen to be restricted to the synthetic FDP organization.
+
+        :return: Nothing.
+        """
+        for model, instances in self.organization_links.items():
+            field = model._meta.get_field('fdp_organizations')
+            through = field.remote_field.through
+            through.objects.bulk_create(
+                [
+                    through(**{
+                        '{f}_id'.format(f=field.m2m_field_name()): instance.pk,
+                        '{f}_id'.format(f=field.m2m_reverse_field_name()): self.fdp_organization.pk
+                    }) for instance in instances
+                ],
+                batch_size=self.batch_size
+            )
+
+    def __get_random_years(self):
+        """ Retrieves a random range of years during which a link was active.
+
+        :return: Tuple (start_year, end_year).
+        """
+        start_year = self.rng.randint(1985, 2018)
+        return start_year, min(start_year + self.rng.randint(0, 8), 2021)
+
+    def __get_random_name(self):
+        """ Retrieves a random name for a person.
+
+        :return: Name.
+        """
+        return '{f} {l}'.format(f=self.rng.choice(FIRST_NAMES), l=self.rng.choice(LAST_NAMES))
+
+    @staticmethod
+    def __get_or_create_by_names(model, names):
+        """ Retrieves supporting records by name, creating them if they do not exist.
+
+        :param model: Supporting model with a unique name field.
+        :param names: Names of records.
+        :return: List of records in the same order as their names.
+        """
+        return [model.objects.get_or_create(name=name)[0] for name in names]
+
+    def __generate_groupings(self, num_of_groupings):
+        """ Generates groupings with aliases, where some groupings belong to others.
+
+        :param num_of_groupings: Number of groupings to generate.
+        :return: List of generated groupings.
+        """
+        groupings = Grouping.objects.bulk_create(
+            [
+                Grouping(
+                    name='{n} {s}'.format(n=i + 1, s=GROUPING_SUFFIXES[i % len(GROUPING_SUFFIXES)]),
+                    code='SYN-{n}'.format(n=i + 1),
+                    description=SYNTHETIC_DESCRIPTION
+                ) for i in range(num_of_groupings)
+            ],
+            batch_size=self.batch_size
+        )
+        GroupingAlias.objects.bulk_create(
+            [
+                GroupingAlias(grouping=grouping, name='{n} Pct'.format(n=i + 1))
+                for i, grouping in enumerate(groupings) if self.__rand_fraction(0.5)
+            ],
+            batch_size=self.batch_size
+        )
+        # about 1 in 10 groupings are top-level groupings to which others belong
+        parents = groupings[::10]
+        for grouping in groupings:
+            if grouping not in parents:
+                grouping.belongs_to_grouping = self.rng.choice(parents)
+        Grouping.objects.bulk_update(groupings, ['belongs_to_grouping'], batch_size=self.batch_size)
+        return groupings
+
+    def __generate_persons(self, num_of_persons, law_enforcement_fraction, groupings):
+        """ Generates persons with aliases, identifiers, titles and groupings.
+
+        :param num_of_persons: Number of persons to generate.
+        :param law_enforcement_fraction: Fraction of persons that are law enforcement.
+        :param groupings: List of groupings to which officers can be linked.
+        :return: List of generated persons.
+        """
+        persons = Person.objects.bulk_create(
+            [
+                self.__create_confidentiable(
+                    model=Person,
+                    kwargs={
+                        'name': self.__get_random_name(),
+                        'is_law_enforcement': self.__rand_fraction(law_enforcement_fraction)
+                    }
+                ) for _ in range(num_of_persons)
+            ],
+            batch_size=self.batch_size
+        )
+        tax_id_type, badge_type = self.__get_or_create_by_names(model=PersonIdentifierType, names=['Tax ID', 'Badge'])
+        titles = self.__get_or_create_by_names(model=Title, names=TITLES)
+        grouping_type = self.__get_or_create_by_names(model=PersonGroupingType, names=['Member'])[0]
+        grouping_cum_weights = self.__get_skewed_cum_weights(num_of_items=len(groupings))
+        aliases, identifiers, person_titles, person_groupings = [], [], [], []
+        for person in persons:
+            # most persons have no aliases
+            if self.__rand_fraction(0.3):
+                for alias_name in {self.__get_random_name() for _ in range(self.rng.randint(1, 3))}:
+                    aliases.append(PersonAlias(person=person, name=alias_name))
+            if not person.is_law_enforcement:
+                continue
+            identifiers.append(
+                PersonIdentifier(
+                    person=person, person_identifier_type=tax_id_type, identifier=str(900000 + person.pk)
+                )
+            )
+            if self.__rand_fraction(0.5):
+                identifiers.append(
+                    PersonIdentifier(
+                        person=person, person_identifier_type=badge_type, identifier=str(self.rng.randint(1, 99999))
+                    )
+                )
+            # promotions follow the order of titles
+            start_year = self.rng.randint(1985, 2015)
+            for title in titles[:self.rng.choice([1, 1, 1, 2, 2, 3, 4])]:
+                end_year = min(start_year + self.rng.randint(1, 8), 2021)
+                person_titles.append(
+                    PersonTitle(person=person, title=title, start_year=start_year, end_year=end_year)
+                )
+                start_year = end_year
+            for grouping in self.__choose_skewed(
+                    items=groupings, cum_weights=grouping_cum_weights, k=self.rng.choice([1, 1, 2, 3])
+            ):
+                start_year, end_year = self.__get_random_years()
+                person_groupings.append(
+                    PersonGrouping(
+                        person=person, grouping=grouping, type=grouping_type, start_year=start_year, end_year=end_year,
+                        is_inactive=end_year < 2021
+                    )
+                )
+        PersonAlias.objects.bulk_create(aliases, batch_size=self.batch_size)
+        PersonIdentifier.objects.bulk_create(self.__set_date_keys(records=identifiers), batch_size=self.batch_size)
+        PersonTitle.objects.bulk_create(self.__set_date_keys(records=person_titles), batch_size=self.batch_size)
+        PersonGrouping.objects.bulk_create(self.__set_date_keys(records=person_groupings), batch_size=self.batch_size)
+        return persons
+
+    def __generate_incidents(self, num_of_incidents, officers, persons, groupings):
+        """ Generates incidents that are linked to persons and groupings.
+
+        :param num_of_incidents: Number of incidents to generate.
+        :param officers: List of persons that are law enforcement, ordered from most to least often involved.
+        :param persons: List of all persons.
+        :param groupings: List of groupings, ordered from most to least often involved.
+        :return: List of tuples (incident, persons linked to incident).
+        """
+        incidents = Incident.objects.bulk_create(
+            self.__set_date_keys(records=[
+                self.__create_confidentiable(
+                    model=Incident,
+                    kwargs=dict(
+                        zip(
+                            ('start_year', 'start_month', 'start_day'),
+                            (self.rng.randint(1990, 2021), self.rng.randint(1, 12), self.rng.randint(1, 28))
+                            # some incidents only have a known year
+                            if self.__rand_fraction(0.8) else (self.rng.randint(1990, 2021), 0, 0)
+                        )
+                    )
+                ) for _ in range(num_of_incidents)
+            ]),
+            batch_size=self.batch_size
+        )
+        officer_cum_weights = self.__get_skewed_cum_weights(num_of_items=len(officers))
+        grouping_cum_weights = self.__get_skewed_cum_weights(num_of_items=len(groupings))
+        person_incidents, grouping_incidents, linked = [], [], []
+        for incident in incidents:
+            incident_persons = self.__choose_skewed(
+                items=officers, cum_weights=officer_cum_weights, k=self.rng.choice([1, 1, 2, 2, 3, 4])
+            )
+            # some incidents also involve a civilian
+            if persons and self.__rand_fraction(0.3):
+                civilian = self.rng.choice(persons)
+                if civilian not in incident_persons:
+                    incident_persons.append(civilian)
+            for person in incident_persons:
+                person_incidents.append(PersonIncident(person=person, incident=incident))
+            if groupings and self.__rand_fraction(0.5):
+                for grouping in self.__choose_skewed(items=groupings, cum_weights=grouping_cum_weights, k=1):
+                    grouping_incidents.append(GroupingIncident(grouping=grouping, incident=incident))
+            linked.append((incident, incident_persons))
+        PersonIncident.objects.bulk_create(person_incidents, batch_size=self.batch_size)
+        GroupingIncident.objects.bulk_create(grouping_incidents, batch_size=self.batch_size)
+        return linked
+
+    def __generate_contents(self, num_of_contents, linked_incidents, officers):
+        """ Generates content with identifiers, attachments and allegations, that is linked to incidents and persons.
+
+        :param num_of_contents: Number of content to generate.
+        :param linked_incidents: List of tuples (incident, persons linked to incident).
+        :param officers: List of persons that are law enforcement.
+        :return: Tuple (number of content, number of attachments, number of allegations).
+        """
+        content_types = self.__get_or_create_by_names(model=ContentType, names=CONTENT_TYPES)
+        content_type_cum_weights = self.__get_skewed_cum_weights(num_of_items=len(content_types))
+        contents = Content.objects.bulk_create(
+            [
+                self.__create_confidentiable(
+                    model=Content,
+                    kwargs={
+                        'name': 'Synthetic content {n}'.format(n=i + 1),
+                        'type': self.rng.choices(content_types, cum_weights=content_type_cum_weights)[0]
+                    }
+                ) for i in range(num_of_contents)
+            ],
+            batch_size=self.batch_size
+        )
+        identifier_type = self.__get_or_create_by_names(model=ContentIdentifierType, names=['Case Number'])[0]
+        attachment_type = self.__get_or_create_by_names(model=AttachmentType, names=['Document'])[0]
+        allegations = self.__get_or_create_by_names(model=Allegation, names=ALLEGATIONS)
+        allegation_cum_weights = self.__get_skewed_cum_weights(num_of_items=len(allegations))
+        outcomes = self.__get_or_create_by_names(model=AllegationOutcome, names=ALLEGATION_OUTCOMES)
+        outcome_cum_weights = self.__get_skewed_cum_weights(num_of_items=len(outcomes))
+        content_incidents, content_persons, attachments, content_attachments = [], [], [], []
+        content_identifiers = []
+        for content in contents:
+            content_identifiers.append(
+                self.__create_confidentiable(
+                    model=ContentIdentifier,
+                    kwargs={
+                        'content': content,
+                        'content_identifier_type': identifier_type,
+                        'identifier': '{y}-{n:06d}'.format(y=self.rng.randint(1990, 2021), n=content.pk)
+                    }
+                )
+            )
+            # most content describes an incident, and its persons
+            if linked_incidents and self.__rand_fraction(0.8):
+                incident, persons = self.rng.choice(linked_incidents)
+                content_incidents.append((content, incident))
+            else:
+                persons = self.rng.sample(officers, k=min(len(officers), self.rng.randint(1, 2)))
+            for person in persons:
+                content_persons.append(ContentPerson(content=content, person=person))
+            for _ in range(self.rng.choice([0, 1, 1, 2])):
+                attachment = self.__create_confidentiable(
+                    model=Attachment,
+                    kwargs={
+                        'name': 'Synthetic attachment {n}'.format(n=len(attachments) + 1),
+                        'file': '{b}synthetic/{n}.pdf'.format(
+                            b=AbstractUrlValidator.ATTACHMENT_BASE_URL, n=len(attachments) + 1
+                        ),
+                        'extension': 'pdf',
+                        'type': attachment_type
+                    }
+                )
+                attachments.append(attachment)
+                content_attachments.append((content, attachment))
+        ContentIdentifier.objects.bulk_create(content_identifiers, batch_size=self.batch_size)
+        Attachment.objects.bulk_create(attachments, batch_size=self.batch_size)
+        incidents_through = Content.incidents.through
+        incidents_through.objects.bulk_create(
+            [incidents_through(content_id=c.pk, incident_id=i.pk) for c, i in content_incidents],
+            batch_size=self.batch_size
+        )
+        attachments_through = Content.attachments.through
+        attachments_through.objects.bulk_create(
+            [attachments_through(content_id=c.pk, attachment_id=a.pk) for c, a in content_attachments],
+            batch_size=self.batch_size
+        )
+        ContentPerson.objects.bulk_create(content_persons, batch_size=self.batch_size)
+        content_person_allegations = []
+        for content_person in content_persons:
+            if not content_person.person.is_law_enforcement or not self.__rand_fraction(0.4):
+                continue
+            for allegation in self.__choose_skewed(
+                    items=allegations, cum_weights=allegation_cum_weights, k=self.rng.randint(1, 3)
+            ):
+                content_person_allegations.append(
+                    ContentPersonAllegation(
+                        content_person=content_person,
+                        allegation=allegation,
+                        allegation_outcome=self.rng.choices(outcomes, cum_weights=outcome_cum_weights)[0]
+                    )
+                )
+        ContentPersonAllegation.objects.bulk_create(content_person_allegations, batch_size=self.batch_size)
+        return len(contents), len(attachments), len(content_person_allegations)
+
+    def __delete(self):
+        """ Deletes all previously generated synthetic records. Linked records are deleted through cascades.
+
+        :return: Nothing.
+        """
+        for model in (Attachment, Content, Incident, Person, Grouping):
+            num_of_deleted, _ = model.objects.filter(description=SYNTHETIC_DESCRIPTION).delete()
+            self.stdout.write('Deleted {n} {m} record(s), including linked records'.format(
+                n=num_of_deleted, m=model.__name__
+            ))
+        FdpOrganization.objects.filter(name=SYNTHETIC_ORGANIZATION_NAME).delete()
+
+    def handle(self, *args, **options):
+        """ Generates or deletes the synthetic dataset.
+
+        :param args: Positional arguments.
+        :param options: Keyword arguments.
+        :return: Nothing.
+        """
+        if not settings.DEBUG and not options['force']:
+            raise CommandError('Synthetic records are only generated or deleted if DEBUG is True, or with --force')
+        if options['delete']:
+            with transaction.atomic():
+                self.__delete()
+            return
+        num_of_persons = options['persons']
+        num_of_groupings = options['groupings'] if options['groupings'] is not None else max(1, num_of_persons // 25)
+        num_of_incidents = options['incidents'] if options['incidents'] is not None else num_of_persons // 2
+        num_of_contents = options['contents'] if options['contents'] is not None else num_of_persons // 2
+        if min(num_of_persons, num_of_groupings, num_of_incidents, num_of_contents) < 0:
+            raise CommandError('Number of records to generate must be at least 0')
+        for fraction_option in ('law_enforcement_fraction', 'confidential_fraction'):
+            if not 0 <= options[fraction_option] <= 1:
+                raise CommandError('{o} must be between 0 and 1'.format(o=fraction_option.replace('_', ' ').title()))
+        self.rng = Random(options['seed'])
+        self.confidential_fraction = options['confidential_fraction']
+        self.organization_links = {}
+        with transaction.atomic():
+            self.fdp_organization = FdpOrganization.objects.get_or_create(name=SYNTHETIC_ORGANIZATION_NAME)[0]
+            groupings = self.__generate_groupings(num_of_groupings=num_of_groupings) if num_of_groupings else []
+            persons = self.__generate_persons(
+                num_of_persons=num_of_persons,
+                law_enforcement_fraction=options['law_enforcement_fraction'],
+                groupings=groupings
+            )
+            officers = [person for person in persons if person.is_law_enforcement]
+            # shuffle, so that the officers involved in the most incidents are spread across the dataset
+            self.rng.shuffle(officers)
+            linked_incidents = self.__generate_incidents(
+                num_of_incidents=num_of_incidents if officers else 0, officers=officers, persons=persons,
+                groupings=groupings
+            )
+            num_of_contents, num_of_attachments, num_of_allegations = self.__generate_contents(
+                num_of_contents=num_of_contents if officers else 0, linked_incidents=linked_incidents,
+                officers=officers
+            )
+            self.__link_organizations()
+            # records that are created through bulk_create(...) do not send the signals maintaining search documents
+            rebuild_search_documents()
+        self.stdout.write(
+            'Generated {p} person(s), {g} grouping(s), {i} incident(s), {c} content, {a} attachment(s) and {l} '
+            'allegation(s)'.format(
+                p=len(persons), g=len(groupings), i=len(linked_incidents), c=num_of_contents, a=num_of_attachments,
+                l=num_of_allegations
+            )
+        )
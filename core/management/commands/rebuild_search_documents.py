@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS
+from core.search_documents import rebuild_search_documents
+
+
+class Command(BaseCommand):
+    """ Rebuilds the search documents for all persons and groupings, against which person and grouping profile searches
+    are scored.
+
+    Search documents are maintained when records are saved, so they only need to be rebuilt after records were changed
+    without sending signals, e.g. through bulk_create(...) or QuerySet.update(...), or directly in the database.
+
+    Usage: python manage.py rebuild_search_documents [--database DATABASE]
+
+    """
+    help = 'Rebuilds the search documents for all persons and groupings.'
+
+    def add_arguments(self, parser):
+        """ Adds the command line arguments.
+
+        :param parser: Command line argument parser.
+        :return: Nothing.
+        """
+        parser.add_argument(
+            '--database',
+            default=DEFAULT_DB_ALIAS,
+            help='Alias of the database in which to rebuild the search documents.'
+        )
+
+    def handle(self, *args, **options):
+        """ Rebuilds the search documents.
+
+        :param args: Positional arguments.
+        :param options: Keyword arguments.
+        :return: Nothing.
+        """
+        num_of_persons, num_of_groupings = rebuild_search_documents(using=options['database'])
+        self.stdout.write(
+            'Rebuilt search documents for {p} person(s) and {g} grouping(s)'.format(
+                p=num_of_persons, g=num_of_groupings
+            )
+        )
@@ -0,0 +1,605 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Count
+from django.test import Client, override_settings
+from django.urls import reverse
+from django.utils.crypto import get_random_string
+from django.utils.timezone import now
+from django_otp import DEVICE_ID_SESSION_KEY
+from inheritable.instrumentation import QueryRecorder
+from inheritable.models import AbstractUrlValidator, AbstractAnySearch
+from core.models import Person, Grouping, Incident
+from sourcing.models import Attachment, Content
+from changing.forms import WizardSearchForm
+from fdpuser.models import FdpUser
+from bulk.serializers import GroupingAirTableSerializer, PersonAirTableSerializer, IncidentAirTableSerializer, \
+    ContentAirTableSerializer, AllegationAirTableSerializer, CountyAirTableSerializer, \
+    PersonGroupingAirTableSerializer, PersonTitleAirTableSerializer, PersonPaymentAirTableSerializer, \
+    PersonIncidentAirTableSerializer, ContentPersonAirTableSerializer, ContentIdentifierAirTableSerializer, \
+    AttachmentAirTableSerializer
+from json import dumps as json_dumps, load as json_load
+from statistics import mean, median
+from subprocess import run, PIPE
+from time import perf_counter
+
+
+#: Groups of benchmarks that can be run.
+BENCHMARK_GROUPS = ['searches', 'profiles', 'wizard', 'autocomplete', 'imports']
+
+
+def create_benchmark_client():
+    """ Creates a temporary host administrator and retrieves a client through which the user is logged in and
+    verified through 2FA.
+
+    :return: Client.
+    """
+    fdp_user = FdpUser.objects.create_user(
+        email='benchmark-{r}@localhost'.format(r=get_random_string(length=12).lower()),
+        password=get_random_string(length=32),
+        is_host=True,
+        is_administrator=True,
+        is_superuser=False
+    )
+    totp_device = fdp_user.totpdevice_set.create(name='default')
+    client = Client(REMOTE_ADDR='127.0.0.1', SERVER_NAME=next(
+        (host.lstrip('.') for host in settings.ALLOWED_HOSTS if host != '*'), 'testserver'
+    ))
+    client.force_login(user=fdp_user, backend='django.contrib.auth.backends.ModelBackend')
+    session = client.session
+    session[DEVICE_ID_SESSION_KEY] = totp_device.persistent_id
+    session.save()
+    return client
+
+
+def get_default_search():
+    """ Retrieves the default search criteria for persons, i.e. the last name of the officer linked to the most
+    incidents.
+
+    :return: Search criteria.
+    """
+    name = Person.objects.filter(is_law_enforcement=True).annotate(
+        num=Count('person_incident')
+    ).order_by('-num', 'pk').values_list('name', flat=True).first()
+    return name.split()[-1] if name and name.split() else 'a'
+
+
+def get_default_grouping_search():
+    """ Retrieves the default search criteria for groupings, i.e. the name of the grouping linked to the most
+    persons.
+
+    :return: Search criteria.
+    """
+    name = Grouping.objects.all().annotate(
+        num=Count('person_grouping')
+    ).order_by('-num', 'pk').values_list('name', flat=True).first()
+    return name if name else 'a'
+
+
+class _RollbackBenchmarks(Exception):
+    """ Raised to roll back the records that were created while running benchmarks.
+
+    """
+    pass
+
+
+class Command(BaseCommand):
+    """ Times officer and command searches, officer and command profiles, data management wizard searches, autocomplete
+    endpoints, and imports through each AirTable serializer, against the data in the configured database.
+
+    Intended to be run against a dataset generated by the generate_synthetic_data command. Results are written as JSON
+    and include the commit being benchmarked, so that runs can be compared across commits through the --baseline option.
+
+    Requests are sent as a temporary host administrator that is verified through 2FA. All records created while running
+    benchmarks, including the temporary user and imported records, are rolled back.
+
+    Usage: python manage.py run_benchmarks [--repeat 5] [--group searches] [--output results.json] [--baseline old.json]
+
+    """
+    help = 'Times searches, profiles, data management wizard searches, autocomplete endpoints and imports.'
+
+    def __init__(self, *args, **kwargs):
+        """ Initializes the command.
+
+        :param args: Positional arguments.
+        :param kwargs: Keyword arguments.
+        """
+        super(Command, self).__init__(*args, **kwargs)
+        self.repeat = 1
+        self.warmup = 0
+
+    def add_arguments(self, parser):
+        """ Adds the command line arguments.
+
+        :param parser: Command line argument parser.
+        :return: Nothing.
+        """
+        parser.add_argument('--repeat', type=int, default=5, help='Number of timed runs for each benchmark.')
+        parser.add_argument(
+            '--warmup', type=int, default=1, help='Number of untimed runs for each benchmark, e.g. to fill caches.'
+        )
+        parser.add_argument(
+            '--group',
+            action='append',
+            dest='groups',
+            choices=BENCHMARK_GROUPS,
+            default=None,
+            help='Group of benchmarks to run. Can be repeated. Defaults to all groups.'
+        )
+        parser.add_argument(
+            '--import-rows', type=int, default=20, help='Number of rows imported through each AirTable serializer.'
+        )
+        parser.add_argument(
+            '--search',
+            default=None,
+            help='Search criteria for persons. Defaults to the last name of the officer linked to the most incidents.'
+        )
+        parser.add_argument(
+            '--grouping-search',
+            default=None,
+            help='Search criteria for groupings. Defaults to the name of the grouping linked to the most persons.'
+        )
+        parser.add_argument('--output', default=None, help='Path of file to which to write results, instead of stdout.')
+        parser.add_argument(
+            '--baseline', default=None, help='Path of results from a previous run with which to compare this run.'
+        )
+        parser.add_argument(
+            '--force', action='store_true', help='Run benchmarks even if the DEBUG setting is False.'
+        )
+
+    @staticmethod
+    def __get_commit():
+        """ Retrieves the Git commit that is benchmarked.
+
+        :return: Hash of commit, or None if it cannot be retrieved.
+        """
+        try:
+            completed = run(
+                ['git', 'rev-parse', 'HEAD'], stdout=PIPE, stderr=PIPE, cwd=str(settings.BASE_DIR),
+                universal_newlines=True
+            )
+        except OSError:
+            return None
+        return completed.stdout.strip() if completed.returncode == 0 else None
+
+    def __time(self, name, group, func):
+        """ Times a benchmark.
+
+        :param name: Name of benchmark.
+        :param group: Group to which benchmark belongs.
+        :param func: Callable running the benchmark once.
+        :return: Dictionary of results.
+        """
+        for _ in range(self.warmup):
+            func()
+        durations_ms, db_durations_ms, num_of_queries = [], [], []
+        for _ in range(self.repeat):
+            with QueryRecorder(num_of_slowest=0) as recorder:
+                start = perf_counter()
+                func()
+                durations_ms.append((perf_counter() - start) * 1000)
+            db_durations_ms.append(recorder.db_ms)
+            num_of_queries.append(recorder.num_of_queries)
+        result = {
+            'name': name,
+            'group': group,
+            'repeat': self.repeat,
+            'min_ms': round(min(durations_ms), 3),
+            'median_ms': round(median(durations_ms), 3),
+            'mean_ms': round(mean(durations_ms), 3),
+            'max_ms': round(max(durations_ms), 3),
+            'median_db_ms': round(median(db_durations_ms), 3),
+            'num_of_queries': max(num_of_queries)
+        }
+        self.stderr.write('{n}: {m:.1f} ms median, {q} queries'.format(
+            n=name, m=result['median_ms'], q=result['num_of_queries']
+        ))
+        return result
+
+    def __get(self, client, url):
+        """ Retrieves a callable that sends a GET request, and checks that the request succeeds.
+
+        :param client: Client through which to send request.
+        :param url: URL to which to send request.
+        :return: Callable.
+        """
+        def get():
+            response = client.get(url, secure=True)
+            if response.status_code != 200:
+                raise CommandError('GET {u} returned status {s}'.format(u=url, s=response.status_code))
+        return get
+
+    def __post_json(self, client, url, data):
+        """ Retrieves a callable that sends an asynchronous POST request with JSON data, and checks that the request
+        succeeds.
+
+        :param client: Client through which to send request.
+        :param url: URL to which to send request.
+        :param data: Dictionary of JSON data.
+        :return: Callable.
+        """
+        def post():
+            response = client.post(url, json_dumps(data), content_type='application/json', secure=True)
+            if response.status_code != 200:
+                raise CommandError('POST {u} returned status {s}'.format(u=url, s=response.status_code))
+        return post
+
+    @staticmethod
+    def __get_search_results_url(client, url, data):
+        """ Submits a search form and retrieves the URL of the search results to which it redirects.
+
+        :param client: Client through which to submit search form.
+        :param url: URL of search form.
+        :param data: Dictionary of search form data.
+        :return: URL of search results.
+        """
+        response = client.post(url, data, secure=True)
+        if response.status_code != 302:
+            raise CommandError('Search through {u} returned status {s}'.format(u=url, s=response.status_code))
+        return response.url
+
+    def __run_searches(self, client, search, grouping_search):
+        """ Times the officer and command searches.
+
+        :param client: Client through which to send requests.
+        :param search: Search criteria for persons.
+        :param grouping_search: Search criteria for groupings.
+        :return: List of results.
+        """
+        return [
+            self.__time(
+                name=name,
+                group='searches',
+                func=self.__get(
+                    client=client,
+                    url=self.__get_search_results_url(client=client, url=reverse(view_name), data={'search': criteria})
+                )
+            ) for name, view_name, criteria in (
+                ('officer_search_results', 'profiles:officer_search', search),
+                ('command_search_results', 'profiles:command_search', grouping_search),
+            )
+        ]
+
+    def __run_profiles(self, client):
+        """ Times the officer and command profiles, for the records with the most links and a typical record.
+
+        :param client: Client through which to send requests.
+        :return: List of results.
+        """
+        results = []
+        officers = Person.objects.filter(is_law_enforcement=True).annotate(num=Count('person_incident'))
+        groupings = Grouping.objects.all().annotate(num=Count('person_grouping'))
+        for name, view_name, queryset in (
+            ('officer_profile', 'profiles:officer', officers),
+            ('command_profile', 'profiles:command', groupings)
+        ):
+            num_of_records = queryset.count()
+            if not num_of_records:
+                continue
+            for suffix, pk in (
+                ('busiest', queryset.order_by('-num', 'pk').values_list('pk', flat=True).first()),
+                ('typical', queryset.order_by('num', 'pk').values_list('pk', flat=True)[num_of_records // 2]),
+            ):
+                results.append(
+                    self.__time(
+                        name='{n}_{s}'.format(n=name, s=suffix),
+                        group='profiles',
+                        func=self.__get(client=client, url=reverse(view_name, kwargs={'pk': pk}))
+                    )
+                )
+        return results
+
+    def __run_wizard(self, client, search, grouping_search):
+        """ Times the data management wizard searches, through each strategy by which their tables of scores can be
+        defined.
+
+        Results for the temporary table strategy keep the names of earlier runs, so that they can be compared with
+        baselines. Results for other strategies are suffixed by the name of the strategy.
+
+        :param client: Client through which to send requests.
+        :param search: Search criteria for persons, incidents and content.
+        :param grouping_search: Search criteria for groupings.
+        :return: List of results.
+        """
+        results = []
+        for strategy in AbstractAnySearch.SCORE_TABLE_STRATEGIES:
+            with override_settings(FDP_SEARCH_SCORE_TABLE_STRATEGY=strategy):
+                for view_name, search_type, criteria in (
+                    ('changing:persons', WizardSearchForm.person_type, search),
+                    ('changing:incidents', WizardSearchForm.incident_type, search),
+                    ('changing:content', WizardSearchForm.content_type, search),
+                    ('changing:groupings', WizardSearchForm.grouping_type, grouping_search),
+                ):
+                    result = self.__time(
+                        name='wizard_{t}_search_results{s}'.format(
+                            t=search_type,
+                            s='' if strategy == AbstractAnySearch.TEMP_TABLE_STRATEGY else '_{s}'.format(s=strategy)
+                        ),
+                        group='wizard',
+                        func=self.__get(
+                            client=client,
+                            url=self.__get_search_results_url(
+                                client=client, url=reverse(view_name), data={'search': criteria, 'type': search_type}
+                            )
+                        )
+                    )
+                    result['strategy'] = strategy
+                    results.append(result)
+        return results
+
+    def __run_autocomplete(self, client, search, grouping_search):
+        """ Times the asynchronous endpoints populating the autocomplete fields in the data management wizard.
+
+        :param client: Client through which to send requests.
+        :param search: Search criteria for persons, incidents and attachments.
+        :param grouping_search: Search criteria for groupings.
+        :return: List of results.
+        """
+        return [
+            self.__time(
+                name=view_name.split(':')[1],
+                group='autocomplete',
+                func=self.__post_json(
+                    client=client, url=reverse(view_name), data={AbstractUrlValidator.JSON_SRCH_CRT_PARAM: criteria}
+                )
+            ) for view_name, criteria in (
+                ('changing:async_get_persons', search),
+                ('changing:async_get_groupings', grouping_search),
+                ('changing:async_get_incidents', search),
+                ('changing:async_get_attachments', 'Synthetic'),
+            )
+        ]
+
+    @staticmethod
+    def __get_import_rows(num_of_rows):
+        """ Retrieves the rows imported through each AirTable serializer, in the order in which they are imported.
+
+        Rows reference records imported through earlier serializers by their external IDs.
+
+        :param num_of_rows: Number of rows imported through each serializer.
+        :return: List of tuples (serializer class, list of rows).
+        """
+        def e(t, i):
+            return 'benchmark-{t}-{i}'.format(t=t, i=i % num_of_rows)
+
+        def d(start_year, end_year):
+            return {
+                'start_year': str(start_year), 'start_month': '0', 'start_day': '0',
+                'end_year': str(end_year), 'end_month': '0', 'end_day': '0'
+            }
+        rows = range(num_of_rows)
+        return [
+            (CountyAirTableSerializer, [
+                {'external_id': e('county', i), 'name': 'Benchmark County {i}'.format(i=i), 'state': 'Benchmark'}
+                for i in rows
+            ]),
+            (GroupingAirTableSerializer, [
+                {
+                    'external_id': e('grouping', i), 'name': 'Benchmark Grouping {i}'.format(i=i),
+                    'unsplit_aliases': 'BG{i}'.format(i=i), 'unsplit_counties': e('county', i),
+                    'belongs_to_grouping_by_external_id': e('grouping', 0) if i else None,
+                    'inception_date_mdy': '01/15/1990'
+                } for i in rows
+            ]),
+            (PersonAirTableSerializer, [
+                {
+                    'external_id': e('person', i), 'name': 'Benchmark Person {i}'.format(i=i),
+                    'law_enforcement_checkbox': 'checked', 'unsplit_aliases': 'Bench {i}, B. Person'.format(i=i),
+                    'identifier_type': 'Tax ID', 'identifier': str(800000 + i), 'person_title': 'Police Officer',
+                    'unsplit_groupings': e('grouping', i)
+                } for i in rows
+            ]),
+            (IncidentAirTableSerializer, [
+                {
+                    'external_id': e('incident', i), 'description': 'Benchmark incident {i}'.format(i=i),
+                    'incident_date': '2019-03-{d:02d}'.format(d=i % 28 + 1), 'encounter_reason': 'Traffic stop',
+                    'unsplit_incident_tags': 'Benchmark', 'unsplit_persons': e('person', i)
+                } for i in rows
+            ]),
+            (ContentAirTableSerializer, [
+                {
+                    'external_id': e('content', i), 'name': 'Benchmark content {i}'.format(i=i), 'type': 'Complaint',
+                    'identifier_type': 'Case Number', 'identifier': 'BENCH-{i}'.format(i=i),
+                    'unsplit_incidents': e('incident', i), 'unsplit_persons': e('person', i)
+                } for i in rows
+            ]),
+            (AllegationAirTableSerializer, [
+                {
+                    'external_id': e('allegation', i), 'content_external_id': e('content', i),
+                    'person_external_id': e('person', i), 'allegation': 'Force',
+                    'allegation_outcome': 'Unsubstantiated'
+                } for i in rows
+            ]),
+            (PersonGroupingAirTableSerializer, [
+                {
+                    'external_id': e('person-grouping', i), 'person': e('person', i), 'grouping': e('grouping', i + 1),
+                    'type': 'Member', 'is_inactive_checkbox': 'checked', **d(2010, 2015)
+                } for i in rows
+            ]),
+            (PersonTitleAirTableSerializer, [
+                {
+                    'external_id': e('person-title', i), 'person': e('person', i), 'title': 'Detective',
+                    'as_of_checkbox': 'checked', **d(2015, 0)
+                } for i in rows
+            ]),
+            (PersonPaymentAirTableSerializer, [
+                {
+                    'external_id': e('person-payment', i), 'person': e('person', i), 'county': e('county', i),
+                    'base_salary': '65000.00', **d(2019, 2019)
+                } for i in rows
+            ]),
+            (PersonIncidentAirTableSerializer, [
+                {
+                    'external_id': e('person-incident', i), 'person': e('person', i), 'incident': e('incident', i + 1),
+                    'situation_role': 'Witness'
+                } for i in rows
+            ]),
+            (ContentPersonAirTableSerializer, [
+                {
+                    'external_id': e('content-person', i), 'content': e('content', i), 'person': e('person', i + 1),
+                    'situation_role': 'Witness', 'is_guess_checkbox': 'checked'
+                } for i in rows
+            ]),
+            (ContentIdentifierAirTableSerializer, [
+                {
+                    'external_id': e('content-identifier', i), 'content': e('content', i),
+                    'content_identifier_type': 'Docket', 'identifier': 'DOCKET-{i}'.format(i=i)
+                } for i in rows
+            ]),
+            (AttachmentAirTableSerializer, [
+                {
+                    'external_id': e('attachment', i), 'name': 'Benchmark attachment {i}'.format(i=i),
+                    'type': 'Document', 'link': 'https://localhost/benchmark/{i}'.format(i=i),
+                    'unsplit_content': e('content', i)
+                } for i in rows
+            ]),
+        ]
+
+    @staticmethod
+    def __import(serializer_class, rows):
+        """ Imports rows through an AirTable serializer, in the same manner as the Django Data Wizard package.
+
+        :param serializer_class: AirTable serializer class.
+        :param rows: List of rows, each a dictionary of data to import.
+        :return: Nothing.
+        """
+        for row in rows:
+            serializer = serializer_class(data=dict(row))
+            if not serializer.is_valid():
+                raise CommandError(
+                    '{s} could not import {r}: {e}'.format(s=serializer_class.__name__, r=row, e=serializer.errors)
+                )
+            serializer.save()
+
+    def __run_imports(self, num_of_rows):
+        """ Times the imports through each AirTable serializer.
+
+        Serializers are timed in the order of their dependencies, and all imported records are rolled back after each
+        run, so that every run imports the same rows into the same database.
+
+        :param num_of_rows: Number of rows imported through each serializer.
+        :return: List of results.
+        """
+        import_rows = self.__get_import_rows(num_of_rows=num_of_rows)
+        durations_ms = {serializer_class: [] for serializer_class, _ in import_rows}
+        num_of_queries = {serializer_class: 0 for serializer_class, _ in import_rows}
+        for run_num in range(self.warmup + self.repeat):
+            savepoint_id = transaction.savepoint()
+            try:
+                for serializer_class, rows in import_rows:
+                    with QueryRecorder(num_of_slowest=0) as recorder:
+                        start = perf_counter()
+                        self.__import(serializer_class=serializer_class, rows=rows)
+                        duration_ms = (perf_counter() - start) * 1000
+                    if run_num >= self.warmup:
+                        durations_ms[serializer_class].append(duration_ms)
+                        num_of_queries[serializer_class] = max(
+                            num_of_queries[serializer_class], recorder.num_of_queries
+                        )
+            finally:
+                transaction.savepoint_rollback(savepoint_id)
+        results = []
+        for serializer_class, _ in import_rows:
+            ms = durations_ms[serializer_class]
+            results.append({
+                'name': 'import_{s}'.format(s=serializer_class.__name__),
+                'group': 'imports',
+                'repeat': self.repeat,
+                'num_of_rows': num_of_rows,
+                'min_ms': round(min(ms), 3),
+                'median_ms': round(median(ms), 3),
+                'mean_ms': round(mean(ms), 3),
+                'max_ms': round(max(ms), 3),
+                'median_ms_per_row': round(median(ms) / num_of_rows, 3),
+                'num_of_queries': num_of_queries[serializer_class]
+            })
+            self.stderr.write('{n}: {m:.1f} ms median for {r} rows, {q} queries'.format(
+                n=results[-1]['name'], m=results[-1]['median_ms'], r=num_of_rows, q=results[-1]['num_of_queries']
+            ))
+        return results
+
+    @staticmethod
+    def __read_baseline(baseline_path):
+        """ Reads the results from a previous run with which to compare this run.
+
+        :param baseline_path: Path of results from a previous run.
+        :return: Dictionary mapping names of benchmarks to their results.
+        """
+        try:
+            with open(baseline_path, 'r') as baseline_file:
+                return {result['name']: result for result in json_load(baseline_file)['results']}
+        except (OSError, ValueError, KeyError, TypeError) as err:
+            raise CommandError('Baseline {p} could not be read: {e}'.format(p=baseline_path, e=err))
+
+    @staticmethod
+    def __compare(results, baseline):
+        """ Compares results with the results from a previous run.
+
+        :param results: List of results for this run.
+        :param baseline: Dictionary mapping names of benchmarks to their results from a previous run.
+        :return: Nothing.
+        """
+        for result in results:
+            baseline_result = baseline.get(result['name'])
+            if baseline_result and baseline_result.get('median_ms'):
+                result['baseline_median_ms'] = baseline_result['median_ms']
+                result['baseline_num_of_queries'] = baseline_result.get('num_of_queries')
+                result['median_ratio'] = round(result['median_ms'] / baseline_result['median_ms'], 3)
+
+    def handle(self, *args, **options):
+        """ Runs the benchmarks.
+
+        :param args: Positional arguments.
+        :param options: Keyword arguments.
+        :return: Nothing.
+        """
+        if not settings.DEBUG and not options['force']:
+            raise CommandError('Benchmarks are only run if DEBUG is True, or with --force')
+        self.repeat = options['repeat']
+        self.warmup = options['warmup']
+        if self.repeat < 1 or self.warmup < 0 or options['import_rows'] < 1:
+            raise CommandError('Repeat and import rows must be at least 1, and warmup must be at least 0')
+        groups = options['groups'] or BENCHMARK_GROUPS
+        baseline = self.__read_baseline(baseline_path=options['baseline']) if options['baseline'] else None
+        search = options['search'] or get_default_search()
+        grouping_search = options['grouping_search'] or get_default_grouping_search()
+        dataset = {
+            model.__name__: model.objects.all().count() for model in (Person, Grouping, Incident, Content, Attachment)
+        }
+        results = []
+        try:
+            with transaction.atomic():
+                client = create_benchmark_client()
+                if 'searches' in groups:
+                    results.extend(self.__run_searches(client=client, search=search, grouping_search=grouping_search))
+                if 'profiles' in groups:
+                    results.extend(self.__run_profiles(client=client))
+                if 'wizard' in groups:
+                    results.extend(self.__run_wizard(client=client, search=search, grouping_search=grouping_search))
+                if 'autocomplete' in groups:
+                    results.extend(
+                        self.__run_autocomplete(client=client, search=search, grouping_search=grouping_search)
+                    )
+                if 'imports' in groups:
+                    results.extend(self.__run_imports(num_of_rows=options['import_rows']))
+                # roll back the temporary user, its sessions, and any other records that were created
+                raise _RollbackBenchmarks()
+        except _RollbackBenchmarks:
+            pass
+        if baseline is not None:
+            self.__compare(results=results, baseline=baseline)
+        report = json_dumps({
+            'commit': self.__get_commit(),
+            'created': now().isoformat(),
+            'database': connection.vendor,
+            'dataset': dataset,
+            'search': search,
+            'grouping_search': grouping_search,
+            'results': results
+        }, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as output_file:
+                output_file.write(report)
+            self.stderr.write('Results were written to {p}'.format(p=options['output']))
+        else:
+            self.stdout.write(report)
@@ -0,0 +1,18 @@
+# Generated by Django 3.1.7 on 2026-10-18 21:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_auto_20210811_1857'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='personphoto',
+            name='has_thumbnails',
+            field=models.BooleanField(default=False, editable=False, help_text='Select if thumbnails have been generated for the photo', verbose_name='has thumbnails'),
+        ),
+    ]
@@ -0,0 +1,330 @@
+# Generated by Django 3.1.7 on 2026-10-18 22:38
+
+import django.contrib.postgres.fields.ranges
+import django.contrib.postgres.indexes
+from django.db import migrations, models
+
+
+#: Key for a date from its year, month and day components in raw SQL, see AbstractExactDateBounded.get_date_key(...)
+DATE_KEY_SQL = '"{p}_year" * 10000 + "{p}_month" * 100 + "{p}_day"'
+
+#: First day of the month of a date in raw SQL
+FIRST_OF_MONTH_SQL = 'make_date("{p}_year", {m}, 1)'
+
+#: Number of days in the month of a date in raw SQL
+DAYS_IN_MONTH_SQL = "EXTRACT(DAY FROM {f} + INTERVAL '1 month' - INTERVAL '1 day')::integer"
+
+
+def get_backfill_sql(table):
+    """ Retrieves the SQL statement setting the date keys and date range from the individual date components for
+    existing records, in the same way as AbstractExactDateBounded.set_date_keys(...).
+
+    :param table: Name of table for which to set date keys and date range.
+    :return: SQL statement.
+    """
+    start_first = FIRST_OF_MONTH_SQL.format(p='start', m='LEAST(GREATEST("start_month", 1), 12)')
+    start_days = DAYS_IN_MONTH_SQL.format(f=start_first)
+    end_first = FIRST_OF_MONTH_SQL.format(
+        p='end', m='CASE WHEN "end_month" = 0 THEN 12 ELSE LEAST("end_month", 12) END'
+    )
+    end_days = DAYS_IN_MONTH_SQL.format(f=end_first)
+    lower = 'CASE WHEN "start_year" = 0 THEN NULL ELSE {f} + LEAST(GREATEST("start_day", 1), {d}) - 1 END'.format(
+        f=start_first, d=start_days
+    )
+    upper = 'CASE WHEN "end_year" = 0 THEN NULL ELSE {f} + LEAST(CASE WHEN "end_day" = 0 THEN {d} ELSE "end_day" ' \
+            'END, {d}) - 1 END'.format(f=end_first, d=end_days)
+    return """
+        UPDATE "{t}" SET
+            "start_date_key" = {s},
+            "end_date_key" = {e},
+            "sort_date_key" = CASE WHEN "end_year" > "start_year" THEN {e} ELSE {s} END,
+            "date_range" = CASE
+                WHEN ("start_year" = 0 AND "end_year" = 0) OR ({l}) > ({u}) THEN NULL
+                ELSE daterange({l}, {u}, '[]')
+            END
+    """.format(t=table, s=DATE_KEY_SQL.format(p='start'), e=DATE_KEY_SQL.format(p='end'), l=lower, u=upper)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_person_photo_has_thumbnails'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='incident',
+            options={'ordering': ['start_date_key', 'end_date_key', 'location'], 'verbose_name': 'Incident'},
+        ),
+        migrations.AlterModelOptions(
+            name='persongrouping',
+            options={'ordering': ['start_date_key', 'end_date_key', 'grouping', 'person'], 'verbose_name': 'Link between person and grouping', 'verbose_name_plural': 'Links between people and groupings'},
+        ),
+        migrations.AlterModelOptions(
+            name='personidentifier',
+            options={'ordering': ['person', 'person_identifier_type', 'start_date_key', 'end_date_key'], 'verbose_name': 'Person identifier'},
+        ),
+        migrations.AlterModelOptions(
+            name='personpayment',
+            options={'ordering': ['person', 'start_date_key', 'end_date_key'], 'verbose_name': 'person payment'},
+        ),
+        migrations.AlterModelOptions(
+            name='persontitle',
+            options={'ordering': ['person', 'start_date_key', 'end_date_key'], 'verbose_name': 'Person title'},
+        ),
+        migrations.AddField(
+            model_name='groupingrelationship',
+            name='date_range',
+            field=django.contrib.postgres.fields.ranges.DateRangeField(blank=True, editable=False, help_text='Earliest possible start date through latest possible end date', null=True, verbose_name='date range'),
+        ),
+        migrations.AddField(
+            model_name='groupingrelationship',
+            name='end_date_key',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='End date as YYYYMMDD, with unknown components as 0', verbose_name='ending date key'),
+        ),
+        migrations.AddField(
+            model_name='groupingrelationship',
+            name='sort_date_key',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='End date key if end year is after start year, otherwise start date key', verbose_name='sorting date key'),
+        ),
+        migrations.AddField(
+            model_name='groupingrelationship',
+            name='start_date_key',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Start date as YYYYMMDD, with unknown components as 0', verbose_name='starting date key'),
+        ),
+        migrations.AddField(
+            model_name='incident',
+            name='date_range',
+            field=django.contrib.postgres.fields.ranges.DateRangeField(blank=True, editable=False, help_text='Earliest possible start date through latest possible end date', null=True, verbose_name='date range'),
+        ),
+        migrations.AddField(
+            model_name='incident',
+            name='end_date_key',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='End date as YYYYMMDD, with unknown components as 0', verbose_name='ending date key'),
+        ),
+        migrations.AddField(
+            model_name='incident',
+            name='sort_date_key',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='End date key if end year is after start year, otherwise start date key', verbose_name='sorting date key'),
+        ),
+        migrations.AddField(
+            model_name='incident',
+            name='start_date_key',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Start date as YYYYMMDD, with unknown components as 0', verbose_name='starting date key'),
+        ),
+        migrations.AddField(
+            model_name='persongrouping',
+            name='date_range',
+            field=django.contrib.postgres.fields.ranges.DateRangeField(blank=True, editable=False, help_text='Earliest possible start date through latest possible end date', null=True, verbose_name='date range'),
+        ),
+        migrations.AddField(
+            model_name='persongrouping',
+            name='end_date_key',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='End date as YYYYMMDD, with unknown components as 0', verbose_name='ending date key'),
+        ),
+        migrations.AddField(
+            model_name='persongrouping',
+            name='sort_date_key',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='End date key if end year is after start year, otherwise start date key', verbose_name='sorting date key'),
+        ),
+        migrations.AddField(
+            model_name='persongrouping',
+            name='start_date_key',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Start date as YYYYMMDD, with unknown components as 0', verbose_name='starting date key'),
+        ),
+        migrations.AddField(
+            model_name='personidentifier',
+            name='date_range',
+            field=django.contrib.postgres.fields.ranges.DateRangeField(blank=True, editable=False, help_text='Earliest possible start date through latest possible end date', null=True, verbose_name='date range'),
+        ),
+        migrations.AddField(
+            model_name='personidentifier',
+            name='end_date_key',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='End date as YYYYMMDD, with unknown components as 0', verbose_name='ending date key'),
+        ),
+        migrations.AddField(
+            model_name='personidentifier',
+            name='sort_date_key',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='End date key if end year is after start year, otherwise start date key', verbose_name='sorting date key'),
+        ),
+        migrations.AddField(
+            model_name='personidentifier',
+            name='start_date_key',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Start date as YYYYMMDD, with unknown components as 0', verbose_name='starting date key'),
+        ),
+        migrations.AddField(
+            model_name='personpayment',
+            name='date_range',
+            field=django.contrib.postgres.fields.ranges.DateRangeField(blank=True, editable=False, help_text='Earliest possible start date through latest possible end date', null=True, verbose_name='date range'),
+        ),
+        migrations.AddField(
+            model_name='personpayment',
+            name='end_date_key',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='End date as YYYYMMDD, with unknown components as 0', verbose_name='ending date key'),
+        ),
+        migrations.AddField(
+            model_name='personpayment',
+            name='sort_date_key',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='End date key if end year is after start year, otherwise start date key', verbose_name='sorting date key'),
+        ),
+        migrations.AddField(
+            model_name='personpayment',
+            name='start_date_key',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Start date as YYYYMMDD, with unknown components as 0', verbose_name='starting date key'),
+        ),
+        migrations.AddField(
+            model_name='personrelationship',
+            name='date_range',
+            field=django.contrib.postgres.fields.ranges.DateRangeField(blank=True, editable=False, help_text='Earliest possible start date through latest possible end date', null=True, verbose_name='date range'),
+        ),
+        migrations.AddField(
+            model_name='personrelationship',
+            name='end_date_key',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='End date as YYYYMMDD, with unknown components as 0', verbose_name='ending date key'),
+        ),
+        migrations.AddField(
+            model_name='personrelationship',
+            name='sort_date_key',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='End date key if end year is after start year, otherwise start date key', verbose_name='sorting date key'),
+        ),
+        migrations.AddField(
+            model_name='personrelationship',
+            name='start_date_key',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Start date as YYYYMMDD, with unknown components as 0', verbose_name='starting date key'),
+        ),
+        migrations.AddField(
+            model_name='persontitle',
+            name='date_range',
+            field=django.contrib.postgres.fields.ranges.DateRangeField(blank=True, editable=False, help_text='Earliest possible start date through latest possible end date', null=True, verbose_name='date range'),
+        ),
+        migrations.AddField(
+            model_name='persontitle',
+            name='end_date_key',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='End date as YYYYMMDD, with unknown components as 0', verbose_name='ending date key'),
+        ),
+        migrations.AddField(
+            model_name='persontitle',
+            name='sort_date_key',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='End date key if end year is after start year, otherwise start date key', verbose_name='sorting date key'),
+        ),
+        migrations.AddField(
+            model_name='persontitle',
+            name='start_date_key',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Start date as YYYYMMDD, with unknown components as 0', verbose_name='starting date key'),
+        ),
+        migrations.RunSQL(sql=get_backfill_sql(table='fdp_grouping_relationship'), reverse_sql=migrations.RunSQL.noop),
+        migrations.RunSQL(sql=get_backfill_sql(table='fdp_incident'), reverse_sql=migrations.RunSQL.noop),
+        migrations.RunSQL(sql=get_backfill_sql(table='fdp_person_grouping'), reverse_sql=migrations.RunSQL.noop),
+        migrations.RunSQL(sql=get_backfill_sql(table='fdp_person_identifier'), reverse_sql=migrations.RunSQL.noop),
+        migrations.RunSQL(sql=get_backfill_sql(table='fdp_person_payment'), reverse_sql=migrations.RunSQL.noop),
+        migrations.RunSQL(sql=get_backfill_sql(table='fdp_person_relationship'), reverse_sql=migrations.RunSQL.noop),
+        migrations.RunSQL(sql=get_backfill_sql(table='fdp_person_title'), reverse_sql=migrations.RunSQL.noop),
+        migrations.AddIndex(
+            model_name='groupingrelationship',
+            index=models.Index(fields=['start_date_key'], name='groupingrelationship_start_key'),
+        ),
+        migrations.AddIndex(
+            model_name='groupingrelationship',
+            index=models.Index(fields=['end_date_key'], name='groupingrelationship_end_key'),
+        ),
+        migrations.AddIndex(
+            model_name='groupingrelationship',
+            index=django.contrib.postgres.indexes.GistIndex(fields=['date_range'], name='groupingrelationship_range'),
+        ),
+        migrations.AddIndex(
+            model_name='incident',
+            index=models.Index(fields=['start_date_key'], name='incident_start_key'),
+        ),
+        migrations.AddIndex(
+            model_name='incident',
+            index=models.Index(fields=['end_date_key'], name='incident_end_key'),
+        ),
+        migrations.AddIndex(
+            model_name='incident',
+            index=django.contrib.postgres.indexes.GistIndex(fields=['date_range'], name='incident_range'),
+        ),
+        migrations.AddIndex(
+            model_name='incident',
+            index=models.Index(fields=['-sort_date_key'], name='incident_sort'),
+        ),
+        migrations.AddIndex(
+            model_name='persongrouping',
+            index=models.Index(fields=['start_date_key'], name='persongrouping_start_key'),
+        ),
+        migrations.AddIndex(
+            model_name='persongrouping',
+            index=models.Index(fields=['end_date_key'], name='persongrouping_end_key'),
+        ),
+        migrations.AddIndex(
+            model_name='persongrouping',
+            index=django.contrib.postgres.indexes.GistIndex(fields=['date_range'], name='persongrouping_range'),
+        ),
+        migrations.AddIndex(
+            model_name='persongrouping',
+            index=models.Index(fields=['person', '-sort_date_key'], name='persongrouping_person_sort'),
+        ),
+        migrations.AddIndex(
+            model_name='persongrouping',
+            index=models.Index(fields=['grouping', '-sort_date_key'], name='persongrouping_grouping_sort'),
+        ),
+        migrations.AddIndex(
+            model_name='personidentifier',
+            index=models.Index(fields=['start_date_key'], name='personidentifier_start_key'),
+        ),
+        migrations.AddIndex(
+            model_name='personidentifier',
+            index=models.Index(fields=['end_date_key'], name='personidentifier_end_key'),
+        ),
+        migrations.AddIndex(
+            model_name='personidentifier',
+            index=django.contrib.postgres.indexes.GistIndex(fields=['date_range'], name='personidentifier_range'),
+        ),
+        migrations.AddIndex(
+            model_name='personidentifier',
+            index=models.Index(fields=['person', '-sort_date_key'], name='personidentifier_person_sort'),
+        ),
+        migrations.AddIndex(
+            model_name='personpayment',
+            index=models.Index(fields=['start_date_key'], name='personpayment_start_key'),
+        ),
+        migrations.AddIndex(
+            model_name='personpayment',
+            index=models.Index(fields=['end_date_key'], name='personpayment_end_key'),
+        ),
+        migrations.AddIndex(
+            model_name='personpayment',
+            index=django.contrib.postgres.indexes.GistIndex(fields=['date_range'], name='personpayment_range'),
+        ),
+        migrations.AddIndex(
+            model_name='personpayment',
+            index=models.Index(fields=['person', '-sort_date_key'], name='personpayment_person_sort'),
+        ),
+        migrations.AddIndex(
+            model_name='personrelationship',
+            index=models.Index(fields=['start_date_key'], name='personrelationship_start_key'),
+        ),
+        migrations.AddIndex(
+            model_name='personrelationship',
+            index=models.Index(fields=['end_date_key'], name='personrelationship_end_key'),
+        ),
+        migrations.AddIndex(
+            model_name='personrelationship',
+            index=django.contrib.postgres.indexes.GistIndex(fields=['date_range'], name='personrelationship_range'),
+        ),
+        migrations.AddIndex(
+            model_name='persontitle',
+            index=models.Index(fields=['start_date_key'], name='persontitle_start_key'),
+        ),
+        migrations.AddIndex(
+            model_name='persontitle',
+            index=models.Index(fields=['end_date_key'], name='persontitle_end_key'),
+        ),
+        migrations.AddIndex(
+            model_name='persontitle',
+            index=django.contrib.postgres.indexes.GistIndex(fields=['date_range'], name='persontitle_range'),
+        ),
+        migrations.AddIndex(
+            model_name='persontitle',
+            index=models.Index(fields=['person', '-sort_date_key'], name='persontitle_person_sort'),
+        ),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 3.1.7 on 2026-10-18 23:05
+
+import django.contrib.postgres.fields
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def build_search_documents(apps, schema_editor):
+    """ Builds the search documents for existing persons and groupings.
+
+    Search documents are built through raw SQL, so the statements of the current models can be used.
+
+    :param apps: Registry of historical models.
+    :param schema_editor: Schema editor through which the migration is applied.
+    :return: Nothing.
+    """
+    from core.search_documents import rebuild_search_documents
+    rebuild_search_documents(using=schema_editor.connection.alias)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_date_keys'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PersonSearchDocument',
+            fields=[
+                ('person', models.OneToOneField(help_text='Person that is described by the search document', on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='search_document', related_query_name='search_document', serialize=False, to='core.person', verbose_name='person')),
+                ('name', models.TextField(blank=True, help_text='Normalised name of person', verbose_name='name')),
+                ('aliases', django.contrib.postgres.fields.ArrayField(base_field=models.TextField(), blank=True, default=list, help_text='Normalised names of active aliases for person', size=None, verbose_name='aliases')),
+                ('identifiers', django.contrib.postgres.fields.ArrayField(base_field=models.TextField(), blank=True, default=list, help_text='Normalised active identifiers for person', size=None, verbose_name='identifiers')),
+                ('title_ids', django.contrib.postgres.fields.ArrayField(base_field=models.IntegerField(), blank=True, default=list, help_text='Primary keys of titles linked to person through active links', size=None, verbose_name='titles')),
+                ('grouping_names', django.contrib.postgres.fields.ArrayField(base_field=models.TextField(), blank=True, default=list, help_text='Normalised names of active groupings linked to person through active links', size=None, verbose_name='grouping names')),
+                ('grouping_aliases', django.contrib.postgres.fields.ArrayField(base_field=models.TextField(), blank=True, default=list, help_text='Normalised names of active aliases for the groupings linked to person', size=None, verbose_name='grouping aliases')),
+                ('county_ids', django.contrib.postgres.fields.ArrayField(base_field=models.IntegerField(), blank=True, default=list, help_text='Primary keys of counties in which the groupings linked to person operate', size=None, verbose_name='counties')),
+                ('visibility', models.PositiveSmallIntegerField(default=1, help_text='Whether person is visible to all users, or restricted by confidentiality', verbose_name='visibility')),
+            ],
+            options={
+                'verbose_name': 'person search document',
+                'db_table': 'fdp_person_search_document',
+            },
+        ),
+        migrations.CreateModel(
+            name='GroupingSearchDocument',
+            fields=[
+                ('grouping', models.OneToOneField(help_text='Grouping that is described by the search document', on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='search_document', related_query_name='search_document', serialize=False, to='core.grouping', verbose_name='grouping')),
+                ('name', models.TextField(blank=True, help_text='Normalised name of grouping', verbose_name='name')),
+                ('code', models.TextField(blank=True, help_text='Normalised code of grouping', verbose_name='code')),
+                ('aliases', django.contrib.postgres.fields.ArrayField(base_field=models.TextField(), blank=True, default=list, help_text='Normalised names of active aliases for grouping', size=None, verbose_name='aliases')),
+                ('has_law_enforcement', models.BooleanField(default=False, help_text='True if grouping is linked to at least one law enforcement person', verbose_name='has law enforcement')),
+            ],
+            options={
+                'verbose_name': 'grouping search document',
+                'db_table': 'fdp_grouping_search_document',
+            },
+        ),
+        migrations.RunPython(code=build_search_documents, reverse_code=migrations.RunPython.noop),
+    ]
@@ -2,16 +2,18 @@ from django.db import models
 from django.core.exceptions import ValidationError
 from django.utils.translation import ugettext_lazy as _
 from django.conf import settings
-from django.db.models import Q, Prefetch, Exists
-from django.db.models.expressions import RawSQL, Subquery, OuterRef
+from django.db.models import Q, Prefetch, Exists, Count
+from django.db.models.expressions import Subquery, OuterRef
 from django.apps import apps
-from inheritable.models import Archivable, Descriptable, AbstractForeignKeyValidator, \
+from django.contrib.postgres.fields import ArrayField
+from inheritable.models import Metable, Archivable, Descriptable, AbstractForeignKeyValidator, \
     AbstractExactDateBounded, AbstractKnownInfo, AbstractAlias, AbstractAsOfDateBounded, Confidentiable, \
     AbstractFileValidator, AbstractUrlValidator, Linkable
 from supporting.models import State, Trait, PersonRelationshipType, Location, PersonIdentifierType, County, \
     Title, GroupingRelationshipType, PersonGroupingType, IncidentLocationType, EncounterReason, IncidentTag, \
     PersonIncidentTag, LeaveStatus, SituationRole, TraitType
 from fdpuser.models import FdpOrganization
+from .thumbnails import generate_thumbnails
 from datetime import date
 
 
@@ -419,6 +421,12 @@ class Person(Confidentiable, Descriptable):
     def get_officer_profile_queryset(cls, pk, user):
         """ Filters the queryset for a particular user (depending on whether the user is an administrator, etc.)
 
+        Only the identification of the officer is retrieved. The payroll, associates, snapshot and misconducts are
+        retrieved separately, see get_officer_payments_queryset(...), get_officer_relationships_queryset(...),
+        get_officer_misconducts_queryset(...) and get_officer_contents_queryset(...).
+
+        :param pk: Primary key used to identify the officer.
+        :param user: User retrieving the officer.
         :return: Filtered queryset from which officer will be retrieved.
         """
         # ensure that only officers are retrieved
@@ -433,20 +441,7 @@ class Person(Confidentiable, Descriptable):
                 'person_identifiers',
                 queryset=PersonIdentifier.active_objects.filter(
                     **PersonIdentifier.get_active_filter(prefix='person_identifier_type')
-                ).select_related('person_identifier_type').order_by(
-                    RawSQL(
-                        PersonIdentifier.order_by_sql_year.format(t=PersonIdentifier.get_db_table(), o=''),
-                        params=[]
-                    ).desc(),
-                    RawSQL(
-                        PersonIdentifier.order_by_sql_month.format(t=PersonIdentifier.get_db_table(), o=''),
-                        params=[]
-                    ).desc(),
-                    RawSQL(
-                        PersonIdentifier.order_by_sql_day.format(t=PersonIdentifier.get_db_table(), o=''),
-                        params=[]
-                    ).desc()
-                ),
+                ).select_related('person_identifier_type').order_by('-sort_date_key'),
                 to_attr='officer_identifiers'
             ),
             Prefetch(
@@ -456,20 +451,9 @@ class Person(Confidentiable, Descriptable):
                     Q(**Grouping.get_active_filter(prefix='grouping'))
                     &
                     Q(Q(type__isnull=True) | Q(**PersonGroupingType.get_active_filter(prefix='type'))),
-                ).select_related(*PersonGrouping.get_select_related()).prefetch_related('grouping__counties').order_by(
-                    RawSQL(
-                        PersonGrouping.order_by_sql_year.format(t=PersonGrouping.get_db_table(), o=''),
-                        params=[]
-                    ).desc(),
-                    RawSQL(
-                        PersonGrouping.order_by_sql_month.format(t=PersonGrouping.get_db_table(), o=''),
-                        params=[]
-                    ).desc(),
-                    RawSQL(
-                        PersonGrouping.order_by_sql_day.format(t=PersonGrouping.get_db_table(), o=''),
-                        params=[]
-                    ).desc()
-                ),
+                ).select_related(
+                    *PersonGrouping.get_select_related()
+                ).prefetch_related('grouping__counties').order_by('-sort_date_key'),
                 to_attr='officer_commands'
             ),
             Prefetch(
@@ -483,130 +467,186 @@ class Person(Confidentiable, Descriptable):
                 'person_titles',
                 queryset=PersonTitle.active_objects.filter(
                     **Title.get_active_filter(prefix='title')
-                ).select_related('title').order_by(
-                    RawSQL(
-                        PersonTitle.order_by_sql_year.format(t=PersonTitle.get_db_table(), o=''),
-                        params=[]
-                    ).desc(),
-                    RawSQL(
-                        PersonTitle.order_by_sql_month.format(t=PersonTitle.get_db_table(), o=''),
-                        params=[]
-                    ).desc(),
-                    RawSQL(
-                        PersonTitle.order_by_sql_day.format(t=PersonTitle.get_db_table(), o=''),
-                        params=[]
-                    ).desc()
-                ),
+                ).select_related('title').order_by('-sort_date_key'),
                 to_attr='officer_titles'
+            )
+        )
+        return qs
+
+    @classmethod
+    def get_officer_payments_queryset(cls, pk, user):
+        """ Retrieves the payroll of an officer, for the Payroll section of the officer profile.
+
+        Assumes that the user's access to the officer was already verified, e.g. through
+        get_officer_profile_queryset(...).
+
+        :param pk: Primary key used to identify the officer.
+        :param user: User retrieving the payroll.
+        :return: Person payment queryset, most recent first.
+        """
+        return PersonPayment.active_objects.filter(
+            Q(person_id=pk)
+            &
+            Q(Q(county__isnull=True) | Q(**County.get_active_filter(prefix='county')))
+            &
+            Q(Q(leave_status__isnull=True) | Q(**LeaveStatus.get_active_filter(prefix='leave_status')))
+        ).select_related('county', 'leave_status').order_by('-sort_date_key')
+
+    @classmethod
+    def get_officer_relationships_queryset(cls, pk, user, for_object_person):
+        """ Retrieves the relationships of an officer with other persons, for the Associates section of the officer
+        profile.
+
+        Assumes that the user's access to the officer was already verified, e.g. through
+        get_officer_profile_queryset(...).
+
+        :param pk: Primary key used to identify the officer.
+        :param user: User retrieving the relationships.
+        :param for_object_person: True if the officer is the object person in the relationships, false if the officer is
+        the subject person in the relationships.
+        :return: Person relationship queryset.
+        """
+        officer = 'object_person_id' if for_object_person else 'subject_person_id'
+        return cls.__get_person_relationship_query(user=user, for_object_person=for_object_person).filter(
+            **{officer: pk}
+        )
+
+    @classmethod
+    def get_officer_misconducts_queryset(cls, pk, user):
+        """ Retrieves the incidents linked to an officer, together with their tags, other officers and content, for the
+        Snapshot and Misconduct sections of the officer profile.
+
+        Assumes that the user's access to the officer was already verified, e.g. through
+        get_officer_profile_queryset(...).
+
+        :param pk: Primary key used to identify the officer.
+        :param user: User retrieving the incidents.
+        :return: Person incident queryset.
+        """
+        return cls.get_person_incident_query(
+            user=user, filter_dict={'person_id': pk}, person_pk=None, person_filter_by_dict=None
+        ).prefetch_related(
+            Prefetch(
+                'incident__tags',
+                queryset=IncidentTag.active_objects.all(),
+                to_attr='officer_incident_tags'
             ),
             Prefetch(
-                'person_incidents',
-                queryset=(cls.get_person_incident_query(
-                    user=user, filter_dict=None, person_pk=None, person_filter_by_dict=None
-                )).prefetch_related(
-                    Prefetch(
-                        'incident__tags',
-                        queryset=IncidentTag.active_objects.all(),
-                        to_attr='officer_incident_tags'
-                    ),
-                    Prefetch(
-                        'tags',
-                        queryset=PersonIncidentTag.active_objects.all(),
-                        to_attr='officer_person_incident_tags'
-                    ),
-                    Prefetch(
-                        'incident__person_incidents',
-                        queryset=cls.get_person_incident_query(
-                            user=user,
-                            filter_dict=None,
-                            person_pk=pk,
-                            person_filter_by_dict={'pk': OuterRef('person_id'), 'is_law_enforcement': True}
-                        ),
-                        to_attr='officer_other_persons'
-                    ),
-                    Prefetch(
-                        'incident__contents',
-                        queryset=cls.__get_content_query(
-                            user=user,
-                            filter_by_dict={},
-                            person_filter_dict={'pk': pk}
-                        ),
-                        to_attr='officer_contents'
-                    )
-                ),
-                to_attr='officer_misconducts'
+                'tags',
+                queryset=PersonIncidentTag.active_objects.all(),
+                to_attr='officer_person_incident_tags'
             ),
             Prefetch(
-                'person_payments',
-                queryset=PersonPayment.active_objects.filter(
-                    Q(Q(county__isnull=True) | Q(**County.get_active_filter(prefix='county')))
-                    &
-                    Q(Q(leave_status__isnull=True) | Q(**LeaveStatus.get_active_filter(prefix='leave_status')))
-                ).select_related('county', 'leave_status').order_by(
-                    RawSQL(
-                        PersonPayment.order_by_sql_year.format(t=PersonPayment.get_db_table(), o=''),
-                        params=[]
-                    ).desc(),
-                    RawSQL(
-                        PersonPayment.order_by_sql_month.format(t=PersonPayment.get_db_table(), o=''),
-                        params=[]
-                    ).desc(),
-                    RawSQL(
-                        PersonPayment.order_by_sql_day.format(t=PersonPayment.get_db_table(), o=''),
-                        params=[]
-                    ).desc()
+                'incident__person_incidents',
+                queryset=cls.get_person_incident_query(
+                    user=user,
+                    filter_dict=None,
+                    person_pk=pk,
+                    person_filter_by_dict={'pk': OuterRef('person_id'), 'is_law_enforcement': True}
                 ),
-                to_attr='officer_payments'
+                to_attr='officer_other_persons'
             ),
             Prefetch(
-                'content_persons',
+                'incident__contents',
+                queryset=cls.__get_content_query(
+                    user=user,
+                    filter_by_dict={},
+                    person_filter_dict={'pk': pk}
+                ),
+                to_attr='officer_contents'
+            )
+        )
+
+    @classmethod
+    def __get_officer_content_person_query(cls, pk, user):
+        """ Retrieves a queryset of the links between an officer and content that is not linked to any of the officer's
+        incidents, i.e. "unsummarized" misconduct records.
+
+        :param pk: Primary key used to identify the officer.
+        :param user: User retrieving the queryset.
+        :return: Content person queryset.
+        """
+        return cls.__get_content_person_query(
+            user=user,
+            filter_dict={
+                'person_id': pk,
+                'content__in': Subquery(
+                    cls.__get_content_query(
+                        user=user,
+                        filter_by_dict={'pk': OuterRef('content_id')},
+                        person_filter_dict=None
+                    ).exclude(incidents__person_incident__person_id=pk).values('pk')
+                )
+            }
+        )
+
+    @classmethod
+    def get_officer_contents_queryset(cls, pk, user):
+        """ Retrieves the content linked to an officer that is not linked to any of the officer's incidents, together
+        with its attachments, identifiers, cases, allegations, penalties and other officers, for the Snapshot and
+        Misconduct sections of the officer profile.
+
+        Assumes that the user's access to the officer was already verified, e.g. through
+        get_officer_profile_queryset(...).
+
+        :param pk: Primary key used to identify the officer.
+        :param user: User retrieving the content.
+        :return: Content person queryset.
+        """
+        return cls.__get_officer_content_person_query(pk=pk, user=user).prefetch_related(
+            cls.__get_attachment_prefetch(user=user, prefix='content__'),
+            cls.__get_content_identifier_prefetch(user=user, prefix='content__'),
+            cls.__get_content_case_prefetch(prefix='content__'),
+            cls.__get_content_person_allegation_prefetch(prefix=None),
+            cls.__get_content_person_penalty_prefetch(prefix=None),
+            Prefetch(
+                'content__content_persons',
                 queryset=cls.__get_content_person_query(
                     user=user,
                     filter_dict={
-                        'content__in': Subquery(
-                            cls.__get_content_query(
-                                user=user,
-                                filter_by_dict={'pk': OuterRef('content_id')},
-                                person_filter_dict=None
-                            ).exclude(incidents__person_incident__person_id=pk).values('pk')
+                        'person__in': cls.__get_person_subquery(
+                            user=user, pk=pk, filter_by_dict={
+                                'content_person__isnull': False,
+                                'is_law_enforcement': True
+                            }
                         )
                     }
-                ).prefetch_related(
-                    cls.__get_attachment_prefetch(user=user, prefix='content__'),
-                    cls.__get_content_identifier_prefetch(user=user, prefix='content__'),
-                    cls.__get_content_case_prefetch(prefix='content__'),
-                    cls.__get_content_person_allegation_prefetch(prefix=None),
-                    cls.__get_content_person_penalty_prefetch(prefix=None),
-                    Prefetch(
-                        'content__content_persons',
-                        queryset=cls.__get_content_person_query(
-                            user=user,
-                            filter_dict={
-                                'person__in': cls.__get_person_subquery(
-                                    user=user, pk=pk, filter_by_dict={
-                                        'content_person__isnull': False,
-                                        'is_law_enforcement': True
-                                    }
-                                )
-                            }
-                        ),
-                        to_attr='officer_other_persons'
-                    ),
-                ).distinct(),
-                to_attr='officer_contents'
-            ),
-            Prefetch(
-                'subject_person_relationships',
-                queryset=cls.__get_person_relationship_query(user=user, for_object_person=False),
-                to_attr='officer_subject_person_relationships'
+                ),
+                to_attr='officer_other_persons'
             ),
-            Prefetch(
-                'object_person_relationships',
-                queryset=cls.__get_person_relationship_query(user=user, for_object_person=True),
-                to_attr='officer_object_person_relationships'
+        ).distinct()
+
+    @classmethod
+    def has_officer_attachments(cls, pk, user):
+        """ Checks whether an officer has attachments with files linked through their misconducts, that can be accessed
+        by a user.
+
+        :param pk: Primary key used to identify the officer.
+        :param user: User accessing the attachments.
+        :return: True if the officer has attachments with files, false otherwise.
+        """
+        m = apps.get_model('sourcing', 'Attachment')
+        return m.active_objects.all().filter_for_confidential_by_user(user=user).filter(
+            Q(Q(type__isnull=True) | Q(**m.get_active_filter(prefix='type')))
+            &
+            Q(
+                # content linked to misconducts
+                Q(
+                    content__in=cls.__get_content_query(
+                        user=user,
+                        filter_by_dict={
+                            'incidents__in': cls.get_person_incident_query(
+                                user=user, filter_dict={'person_id': pk}, person_pk=None, person_filter_by_dict=None
+                            ).values('incident_id')
+                        },
+                        person_filter_dict=None
+                    ).values('pk')
+                )
+                |
+                # "unsummarized" misconduct records
+                Q(content__in=cls.__get_officer_content_person_query(pk=pk, user=user).values('content_id'))
             )
-        )
-        return qs
+        ).exclude(Q(file='') | Q(file__isnull=True)).exists()
 
     @classmethod
     def get_officer_attachments(cls, pk, user):
@@ -617,16 +657,16 @@ class Person(Confidentiable, Descriptable):
         :return: List of attachments.
         """
         files_to_zip = []
-        qs = cls.get_officer_profile_queryset(pk=pk, user=user)
-        officer = qs.get(pk=pk)
+        # officer must be accessible
+        cls.get_officer_profile_queryset(pk=pk, user=user).get(pk=pk)
         # Attachments within the Misconduct section
-        for misconduct in officer.officer_misconducts:
+        for misconduct in cls.get_officer_misconducts_queryset(pk=pk, user=user):
             for content in misconduct.incident.officer_contents:
                 for attachment in content.officer_attachments:
                     if attachment.file:
                         files_to_zip.append(attachment.file)
         # "Unsummarized" misconduct records
-        for content_person in officer.officer_contents:
+        for content_person in cls.get_officer_contents_queryset(pk=pk, user=user):
             for attachment in content_person.content.officer_attachments:
                 if attachment.file:
                     files_to_zip.append(attachment.file)
@@ -910,6 +950,15 @@ class PersonPhoto(Archivable, Descriptable):
         unique=True,
     )
 
+    has_thumbnails = models.BooleanField(
+        null=False,
+        blank=False,
+        default=False,
+        editable=False,
+        help_text=_('Select if thumbnails have been generated for the photo'),
+        verbose_name=_('has thumbnails')
+    )
+
     #: Fields to display in the model form.
     form_fields = ['photo', 'person']
 
@@ -923,6 +972,36 @@ class PersonPhoto(Archivable, Descriptable):
             p=AbstractForeignKeyValidator.stringify_foreign_key(obj=self, foreign_key='person')
         )
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """ Records the photo path that was loaded from the database, so that changes to it can be detected when saving.
+
+        :param db: Alias of database from which person photo was loaded.
+        :param field_names: Names of fields that were loaded.
+        :param values: Values of fields that were loaded.
+        :return: Person photo.
+        """
+        instance = super(PersonPhoto, cls).from_db(db, field_names, values)
+        instance._loaded_photo_name = values[field_names.index('photo')] if 'photo' in field_names else None
+        return instance
+
+    def save(self, *args, **kwargs):
+        """ Saves the person photo, and generates its thumbnails if it is new or if its photo changed.
+
+        :param args: Positional arguments passed to the model's save(...) method.
+        :param kwargs: Keyword arguments passed to the model's save(...) method.
+        :return: Nothing.
+        """
+        loaded_photo_name = getattr(self, '_loaded_photo_name', None)
+        super(PersonPhoto, self).save(*args, **kwargs)
+        photo_name = self.photo.name
+        if not self.has_thumbnails or photo_name != loaded_photo_name:
+            has_thumbnails = generate_thumbnails(name=photo_name)
+            if has_thumbnails != self.has_thumbnails:
+                self.has_thumbnails = has_thumbnails
+                type(self)._base_manager.filter(pk=self.pk).update(has_thumbnails=has_thumbnails)
+        self._loaded_photo_name = photo_name
+
     def clean(self):
         """ Ensure that the photo path contains no directory traversal.
 
@@ -1053,6 +1132,9 @@ class PersonIdentifier(Archivable, AbstractAsOfDateBounded):
         verbose_name = _('Person identifier')
         unique_together = ('person', 'person_identifier_type', 'identifier')
         ordering = ['person', 'person_identifier_type'] + AbstractAsOfDateBounded.order_by_date_fields
+        indexes = AbstractAsOfDateBounded.date_indexes + [
+            models.Index(fields=['person', '-sort_date_key'], name='%(class)s_person_sort'),
+        ]
 
 
 class PersonTitle(Archivable, AbstractAsOfDateBounded):
@@ -1127,6 +1209,9 @@ class PersonTitle(Archivable, AbstractAsOfDateBounded):
             'person', 'title', 'start_year', 'end_year', 'start_month', 'end_month', 'start_day', 'end_day'
         )
         ordering = ['person'] + AbstractAsOfDateBounded.order_by_date_fields
+        indexes = AbstractAsOfDateBounded.date_indexes + [
+            models.Index(fields=['person', '-sort_date_key'], name='%(class)s_person_sort'),
+        ]
 
 
 class PersonRelationship(Archivable, AbstractAsOfDateBounded):
@@ -1221,6 +1306,7 @@ class PersonRelationship(Archivable, AbstractAsOfDateBounded):
             'start_year', 'end_year', 'start_month', 'end_month', 'start_day', 'end_day'
         )
         ordering = ['subject_person', 'type', 'object_person']
+        indexes = AbstractAsOfDateBounded.date_indexes
 
 
 class PersonPayment(Archivable, AbstractAsOfDateBounded):
@@ -1371,6 +1457,9 @@ class PersonPayment(Archivable, AbstractAsOfDateBounded):
             'person', 'start_year', 'end_year', 'start_month', 'end_month', 'start_day', 'end_day'
         )
         ordering = ['person'] + AbstractAsOfDateBounded.order_by_date_fields
+        indexes = AbstractAsOfDateBounded.date_indexes + [
+            models.Index(fields=['person', '-sort_date_key'], name='%(class)s_person_sort'),
+        ]
 
 
 class Grouping(Archivable, Descriptable):
@@ -1481,9 +1570,6 @@ class Grouping(Archivable, Descriptable):
         'description', 'belongs_to_grouping', 'belongs_to_grouping_name'
     ]
 
-    #: Maximum number of person-groupings that are retrieved in a queryset for the grouping profiles.
-    max_person_groupings = 1000
-
     def __str__(self):
         """Defines string representation for a grouping.
 
@@ -1571,45 +1657,36 @@ class Grouping(Archivable, Descriptable):
             qs = qs.filter(**filter_dict)
         return qs
 
-    @classmethod
-    def __get_person_grouping_query(cls, accessible_officers, is_inactive):
-        """ Retrieves a person grouping queryset that is filtered by active/inactive and a list of accessible officers.
+    @staticmethod
+    def __get_accessible_officers(user):
+        """ Retrieves a queryset of officers that can be accessed by a user.
+
+        :param user: User accessing the officers.
+        :return: Person queryset.
+        """
+        return Person.active_objects.filter(is_law_enforcement=True).filter_for_confidential_by_user(user=user)
+
+    @staticmethod
+    def __get_person_grouping_filter(accessible_officers, is_inactive):
+        """ Retrieves a filter for person-groupings by active/inactive and a list of accessible officers.
 
         :param accessible_officers: List or queryset of officers that can be accessed by the user.
         :param is_inactive: True if only inactive person-groupings should be retrieved, false if only active
-        person-groupings should be retrieved.
-        :return: Person grouping queryset.
+        person-groupings should be retrieved. May be None if both active and inactive person-groupings should be
+        retrieved.
+        :return: Q object filtering person-groupings.
         """
-        return PersonGrouping.active_objects.filter(
-            id__in=Subquery(
-                PersonGrouping.active_objects.filter(
-                    # only active career segments
-                    Q(is_inactive=is_inactive)
-                    &
-                    # only for current grouping
-                    Q(grouping_id=OuterRef('grouping_id'))
-                    &
-                    # only accessible officer
-                    Q(person__in=accessible_officers)
-                    &
-                    # only active or missing categorization
-                    Q(Q(type__isnull=True) | Q(**PersonGroupingType.get_active_filter(prefix='type')))
-                ).values_list('id', flat=True)[:cls.max_person_groupings]
-            )
-        ).select_related(*PersonGrouping.get_select_related()).order_by(
-            RawSQL(
-                PersonGrouping.order_by_sql_year.format(t=PersonGrouping.get_db_table(), o=''),
-                params=[]
-            ).desc(),
-            RawSQL(
-                PersonGrouping.order_by_sql_month.format(t=PersonGrouping.get_db_table(), o=''),
-                params=[]
-            ).desc(),
-            RawSQL(
-                PersonGrouping.order_by_sql_day.format(t=PersonGrouping.get_db_table(), o=''),
-                params=[]
-            ).desc()
+        q = Q(
+            # only accessible officer
+            Q(person__in=accessible_officers)
+            &
+            # only active or missing categorization
+            Q(Q(type__isnull=True) | Q(**PersonGroupingType.get_active_filter(prefix='type')))
         )
+        # only active or inactive career segments
+        if is_inactive is not None:
+            q &= Q(is_inactive=is_inactive)
+        return q
 
     @staticmethod
     def __get_grouping_subquery(pk, filter_by_dict):
@@ -1644,9 +1721,45 @@ class Grouping(Archivable, Descriptable):
         )
 
     @classmethod
-    def get_command_profile_queryset(cls, user):
+    def __get_misconduct_prefetches(cls, user):
+        """ Retrieves a list of Prefetch objects for the data that is displayed for each misconduct in the command
+        profile, i.e. each grouping incident.
+
+        :param user: User retrieving the misconducts.
+        :return: List of Prefetch objects.
+        """
+        return [
+            Prefetch(
+                'incident__tags',
+                queryset=IncidentTag.active_objects.all(),
+                to_attr='command_incident_tags'
+            ),
+            Prefetch(
+                'incident__person_incidents',
+                queryset=Person.get_person_incident_query(
+                    user=user,
+                    filter_dict=None,
+                    person_pk=None,
+                    person_filter_by_dict={'is_law_enforcement': True}
+                ),
+                to_attr='command_other_persons'
+            ),
+            Prefetch(
+                'incident__contents',
+                queryset=cls.__get_content_query(user=user, filter_by_dict={}),
+                to_attr='command_contents'
+            )
+        ]
+
+    @classmethod
+    def get_command_summary_queryset(cls, user):
         """ Filters the queryset for a particular user (depending on whether the user is an administrator, etc.)
 
+        Only the related data that is displayed when the command profile is first loaded is included. Members,
+        misconducts and relationships are retrieved one page at a time through get_command_members_queryset(...),
+        get_command_misconducts_queryset(...) and get_command_relationships(...).
+
+        :param user: User retrieving the queryset.
         :return: Filtered queryset from which command will be retrieved.
         """
         # ensure that only groupings with an officer are retrieved
@@ -1655,64 +1768,119 @@ class Grouping(Archivable, Descriptable):
                 PersonGrouping.active_objects.filter(Q(grouping_id=OuterRef('pk')) & Q(person__is_law_enforcement=True))
             )
         )
-        # accessible officers for user
-        accessible_officers = Person.active_objects.filter(is_law_enforcement=True).filter_for_confidential_by_user(
-            user=user
-        )
         # include the related data
-        qs = qs.prefetch_related(
+        return qs.prefetch_related(
             Prefetch('counties', queryset=County.active_objects.all(), to_attr='command_counties'),
-            Prefetch('grouping_aliases', queryset=GroupingAlias.active_objects.all(), to_attr='command_aliases'),
-            Prefetch(
-                'person_groupings',
-                # don't need to filter groupings, since filtered above
-                queryset=cls.__get_person_grouping_query(accessible_officers=accessible_officers, is_inactive=False),
-                to_attr='command_active_officers'
-            ),
-            Prefetch(
-                'person_groupings',
-                # don't need to filter groupings, since filtered above
-                queryset=cls.__get_person_grouping_query(accessible_officers=accessible_officers, is_inactive=True),
-                to_attr='command_inactive_officers'
-            ),
-            Prefetch(
-                'grouping_incidents',
-                queryset=(cls.__get_grouping_incident_query(user=user, filter_dict=None)).prefetch_related(
-                    Prefetch(
-                        'incident__tags',
-                        queryset=IncidentTag.active_objects.all(),
-                        to_attr='command_incident_tags'
-                    ),
-                    Prefetch(
-                        'incident__person_incidents',
-                        queryset=Person.get_person_incident_query(
-                            user=user,
-                            filter_dict=None,
-                            person_pk=None,
-                            person_filter_by_dict={'is_law_enforcement': True}
-                        ),
-                        to_attr='command_other_persons'
-                    ),
-                    Prefetch(
-                        'incident__contents',
-                        queryset=cls.__get_content_query(user=user, filter_by_dict={}),
-                        to_attr='command_contents'
-                    )
-                ),
-                to_attr='command_misconducts'
-            ),
-            Prefetch(
-                'subject_grouping_relationships',
-                queryset=cls.__get_grouping_relationship_query(for_object_grouping=False),
-                to_attr='command_subject_grouping_relationships'
-            ),
-            Prefetch(
-                'object_grouping_relationships',
-                queryset=cls.__get_grouping_relationship_query(for_object_grouping=True),
-                to_attr='command_object_grouping_relationships'
+            Prefetch('grouping_aliases', queryset=GroupingAlias.active_objects.all(), to_attr='command_aliases')
+        )
+
+    @classmethod
+    def get_command_section_counts(cls, pk, user):
+        """ Retrieves the number of current members, former members and misconducts for a command, that can be accessed
+        by a user.
+
+        :param pk: Primary key used to identify the command.
+        :param user: User accessing the command.
+        :return: Dictionary with the keys: active_members, inactive_members and misconducts.
+        """
+        counts = PersonGrouping.active_objects.filter(
+            Q(grouping_id=pk)
+            &
+            cls.__get_person_grouping_filter(
+                accessible_officers=cls.__get_accessible_officers(user=user), is_inactive=None
             )
+        ).aggregate(
+            active_members=Count('pk', filter=Q(is_inactive=False)),
+            inactive_members=Count('pk', filter=Q(is_inactive=True))
         )
-        return qs
+        counts['misconducts'] = cls.__get_grouping_incident_query(user=user, filter_dict={'grouping_id': pk}).count()
+        return counts
+
+    @classmethod
+    def get_command_members_queryset(cls, pk, user, is_inactive):
+        """ Retrieves a queryset of the current or former members of a command, that can be accessed by a user.
+
+        :param pk: Primary key used to identify the command.
+        :param user: User accessing the members.
+        :param is_inactive: True if only former members should be retrieved, false if only current members should be
+        retrieved.
+        :return: Person grouping queryset.
+        """
+        return PersonGrouping.active_objects.filter(
+            Q(grouping_id=pk)
+            &
+            cls.__get_person_grouping_filter(
+                accessible_officers=cls.__get_accessible_officers(user=user), is_inactive=is_inactive
+            )
+        ).select_related(*PersonGrouping.get_select_related())
+
+    @classmethod
+    def get_command_misconducts_queryset(cls, pk, user):
+        """ Retrieves a queryset of the misconducts for a command, i.e. its grouping incidents, that can be accessed by
+        a user.
+
+        :param pk: Primary key used to identify the command.
+        :param user: User accessing the misconducts.
+        :return: Grouping incident queryset.
+        """
+        return cls.__get_grouping_incident_query(user=user, filter_dict={'grouping_id': pk}).prefetch_related(
+            *cls.__get_misconduct_prefetches(user=user)
+        )
+
+    @classmethod
+    def get_command_relationships(cls, pk):
+        """ Retrieves the relationships between a command and other commands, counting each relationship type once for
+        each other command.
+
+        :param pk: Primary key used to identify the command.
+        :return: List of dictionaries, each with the keys: grouping_id, grouping, relationship and num.
+        """
+        rel_dict = {}
+        for for_object_grouping, other_grouping in ((False, 'object_grouping'), (True, 'subject_grouping')):
+            this_grouping = 'object_grouping' if for_object_grouping else 'subject_grouping'
+            for relationship in cls.__get_grouping_relationship_query(
+                for_object_grouping=for_object_grouping
+            ).filter(
+                **{'{g}_id'.format(g=this_grouping): pk}
+            ).order_by().values(
+                'type_id', 'type__name', '{g}_id'.format(g=other_grouping), '{g}__name'.format(g=other_grouping)
+            ).annotate(num=Count('pk')):
+                other_grouping_id = relationship['{g}_id'.format(g=other_grouping)]
+                dict_key = (relationship['type_id'], other_grouping_id)
+                if dict_key not in rel_dict:
+                    rel_dict[dict_key] = {
+                        'grouping_id': other_grouping_id,
+                        'grouping': relationship['{g}__name'.format(g=other_grouping)],
+                        'relationship': relationship['type__name'],
+                        'num': 0
+                    }
+                rel_dict[dict_key]['num'] += relationship['num']
+        return list(rel_dict.values())
+
+    @classmethod
+    def has_command_attachments(cls, pk, user):
+        """ Checks whether a command has attachments with files linked through its misconducts, that can be accessed by
+        a user.
+
+        :param pk: Primary key used to identify the command.
+        :param user: User accessing the attachments.
+        :return: True if the command has attachments with files, false otherwise.
+        """
+        m = apps.get_model('sourcing', 'Attachment')
+        return m.active_objects.all().filter_for_confidential_by_user(user=user).filter(
+            Q(Q(type__isnull=True) | Q(**m.get_active_filter(prefix='type')))
+            &
+            Q(
+                content__in=cls.__get_content_query(
+                    user=user,
+                    filter_by_dict={
+                        'incidents__in': cls.__get_grouping_incident_query(
+                            user=user, filter_dict={'grouping_id': pk}
+                        ).values('incident_id')
+                    }
+                ).values('pk')
+            )
+        ).exclude(Q(file='') | Q(file__isnull=True)).exists()
 
     @classmethod
     def get_command_attachments(cls, pk, user):
@@ -1723,10 +1891,10 @@ class Grouping(Archivable, Descriptable):
         :return: List of attachments.
         """
         files_to_zip = []
-        qs = cls.get_command_profile_queryset(user=user)
-        command = qs.get(pk=pk)
+        # command must be accessible
+        cls.get_command_summary_queryset(user=user).get(pk=pk)
         # Attachments within the Misconduct section
-        for misconduct in command.command_misconducts:
+        for misconduct in cls.get_command_misconducts_queryset(pk=pk, user=user):
             for content in misconduct.incident.command_contents:
                 for attachment in content.command_attachments:
                     if attachment.file:
@@ -1894,6 +2062,7 @@ class GroupingRelationship(Archivable, AbstractAsOfDateBounded):
         verbose_name = _('Grouping relationship')
         unique_together = ('subject_grouping', 'object_grouping', 'type')
         ordering = ['subject_grouping', 'type', 'object_grouping']
+        indexes = AbstractAsOfDateBounded.date_indexes
 
 
 class PersonGrouping(Archivable, AbstractAsOfDateBounded):
@@ -2002,6 +2171,10 @@ class PersonGrouping(Archivable, AbstractAsOfDateBounded):
             'person', 'grouping', 'type', 'start_year', 'end_year', 'start_month', 'end_month', 'start_day', 'end_day'
         )
         ordering = AbstractAsOfDateBounded.order_by_date_fields + ['grouping', 'person']
+        indexes = AbstractAsOfDateBounded.date_indexes + [
+            models.Index(fields=['person', '-sort_date_key'], name='%(class)s_person_sort'),
+            models.Index(fields=['grouping', '-sort_date_key'], name='%(class)s_grouping_sort'),
+        ]
 
 
 class Incident(Confidentiable, AbstractExactDateBounded):
@@ -2119,6 +2292,9 @@ class Incident(Confidentiable, AbstractExactDateBounded):
         db_table = '{d}incident'.format(d=settings.DB_PREFIX)
         verbose_name = _('Incident')
         ordering = AbstractExactDateBounded.order_by_date_fields + ['location']
+        indexes = AbstractExactDateBounded.date_indexes + [
+            models.Index(fields=['-sort_date_key'], name='%(class)s_sort'),
+        ]
 
 
 class PersonIncident(Archivable, Descriptable, Linkable, AbstractKnownInfo):
@@ -2307,3 +2483,180 @@ class GroupingIncident(Archivable, Descriptable):
         verbose_name_plural = _('Links between groupings and incidents')
         unique_together = ('grouping', 'incident')
         ordering = ['grouping', 'incident']
+
+
+class PersonSearchDocument(Metable):
+    """ Denormalised search document for a person, against which person profile searches are scored in a single
+    statement.
+
+    Maintained incrementally through signals, see core/search_documents.py, and rebuilt through the management command:
+    python manage.py rebuild_search_documents
+
+    Attributes:
+        :person (fk): Person that is described by the search document.
+        :name (str): Normalised name of person.
+        :aliases (list): Normalised names of active aliases for person.
+        :identifiers (list): Normalised active identifiers for person.
+        :title_ids (list): Primary keys of titles linked to person through active links.
+        :grouping_names (list): Normalised names of active groupings linked to person through active links.
+        :grouping_aliases (list): Normalised names of active aliases for the groupings linked to person.
+        :county_ids (list): Primary keys of counties in which the groupings linked to person operate.
+        :visibility (int): Whether person is visible to all users, or restricted by confidentiality.
+
+    """
+    #: Person is visible to all users.
+    VISIBLE_TO_ALL = 0
+
+    #: Person is only visible to some users, depending on its confidentiality.
+    RESTRICTED = 1
+
+    person = models.OneToOneField(
+        Person,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='search_document',
+        related_query_name='search_document',
+        help_text=_('Person that is described by the search document'),
+        verbose_name=_('person')
+    )
+
+    name = models.TextField(
+        null=False,
+        blank=True,
+        help_text=_('Normalised name of person'),
+        verbose_name=_('name')
+    )
+
+    aliases = ArrayField(
+        models.TextField(),
+        default=list,
+        blank=True,
+        help_text=_('Normalised names of active aliases for person'),
+        verbose_name=_('aliases')
+    )
+
+    identifiers = ArrayField(
+        models.TextField(),
+        default=list,
+        blank=True,
+        help_text=_('Normalised active identifiers for person'),
+        verbose_name=_('identifiers')
+    )
+
+    title_ids = ArrayField(
+        models.IntegerField(),
+        default=list,
+        blank=True,
+        help_text=_('Primary keys of titles linked to person through active links'),
+        verbose_name=_('titles')
+    )
+
+    grouping_names = ArrayField(
+        models.TextField(),
+        default=list,
+        blank=True,
+        help_text=_('Normalised names of active groupings linked to person through active links'),
+        verbose_name=_('grouping names')
+    )
+
+    grouping_aliases = ArrayField(
+        models.TextField(),
+        default=list,
+        blank=True,
+        help_text=_('Normalised names of active aliases for the groupings linked to person'),
+        verbose_name=_('grouping aliases')
+    )
+
+    county_ids = ArrayField(
+        models.IntegerField(),
+        default=list,
+        blank=True,
+        help_text=_('Primary keys of counties in which the groupings linked to person operate'),
+        verbose_name=_('counties')
+    )
+
+    visibility = models.PositiveSmallIntegerField(
+        null=False,
+        blank=False,
+        default=RESTRICTED,
+        help_text=_('Whether person is visible to all users, or restricted by confidentiality'),
+        verbose_name=_('visibility')
+    )
+
+    def __str__(self):
+        """Defines string representation for a person search document.
+
+        :return: String representation of a person search document.
+        """
+        return '{s} {p}'.format(s=_('search document for'), p=self.person_id)
+
+    class Meta:
+        db_table = '{d}person_search_document'.format(d=settings.DB_PREFIX)
+        verbose_name = _('person search document')
+
+
+class GroupingSearchDocument(Metable):
+    """ Denormalised search document for a grouping, against which grouping profile searches are scored in a single
+    statement.
+
+    Maintained incrementally through signals, see core/search_documents.py, and rebuilt through the management command:
+    python manage.py rebuild_search_documents
+
+    Attributes:
+        :grouping (fk): Grouping that is described by the search document.
+        :name (str): Normalised name of grouping.
+        :code (str): Normalised code of grouping.
+        :aliases (list): Normalised names of active aliases for grouping.
+        :has_law_enforcement (bool): True if grouping is linked to at least one law enforcement person.
+
+    """
+    grouping = models.OneToOneField(
+        Grouping,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='search_document',
+        related_query_name='search_document',
+        help_text=_('Grouping that is described by the search document'),
+        verbose_name=_('grouping')
+    )
+
+    name = models.TextField(
+        null=False,
+        blank=True,
+        help_text=_('Normalised name of grouping'),
+        verbose_name=_('name')
+    )
+
+    code = models.TextField(
+        null=False,
+        blank=True,
+        help_text=_('Normalised code of grouping'),
+        verbose_name=_('code')
+    )
+
+    aliases = ArrayField(
+        models.TextField(),
+        default=list,
+        blank=True,
+        help_text=_('Normalised names of active aliases for grouping'),
+        verbose_name=_('aliases')
+    )
+
+    has_law_enforcement = models.BooleanField(
+        null=False,
+        blank=False,
+        default=False,
+        help_text=_('True if grouping is linked to at least one law enforcement person'),
+        verbose_name=_('has law enforcement')
+    )
+
+    def __str__(self):
+        """Defines string representation for a grouping search document.
+
+        :return: String representation of a grouping search document.
+        """
+        return '{s} {g}'.format(s=_('search document for'), g=self.grouping_id)
+
+    class Meta:
+        db_table = '{d}grouping_search_document'.format(d=settings.DB_PREFIX)
+        verbose_name = _('grouping search document')
@@ -0,0 +1,230 @@
+"""
+
+Maintenance of the denormalised search documents, against which person and grouping profile searches are scored.
+
+Each person and grouping has a single search document row, which holds the normalised names, aliases, identifiers and
+lookups that are otherwise joined from several tables on every search. Search documents are rebuilt through single
+INSERT ... ON CONFLICT statements, either for all records or for the records affected by a change.
+
+Search documents affected by a change are refreshed within the transaction in which the change is made, so that they
+are committed or rolled back together with the change.
+
+"""
+from django.db import connections, transaction, DEFAULT_DB_ALIAS
+from inheritable.models import Archivable
+from .models import Person, PersonAlias, PersonIdentifier, PersonTitle, PersonGrouping, Grouping, GroupingAlias, \
+    PersonSearchDocument, GroupingSearchDocument
+
+
+#: Normalises a text column in raw SQL, in the same way as search criteria, i.e. lowercase with single whitespaces.
+_normalise_sql = 'lower(regexp_replace(btrim({c}), \'\\s+\', \' \', \'g\'))'
+
+
+def _get_person_document_sql(where_sql):
+    """ Retrieves the SQL statement that inserts or updates the search documents for persons.
+
+    :param where_sql: WHERE portion of the SQL statement, that selects the persons for which to rebuild documents.
+    :return: SQL statement.
+    """
+    return """
+        INSERT INTO "{document}" (
+            "person_id", "name", "aliases", "identifiers", "title_ids", "grouping_names", "grouping_aliases",
+            "county_ids", "visibility"
+        )
+        SELECT
+            P."id",
+            {person_name},
+            ARRAY(
+                SELECT DISTINCT {alias_name} FROM "{person_alias}" AS ZA
+                WHERE ZA."person_id" = P."id" AND ZA.{active_filter}
+            ),
+            ARRAY(
+                SELECT DISTINCT {identifier} FROM "{person_identifier}" AS ZI
+                WHERE ZI."person_id" = P."id" AND ZI.{active_filter}
+            ),
+            ARRAY(
+                SELECT DISTINCT ZT."title_id" FROM "{person_title}" AS ZT
+                WHERE ZT."person_id" = P."id" AND ZT.{active_filter}
+            ),
+            ARRAY(
+                SELECT DISTINCT {grouping_name} FROM "{person_grouping}" AS ZPG
+                INNER JOIN "{grouping}" AS ZG ON ZPG."grouping_id" = ZG."id" AND ZG.{active_filter}
+                WHERE ZPG."person_id" = P."id" AND ZPG.{active_filter}
+            ),
+            ARRAY(
+                SELECT DISTINCT {grouping_alias_name} FROM "{person_grouping}" AS ZPG
+                INNER JOIN "{grouping}" AS ZG ON ZPG."grouping_id" = ZG."id" AND ZG.{active_filter}
+                INNER JOIN "{grouping_alias}" AS ZGA ON ZG."id" = ZGA."grouping_id" AND ZGA.{active_filter}
+                WHERE ZPG."person_id" = P."id" AND ZPG.{active_filter}
+            ),
+            ARRAY(
+                SELECT DISTINCT ZGC."county_id" FROM "{person_grouping}" AS ZPG
+                INNER JOIN "{grouping}" AS ZG ON ZPG."grouping_id" = ZG."id" AND ZG.{active_filter}
+                INNER JOIN "{grouping_county}" AS ZGC ON ZG."id" = ZGC."grouping_id"
+                WHERE ZPG."person_id" = P."id" AND ZPG.{active_filter}
+            ),
+            CASE
+                WHEN P."for_admin_only" = False AND P."for_host_only" = False AND NOT EXISTS (
+                    SELECT 'X' FROM "{person_organization}" AS ZPO WHERE ZPO."person_id" = P."id"
+                ) THEN {visible_to_all}
+                ELSE {restricted}
+            END
+        FROM "{person}" AS P
+        {where_sql}
+        ON CONFLICT ("person_id") DO UPDATE SET
+            "name" = EXCLUDED."name",
+            "aliases" = EXCLUDED."aliases",
+            "identifiers" = EXCLUDED."identifiers",
+            "title_ids" = EXCLUDED."title_ids",
+            "grouping_names" = EXCLUDED."grouping_names",
+            "grouping_aliases" = EXCLUDED."grouping_aliases",
+            "county_ids" = EXCLUDED."county_ids",
+            "visibility" = EXCLUDED."visibility"
+    """.format(
+        document=PersonSearchDocument.get_db_table(),
+        person=Person.get_db_table(),
+        person_alias=PersonAlias.get_db_table(),
+        person_identifier=PersonIdentifier.get_db_table(),
+        person_title=PersonTitle.get_db_table(),
+        person_grouping=PersonGrouping.get_db_table(),
+        person_organization=Person.get_db_table_for_many_to_many(many_to_many_key=Person.fdp_organizations),
+        grouping=Grouping.get_db_table(),
+        grouping_alias=GroupingAlias.get_db_table(),
+        grouping_county=Grouping.get_db_table_for_many_to_many(many_to_many_key=Grouping.counties),
+        person_name=_normalise_sql.format(c='P."name"'),
+        alias_name=_normalise_sql.format(c='ZA."name"'),
+        identifier=_normalise_sql.format(c='ZI."identifier"'),
+        grouping_name=_normalise_sql.format(c='ZG."name"'),
+        grouping_alias_name=_normalise_sql.format(c='ZGA."name"'),
+        active_filter=Archivable.ACTIVE_FILTER,
+        visible_to_all=PersonSearchDocument.VISIBLE_TO_ALL,
+        restricted=PersonSearchDocument.RESTRICTED,
+        where_sql=where_sql
+    )
+
+
+def _get_grouping_document_sql(where_sql):
+    """ Retrieves the SQL statement that inserts or updates the search documents for groupings.
+
+    :param where_sql: WHERE portion of the SQL statement, that selects the groupings for which to rebuild documents.
+    :return: SQL statement.
+    """
+    return """
+        INSERT INTO "{document}" ("grouping_id", "name", "code", "aliases", "has_law_enforcement")
+        SELECT
+            G."id",
+            {grouping_name},
+            {grouping_code},
+            ARRAY(
+                SELECT DISTINCT {alias_name} FROM "{grouping_alias}" AS ZGA
+                WHERE ZGA."grouping_id" = G."id" AND ZGA.{active_filter}
+            ),
+            EXISTS (
+                SELECT 'X' FROM "{person_grouping}" AS ZPG
+                INNER JOIN "{person}" AS ZP ON ZPG."person_id" = ZP."id" AND ZP."is_law_enforcement" = True
+                WHERE ZPG."grouping_id" = G."id"
+            )
+        FROM "{grouping}" AS G
+        {where_sql}
+        ON CONFLICT ("grouping_id") DO UPDATE SET
+            "name" = EXCLUDED."name",
+            "code" = EXCLUDED."code",
+            "aliases" = EXCLUDED."aliases",
+            "has_law_enforcement" = EXCLUDED."has_law_enforcement"
+    """.format(
+        document=GroupingSearchDocument.get_db_table(),
+        grouping=Grouping.get_db_table(),
+        grouping_alias=GroupingAlias.get_db_table(),
+        person=Person.get_db_table(),
+        person_grouping=PersonGrouping.get_db_table(),
+        grouping_name=_normalise_sql.format(c='G."name"'),
+        grouping_code=_normalise_sql.format(c='G."code"'),
+        alias_name=_normalise_sql.format(c='ZGA."name"'),
+        active_filter=Archivable.ACTIVE_FILTER,
+        where_sql=where_sql
+    )
+
+
+def update_person_search_documents(person_ids=None, grouping_ids=None, using=DEFAULT_DB_ALIAS):
+    """ Inserts or updates the search documents for persons.
+
+    If neither persons nor groupings are specified, then the search documents for all persons are rebuilt.
+
+    :param person_ids: Primary keys of persons for which to rebuild search documents.
+    :param grouping_ids: Primary keys of groupings, for whose linked persons to rebuild search documents.
+    :param using: Alias of database in which to rebuild search documents.
+    :return: Number of search documents that were inserted or updated.
+    """
+    checks = []
+    params = []
+    if person_ids is not None:
+        checks.append('P."id" = ANY(%s)')
+        params.append(list(person_ids))
+    if grouping_ids is not None:
+        checks.append(
+            'P."id" IN (SELECT "person_id" FROM "{person_grouping}" WHERE "grouping_id" = ANY(%s))'.format(
+                person_grouping=PersonGrouping.get_db_table()
+            )
+        )
+        params.append(list(grouping_ids))
+    where_sql = 'WHERE {c}'.format(c=' OR '.join(checks)) if checks else ''
+    with connections[using].cursor() as cursor:
+        cursor.execute(_get_person_document_sql(where_sql=where_sql), params)
+        return cursor.rowcount
+
+
+def update_grouping_search_documents(grouping_ids=None, person_ids=None, using=DEFAULT_DB_ALIAS):
+    """ Inserts or updates the search documents for groupings.
+
+    If neither groupings nor persons are specified, then the search documents for all groupings are rebuilt.
+
+    :param grouping_ids: Primary keys of groupings for which to rebuild search documents.
+    :param person_ids: Primary keys of persons, for whose linked groupings to rebuild search documents.
+    :param using: Alias of database in which to rebuild search documents.
+    :return: Number of search documents that were inserted or updated.
+    """
+    checks = []
+    params = []
+    if grouping_ids is not None:
+        checks.append('G."id" = ANY(%s)')
+        params.append(list(grouping_ids))
+    if person_ids is not None:
+        checks.append(
+            'G."id" IN (SELECT "grouping_id" FROM "{person_grouping}" WHERE "person_id" = ANY(%s))'.format(
+                person_grouping=PersonGrouping.get_db_table()
+            )
+        )
+        params.append(list(person_ids))
+    where_sql = 'WHERE {c}'.format(c=' OR '.join(checks)) if checks else ''
+    with connections[using].cursor() as cursor:
+        cursor.execute(_get_grouping_document_sql(where_sql=where_sql), params)
+        return cursor.rowcount
+
+
+def rebuild_search_documents(using=DEFAULT_DB_ALIAS):
+    """ Rebuilds the search documents for all persons and groupings.
+
+    :param using: Alias of database in which to rebuild search documents.
+    :return: A tuple containing the number of person search documents and the number of grouping search documents.
+    """
+    with transaction.atomic(using=using):
+        num_of_persons = update_person_search_documents(using=using)
+        num_of_groupings = update_grouping_search_documents(using=using)
+    return num_of_persons, num_of_groupings
+
+
+def refresh_search_documents(person_ids=None, grouping_ids=None, persons_in_grouping_ids=None,
+                             groupings_of_person_ids=None, using=DEFAULT_DB_ALIAS):
+    """ Refreshes the search documents affected by a change.
+
+    :param person_ids: Primary keys of persons whose search documents to refresh.
+    :param grouping_ids: Primary keys of groupings whose search documents to refresh.
+    :param persons_in_grouping_ids: Primary keys of groupings, for whose linked persons to refresh search documents.
+    :param groupings_of_person_ids: Primary keys of persons, for whose linked groupings to refresh search documents.
+    :param using: Alias of database in which the change was made.
+    :return: Nothing.
+    """
+    if person_ids is not None or persons_in_grouping_ids is not None:
+        update_person_search_documents(person_ids=person_ids, grouping_ids=persons_in_grouping_ids, using=using)
+    if grouping_ids is not None or groupings_of_person_ids is not None:
+        update_grouping_search_documents(grouping_ids=grouping_ids, person_ids=groupings_of_person_ids, using=using)
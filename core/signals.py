@@ -0,0 +1,179 @@
+from .models import PersonSearchDocument, GroupingSearchDocument
+from .search_documents import refresh_search_documents
+
+
+def post_save_person(sender, instance, raw, using, **kwargs):
+    """ Refreshes the search documents for a person and its groupings after the person is saved.
+
+    :param sender: Always the Person model class.
+    :param instance: Instance of the Person model class that was saved.
+    :param raw: True if the model is saved exactly as presented, i.e. when loading a fixture or when reverting through
+    Django-Reversion. Documents are still refreshed, since they are only rebuilt from the records that exist.
+    :param using: The database alias being used.
+    :param kwargs: Additional keyword arguments.
+    :return: Nothing.
+    """
+    refresh_search_documents(person_ids=[instance.pk], groupings_of_person_ids=[instance.pk], using=using)
+
+
+def post_delete_person(sender, instance, using, **kwargs):
+    """ Removes the search document for a person after the person is deleted.
+
+    The search document is removed again, since it may have been refreshed while the person's aliases, identifiers,
+    titles and links to groupings were deleted through the cascade.
+
+    :param sender: Always the Person model class.
+    :param instance: Instance of the Person model class that was deleted.
+    :param using: The database alias being used.
+    :param kwargs: Additional keyword arguments.
+    :return: Nothing.
+    """
+    PersonSearchDocument.objects.using(using).filter(person_id=instance.pk).delete()
+
+
+def post_change_person_link(sender, instance, using, raw=False, **kwargs):
+    """ Refreshes the search document for a person after one of its aliases, identifiers or titles is saved or
+    deleted.
+
+    :param sender: Model class of the alias, identifier or title that was saved or deleted.
+    :param instance: Alias, identifier or title that was saved or deleted.
+    :param using: The database alias being used.
+    :param raw: True if the model is saved exactly as presented, i.e. when loading a fixture or when reverting through
+    Django-Reversion.
+    :param kwargs: Additional keyword arguments.
+    :return: Nothing.
+    """
+    refresh_search_documents(person_ids=[instance.person_id], using=using)
+
+
+def post_change_person_grouping(sender, instance, using, raw=False, **kwargs):
+    """ Refreshes the search documents for a person and a grouping after the link between them is saved or deleted.
+
+    :param sender: Always the PersonGrouping model class.
+    :param instance: Instance of the PersonGrouping model class that was saved or deleted.
+    :param using: The database alias being used.
+    :param raw: True if the model is saved exactly as presented, i.e. when loading a fixture or when reverting through
+    Django-Reversion.
+    :param kwargs: Additional keyword arguments.
+    :return: Nothing.
+    """
+    refresh_search_documents(person_ids=[instance.person_id], grouping_ids=[instance.grouping_id], using=using)
+
+
+def pre_save_grouping(sender, instance, raw, using, **kwargs):
+    """ Records the name and archived status of a grouping before it is saved, since the search documents for its
+    persons only need to be refreshed if these change.
+
+    :param sender: Always the Grouping model class.
+    :param instance: Instance of the Grouping model class that will be saved.
+    :param raw: True if the model is saved exactly as presented, i.e. when loading a fixture or when reverting through
+    Django-Reversion.
+    :param using: The database alias being used.
+    :param kwargs: Additional keyword arguments.
+    :return: Nothing.
+    """
+    if instance.pk is not None:
+        instance._search_document_values = sender.objects.using(using).filter(
+            pk=instance.pk
+        ).values_list('name', 'is_archived').first()
+
+
+def post_save_grouping(sender, instance, created, raw, using, **kwargs):
+    """ Refreshes the search documents for a grouping, and for its persons if its name or archived status changed,
+    after the grouping is saved.
+
+    :param sender: Always the Grouping model class.
+    :param instance: Instance of the Grouping model class that was saved.
+    :param created: True if instance was created.
+    :param raw: True if the model is saved exactly as presented, i.e. when loading a fixture or when reverting through
+    Django-Reversion.
+    :param using: The database alias being used.
+    :param kwargs: Additional keyword arguments.
+    :return: Nothing.
+    """
+    previous_values = getattr(instance, '_search_document_values', None)
+    has_changed = not created and previous_values != (instance.name, instance.is_archived)
+    refresh_search_documents(
+        grouping_ids=[instance.pk], persons_in_grouping_ids=[instance.pk] if has_changed else None, using=using
+    )
+
+
+def post_delete_grouping(sender, instance, using, **kwargs):
+    """ Removes the search document for a grouping after the grouping is deleted.
+
+    The search document is removed again, since it may have been refreshed while the grouping's aliases and links to
+    persons were deleted through the cascade.
+
+    :param sender: Always the Grouping model class.
+    :param instance: Instance of the Grouping model class that was deleted.
+    :param using: The database alias being used.
+    :param kwargs: Additional keyword arguments.
+    :return: Nothing.
+    """
+    GroupingSearchDocument.objects.using(using).filter(grouping_id=instance.pk).delete()
+
+
+def post_change_grouping_alias(sender, instance, using, raw=False, **kwargs):
+    """ Refreshes the search documents for a grouping and its persons after one of its aliases is saved or deleted.
+
+    :param sender: Always the GroupingAlias model class.
+    :param instance: Instance of the GroupingAlias model class that was saved or deleted.
+    :param using: The database alias being used.
+    :param raw: True if the model is saved exactly as presented, i.e. when loading a fixture or when reverting through
+    Django-Reversion.
+    :param kwargs: Additional keyword arguments.
+    :return: Nothing.
+    """
+    refresh_search_documents(
+        grouping_ids=[instance.grouping_id], persons_in_grouping_ids=[instance.grouping_id], using=using
+    )
+
+
+def m2m_changed_person_organizations(sender, instance, action, reverse, pk_set, using, **kwargs):
+    """ Refreshes the visibility in the search documents for persons after their organization access changes.
+
+    :param sender: Intermediate model class for the relationship between persons and FDP organizations.
+    :param instance: Person whose organizations changed, or FDP organization whose persons changed if reverse.
+    :param action: Type of change, e.g. post_add.
+    :param reverse: True if the relationship was changed from its reverse side.
+    :param pk_set: Primary keys of the records that were added or removed, or None when cleared.
+    :param using: The database alias being used.
+    :param kwargs: Additional keyword arguments.
+    :return: Nothing.
+    """
+    if action == 'pre_clear' and reverse:
+        # persons are no longer linked to the organization once it is cleared, so record them to refresh afterwards
+        instance._search_document_person_ids = list(instance.persons.values_list('pk', flat=True))
+    elif action in ('post_add', 'post_remove', 'post_clear'):
+        if not reverse:
+            refresh_search_documents(person_ids=[instance.pk], using=using)
+        elif action == 'post_clear':
+            refresh_search_documents(person_ids=getattr(instance, '_search_document_person_ids', []), using=using)
+        elif pk_set:
+            refresh_search_documents(person_ids=list(pk_set), using=using)
+
+
+def m2m_changed_grouping_counties(sender, instance, action, reverse, pk_set, using, **kwargs):
+    """ Refreshes the search documents for the persons in groupings after the counties of the groupings change.
+
+    :param sender: Intermediate model class for the relationship between groupings and counties.
+    :param instance: Grouping whose counties changed, or county whose groupings changed if reverse.
+    :param action: Type of change, e.g. post_add.
+    :param reverse: True if the relationship was changed from its reverse side.
+    :param pk_set: Primary keys of the records that were added or removed, or None when cleared.
+    :param using: The database alias being used.
+    :param kwargs: Additional keyword arguments.
+    :return: Nothing.
+    """
+    if action == 'pre_clear' and reverse:
+        # groupings are no longer linked to the county once it is cleared, so record them to refresh afterwards
+        instance._search_document_grouping_ids = list(instance.groupings.values_list('pk', flat=True))
+    elif action in ('post_add', 'post_remove', 'post_clear'):
+        if not reverse:
+            refresh_search_documents(persons_in_grouping_ids=[instance.pk], using=using)
+        elif action == 'post_clear':
+            refresh_search_documents(
+                persons_in_grouping_ids=getattr(instance, '_search_document_grouping_ids', []), using=using
+            )
+        elif pk_set:
+            refresh_search_documents(persons_in_grouping_ids=list(pk_set), using=using)
@@ -1,10 +1,41 @@
 from django.utils.translation import ugettext_lazy as _
-from inheritable.models import AbstractUrlValidator
+from django.db import router, connection
+from django.test import Client, override_settings
+from django.core.exceptions import ImproperlyConfigured
+from inheritable.models import AbstractUrlValidator, AbstractSearchValidator
+from inheritable.revisions import capture_changes, DeferredRevision, save_deferred_revision, serialize_versions
+from inheritable.caching import CacheNamespace
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.urls import reverse
+from .thumbnails import get_thumbnail_name, get_thumbnail_urls, sign_thumbnail_name, unsign_thumbnail_name, Image
+from io import BytesIO
+from reversion.models import Revision, Version
 from inheritable.tests import AbstractTestCase, local_test_settings_required
 from fdpuser.models import FdpOrganization, FdpUser
 from .models import Person, PersonContact, PersonAlias, PersonPhoto, PersonIdentifier, PersonTitle, \
     PersonRelationship, PersonPayment, PersonGrouping, PersonIncident, GroupingIncident, Grouping, Incident
-from supporting.models import PersonIdentifierType, Title, PersonRelationshipType
+from supporting.models import PersonIdentifierType, Title, PersonRelationshipType, State, County, Location
+from fdp.configuration.abstract.base_settings import get_shared_cache, SHARED_CACHE_FILE_SYSTEM, \
+    SHARED_CACHE_DATABASE
+from fdp.configuration.azure.key_vault import AzureKeyVaultException, FakeSecretClient, SecretCacheFile, load_secrets
+from fdp.lazy_import import lazy_module, load_python_package_module
+from inheritable.management.commands.import_time_report import parse_import_times
+from .management.commands.generate_synthetic_data import SYNTHETIC_DESCRIPTION
+from .management.commands.explain_plans import split_sql_statements, normalize_sql, summarize_plan, compare_plans
+from bulk.models import BulkImport
+from django.core.management import call_command
+from io import StringIO
+from json import loads as json_loads
+from psycopg2.extras import DateRange
+from datetime import date
+from cryptography.fernet import Fernet
+from tempfile import TemporaryDirectory
+from importlib import import_module
+from time import time
+from unittest.mock import patch as mock_patch
+import os
+import sys
 
 
 class CoreTestCase(AbstractTestCase):
@@ -17,6 +48,23 @@ class CoreTestCase(AbstractTestCase):
 
     (2) Test for Download PersonPhoto View for all permutations of user roles and confidentiality levels.
 
+    (3) Test for deferred revisions that are captured during a request and saved in bulk, including through a data
+    management wizard view.
+
+    (4) Test for namespaced values in a shared cache, and their version-based invalidation.
+
+    (5) Test for thumbnails of person photos, and the signed links through which they are served.
+
+    (6) Test for concurrent and cached loading of secrets from the Azure Key Vault, through a fake secret client.
+
+    (7) Test for lazily loaded modules, and the parsing of import times for the import time report.
+
+    (8) Test for the generation of synthetic data, and for benchmarks run against it.
+
+    (9) Test for explained plans of search and profile statements, and the detection of plan regressions.
+
+    (10) Test for date keys and date ranges maintained for date bounded records, and used to order and search by date.
+
     """
     @classmethod
     def setUpTestData(cls):
@@ -515,3 +563,425 @@ class CoreTestCase(AbstractTestCase):
         self.__test_download_person_photo_view(fdp_org=fdp_org, other_fdp_org=other_fdp_org)
         print(_('\nSuccessfully finished test for Download Person Photo view for all permutations of user roles and '
                 'confidentiality levels\n\n'))
+
+    @local_test_settings_required
+    def test_deferred_revisions(self):
+        """ Test that records saved while changes are captured are versioned in bulk in a single revision, and that
+        their compressed versions can be read.
+
+        :return: Nothing
+        """
+        print(_('\nStarting test for deferred revisions'))
+        fdp_user = self._create_fdp_user(email_counter=FdpUser.objects.all().count() + 1, **self._host_admin_dict)
+        with capture_changes() as model_pks:
+            person = Person.objects.create(name='DeferredRevisionPerson', **self._is_law_dict)
+            person_alias = PersonAlias.objects.create(name='DeferredRevisionAlias', person=person)
+            # saving the same record again is only captured once
+            person.save()
+        self.assertEqual(
+            dict(model_pks), {Person._meta.label: {str(person.pk)}, PersonAlias._meta.label: {str(person_alias.pk)}}
+        )
+        num_of_revisions = Revision.objects.all().count()
+        versions = serialize_versions(model_pks=model_pks, using=router.db_for_write(Revision))
+        # records are serialized as they were when captured, even if they change before the revision is saved
+        PersonAlias.objects.filter(pk=person_alias.pk).update(name='ChangedDeferredRevisionAlias')
+        revision = save_deferred_revision(
+            deferred_revision=DeferredRevision(
+                versions=versions,
+                user_id=fdp_user.pk,
+                comment='Deferred revision',
+                date_created=None,
+                using=router.db_for_write(Revision)
+            )
+        )
+        self.assertEqual(Revision.objects.all().count(), num_of_revisions + 1)
+        self.assertEqual(revision.user_id, fdp_user.pk)
+        versions = Version.objects.filter(revision=revision)
+        self.assertEqual(versions.count(), 2)
+        for version in versions:
+            self.assertEqual(version.format, 'compressed_json')
+        for obj in [person, person_alias]:
+            version = Version.objects.get_for_object(obj).get(revision=revision)
+            self.assertEqual(version._object_version.object.name, obj.name)
+        print(_('\nSuccessfully finished test for deferred revisions\n\n'))
+
+    @local_test_settings_required
+    def test_deferred_revisions_through_view(self):
+        """ Test that records created through a data management wizard view are captured for a deferred revision,
+        together with the comment set by the view.
+
+        :return: Nothing
+        """
+        print(_('\nStarting test for deferred revisions through a view'))
+        fdp_user = self._create_fdp_user(email_counter=FdpUser.objects.all().count() + 1, **self._host_admin_dict)
+        client = self._get_logged_in_client(fdp_user=fdp_user)
+        county = County.objects.create(name='DeferredRevisionCounty', state=State.objects.create(name='DeferredState'))
+        with override_settings(FDP_DEFER_REVISIONS=True):
+            with mock_patch('inheritable.views.defer_revision') as mock_defer_revision:
+                self._do_post(
+                    c=client,
+                    url=reverse('changing:add_location'),
+                    data={'locations-county': county.pk, 'locations-address': 'DeferredRevisionAddress'},
+                    expected_status_code=302,
+                    login_startswith=None
+                )
+        location = Location.objects.get(address='DeferredRevisionAddress')
+        mock_defer_revision.assert_called_once()
+        deferred_kwargs = mock_defer_revision.call_args[1]
+        self.assertEqual(deferred_kwargs['model_pks'][Location._meta.label], {str(location.pk)})
+        self.assertEqual(deferred_kwargs['comment'], 'Created through data management wizard')
+        self.assertEqual(deferred_kwargs['user'].pk, fdp_user.pk)
+        # versions are only serialized once deferred, so none were saved during the request
+        self.assertFalse(Version.objects.get_for_object(location).exists())
+        print(_('\nSuccessfully finished test for deferred revisions through a view\n\n'))
+
+    @local_test_settings_required
+    def test_shared_cache_namespaces(self):
+        """ Test that values cached in a namespace of a shared cache are visible through other instances of the
+        namespace, and that invalidating a namespace only invalidates its own values.
+
+        :return: Nothing
+        """
+        print(_('\nStarting test for shared cache namespaces'))
+        self.assertEqual(
+            get_shared_cache(cache_type=SHARED_CACHE_DATABASE, location='')['BACKEND'],
+            'django.core.cache.backends.db.DatabaseCache'
+        )
+        with self.assertRaises(ImproperlyConfigured):
+            get_shared_cache(cache_type='unknown', location='')
+        with TemporaryDirectory() as cache_dir:
+            with override_settings(CACHES={'default': get_shared_cache(SHARED_CACHE_FILE_SYSTEM, location=cache_dir)}):
+                lookups = CacheNamespace(name='lookups')
+                searches = CacheNamespace(name='searches')
+                lookups.set(key='titles', value=['Title1'])
+                searches.set(key='titles', value=['Search1'])
+                # same namespace defined elsewhere, e.g. in another process, sees the same values
+                self.assertEqual(CacheNamespace(name='lookups').get(key='titles'), ['Title1'])
+                self.assertEqual(lookups.get_or_set(key='titles', default=lambda: ['Title2']), ['Title1'])
+                version = lookups.get_version()
+                self.assertEqual(lookups.invalidate(), version + 1)
+                self.assertIsNone(CacheNamespace(name='lookups').get(key='titles'))
+                self.assertEqual(lookups.get_or_set(key='titles', default=lambda: ['Title2']), ['Title2'])
+                # other namespaces are not invalidated
+                self.assertEqual(searches.get(key='titles'), ['Search1'])
+                searches.delete(key='titles')
+                self.assertIsNone(searches.get(key='titles'))
+        print(_('\nSuccessfully finished test for shared cache namespaces\n\n'))
+
+    @local_test_settings_required
+    def test_person_photo_thumbnails(self):
+        """ Test that thumbnails are generated when person photos are saved, and that they are linked from the officer
+        profile through tokens that are signed for the user.
+
+        :return: Nothing
+        """
+        print(_('\nStarting test for person photo thumbnails'))
+        if Image is None:
+            print(_('\nSkipped test for person photo thumbnails, since the Pillow package is not installed\n\n'))
+            return
+        fdp_user = self._create_fdp_user(email_counter=FdpUser.objects.all().count() + 1, **self._host_admin_dict)
+        other_fdp_user = self._create_fdp_user(email_counter=FdpUser.objects.all().count() + 1, **self._host_admin_dict)
+        image_bytes = BytesIO()
+        Image.new('RGB', (800, 1000), color='red').save(image_bytes, format='PNG')
+        with TemporaryDirectory() as media_root:
+            with override_settings(
+                MEDIA_ROOT=media_root,
+                FDP_PERSON_PHOTO_THUMBNAIL_WIDTHS=[200, 400],
+                # links signed while the test runs are identical
+                FDP_PERSON_PHOTO_THUMBNAIL_TOKEN_SECS=10 ** 10
+            ):
+                person = Person.objects.create(name='ThumbnailPerson', **self._is_law_dict, **self._not_confidential_dict)
+                person_photo = PersonPhoto(person=person)
+                person_photo.photo.save(
+                    '{b}thumbnail.png'.format(b=AbstractUrlValidator.PERSON_PHOTO_BASE_URL),
+                    ContentFile(image_bytes.getvalue())
+                )
+                person_photo.refresh_from_db()
+                self.assertTrue(person_photo.has_thumbnails)
+                for width in [200, 400]:
+                    with default_storage.open(get_thumbnail_name(name=person_photo.photo.name, width=width)) as f:
+                        self.assertEqual(Image.open(f).size, (width, int(width * 1.25)))
+                # tokens are only valid for the user for whom they were signed
+                thumbnail_name = get_thumbnail_name(name=person_photo.photo.name, width=200)
+                token = sign_thumbnail_name(name=thumbnail_name, user=fdp_user)
+                self.assertEqual(unsign_thumbnail_name(token=token, user=fdp_user), thumbnail_name)
+                self.assertIsNone(unsign_thumbnail_name(token=token, user=other_fdp_user))
+                self.assertIsNone(unsign_thumbnail_name(token='{t}x'.format(t=token), user=fdp_user))
+                # officer profile links to thumbnails rather than to the original photo
+                thumbnail_urls = get_thumbnail_urls(person_photo=person_photo, user=fdp_user)
+                response_content = self._get_response_from_get_request(
+                    fdp_user=fdp_user,
+                    url=reverse('profiles:officer', kwargs={'pk': person.pk}),
+                    expected_status_code=200,
+                    login_startswith=None
+                )
+                self.assertIn(thumbnail_urls['src'], response_content)
+                self.assertNotIn(person_photo.photo.url, response_content)
+                response = self._do_login(
+                    c=Client(**self._local_client_kwargs),
+                    username=fdp_user.email,
+                    password=self._password,
+                    two_factor=self._create_2fa_record(user=fdp_user),
+                    login_status_code=200,
+                    two_factor_status_code=200,
+                    will_login_succeed=True
+                )
+                response = response.client.get(thumbnail_urls['src'])
+                self.assertEqual(response.status_code, 200)
+                self.assertIn('max-age=86400', response['Cache-Control'])
+                self.assertEqual(Image.open(BytesIO(b''.join(response.streaming_content))).size, (200, 250))
+        print(_('\nSuccessfully finished test for person photo thumbnails\n\n'))
+
+    @local_test_settings_required
+    def test_azure_key_vault_secret_loading(self):
+        """ Test that secrets are retrieved concurrently from the Azure Key Vault, and are reused from an encrypted
+        cache file until they expire.
+
+        :return: Nothing.
+        """
+        print(_('\nStarting test for loading secrets from the Azure Key Vault'))
+        secret_names = ['FDP_SECRET_{i}'.format(i=i) for i in range(5)]
+        secret_client = FakeSecretClient(
+            secrets={'FDP-SECRET-{i}'.format(i=i): 'value{i}'.format(i=i) for i in range(4)}, latency_secs=0.2
+        )
+        start = time()
+        secrets = load_secrets(secret_client=secret_client, secret_names=secret_names, max_workers=5)
+        # secrets were retrieved concurrently
+        self.assertLess(time() - start, 0.2 * len(secret_names))
+        self.assertEqual(secrets['FDP_SECRET_0'], 'value0')
+        # secret does not exist
+        self.assertIsNone(secrets['FDP_SECRET_4'])
+        with TemporaryDirectory() as cache_dir:
+            path = os.path.join(cache_dir, 'secrets.bin')
+            key = Fernet.generate_key()
+            load_secrets(
+                secret_client=secret_client,
+                secret_names=secret_names,
+                cache_file=SecretCacheFile(path=path, key=key, ttl_secs=3600)
+            )
+            self.assertNotIn(b'value0', open(path, 'rb').read())
+            # cached secrets are used without contacting the Azure Key Vault
+            secrets = load_secrets(
+                secret_client=FakeSecretClient(secrets={}),
+                secret_names=secret_names,
+                cache_file=SecretCacheFile(path=path, key=key, ttl_secs=3600)
+            )
+            self.assertEqual(secrets['FDP_SECRET_3'], 'value3')
+            # cached secrets cannot be read with a different key
+            self.assertEqual(
+                SecretCacheFile(path=path, key=Fernet.generate_key(), ttl_secs=3600).read(secret_names=secret_names),
+                (None, None)
+            )
+            # secrets that are not cached are retrieved from the Azure Key Vault
+            secrets = load_secrets(
+                secret_client=FakeSecretClient(secrets={'FDP-SECRET-5': 'value5'}),
+                secret_names=secret_names + ['FDP_SECRET_5'],
+                cache_file=SecretCacheFile(path=path, key=key, ttl_secs=3600)
+            )
+            self.assertEqual(secrets['FDP_SECRET_5'], 'value5')
+            self.assertIsNone(secrets['FDP_SECRET_0'])
+
+        class UnavailableSecretClient:
+            def get_secret(self, name):
+                raise type('ServiceRequestError', (Exception,), {})()
+
+        with self.assertRaises(AzureKeyVaultException):
+            load_secrets(secret_client=UnavailableSecretClient(), secret_names=secret_names)
+        print(_('\nSuccessfully finished test for loading secrets from the Azure Key Vault\n\n'))
+
+    @local_test_settings_required
+    def test_lazy_import(self):
+        """ Test that lazily loaded modules are only loaded on first use and are shared through sys.modules, and that
+        import times are parsed for the import time report.
+
+        :return: Nothing.
+        """
+        print(_('\nStarting test for lazily loaded modules'))
+        self.assertIsNone(
+            load_python_package_module(module_as_str='fdp_missing.module', err_msg='Missing', raise_exception=False)
+        )
+        with self.assertRaisesMessage(Exception, 'Missing'):
+            lazy_module(module_as_str='fdp_missing.module', err_msg='Missing')
+        module_name = 'fdp.configuration.abstract.constants'
+        already_loaded = module_name in sys.modules
+        constants = lazy_module(module_as_str=module_name)
+        self.assertEqual(constants.is_loaded, already_loaded)
+        self.assertIsInstance(constants.CONST_AZURE_AD_PROVIDER, str)
+        self.assertTrue(constants.is_loaded)
+        # module is executed once, and shared with other imports
+        self.assertIs(constants.load(), import_module(module_name))
+        import_times = parse_import_times(lines=[
+            'import time: self [us] | cumulative | imported package',
+            'import time:       120 |        120 |   encodings.aliases',
+            'import time:       300 |        420 | encodings',
+            'unrelated output',
+        ])
+        self.assertEqual([t['module'] for t in import_times], ['encodings.aliases', 'encodings'])
+        self.assertEqual([t['depth'] for t in import_times], [1, 0])
+        self.assertEqual(import_times[1]['cumulative_us'], 420)
+        print(_('\nSuccessfully finished test for lazily loaded modules\n\n'))
+
+    @local_test_settings_required
+    def test_synthetic_data_benchmarks(self):
+        """ Test that synthetic data is generated reproducibly and deleted, and that benchmarks are run against it
+        without leaving any records behind.
+
+        :return: Nothing.
+        """
+        print(_('\nStarting test for synthetic data and benchmarks'))
+        generate_dict = {'persons': 40, 'seed': 3, 'confidential_fraction': 1, 'force': True, 'stdout': StringIO()}
+        call_command('generate_synthetic_data', **generate_dict)
+        synthetic_persons = Person.objects.filter(description=SYNTHETIC_DESCRIPTION)
+        self.assertEqual(synthetic_persons.count(), 40)
+        self.assertFalse(synthetic_persons.filter(for_admin_only=False, for_host_only=False, fdp_organizations=None))
+        self.assertTrue(PersonIncident.objects.filter(person__in=synthetic_persons).exists())
+        names = list(synthetic_persons.order_by('pk').values_list('name', flat=True))
+        num_of_bulk_imports = BulkImport.objects.all().count()
+        num_of_users = FdpUser.objects.all().count()
+        out = StringIO()
+        call_command(
+            'run_benchmarks', group=['searches', 'autocomplete', 'imports'], repeat=1, warmup=0, import_rows=2,
+            force=True, stdout=out, stderr=StringIO()
+        )
+        report = json_loads(out.getvalue())
+        self.assertEqual(report['dataset']['Person'], Person.objects.all().count())
+        result_names = [result['name'] for result in report['results']]
+        for name in ('officer_search_results', 'async_get_persons', 'import_AttachmentAirTableSerializer'):
+            self.assertIn(name, result_names)
+        self.assertTrue(all(result['num_of_queries'] > 0 for result in report['results']))
+        # imported records and the temporary user are rolled back
+        self.assertEqual(BulkImport.objects.all().count(), num_of_bulk_imports)
+        self.assertEqual(FdpUser.objects.all().count(), num_of_users)
+        call_command('generate_synthetic_data', delete=True, force=True, stdout=StringIO())
+        self.assertFalse(Person.objects.filter(description=SYNTHETIC_DESCRIPTION).exists())
+        # same seed generates same data
+        call_command('generate_synthetic_data', **generate_dict)
+        self.assertEqual(list(synthetic_persons.order_by('pk').values_list('name', flat=True)), names)
+        print(_('\nSuccessfully finished test for synthetic data and benchmarks\n\n'))
+
+    @local_test_settings_required
+    def test_explain_plans(self):
+        """ Test that multi-statement search SQL is split with its parameters, that plans are fingerprinted by their
+        shapes, and that new sequential scans, large nested loops and cost jumps are reported as regressions.
+
+        :return: Nothing.
+        """
+        print(_('\nStarting test for explained plans'))
+        statements = split_sql_statements(
+            sql='CREATE TEMP TABLE "temp_x_5_123" ("id" INTEGER) ON COMMIT DROP; '
+                'INSERT INTO "temp_x_5_123" SELECT "id" FROM "p" WHERE "name" ILIKE \'%%;%%\' || %s; '
+                'SELECT * FROM "temp_x_5_123" WHERE "id" > %s AND "id" < %s;',
+            params=['a', 1, 9]
+        )
+        self.assertEqual([p for _, p in statements], [[], ['a'], [1, 9]])
+        self.assertTrue(statements[1][0].endswith('|| %s'))
+        self.assertEqual(
+            normalize_sql(sql='SELECT  *\n FROM "temp_x_5_123" WHERE "id" = 42'),
+            'SELECT * FROM "temp_x" WHERE "id" = ?'
+        )
+        plan = {'Plan': {
+            'Node Type': 'Nested Loop', 'Join Type': 'Inner', 'Total Cost': 500.0, 'Actual Rows': 20000,
+            'Actual Loops': 1, 'Plans': [
+                {'Node Type': 'Seq Scan', 'Relation Name': 'fdp_person', 'Actual Rows': 50,
+                 'Rows Removed by Filter': 19950, 'Actual Loops': 1},
+                {'Node Type': 'Seq Scan', 'Relation Name': 'temp_x_5_123', 'Actual Rows': 10, 'Actual Loops': 1},
+            ]
+        }}
+        summary = summarize_plan(plan=plan, large_table_rows=10000, nested_loop_rows=10000)
+        self.assertEqual(summary['large_seq_scans'], [{'relation': 'fdp_person', 'rows': 20000}])
+        self.assertEqual(len(summary['large_nested_loops']), 1)
+        # fingerprints ignore costs, timings and the unique suffixes of temporary tables
+        plan['Plan']['Total Cost'] = 9.0
+        plan['Plan']['Plans'][1]['Relation Name'] = 'temp_x_7_456'
+        self.assertEqual(
+            summarize_plan(plan=plan, large_table_rows=10000, nested_loop_rows=10000)['fingerprint'],
+            summary['fingerprint']
+        )
+        statement = dict(summary, key='k', sql='SELECT ?')
+        report = {'cases': {'case': {'statements': [statement]}}}
+        compare_dict = {'max_cost_ratio': 2.0, 'min_cost': 100.0}
+        self.assertEqual(compare_plans(report=report, baseline=report, **compare_dict), [])
+        baseline = {'cases': {'case': {'statements': [
+            dict(statement, total_cost=100.0, large_seq_scans=[], large_nested_loops=[])
+        ]}}}
+        self.assertEqual(
+            sorted(r['type'] for r in compare_plans(report=report, baseline=baseline, **compare_dict)),
+            ['cost_jump', 'nested_loop_rows', 'new_seq_scan']
+        )
+        call_command('generate_synthetic_data', persons=20, force=True, stdout=StringIO())
+        out = StringIO()
+        call_command('explain_plans', force=True, stdout=out, stderr=StringIO())
+        explained = json_loads(out.getvalue())
+        self.assertIn('command_profile_busiest', explained['cases'])
+        self.assertTrue(all(case['statements'] for case in explained['cases'].values()))
+        self.assertEqual(explained['regressions'], [])
+        print(_('\nSuccessfully finished test for explained plans\n\n'))
+
+    @local_test_settings_required
+    def test_date_keys(self):
+        """ Test that the date keys and date ranges of date bounded records are maintained when saving, and that they
+        order records and filter by date in the same way as the individual date components.
+
+        :return: Nothing.
+        """
+        print(_('\nStarting test for date keys'))
+        person = Person.objects.create(name='Date keys', **self._is_law_dict, **self._not_confidential_dict)
+        title = Title.objects.create(name='Date keys title')
+        # start year, start month, start day, end year, end month, end day
+        dates = [
+            (2010, 0, 0, 2012, 5, 0), (2011, 3, 4, 2011, 3, 4), (0, 0, 0, 2011, 6, 0), (2009, 1, 1, 0, 0, 0),
+            (0, 0, 0, 0, 0, 0)
+        ]
+        person_titles = [
+            PersonTitle.objects.create(
+                person=person, title=title, start_year=d[0], start_month=d[1], start_day=d[2], end_year=d[3],
+                end_month=d[4], end_day=d[5]
+            ) for d in dates
+        ]
+        self.assertEqual(
+            (person_titles[0].start_date_key, person_titles[0].end_date_key, person_titles[0].sort_date_key),
+            (20100000, 20120500, 20120500)
+        )
+        self.assertEqual(person_titles[0].date_range, DateRange(date(2010, 1, 1), date(2012, 6, 1), '[)'))
+        self.assertEqual(person_titles[3].date_range, DateRange(date(2009, 1, 1), None, '[)'))
+        self.assertIsNone(person_titles[4].date_range)
+        for person_title in person_titles:
+            date_range = person_title.date_range
+            person_title.refresh_from_db()
+            self.assertEqual(person_title.date_range, date_range)
+        # ordering is the same as by the year, month and day of the end date if it is in a later year than the start
+        # date, and otherwise by the year, month and day of the start date
+        self.assertEqual(
+            list(PersonTitle.objects.filter(person=person).order_by('-sort_date_key').values_list('pk', flat=True)),
+            [
+                person_titles[i].pk for i in sorted(
+                    range(len(dates)), key=lambda i: dates[i][3:] if dates[i][3] > dates[i][0] else dates[i][:3],
+                    reverse=True
+                )
+            ]
+        )
+        # keys are saved with the date components that they are maintained from
+        person_titles[3].end_year = 2015
+        person_titles[3].save(update_fields=['end_year'])
+        person_titles[3].refresh_from_db()
+        self.assertEqual((person_titles[3].end_date_key, person_titles[3].sort_date_key), (20150000, 20150000))
+        # exact dates are searched through the start and end date keys
+        incident = Incident.objects.create(
+            start_year=2019, start_month=4, start_day=5, end_year=2019, end_month=4, end_day=9,
+            **self._not_confidential_dict
+        )
+        for searched_date, is_found in [(date(2019, 4, 5), True), (date(2019, 4, 9), True), (date(2019, 4, 7), False)]:
+            date_check_sql = AbstractSearchValidator.get_date_components_check_sql(
+                dates_to_check=[searched_date], table=Incident.get_db_table(), is_and=False, fail_on_default=True
+            )
+            self.assertEqual(Incident.objects.filter(pk=incident.pk).extra(where=[date_check_sql]).exists(), is_found)
+        # date ranges identify dates that fall within other dates
+        with connection.cursor() as cursor:
+            for e, c, is_within in [(1, 0, True), (0, 1, False), (4, 0, False)]:
+                cursor.execute(
+                    'SELECT COUNT(*) FROM "{t}" AS E INNER JOIN "{t}" AS C ON {o} WHERE E."id" = %s AND C."id" = %s'
+                    .format(t=PersonTitle.get_db_table(), o=PersonTitle.date_overlap_sql.format(E='E', C='C')),
+                    [person_titles[e].pk, person_titles[c].pk]
+                )
+                self.assertEqual(cursor.fetchone()[0], 1 if is_within else 0)
+        print(_('\nSuccessfully finished test for date keys\n\n'))
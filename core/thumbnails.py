@@ -0,0 +1,165 @@
+"""
+
+Thumbnails for person photos, and the signed tokens through which they are served.
+
+Thumbnails are generated in fixed widths when a person photo is uploaded or imported, and are stored beside the original
+photo through the default file storage, i.e. in the local file system or in an Azure Storage account.
+
+Access to a person photo is verified once when the page displaying it is rendered, e.g. the officer profile. The page
+then links to the photo's thumbnails through tokens that are signed for the user, and that expire after a short period,
+so that each thumbnail can be served without verifying access to it again.
+
+Thumbnails are only generated if the Pillow package is installed.
+See: https://pillow.readthedocs.io/en/stable/
+
+"""
+from django.core import signing
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.urls import reverse
+from inheritable.models import AbstractConfiguration
+from io import BytesIO
+from json import dumps as json_dumps, loads as json_loads
+from posixpath import join as posix_join, split as posix_split, splitext as posix_splitext
+from time import time
+import logging
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+
+logger = logging.getLogger(__name__)
+
+
+#: Salt used when signing the tokens through which thumbnails are served.
+SALT = 'core.thumbnails'
+
+
+#: Name of folder, beside the original photo, in which thumbnails are stored.
+THUMBNAIL_FOLDER = 'thumbnails'
+
+
+#: Extension for thumbnail files.
+THUMBNAIL_EXTENSION = '.jpg'
+
+
+def can_generate_thumbnails():
+    """ Checks whether thumbnails can be generated for person photos.
+
+    :return: True if thumbnails can be generated, false otherwise.
+    """
+    return Image is not None and bool(AbstractConfiguration.person_photo_thumbnail_widths())
+
+
+def get_thumbnail_name(name, width):
+    """ Retrieves the relative path of a thumbnail for a person photo.
+
+    :param name: Relative path of person photo, e.g. person/photo/2021/01/01/00/00/00/photo.png.
+    :param width: Width of thumbnail in pixels.
+    :return: Relative path of thumbnail, e.g. person/photo/2021/01/01/00/00/00/thumbnails/photo_160.jpg.
+    """
+    head, tail = posix_split(name)
+    root, ext = posix_splitext(tail)
+    return posix_join(head, THUMBNAIL_FOLDER, '{r}_{w}{e}'.format(r=root, w=width, e=THUMBNAIL_EXTENSION))
+
+
+def generate_thumbnails(name):
+    """ Generates the thumbnails for a person photo, in each of the widths configured through the
+    FDP_PERSON_PHOTO_THUMBNAIL_WIDTHS setting.
+
+    Photos that are narrower than a width are not enlarged.
+
+    :param name: Relative path of person photo.
+    :return: True if thumbnails were generated, false if they cannot be generated, e.g. if the Pillow package is not
+    installed, or if the photo cannot be read as an image.
+    """
+    if not can_generate_thumbnails() or not name:
+        return False
+    try:
+        with default_storage.open(name, 'rb') as photo_file:
+            with Image.open(photo_file) as image:
+                image.load()
+                image = image.convert('RGB')
+    # photo may be missing, may not be an image, or may not be readable through the storage, none of which should
+    # prevent the person photo from being saved
+    except Exception as err:
+        logger.warning('Thumbnails could not be generated for {n}: {e}'.format(n=name, e=err))
+        return False
+    for width in AbstractConfiguration.person_photo_thumbnail_widths():
+        thumbnail = image.copy()
+        # height is only limited by the photo's aspect ratio
+        thumbnail.thumbnail((width, image.height))
+        thumbnail_bytes = BytesIO()
+        thumbnail.save(thumbnail_bytes, format='JPEG', quality=85, optimize=True)
+        thumbnail_name = get_thumbnail_name(name=name, width=width)
+        # thumbnails are regenerated in place
+        if default_storage.exists(thumbnail_name):
+            default_storage.delete(thumbnail_name)
+        default_storage.save(thumbnail_name, ContentFile(thumbnail_bytes.getvalue()))
+    return True
+
+
+def _get_window(offset=0):
+    """ Retrieves the period of time for which tokens are signed.
+
+    Tokens that are signed in the same period are identical, so that browsers can reuse cached thumbnails while a page
+    is revisited.
+
+    :param offset: Number of periods to add to the current period.
+    :return: Period as an integer.
+    """
+    return int(time() // AbstractConfiguration.person_photo_thumbnail_token_secs()) + offset
+
+
+def sign_thumbnail_name(name, user):
+    """ Signs the relative path of a thumbnail for a user, once the user's access to the person photo has been
+    verified.
+
+    :param name: Relative path of thumbnail.
+    :param user: User for whom to sign.
+    :return: Signed token.
+    """
+    # unlike signing.dumps(...), the token does not include the time when it was signed
+    value = signing.b64_encode(json_dumps([user.pk, name, _get_window()], separators=(',', ':')).encode('utf-8'))
+    return signing.Signer(salt=SALT).sign(value.decode('ascii'))
+
+
+def unsign_thumbnail_name(token, user):
+    """ Retrieves the relative path of a thumbnail from a signed token.
+
+    Tokens are valid for between one and two times the number of seconds configured through the
+    FDP_PERSON_PHOTO_THUMBNAIL_TOKEN_SECS setting.
+
+    :param token: Signed token.
+    :param user: User requesting the thumbnail.
+    :return: Relative path of thumbnail, or None if the token is not valid for the user.
+    """
+    try:
+        value = signing.Signer(salt=SALT).unsign(token)
+        user_pk, name, window = json_loads(signing.b64_decode(value.encode('ascii')).decode('utf-8'))
+    except (signing.BadSignature, TypeError, ValueError):
+        return None
+    if user_pk != user.pk or window not in (_get_window(), _get_window(offset=-1)):
+        return None
+    return name
+
+
+def get_thumbnail_urls(person_photo, user):
+    """ Retrieves the URLs through which a user can retrieve the thumbnails for a person photo, once the user's access
+    to the person photo has been verified.
+
+    :param person_photo: Person photo for which to retrieve thumbnail URLs.
+    :param user: User for whom thumbnail URLs are retrieved.
+    :return: Dictionary with the URL for the smallest thumbnail as src, and the URLs with their widths as srcset, or
+    None if the person photo has no thumbnails.
+    """
+    widths = AbstractConfiguration.person_photo_thumbnail_widths()
+    if not person_photo.has_thumbnails or not widths:
+        return None
+    urls = []
+    for width in sorted(widths):
+        token = sign_thumbnail_name(name=get_thumbnail_name(name=person_photo.photo.name, width=width), user=user)
+        urls.append((reverse('core:download_person_photo_thumbnail', kwargs={'token': token}), width))
+    return {'src': urls[0][0], 'srcset': ', '.join('{u} {w}w'.format(u=u, w=w) for u, w in urls)}
@@ -1,4 +1,4 @@
-from django.urls import re_path
+from django.urls import path, re_path
 from django.conf import settings
 from inheritable.models import AbstractUrlValidator
 from . import views
@@ -15,5 +15,13 @@ urlpatterns = [
         ),
         view=views.DownloadPersonPhotoView.as_view(),
         name='download_person_photo'
+    ),
+    path(
+        '{b}{s}<str:token>'.format(
+            b=settings.FDP_MEDIA_URL[1:] if settings.FDP_MEDIA_URL.startswith('/') else settings.FDP_MEDIA_URL,
+            s=AbstractUrlValidator.PERSON_PHOTO_THUMBNAIL_BASE_URL
+        ),
+        view=views.DownloadPersonPhotoThumbnailView.as_view(),
+        name='download_person_photo_thumbnail'
     )
 ]
@@ -3,6 +3,8 @@ from django.conf import settings
 from .models import PersonPhoto
 from inheritable.models import AbstractUrlValidator, AbstractConfiguration
 from inheritable.views import SecuredSyncView
+from django.utils.cache import patch_cache_control
+from .thumbnails import unsign_thumbnail_name
 
 
 class DownloadPersonPhotoView(SecuredSyncView):
@@ -22,13 +24,15 @@ class DownloadPersonPhotoView(SecuredSyncView):
             user = request.user
             # value that will be in attachment's file field
             file_field_value = '{b}{p}'.format(b=AbstractUrlValidator.PERSON_PHOTO_BASE_URL, p=path)
-            # person photos
-            partially_filtered_queryset = PersonPhoto.active_objects.all()
-            # person photos filtered for indirect confidentiality
-            filtered_queryset = PersonPhoto.filter_for_admin(queryset=partially_filtered_queryset, user=user)
-            # person photo is not accessible by user
-            if file_field_value and not filtered_queryset.filter(photo=file_field_value).exists():
-                raise Exception(_('User does not have access to person photo'))
+            # user's access to person photo was not recently verified, e.g. while retrieving a profile linking to it
+            if not self.has_remembered_file_access(user=user, name=file_field_value):
+                # person photo identified through its unique photo field
+                partially_filtered_queryset = PersonPhoto.active_objects.filter(photo=file_field_value)
+                # person photo filtered for indirect confidentiality
+                filtered_queryset = PersonPhoto.filter_for_admin(queryset=partially_filtered_queryset, user=user)
+                # person photo is not accessible by user
+                if file_field_value and not filtered_queryset.exists():
+                    raise Exception(_('User does not have access to person photo'))
             # if hosted in Microsoft Azure, storing person photos in an Azure Storage account is required
             if AbstractConfiguration.is_using_azure_configuration():
                 return self.serve_azure_storage_static_file(name=file_field_value)
@@ -41,3 +45,41 @@ class DownloadPersonPhotoView(SecuredSyncView):
                     relative_base_url=AbstractUrlValidator.PERSON_PHOTO_BASE_URL,
                     document_root=settings.MEDIA_ROOT
                 )
+
+
+class DownloadPersonPhotoThumbnailView(SecuredSyncView):
+    """ View that allows users to download a thumbnail for a person photo, through a token that was signed for them
+    when their access to the person photo was verified.
+
+    """
+    def get(self, request, token):
+        """ Retrieve the requested thumbnail file.
+
+        :param request: Http request object.
+        :param token: Signed token identifying the thumbnail.
+        :return: Thumbnail file to download or link to download thumbnail.
+        """
+        # relative path of thumbnail, if token was signed for user and has not expired
+        name = unsign_thumbnail_name(token=token, user=request.user)
+        if not name or not name.startswith(AbstractUrlValidator.PERSON_PHOTO_BASE_URL):
+            raise Exception(_('User does not have access to person photo thumbnail'))
+        # if hosted in Microsoft Azure, storing person photos in an Azure Storage account is required
+        if AbstractConfiguration.is_using_azure_configuration():
+            return self.serve_azure_storage_static_file(name=name)
+        # otherwise use default mechanism to serve files
+        else:
+            response = self.serve_static_file(
+                request=request,
+                path=name,
+                absolute_base_url=settings.MEDIA_URL,
+                relative_base_url=AbstractUrlValidator.PERSON_PHOTO_BASE_URL,
+                document_root=settings.MEDIA_ROOT
+            )
+            # thumbnail for a particular photo path never changes
+            patch_cache_control(
+                response,
+                private=True,
+                immutable=True,
+                max_age=AbstractConfiguration.person_photo_thumbnail_cache_secs()
+            )
+            return response
@@ -1,38 +1,112 @@
 from django.conf import settings
+from django.core.files.storage import FileSystemStorage
 from django.utils.encoding import filepath_to_uri
-from urllib.parse import urljoin
+from urllib.parse import urljoin, urlencode
+from fdp.lazy_import import load_python_package_module
+from abc import abstractmethod
+from threading import Lock
+from time import time
+import hmac
 
 
-# FDP system is configured for hosting in Microsoft Azure, so use Azure Storage Account for static and media files
-if getattr(settings, 'USE_AZURE_SETTINGS', False):
-    from importlib.util import find_spec, module_from_spec
+class SasExpiringUrlCacheMixin:
+    """ Reuses the expiring URLs with shared access signatures that are generated for files, until a fraction of their
+    lifetime remains.
+
+    The fraction is configured through the FDP_AZURE_MEDIA_URL_MIN_REMAINING_FRACTION setting. For example, if URLs
+    expire after 20 seconds and the fraction is 0.5, then a URL generated for a file is reused for 10 seconds.
+
+    Expiring URLs are cached in the storage instance, so the storage instance should be reused across requests, e.g.
+    through django.core.files.storage.default_storage.
 
-    #: TODO: Defined both here and in base_settings.py. Refactor for a single definition through base_settings.py.
-    def load_python_package_module(module_as_str, err_msg, raise_exception):
-        """ Dynamically loads a module for a Python package.
+    Storages inheriting from this mixin must override _generate_sas_expiring_url(...) to generate new expiring URLs.
 
-        :param module_as_str: Fully qualified module as a string, e.g. my_package.my_module.
-        :param err_msg: Exception message if module is not available.
-        :param raise_exception: True if an exception should be raised if the module cannot be loaded, False if None should
-        be returned.
-        :return: Loaded module, or None if raise_exception is False and the module cannot be loaded.
+    """
+    #: Maximum number of expiring URLs that are cached before those that can no longer be reused are discarded.
+    max_num_of_cached_sas_expiring_urls = 1000
+
+    def __init__(self, *args, **kwargs):
+        """ Initializes an empty cache of expiring URLs.
+
+        :param args: Positional arguments passed to the storage.
+        :param kwargs: Keyword arguments passed to the storage.
         """
-        spec_for_module = find_spec(module_as_str)
-        # package for requested module is not installed
-        if not spec_for_module:
-            # exception should be raised
-            if raise_exception:
-                raise Exception(err_msg)
-            # fail silently
-            else:
-                return None
-        # load module in the package
-        module = module_from_spec(spec_for_module)
-        # initialize module
-        spec_for_module.loader.exec_module(module)
-        return module
+        super().__init__(*args, **kwargs)
+        #: Dictionary mapping relative paths of files to tuples of their expiring URLs and the times until which they
+        # can be reused.
+        self._sas_expiring_urls = {}
+        self._sas_expiring_urls_lock = Lock()
+
+    @abstractmethod
+    def _generate_sas_expiring_url(self, name, expire):
+        """ Generates a new absolute and temporary URL where the file's contents can be accessed directly by a Web
+        browser.
+
+        :param name: Relative path for file including file name and extension.
+        :param expire: Number of seconds until URL expires.
+        :return: Absolute URL.
+        """
+        pass
 
+    def get_sas_expiring_url(self, name):
+        """ Retrieves an absolute and temporary URL where the file's contents can be accessed directly by a Web
+        browser.
 
+        A URL that was previously generated for the file is reused, if enough of its lifetime remains.
+
+        :param name: Relative path for file including file name and extension.
+        :return: Absolute URL.
+        """
+        # link expiration in seconds
+        expire = int(self.expiration_secs) if self.expiration_secs else None
+        # fraction of the link's lifetime that must remain for the link to be reused
+        min_remaining_fraction = getattr(settings, 'FDP_AZURE_MEDIA_URL_MIN_REMAINING_FRACTION', 0.5)
+        if not expire or min_remaining_fraction >= 1:
+            return self._generate_sas_expiring_url(name=name, expire=expire)
+        now = time()
+        with self._sas_expiring_urls_lock:
+            cached = self._sas_expiring_urls.get(name, None)
+        if cached is not None and cached[1] > now:
+            return cached[0]
+        sas_expiring_url = self._generate_sas_expiring_url(name=name, expire=expire)
+        reuse_until = now + expire * (1 - max(min_remaining_fraction, 0))
+        with self._sas_expiring_urls_lock:
+            if len(self._sas_expiring_urls) >= self.max_num_of_cached_sas_expiring_urls:
+                self._sas_expiring_urls = {k: v for k, v in self._sas_expiring_urls.items() if v[1] > now}
+                if len(self._sas_expiring_urls) >= self.max_num_of_cached_sas_expiring_urls:
+                    self._sas_expiring_urls.clear()
+            self._sas_expiring_urls[name] = (sas_expiring_url, reuse_until)
+        return sas_expiring_url
+
+
+class FakeMediaAzureStorage(SasExpiringUrlCacheMixin, FileSystemStorage):
+    """ Simulates the storage of user-uploaded media files in Azure Storage, through the local file system.
+
+    Expiring URLs are generated with a fake signature and an expiry, so that the serving of media files through Azure
+    Storage can be tested without an Azure Storage account.
+
+    To use, define in the settings: DEFAULT_FILE_STORAGE = 'fdp.backends.azure_storage.FakeMediaAzureStorage'
+
+    """
+    #: Number of seconds for URL to expire to media file in simulated Azure Storage
+    expiration_secs = getattr(settings, 'AZURE_MEDIA_URL_EXPIRATION_SECS', 20)
+
+    def _generate_sas_expiring_url(self, name, expire):
+        """ Generates a new absolute and temporary URL for a file, with a fake shared access signature.
+
+        :param name: Relative path for file including file name and extension.
+        :param expire: Number of seconds until URL expires.
+        :return: Absolute URL.
+        """
+        expires_at = str(int(time() + expire)) if expire else ''
+        signature = hmac.new(
+            settings.SECRET_KEY.encode('utf-8'), '{n}:{e}'.format(n=name, e=expires_at).encode('utf-8'), 'sha256'
+        ).hexdigest()
+        return '{u}?{q}'.format(u=self.url(name), q=urlencode({'se': expires_at, 'sig': signature}))
+
+
+# FDP system is configured for hosting in Microsoft Azure, so use Azure Storage Account for static and media files
+if getattr(settings, 'USE_AZURE_SETTINGS', False):
     # load if django-storage[azure] package is installed
     # see: https://django-storages.readthedocs.io/en/latest/backends/azure.html
     azure_storage_module = load_python_package_module(
@@ -54,7 +128,7 @@ if getattr(settings, 'USE_AZURE_SETTINGS', False):
     )
 
 
-    class MediaAzureStorage(azure_storage_module.AzureStorage):
+    class MediaAzureStorage(SasExpiringUrlCacheMixin, azure_storage_module.AzureStorage):
         """ Defines configuration for storage of user-uploaded media files that are stored in Azure Storage.
 
         See: https://django-storages.readthedocs.io/en/latest/backends/azure.html
@@ -89,19 +163,18 @@ if getattr(settings, 'USE_AZURE_SETTINGS', False):
                 url = url.lstrip('/')
             return urljoin(settings.FDP_MEDIA_URL, url)
 
-        def get_sas_expiring_url(self, name):
-            """ Retrieves an absolute and temporary URL where the file's contents can be accessed directly by a Web
+        def _generate_sas_expiring_url(self, name, expire):
+            """ Generates a new absolute and temporary URL where the file's contents can be accessed directly by a Web
             browser.
 
             URL will be an expiring link with a shared access signature that accesses the Azure Storage account.
 
             :param name: Relative path for file including file name and extension.
+            :param expire: Number of seconds until URL expires.
             :return: Absolute URL.
             """
             # relative path of file including name and extension
             name = self._get_valid_path(name)
-            # link expiration in seconds
-            expire = self.expiration_secs
             # shared access signature
             sas_token = self.custom_service.generate_blob_shared_access_signature(
                 self.azure_container,
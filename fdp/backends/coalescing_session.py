@@ -0,0 +1,103 @@
+from django.conf import settings
+from django.contrib.sessions.backends.base import UpdateError
+from django.contrib.sessions.backends.cached_db import SessionStore as CachedDbSessionStore
+from django.utils.timezone import now
+from hashlib import sha256
+
+
+class SessionStore(CachedDbSessionStore):
+    """ Session backend that keeps sessions in the cache, and coalesces writes to the database.
+
+    Since SESSION_SAVE_EVERY_REQUEST is True, each request saves its session to renew the session's expiry. This backend
+    writes a session to the database only when its content changes, or when its expiry has been extended by more than
+    FDP_SESSION_PERSIST_EXPIRY_FRACTION * SESSION_COOKIE_AGE since it was last written to the database. Otherwise, only
+    the cached session and its expiry are renewed.
+
+    Sessions are loaded from the cache first, and then from the database, in the same manner as Django's cached_db
+    session backend. If a session is evicted from the cache, it may therefore expire up to
+    FDP_SESSION_PERSIST_EXPIRY_FRACTION * SESSION_COOKIE_AGE seconds earlier than its cookie.
+
+    The cache must be shared by all processes serving requests (see SESSION_CACHE_ALIAS), so that changes to a session
+    made by one process are visible to the others.
+
+    To use, define in the settings: SESSION_ENGINE = 'fdp.backends.coalescing_session'
+
+    See: https://docs.djangoproject.com/en/3.1/topics/http/sessions/#using-cached-sessions
+
+    """
+    #: Prefix for the cache keys of sessions.
+    cache_key_prefix = 'fdp.backends.coalescing_session'
+
+    #: Prefix for the cache keys recording what was last written to the database for each session.
+    persisted_cache_key_prefix = 'fdp.backends.coalescing_session.persisted'
+
+    @property
+    def persisted_cache_key(self):
+        """ Cache key recording the hash of the content and the expiry that were last written to the database for this
+        session.
+
+        :return: Cache key.
+        """
+        return self.persisted_cache_key_prefix + self._get_or_create_session_key()
+
+    def __get_hash(self, session_dict):
+        """ Retrieves a hash of the content of a session.
+
+        :param session_dict: Dictionary of session content.
+        :return: Hash as a string.
+        """
+        return sha256(self.serializer().dumps(session_dict)).hexdigest()
+
+    @staticmethod
+    def __get_max_unpersisted_extension():
+        """ Retrieves the number of seconds by which the expiry of a session can be extended without writing the session
+        to the database.
+
+        :return: Number of seconds.
+        """
+        return getattr(settings, 'FDP_SESSION_PERSIST_EXPIRY_FRACTION', 0.1) * settings.SESSION_COOKIE_AGE
+
+    def save(self, must_create=False):
+        """ Saves the session in the cache, and in the database if its content changed or its expiry was extended
+        significantly since it was last written to the database.
+
+        :param must_create: True if a new session must be created.
+        :return: Nothing.
+        """
+        session_dict = self._get_session(no_load=must_create)
+        session_hash = self.__get_hash(session_dict=session_dict)
+        expire_date = self.get_expiry_date()
+        # new sessions are always written to the database
+        if self.session_key is not None and not must_create:
+            persisted = self._cache.get(self.persisted_cache_key)
+            # content is unchanged, and the expiry was not extended significantly since last written to the database
+            if persisted is not None and persisted['hash'] == session_hash and \
+                    (expire_date - persisted['expire_date']).total_seconds() < self.__get_max_unpersisted_extension():
+                self._cache.set(self.cache_key, session_dict, self.get_expiry_age())
+                return
+        try:
+            super(SessionStore, self).save(must_create=must_create)
+        # cached session outlived its database record, e.g. if clearsessions ran while the expiry in the database was
+        # behind the expiry in the cache
+        except UpdateError:
+            if self._cache.get(self.cache_key) is None:
+                raise
+            super(SessionStore, self).save(must_create=True)
+        self._cache.set(
+            self.persisted_cache_key,
+            {'hash': session_hash, 'expire_date': expire_date},
+            max(int((expire_date - now()).total_seconds()), 0)
+        )
+
+    def delete(self, session_key=None):
+        """ Deletes a session from the cache and the database.
+
+        :param session_key: Key of session to delete. If omitted, the current session is deleted.
+        :return: Nothing.
+        """
+        if session_key is None:
+            if self.session_key is None:
+                return
+            session_key = self.session_key
+        self._cache.delete(self.persisted_cache_key_prefix + session_key)
+        super(SessionStore, self).delete(session_key=session_key)
@@ -0,0 +1,300 @@
+"""
+
+PostgreSQL database backend with health checked persistent connections, a per-process pool of idle connections, and
+metrics for connection churn.
+
+Persistent connections are enabled through the CONN_MAX_AGE key in the DATABASES setting. When CONN_HEALTH_CHECKS is
+True, a persistent connection is checked once before it is reused by a subsequent request, and is replaced by a new
+connection if the check fails. The check discards temporary tables, so that tables of scores created by searches never
+survive on a reused connection, even if they were not dropped when their transaction ended.
+
+When POOL_SIZE is greater than 0, connections that are closed, e.g. at the end of a request or when a data wizard import
+thread ends, are reset and kept idle in a pool shared by all threads of the process, rather than being disconnected.
+Idle connections are reused before new connections are opened, and are disconnected after POOL_MAX_IDLE_SECS seconds.
+
+To use, define in the settings: DATABASES = {'default': {'ENGINE': 'fdp.backends.postgresql', ...}}
+
+See: https://docs.djangoproject.com/en/3.1/ref/databases/#persistent-connections
+
+"""
+from django.db import DEFAULT_DB_ALIAS
+from django.db.backends.postgresql.base import DatabaseWrapper as PostgreSQLDatabaseWrapper, Database
+from os import getpid
+from threading import Lock
+from time import monotonic
+import logging
+
+
+logger = logging.getLogger(__name__)
+
+
+#: Metrics for connection churn, i.e. the number of connections that were opened, reused after passing their health
+#: check, taken from or returned to the pool, closed, and replaced after failing their health check.
+CONNECTION_METRICS = ('opened', 'reused', 'pooled', 'returned', 'closed', 'health_check_failures')
+
+#: Metrics for connection churn in the current process.
+_process_metrics = dict.fromkeys(CONNECTION_METRICS, 0)
+
+#: Lock for metrics for connection churn in the current process.
+_process_metrics_lock = Lock()
+
+#: Pools of idle connections in the current process, keyed by database alias.
+_pools = {}
+
+#: Lock for pools of idle connections in the current process.
+_pools_lock = Lock()
+
+
+def get_connection_metrics():
+    """ Retrieves the metrics for connection churn in the current process, since the process started.
+
+    :return: Dictionary with the keys in CONNECTION_METRICS.
+    """
+    with _process_metrics_lock:
+        return dict(_process_metrics)
+
+
+class ConnectionPool:
+    """ Pool of idle connections to a database, shared by all threads of a process.
+
+    Connections are reset before they are returned to the pool, so that no transaction, session setting or temporary
+    table is carried over to the thread that reuses them.
+
+    """
+    def __init__(self, size, max_idle_secs):
+        """ Initializes the pool.
+
+        :param size: Maximum number of idle connections that are kept in the pool.
+        :param max_idle_secs: Maximum number of seconds for which a connection is kept idle in the pool.
+        """
+        self.size = size
+        self.max_idle_secs = max_idle_secs
+        self.pid = getpid()
+        self.__idle = []
+        self.__lock = Lock()
+
+    @property
+    def num_of_idle(self):
+        """ Number of idle connections in the pool.
+
+        :return: Number of connections.
+        """
+        with self.__lock:
+            return len(self.__idle)
+
+    @staticmethod
+    def __disconnect(connection):
+        """ Disconnects a connection, ignoring any errors.
+
+        :param connection: Psycopg2 connection.
+        :return: Nothing.
+        """
+        try:
+            connection.close()
+        except Database.Error:
+            pass
+
+    @staticmethod
+    def is_healthy(connection):
+        """ Checks whether a connection can be used.
+
+        :param connection: Psycopg2 connection.
+        :return: True if the connection can be used, false otherwise.
+        """
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+        except Database.Error:
+            return False
+        return True
+
+    def get(self, health_check):
+        """ Takes the most recently returned idle connection from the pool.
+
+        Connections that were idle for too long, or that fail their health check, are disconnected.
+
+        :param health_check: True if the connection is checked before it is taken from the pool.
+        :return: Tuple of the psycopg2 connection or None if no idle connection can be used, and the number of
+        connections that failed their health check.
+        """
+        num_of_failures = 0
+        while True:
+            with self.__lock:
+                if not self.__idle:
+                    return None, num_of_failures
+                connection, returned_at = self.__idle.pop()
+            if connection.closed or monotonic() - returned_at > self.max_idle_secs:
+                self.__disconnect(connection=connection)
+            elif health_check and not self.is_healthy(connection=connection):
+                num_of_failures += 1
+                self.__disconnect(connection=connection)
+            else:
+                return connection, num_of_failures
+
+    def put(self, connection):
+        """ Resets a connection and returns it to the pool.
+
+        :param connection: Psycopg2 connection.
+        :return: True if the connection was returned to the pool, false if it was disconnected instead.
+        """
+        if connection.closed or getpid() != self.pid:
+            return False
+        try:
+            if connection.status != Database.extensions.STATUS_READY:
+                connection.rollback()
+            connection.autocommit = True
+            with connection.cursor() as cursor:
+                # resets session settings, and drops temporary tables and prepared statements
+                cursor.execute('DISCARD ALL')
+        except Database.Error:
+            self.__disconnect(connection=connection)
+            return False
+        with self.__lock:
+            if len(self.__idle) < self.size:
+                self.__idle.append((connection, monotonic()))
+                return True
+        self.__disconnect(connection=connection)
+        return False
+
+
+class DatabaseWrapper(PostgreSQLDatabaseWrapper):
+    """ PostgreSQL database wrapper with health checked persistent connections, a per-process pool of idle connections,
+    and metrics for connection churn.
+
+    A database wrapper is created for each database alias in each thread, so its metrics are for the current thread.
+
+    """
+    def __init__(self, settings_dict, alias=DEFAULT_DB_ALIAS):
+        """ Initializes the database wrapper.
+
+        :param settings_dict: Dictionary defining the database in the DATABASES setting.
+        :param alias: Alias of the database in the DATABASES setting.
+        """
+        super().__init__(settings_dict, alias=alias)
+        self.health_check_enabled = bool(self.settings_dict.get('CONN_HEALTH_CHECKS', False))
+        self.health_check_done = False
+        self.connection_metrics = dict.fromkeys(CONNECTION_METRICS, 0)
+
+    def __record(self, metric, num=1):
+        """ Records a metric for connection churn for the current thread and process.
+
+        :param metric: Metric in CONNECTION_METRICS.
+        :param num: Number by which the metric is increased.
+        :return: Nothing.
+        """
+        self.connection_metrics[metric] += num
+        with _process_metrics_lock:
+            _process_metrics[metric] += num
+
+    def __get_pool(self):
+        """ Retrieves the pool of idle connections for the database in the current process.
+
+        :return: Pool of idle connections, or None if connections are not pooled.
+        """
+        size = int(self.settings_dict.get('POOL_SIZE', 0) or 0)
+        if size <= 0:
+            return None
+        with _pools_lock:
+            pool = _pools.get(self.alias, None)
+            # connections inherited from a parent process cannot be shared with it
+            if pool is None or pool.pid != getpid():
+                pool = ConnectionPool(
+                    size=size, max_idle_secs=int(self.settings_dict.get('POOL_MAX_IDLE_SECS', 300))
+                )
+                _pools[self.alias] = pool
+            return pool
+
+    def get_new_connection(self, conn_params):
+        """ Takes an idle connection from the pool, or opens a new connection to the database.
+
+        :param conn_params: Parameters for connecting to the database.
+        :return: Psycopg2 connection.
+        """
+        pool = self.__get_pool()
+        if pool is not None:
+            connection, num_of_failures = pool.get(health_check=self.health_check_enabled)
+            if num_of_failures:
+                self.__record(metric='health_check_failures', num=num_of_failures)
+            if connection is not None:
+                self.__record(metric='pooled')
+                options = self.settings_dict['OPTIONS']
+                self.isolation_level = options.get('isolation_level', connection.isolation_level)
+                if self.isolation_level != connection.isolation_level:
+                    connection.set_session(isolation_level=self.isolation_level)
+                return connection
+        connection = super().get_new_connection(conn_params)
+        self.__record(metric='opened')
+        logger.debug('Opened connection to database {a}'.format(a=self.alias))
+        return connection
+
+    def connect(self):
+        """ Connects to the database. A new connection does not need to be checked before its first use.
+
+        :return: Nothing.
+        """
+        super().connect()
+        self.health_check_done = True
+
+    def _close(self):
+        """ Returns the connection to the pool, or disconnects it from the database.
+
+        Connections that are closed inside an atomic block are always disconnected, since their transaction has not
+        ended.
+
+        :return: Nothing.
+        """
+        if self.connection is None:
+            return
+        pool = None if self.in_atomic_block else self.__get_pool()
+        if pool is not None and pool.put(connection=self.connection):
+            self.__record(metric='returned')
+            return
+        super()._close()
+        self.__record(metric='closed')
+        logger.debug('Closed connection to database {a}'.format(a=self.alias))
+
+    def is_usable(self):
+        """ Checks whether the connection can be used, and discards any temporary tables that remain on it.
+
+        :return: True if the connection can be used, false otherwise.
+        """
+        try:
+            # use a psycopg2 cursor directly, bypassing Django's utilities
+            with self.connection.cursor() as cursor:
+                cursor.execute('DISCARD TEMP')
+        except Database.Error:
+            return False
+        return True
+
+    def close_if_health_check_failed(self):
+        """ Checks a persistent connection once before it is reused, and closes it if the check fails.
+
+        :return: Nothing.
+        """
+        if self.connection is None or not self.health_check_enabled or self.health_check_done:
+            return
+        if self.is_usable():
+            self.__record(metric='reused')
+        else:
+            self.__record(metric='health_check_failures')
+            self.close()
+        self.health_check_done = True
+
+    def close_if_unusable_or_obsolete(self):
+        """ Closes the connection if unrecoverable errors have occurred or if it outlived its maximum age, at the start
+        and end of each request. Connections that remain open are checked again before they are reused.
+
+        :return: Nothing.
+        """
+        if self.connection is not None:
+            self.health_check_done = False
+        super().close_if_unusable_or_obsolete()
+
+    def _cursor(self, name=None):
+        """ Creates a cursor, checking a reused connection first and opening a connection if necessary.
+
+        :param name: Name of cursor, for server-side cursors.
+        :return: Cursor.
+        """
+        self.close_if_health_check_failed()
+        return super()._cursor(name=name)
@@ -10,7 +10,6 @@ from .constants import CONST_AXES_AUTH_BACKEND, CONST_DJANGO_AUTH_BACKEND
 from django.urls import reverse_lazy
 from django.core.exceptions import ImproperlyConfigured
 from pathlib import Path
-from importlib.util import find_spec, module_from_spec
 import os
 
 
@@ -34,6 +33,10 @@ ENV_VAR_FOR_FDP_DATABASE_PASSWORD = 'FDP_DATABASE_PASSWORD'
 ENV_VAR_FOR_FDP_DATABASE_HOST = 'FDP_DATABASE_HOST'
 # Name of environment variable for database port.
 ENV_VAR_FOR_FDP_DATABASE_PORT = 'FDP_DATABASE_PORT'
+# Name of environment variable for read replica database host.
+ENV_VAR_FOR_FDP_DATABASE_REPLICA_HOST = 'FDP_DATABASE_REPLICA_HOST'
+# Name of environment variable for read replica database port.
+ENV_VAR_FOR_FDP_DATABASE_REPLICA_PORT = 'FDP_DATABASE_REPLICA_PORT'
 # Name of environment variable for key used in querystring encryption.
 ENV_VAR_FOR_FDP_QUERYSTRING_PASSWORD = 'FDP_QUERYSTRING_PASSWORD'
 # Name of environment variable for private key used by reCAPTCHA.
@@ -127,54 +130,6 @@ def get_from_environment_var_or_conf_file(environment_var, conf_file, default_va
     return val_to_get
 
 
-def load_python_package_module(module_as_str, err_msg, raise_exception):
-    """ Dynamically loads a module for a Python package.
-
-    :param module_as_str: Fully qualified module as a string, e.g. my_package.my_module.
-    :param err_msg: Exception message if module is not available.
-    :param raise_exception: True if an exception should be raised if the module cannot be loaded, False if None should
-    be returned.
-    :return: Loaded module, or None if raise_exception is False and the module cannot be loaded.
-    """
-    dot = '.'
-    # module_as_str = first_module.second_module.third_module...
-    if dot in module_as_str:
-        # split_modules = [first_module, second_module, third_module, ...]
-        split_modules = module_as_str.split(dot)
-        recombined_modules = ''
-        for split_module in split_modules[:-1]:
-            # recombined_modules = first_module
-            # recombined_modules = first_module.second_module
-            # recombined_modules = first_module.second_module.third_module
-            recombined_modules = split_module if not recombined_modules \
-                else '{r}.{s}'.format(r=recombined_modules, s=split_module)
-            # check for partial module specification
-            spec_for_recombined_modules = find_spec(recombined_modules)
-            # some parent package for request module is not installed
-            if not spec_for_recombined_modules:
-                # exception should be raised
-                if raise_exception:
-                    raise Exception(err_msg)
-                # fail silently
-                else:
-                    return None
-    # check for full module specification
-    spec_for_module = find_spec(module_as_str)
-    # package for requested module is not installed
-    if not spec_for_module:
-        # exception should be raised
-        if raise_exception:
-            raise Exception(err_msg)
-        # fail silently
-        else:
-            return None
-    # load module in the package
-    module = module_from_spec(spec_for_module)
-    # initialize module
-    spec_for_module.loader.exec_module(module)
-    return module
-
-
 # Administrator for site
 ADMINS = []
 
@@ -229,11 +184,15 @@ INSTALLED_APPS = [
 # Will be used in Django's standard MIDDLEWARE setting
 # MIDDLEWARE = FIRST_MIDDLEWARE + OTP_MIDDLEWARE + LAST_MIDDLEWARE
 FIRST_MIDDLEWARE = [
+    # Only used if FDP_SQL_INSTRUMENTATION is True
+    'fdp.middleware.instrumentation_middleware.SqlInstrumentationMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    # Only used if a read replica is defined in DATABASES, see FDP_READ_REPLICA_DATABASE
+    'fdp.middleware.replica_middleware.ReadReplicaMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     # Django-CSP: https://django-csp.readthedocs.io/en/latest/
@@ -282,6 +241,47 @@ DATABASES = {
         'NAME': BASE_DIR / 'db.sqlite3'
     }
 }
+# Number of seconds for which database connections are kept open and reused by subsequent requests of the same thread.
+# Use 0 to close database connections at the end of each request.
+# See: https://docs.djangoproject.com/en/3.1/ref/databases/#persistent-connections
+FDP_DATABASE_CONN_MAX_AGE = int(get_from_environment_var_or_conf_file(
+    environment_var='FDP_DATABASE_CONN_MAX_AGE', conf_file='fdp_database_conn_max_age.conf', default_val=0
+))
+# Check persistent database connections before they are reused, and replace them if the check fails.
+# Checks also discard temporary tables that remain on reused database connections.
+# Use 'false' to disable.
+FDP_DATABASE_CONN_HEALTH_CHECKS = str(
+    get_from_environment_var_or_conf_file(
+        environment_var='FDP_DATABASE_CONN_HEALTH_CHECKS', conf_file='fdp_database_conn_health_checks.conf',
+        default_val='true'
+    )
+).strip().lower() == 'true'
+# Maximum number of idle database connections that are kept in each process, e.g. for data wizard import threads and
+# requests served by threads. Connections are reset before they are kept idle. Use 0 to disconnect closed connections.
+FDP_DATABASE_POOL_SIZE = int(get_from_environment_var_or_conf_file(
+    environment_var='FDP_DATABASE_POOL_SIZE', conf_file='fdp_database_pool_size.conf', default_val=0
+))
+# Sends reads for views that opt in through inheritable.replicas.read_replica to the read replica, if it is defined.
+DATABASE_ROUTERS = ['inheritable.replicas.ReadReplicaRouter']
+
+
+def get_read_replica_database(primary, host, port):
+    """ Retrieves the definition of a read replica for the DATABASES setting.
+
+    The read replica is a copy of the primary database, so it is defined through the same settings except for the host
+    and port. During tests, the read replica mirrors the primary database.
+
+    :param primary: Dictionary defining the primary database.
+    :param host: Host of the read replica.
+    :param port: Port of the read replica. If empty, the port of the primary database is used.
+    :return: Dictionary defining the read replica.
+    """
+    replica = dict(primary)
+    replica['HOST'] = host
+    if port:
+        replica['PORT'] = port
+    replica['TEST'] = {'MIRROR': 'default'}
+    return replica
 
 
 # Custom User: https://docs.djangoproject.com/en/3.1/topics/auth/customizing/#substituting-a-custom-user-model
@@ -385,6 +385,13 @@ SESSION_SAVE_EVERY_REQUEST = True
 SESSION_COOKIE_SECURE = True
 # Force session to expire when closing browser
 SESSION_EXPIRE_AT_BROWSER_CLOSE = True
+# Sessions are stored in the database by default. To reduce the number of database writes caused by
+# SESSION_SAVE_EVERY_REQUEST, sessions can instead be kept in the cache and written to the database only when their
+# content changes, or when their expiry has been extended by more than a fraction of SESSION_COOKIE_AGE.
+# This requires a cache that is shared by all processes serving requests (see SESSION_CACHE_ALIAS).
+# To enable, define in settings.py: SESSION_ENGINE = 'fdp.backends.coalescing_session'
+# Fraction of SESSION_COOKIE_AGE by which a session's expiry can be extended before it is written to the database.
+FDP_SESSION_PERSIST_EXPIRY_FRACTION = 0.1
 
 # Secure CSRF cookies can be HTTPS only
 CSRF_COOKIE_SECURE = True
@@ -422,13 +429,76 @@ UNKNOWN = 'Unknown'
 APPS_IN_ADMIN = ['fdpuser', 'changing', 'core', 'sourcing', 'supporting', 'verifying']
 
 
-# Explicitly define local-memory caching as default,
+# Types of caches that can be used as the default cache
+# Local-memory caching, where each process serving requests has its own cache
+SHARED_CACHE_LOCAL_MEMORY = 'locmem'
+# File system caching, where all processes serving requests share a cache directory
+SHARED_CACHE_FILE_SYSTEM = 'file'
+# Database caching, where all processes serving requests share a cache table
+SHARED_CACHE_DATABASE = 'database'
+
+
+def get_shared_cache(cache_type, location):
+    """ Retrieves the definition of a cache for the CACHES setting.
+
+    :param cache_type: Type of cache. Use SHARED_CACHE_LOCAL_MEMORY, SHARED_CACHE_FILE_SYSTEM or SHARED_CACHE_DATABASE.
+    :param location: Directory for file system caching, or table for database caching. Ignored for local-memory caching.
+    :return: Dictionary defining cache.
+    """
+    cache_type = str(cache_type).strip().lower()
+    if cache_type == SHARED_CACHE_LOCAL_MEMORY:
+        return {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'unique-snowflake'}
+    elif cache_type == SHARED_CACHE_FILE_SYSTEM:
+        return {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': str(location) if location else str(ONE_UP_BASE_DIR / 'cache'),
+            'KEY_PREFIX': 'fdp',
+        }
+    elif cache_type == SHARED_CACHE_DATABASE:
+        return {
+            'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+            'LOCATION': str(location) if location else '{p}cache'.format(p=DB_PREFIX),
+            'KEY_PREFIX': 'fdp',
+        }
+    raise ImproperlyConfigured('Cache type {t} is not supported.'.format(t=cache_type))
+
+
+# Type of cache used as the default cache.
+# Use 'locmem' for local-memory caching (only consistent when requests are served by a single process),
+# 'file' for file system caching, or 'database' for database caching.
+# Database caching requires the cache table to be created through: python manage.py createcachetable
+FDP_SHARED_CACHE_TYPE = get_from_environment_var_or_conf_file(
+    environment_var='FDP_SHARED_CACHE_TYPE', conf_file='fdp_shared_cache_type.conf',
+    default_val=SHARED_CACHE_LOCAL_MEMORY
+)
+# Directory for file system caching, or table for database caching.
+# Defaults to the cache directory beside the base directory, or the fdp_cache table.
+FDP_SHARED_CACHE_LOCATION = get_from_environment_var_or_conf_file(
+    environment_var='FDP_SHARED_CACHE_LOCATION', conf_file='fdp_shared_cache_location.conf', default_val=''
+)
+# Use the shared default cache for Django Axes, rather than the workaround DummyCache.
+# Ignored when the default cache uses local-memory caching.
+# Use 'true' to enable.
+FDP_AXES_USE_SHARED_CACHE = str(
+    get_from_environment_var_or_conf_file(
+        environment_var='FDP_AXES_USE_SHARED_CACHE', conf_file='fdp_axes_use_shared_cache.conf', default_val='false'
+    )
+).strip().lower() == 'true'
+# Default number of seconds for which values cached through inheritable.caching.CacheNamespace are kept.
+FDP_SHARED_CACHE_TIMEOUT = 300
+# Number of seconds for which each section of an officer profile that is retrieved after the page is loaded, e.g. the
+# payroll or misconducts, is cached for the user who retrieved it. Cached sections are invalidated when data is changed.
+# Only used if FDP_SHARED_CACHE_TYPE is 'file' or 'database', since invalidating a local-memory cache does not reach the
+# other processes serving requests. Set to 0 to retrieve the sections from the database for every request.
+FDP_OFFICER_PROFILE_SECTION_CACHE_SECS = 0
+
+
+# Define the default cache through FDP_SHARED_CACHE_TYPE,
 # and then add workaround for Django Axes (https://django-axes.readthedocs.io/en/latest/)
+# To redefine in settings.py, use e.g.:
+# CACHES['default'] = get_shared_cache(cache_type=SHARED_CACHE_FILE_SYSTEM, location='/path/to/cache/')
 CACHES = {
-    'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-        'LOCATION': 'unique-snowflake',
-    },
+    'default': get_shared_cache(cache_type=FDP_SHARED_CACHE_TYPE, location=FDP_SHARED_CACHE_LOCATION),
     'axes_cache': {
         'BACKEND': 'django.core.cache.backends.dummy.DummyCache',
     }
@@ -449,8 +519,10 @@ COMPRESS_JS_FILTERS = [
 
 
 # Django Axes: https://django-axes.readthedocs.io/en/latest/
-# Connect with workaround DummyCache because of issue with local-memory caching used as default
-AXES_CACHE = 'axes_cache'
+# Connect with workaround DummyCache because of issue with local-memory caching used as default,
+# unless the default cache is shared by all processes serving requests and FDP_AXES_USE_SHARED_CACHE is enabled
+AXES_CACHE = 'default' if FDP_AXES_USE_SHARED_CACHE and str(FDP_SHARED_CACHE_TYPE).strip().lower() != \
+    SHARED_CACHE_LOCAL_MEMORY else 'axes_cache'
 # Number of login attempts before record is created for failed login
 AXES_FAILURE_LIMIT = 3
 # Number of hours of user inactivity after which old failed logins are forgotten
@@ -545,6 +617,10 @@ TWO_FACTOR_QR_FACTORY = 'qrcode.image.svg.SvgImage'
 # Number of digits to use for TOTP tokens, can be set to 6 or 8. Setting used for tokens delivered by phone call or
 # text message and newly configured token generators. Existing token generator devices will not be affected.
 TWO_FACTOR_TOTP_DIGITS = 6
+# Number of seconds for which the result of verifying a user's 2FA device, and whether the user was authenticated
+# through Azure Active Directory, are reused from the user's session rather than retrieved from the database on each
+# request. Set to 0 to verify on each request.
+FDP_OTP_VERIFICATION_CACHE_SECS = 300
 
 
 # Settings for sending emails
@@ -630,6 +706,18 @@ AUTHENTICATION_BACKENDS = [
 DATE_LANGUAGES = ['en']
 
 
+# Strategy through which the data management wizard searches define their tables of scores.
+# Use 'temp_tables' to create a temporary table for each table of scores, which is dropped when the transaction is
+# committed, or 'cte' to define each table of scores as a common table expression (WITH query), so that each search is
+# performed through a single statement without DDL. Use 'cte' if connections are shared through a connection pooler in
+# transaction mode (e.g. PgBouncer), or if searches are performed on a read replica.
+# Strategies can be compared through: python manage.py run_benchmarks --group wizard
+FDP_SEARCH_SCORE_TABLE_STRATEGY = get_from_environment_var_or_conf_file(
+    environment_var='FDP_SEARCH_SCORE_TABLE_STRATEGY', conf_file='fdp_search_score_table_strategy.conf',
+    default_val='temp_tables'
+)
+
+
 # Django Data Wizard: https://github.com/wq/django-data-wizard
 DATA_WIZARD = {
     # Implement confidentiality filtering and corresponding automated tests in bulk upload before changing this.
@@ -637,17 +725,53 @@ DATA_WIZARD = {
     # The threading backend creates a separate thread for long-running asynchronous tasks (i.e. auto and data).
     # The threading backend leverages the Django cache to pass results back to the status API. As of Django Data
     # Wizard 1.1.0, this backend is the default unless you have configured Celery.
-    'BACKEND': 'data_wizard.backends.threading',
+    # The bulk.backends backend extends the threading backend, so that each thread releases its database connections
+    # when it ends.
+    'BACKEND': 'bulk.backends',
     # Always map IDs (skip manual mapping). Unknown IDs will be passed on as-is to the serializer, which will cause
     # per-row errors unless using natural keys.
     'IDMAP': 'data_wizard.idmap.always',
 }
+# Django Reversion: https://django-reversion.readthedocs.io/en/stable/
+# Additional serialization formats that can be used to store record versions.
+# The compressed_json format stores each version as compressed JSON to reduce the size of the version table.
+SERIALIZATION_MODULES = {'compressed_json': 'inheritable.compressed_json'}
+# Serialization format used to store record versions, e.g. 'json' or 'compressed_json'. Changing the format only
+# affects new versions, existing versions can always be read. Old versions can be removed with the Django-Reversion
+# management command: python manage.py deleterevisions --days=...
+FDP_REVISION_SERIALIZATION_FORMAT = 'compressed_json'
+# Set to True to defer the serialization of record versions for changes made through the data management wizard. Only
+# the primary keys of changed records are captured during a request, and their versions are serialized in bulk once the
+# request's transaction has been committed. Versions therefore reflect the records as committed by the request.
+# Audit trail trade-off: if saved in the background, versions are kept in memory until they are saved. Versions waiting
+# when a process exits normally, e.g. when a worker is recycled, are saved before it exits, but they are lost if the
+# process is killed or crashes, so the history may miss the changes from the last requests that such a process handled.
+FDP_DEFER_REVISIONS = False
+# Set to True to save deferred record versions in a background thread, or False to save them in the request thread
+# once its transaction has been committed. Only used if FDP_DEFER_REVISIONS is True.
+FDP_DEFER_REVISIONS_IN_BACKGROUND = True
 # Set to True to disable record versioning by the Django-Reversion package when importing records through the Django
 # Data Wizard package. See: https://django-reversion.readthedocs.io/en/stable/
 DISABLE_REVERSION_FOR_DATA_WIZARD = True
 # The number of seconds in between each asynchronous GET request to check for the status of importing records through
 # the Django Data Wizard package.
 DATA_WIZARD_STATUS_CHECK_SECONDS = 3
+# Value indicating that the data imported through the Django Data Wizard package is recorded as uncompressed JSON in the
+# bulk import table.
+BULK_IMPORT_JSON_FORMAT = 'json'
+# Value indicating that the data imported through the Django Data Wizard package is recorded as compressed JSON in the
+# bulk import table.
+BULK_IMPORT_COMPRESSED_FORMAT = 'compressed'
+# Format in which the data imported through the Django Data Wizard package is recorded in the bulk import table.
+# Compressed JSON significantly reduces the size of the table, and so the time taken for backups and vacuums.
+FDP_BULK_IMPORT_DATA_FORMAT = BULK_IMPORT_COMPRESSED_FORMAT
+# Number of days for which the data imported through the Django Data Wizard package is kept in the bulk import table,
+# before it is moved into archive files by: python manage.py archive_bulk_imports
+# The columns mapping external IDs to FDP records are always kept in the bulk import table.
+# Set to None to never archive the data.
+FDP_BULK_IMPORT_RETENTION_DAYS = None
+# Directory into which the data imported through the Django Data Wizard package is archived.
+FDP_BULK_IMPORT_ARCHIVE_DIR = ONE_UP_BASE_DIR / 'archive'
 
 
 # Added in Django 3.2
@@ -682,3 +806,72 @@ FDP_ERR_LOGGING = {
 # It must end in a slash if set to a non-empty value.
 # See the Django setting MEDIA_URL for similarities.
 FDP_MEDIA_URL = '/perm/media/'
+
+
+# Mechanisms through which user-uploaded media files are delivered by SecuredSyncView.serve_static_file(...), after
+# access to them has been verified.
+# The Python process streams the file, supporting conditional and range requests
+STATIC_FILE_DELIVERY_PYTHON = 'python'
+# The front-end server streams the file through the X-Accel-Redirect header, e.g. Nginx
+# See: https://www.nginx.com/resources/wiki/start/topics/examples/x-accel/
+STATIC_FILE_DELIVERY_X_ACCEL_REDIRECT = 'x-accel-redirect'
+# The front-end server streams the file through the X-Sendfile header, e.g. Apache with mod_xsendfile
+# See: https://tn123.org/mod_xsendfile/
+STATIC_FILE_DELIVERY_X_SENDFILE = 'x-sendfile'
+# Mechanism through which user-uploaded media files are delivered when they are not stored in an Azure Storage account.
+FDP_STATIC_FILE_DELIVERY = STATIC_FILE_DELIVERY_PYTHON
+# Internal URL prefix that the front-end server maps to MEDIA_ROOT, when files are delivered through the
+# X-Accel-Redirect header. It must end in a slash.
+# E.g. for Nginx: location /protected-media/ { internal; alias /path/to/media/root/; }
+FDP_X_ACCEL_REDIRECT_PREFIX = '/protected-media/'
+# Number of seconds for which the files linked from a profile page can be downloaded by the user who viewed the page,
+# without verifying the user's access to each file again. Access is recorded through the default cache.
+# Set to 0 to always verify access when files are downloaded.
+FDP_FILE_ACCESS_CACHE_SECS = 60
+
+
+# Widths in pixels of the thumbnails that are generated for person photos when they are uploaded or imported.
+# Thumbnails are only generated if the Pillow package is installed: https://pillow.readthedocs.io/en/stable/
+# To generate thumbnails for existing person photos, use: python manage.py generate_person_photo_thumbnails
+# Set to an empty list to disable thumbnails.
+FDP_PERSON_PHOTO_THUMBNAIL_WIDTHS = [200, 400]
+# Number of seconds for which the signed links to thumbnails on a page are valid.
+# Links are valid for between one and two times this number of seconds.
+FDP_PERSON_PHOTO_THUMBNAIL_TOKEN_SECS = 3600
+# Number of seconds for which browsers may cache thumbnails.
+FDP_PERSON_PHOTO_THUMBNAIL_CACHE_SECS = 86400
+
+
+# Records the number of SQL queries, the time spent in the database, the slowest statements and the time spent in Python
+# for each request through fdp.middleware.instrumentation_middleware.SqlInstrumentationMiddleware.
+# Measurements are logged as JSON through the fdp.middleware.instrumentation_middleware logger at the INFO level.
+FDP_SQL_INSTRUMENTATION = False
+# Number of slowest SQL statements that are logged for each request. Literals in statements are redacted.
+FDP_SQL_INSTRUMENTATION_NUM_OF_SLOWEST = 5
+# True if measurements are added to responses for host administrators and superusers through the Server-Timing header.
+FDP_SQL_INSTRUMENTATION_SERVER_TIMING = True
+
+
+# Allows host administrators to profile individual requests to secured views through cProfile, either by sending the
+# X-FDP-Profile header with a request, or by enabling request profiling for their session on the Settings page.
+# Profiles include the timeline of SQL statements, and can be downloaded from the admin interface.
+FDP_REQUEST_PROFILER = False
+# Number of request profiles that are kept. Oldest profiles are deleted when new profiles are recorded.
+FDP_REQUEST_PROFILER_MAX_PROFILES = 100
+
+
+# Alias of the read replica in the DATABASES setting.
+# Read replicas are defined through the FDP_DATABASE_REPLICA_HOST and FDP_DATABASE_REPLICA_PORT settings.
+# Reads for profile pages, searches, downloads and autocomplete lookups are sent to the read replica, if it is defined.
+# Temporary tables cannot be created on a read replica, so searches that use them are performed on the primary database.
+FDP_READ_REPLICA_DATABASE = 'replica'
+# Number of seconds for which a user's reads are sent to the primary database after the user writes, so that the user's
+# changes are visible while the read replica catches up.
+FDP_READ_REPLICA_PIN_SECS = 15
+
+
+# Number of seconds for which the incidents linked to content, and the persons suggested for each incident, are kept in
+# the user's session after allegations and penalties are linked to the content through the data management wizard, so
+# that the user can cycle through the incidents to link the suggested persons without recomputing them for each step.
+# Set to 0 to recompute the next incident and the suggested persons for each step.
+FDP_INCIDENT_NAVIGATION_SECS = 1800
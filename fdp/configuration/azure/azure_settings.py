@@ -12,6 +12,9 @@ Used to define default settings file to configure hosting in a Microsoft Azure e
 from fdp.configuration.abstract.constants import CONST_AZURE_AUTH_BACKEND, CONST_AZURE_OTP_MIDDLEWARE, \
     CONST_AZURE_AUTH_APP, CONST_AZURE_TEMPLATE_CONTEXT_PROCESSORS
 from fdp.configuration.abstract.base_settings import *
+from fdp.configuration.azure.key_vault import AzureKeyVaultException, FakeSecretClient, SecretCacheFile, get_secret, \
+    load_secrets
+from fdp.lazy_import import load_python_package_module
 from django.core.management.utils import get_random_secret_key
 from base64 import b64encode
 from os import urandom
@@ -31,17 +34,16 @@ ENV_VAR_FOR_FDP_SOCIAL_AUTH_AZUREAD_TENANT_OAUTH2_TENANT_ID = 'FDP_SOCIAL_AUTH_A
 ENV_VAR_FOR_FDP_SOCIAL_AUTH_AZUREAD_TENANT_OAUTH2_SECRET = 'FDP_SOCIAL_AUTH_AZUREAD_TENANT_OAUTH2_SECRET'
 
 
-class AzureKeyVaultException(Exception):
-    """ Custom class used by the FDP to raise its own exceptions in the context of accessing and interacting with the
-    Azure Key Vault.
-
-    """
-    pass
-
-
 # default is to ignore Azure Key Vault, unless package is installed and vault name is specified
 TRY_AZURE_KEY_VAULT = False
 secret_client = None
+# Secrets retrieved together from Azure Key Vault, while the settings are loaded
+AZURE_KEY_VAULT_SECRETS = {}
+# Path to a JSON file mapping secret names to values, that is read by a fake secret client instead of Azure Key Vault,
+# e.g. to benchmark the loading of settings offline
+AZURE_KEY_VAULT_FAKE_SECRETS_FILE = get_from_environment_var(
+    environment_var='FDP_AZURE_KEY_VAULT_FAKE_SECRETS_FILE', raise_exception=False, default_val=None
+)
 # load if azure-keyvault-secrets package is installed
 # see: https://github.com/Azure/azure-sdk-for-python/tree/master/sdk/keyvault/azure-keyvault-secrets
 azure_keyvault_secrets_module = load_python_package_module(
@@ -69,6 +71,29 @@ if azure_keyvault_secrets_module:
             vault_url='https://{v}.vault.azure.net'.format(v=AZURE_KEY_VAULT_NAME),
             credential=credential
         )
+if AZURE_KEY_VAULT_FAKE_SECRETS_FILE:
+    TRY_AZURE_KEY_VAULT = True
+    secret_client = FakeSecretClient.from_file(
+        path=AZURE_KEY_VAULT_FAKE_SECRETS_FILE,
+        # Number of seconds to wait before each secret is retrieved, to simulate network latency
+        latency_secs=float(get_from_environment_var(
+            environment_var='FDP_AZURE_KEY_VAULT_FAKE_LATENCY_SECS', raise_exception=False, default_val=0
+        ))
+    )
+# Maximum number of secrets that are retrieved from Azure Key Vault at the same time
+AZURE_KEY_VAULT_MAX_WORKERS = int(get_from_environment_var(
+    environment_var='FDP_AZURE_KEY_VAULT_MAX_WORKERS', raise_exception=False, default_val=8
+))
+# Path to local file in which secrets retrieved from Azure Key Vault are cached, encrypted with the key in the
+# FDP_AZURE_KEY_VAULT_CACHE_KEY environment variable. Secrets are only cached if both are defined.
+AZURE_KEY_VAULT_CACHE_FILE = get_from_environment_var(
+    environment_var='FDP_AZURE_KEY_VAULT_CACHE_FILE', raise_exception=False, default_val=None
+)
+# Number of seconds for which secrets cached in the local file are used. Cached secrets are refreshed in the background
+# once half of this period has elapsed.
+AZURE_KEY_VAULT_CACHE_SECS = int(get_from_environment_var(
+    environment_var='FDP_AZURE_KEY_VAULT_CACHE_SECS', raise_exception=False, default_val=3600
+))
 
 
 def get_from_azure_key_vault(secret_name):
@@ -80,25 +105,11 @@ def get_from_azure_key_vault(secret_name):
     secret = None
     # skip access attempt for Azure Key Vault, if vault name wasn't specified or corresponding package wasn't installed
     if TRY_AZURE_KEY_VAULT:
-        # Secret names cannot have underscores
-        parsed_secret_name = str(secret_name).replace('_', '-')
-        try:
-            azure_key_vault_secret = secret_client.get_secret(parsed_secret_name)
-            secret = azure_key_vault_secret.value
-        except Exception as err:
-            # modules loaded dynamically with find_spec and loader.exec_module have different class definitions than the
-            # modules that define this exception, even if they are from the same source, i.e. azure.core.exceptions
-            # so as a temporary measure, compare string representations of the classes instead of using isinstance(...)
-            err_class = err.__class__.__name__
-            # Occurs if a secret does not exist
-            if err_class == 'ResourceNotFoundError':
-                secret = None
-            # Occurs during deployment to Azure, during the collectstatic step
-            elif err_class == 'ServiceRequestError':
-                raise AzureKeyVaultException(err)
-            # Unexpected error
-            else:
-                raise err
+        # secret was already retrieved together with the other secrets required by the settings
+        if secret_name in AZURE_KEY_VAULT_SECRETS:
+            secret = AZURE_KEY_VAULT_SECRETS[secret_name]
+        else:
+            secret = get_secret(secret_client=secret_client, secret_name=secret_name)
     return secret
 
 
@@ -121,6 +132,43 @@ EXT_AUTH = get_from_environment_var(
 EXT_AUTH = str(EXT_AUTH).lower()
 
 
+# Retrieve all secrets required by the settings concurrently, rather than one after another
+if TRY_AZURE_KEY_VAULT:
+    azure_key_vault_secret_names = [
+        ENV_VAR_FOR_FDP_SECRET_KEY,
+        ENV_VAR_FOR_FDP_DATABASE_USER,
+        ENV_VAR_FOR_FDP_DATABASE_PASSWORD,
+        ENV_VAR_FOR_FDP_QUERYSTRING_PASSWORD,
+        ENV_VAR_FOR_FDP_AZURE_STORAGE_ACCOUNT_KEY,
+        ENV_VAR_FOR_FDP_RECAPTCHA_PRIVATE_KEY,
+        ENV_VAR_FOR_FDP_EMAIL_HOST_USER,
+        ENV_VAR_FOR_FDP_EMAIL_HOST_PASSWORD
+    ]
+    if EXT_AUTH == AAD_EXT_AUTH:
+        azure_key_vault_secret_names += [
+            ENV_VAR_FOR_FDP_SOCIAL_AUTH_AZUREAD_TENANT_OAUTH2_KEY,
+            ENV_VAR_FOR_FDP_SOCIAL_AUTH_AZUREAD_TENANT_OAUTH2_TENANT_ID,
+            ENV_VAR_FOR_FDP_SOCIAL_AUTH_AZUREAD_TENANT_OAUTH2_SECRET
+        ]
+    azure_key_vault_cache_key = get_from_environment_var(
+        environment_var='FDP_AZURE_KEY_VAULT_CACHE_KEY', raise_exception=False, default_val=None
+    )
+    try:
+        AZURE_KEY_VAULT_SECRETS = load_secrets(
+            secret_client=secret_client,
+            secret_names=azure_key_vault_secret_names,
+            max_workers=AZURE_KEY_VAULT_MAX_WORKERS,
+            cache_file=None if not (AZURE_KEY_VAULT_CACHE_FILE and azure_key_vault_cache_key) else SecretCacheFile(
+                path=AZURE_KEY_VAULT_CACHE_FILE, key=azure_key_vault_cache_key, ttl_secs=AZURE_KEY_VAULT_CACHE_SECS
+            )
+        )
+    # azure.core.exceptions.ServiceRequestError occurred
+    # raised during collectstatic command call while deploying
+    except AzureKeyVaultException:
+        # don't try any more Azure Key Vault access
+        TRY_AZURE_KEY_VAULT = False
+
+
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/3.1/howto/deployment/checklist/
 
@@ -327,7 +375,8 @@ TEMPLATES = [TEMPLATE_FIRST_DICT]
 postgres_db_secret_user = get_from_azure_key_vault(secret_name=ENV_VAR_FOR_FDP_DATABASE_USER)
 postgres_db_password = get_from_azure_key_vault(secret_name=ENV_VAR_FOR_FDP_DATABASE_PASSWORD)
 DATABASES['default'] = {
-    'ENGINE': 'django.db.backends.postgresql',
+    # PostgreSQL with health checked persistent connections and pooling, see fdp.backends.postgresql
+    'ENGINE': 'fdp.backends.postgresql',
     'NAME': get_from_environment_var(
         environment_var=ENV_VAR_FOR_FDP_DATABASE_NAME,
         raise_exception=False,
@@ -348,8 +397,23 @@ DATABASES['default'] = {
     'HOST': get_from_environment_var(environment_var=ENV_VAR_FOR_FDP_DATABASE_HOST, raise_exception=True),
     'PORT': get_from_environment_var(
         environment_var=ENV_VAR_FOR_FDP_DATABASE_PORT, raise_exception=False, default_val=5432
-    )
+    ),
+    'CONN_MAX_AGE': FDP_DATABASE_CONN_MAX_AGE,
+    'CONN_HEALTH_CHECKS': FDP_DATABASE_CONN_HEALTH_CHECKS,
+    'POOL_SIZE': FDP_DATABASE_POOL_SIZE
 }
+# Read replica, if its host is defined
+fdp_database_replica_host = get_from_environment_var(
+    environment_var=ENV_VAR_FOR_FDP_DATABASE_REPLICA_HOST, raise_exception=False, default_val=''
+)
+if fdp_database_replica_host:
+    DATABASES[FDP_READ_REPLICA_DATABASE] = get_read_replica_database(
+        primary=DATABASES['default'],
+        host=fdp_database_replica_host,
+        port=get_from_environment_var(
+            environment_var=ENV_VAR_FOR_FDP_DATABASE_REPLICA_PORT, raise_exception=False, default_val=''
+        )
+    )
 
 
 # A URL-safe base64-encoded 32-byte key that is used by the Fernet symmetric encryption algorithm
@@ -448,6 +512,10 @@ MEDIA_URL = 'https://{d}/{c}/'.format(d=AZURE_CUSTOM_DOMAIN, c=AZURE_MEDIA_CONTA
 AZURE_MEDIA_URL_EXPIRATION_SECS = get_from_environment_var(
     environment_var='FDP_AZURE_MEDIA_EXPIRY', raise_exception=False, default_val=AZURE_URL_EXPIRATION_SECS
 )
+# Fraction of AZURE_MEDIA_URL_EXPIRATION_SECS that must remain before an expiring URL to a media file is no longer
+# reused, and a new URL is generated. For example, 0.5 reuses a URL that expires after 20 seconds for 10 seconds.
+# Set to 1 to generate a new URL for every request.
+FDP_AZURE_MEDIA_URL_MIN_REMAINING_FRACTION = 0.5
 
 
 # This is where the files uploaded through Django will be uploaded.
@@ -0,0 +1,242 @@
+"""
+
+Please DO NOT modify!
+
+Concurrent and cached retrieval of the secrets that configure hosting in a Microsoft Azure environment.
+
+Secrets are retrieved from the Azure Key Vault once per process while the settings are loaded. All required secrets are
+requested concurrently, rather than one network round trip after another.
+
+Optionally, retrieved secrets are cached in a local file that is encrypted with a Fernet key, so that workers and
+management commands that start shortly after each other do not need to contact the Azure Key Vault. Cached secrets are
+used for at most FDP_AZURE_KEY_VAULT_CACHE_SECS seconds, and are refreshed in the background once half of that period
+has elapsed. Caching is enabled by defining both the FDP_AZURE_KEY_VAULT_CACHE_FILE and FDP_AZURE_KEY_VAULT_CACHE_KEY
+environment variables. The key must not be stored beside the cache file.
+
+A fake secret client reading secrets from a JSON file can be configured through the
+FDP_AZURE_KEY_VAULT_FAKE_SECRETS_FILE environment variable, so that the loading of settings can be benchmarked without
+access to an Azure Key Vault.
+
+"""
+from cryptography.fernet import Fernet, InvalidToken
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from json import dumps as json_dumps, load as json_load, loads as json_loads
+from tempfile import NamedTemporaryFile
+from threading import Thread
+from time import sleep, time
+import logging
+import os
+
+
+logger = logging.getLogger(__name__)
+
+
+class AzureKeyVaultException(Exception):
+    """ Custom class used by the FDP to raise its own exceptions in the context of accessing and interacting with the
+    Azure Key Vault.
+
+    """
+    pass
+
+
+class ResourceNotFoundError(Exception):
+    """ Raised by the fake secret client if a secret does not exist.
+
+    Named after azure.core.exceptions.ResourceNotFoundError, since exceptions raised while retrieving secrets are
+    identified by the names of their classes.
+
+    """
+    pass
+
+
+#: Secret retrieved through the fake secret client, with the same attributes as KeyVaultSecret that are used.
+FakeSecret = namedtuple('FakeSecret', ('name', 'value'))
+
+
+class FakeSecretClient:
+    """ Secret client that retrieves secrets from a dictionary, after an optional simulated network latency.
+
+    Implements the subset of azure.keyvault.secrets.SecretClient that is used by the FDP.
+
+    """
+    def __init__(self, secrets, latency_secs=0):
+        """ Initializes the fake secret client.
+
+        :param secrets: Dictionary mapping names of secrets, as they are named in the Azure Key Vault, to their values.
+        :param latency_secs: Number of seconds to wait before each secret is retrieved.
+        """
+        self.secrets = dict(secrets)
+        self.latency_secs = latency_secs
+
+    @classmethod
+    def from_file(cls, path, latency_secs=0):
+        """ Initializes the fake secret client from a JSON file.
+
+        :param path: Path to JSON file containing an object that maps names of secrets to their values.
+        :param latency_secs: Number of seconds to wait before each secret is retrieved.
+        :return: Fake secret client.
+        """
+        with open(path, 'r') as secrets_file:
+            return cls(secrets=json_load(secrets_file), latency_secs=latency_secs)
+
+    def get_secret(self, name):
+        """ Retrieves a secret.
+
+        :param name: Name of secret, as it is named in the Azure Key Vault.
+        :return: Secret with a value attribute.
+        """
+        if self.latency_secs:
+            sleep(self.latency_secs)
+        if name not in self.secrets:
+            raise ResourceNotFoundError('Secret {n} was not found'.format(n=name))
+        return FakeSecret(name=name, value=self.secrets[name])
+
+
+def get_secret(secret_client, secret_name):
+    """ Retrieves the contents of a Secret in the Azure Key Vault, and if it does not exist returns None.
+
+    :param secret_client: Client through which to retrieve the secret.
+    :param secret_name: Name of Secret, e.g. FDP_SECRET_KEY. Underscores are replaced, since Secret names cannot have
+    underscores.
+    :return: The value stored in the Secret in the Azure Key Vault, or None otherwise.
+    """
+    try:
+        return secret_client.get_secret(str(secret_name).replace('_', '-')).value
+    except Exception as err:
+        # compare the names of the exception classes instead of using isinstance(...), so that the azure.core package
+        # is not required, and so that exceptions raised by the fake secret client are handled in the same manner
+        err_class = err.__class__.__name__
+        # Occurs if a secret does not exist
+        if err_class == 'ResourceNotFoundError':
+            return None
+        # Occurs during deployment to Azure, during the collectstatic step
+        elif err_class == 'ServiceRequestError':
+            raise AzureKeyVaultException(err)
+        # Unexpected error
+        else:
+            raise err
+
+
+def get_secrets(secret_client, secret_names, max_workers):
+    """ Retrieves the contents of multiple Secrets in the Azure Key Vault concurrently.
+
+    :param secret_client: Client through which to retrieve the secrets.
+    :param secret_names: Names of Secrets to retrieve.
+    :param max_workers: Maximum number of Secrets that are retrieved at the same time.
+    :return: Dictionary mapping names of Secrets to their values, or to None if they do not exist.
+    """
+    secret_names = list(secret_names)
+    if not secret_names:
+        return {}
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(secret_names)))) as executor:
+        values = executor.map(lambda secret_name: get_secret(secret_client=secret_client, secret_name=secret_name),
+                              secret_names)
+        # any exception raised while retrieving a secret is raised here
+        return dict(zip(secret_names, values))
+
+
+class SecretCacheFile:
+    """ Local file in which secrets retrieved from the Azure Key Vault are cached, encrypted with a Fernet key.
+
+    """
+    def __init__(self, path, key, ttl_secs):
+        """ Initializes the cache file.
+
+        :param path: Path to the cache file.
+        :param key: URL-safe base64-encoded 32-byte key with which the cache file is encrypted.
+        :param ttl_secs: Number of seconds for which cached secrets are used.
+        """
+        self.path = path
+        self.fernet = Fernet(key)
+        self.ttl_secs = int(ttl_secs)
+
+    def read(self, secret_names):
+        """ Reads cached secrets, if they were cached recently enough and include all required secrets.
+
+        :param secret_names: Names of secrets that are required.
+        :return: Tuple (secrets, age) where secrets is a dictionary mapping names of secrets to their values, and age is
+        the number of seconds since they were cached, or (None, None) if the cached secrets cannot be used.
+        """
+        try:
+            with open(self.path, 'rb') as cache_file:
+                token = cache_file.read()
+            secrets = json_loads(self.fernet.decrypt(token, ttl=self.ttl_secs).decode('utf-8'))
+            age = time() - self.fernet.extract_timestamp(token)
+        # missing, expired, tampered with, or encrypted with a different key
+        except (OSError, InvalidToken, ValueError):
+            return None, None
+        if not isinstance(secrets, dict) or not set(secret_names).issubset(secrets):
+            return None, None
+        return secrets, age
+
+    def write(self, secrets):
+        """ Caches secrets, replacing any previously cached secrets.
+
+        :param secrets: Dictionary mapping names of secrets to their values.
+        :return: Nothing.
+        """
+        token = self.fernet.encrypt(json_dumps(secrets).encode('utf-8'))
+        directory = os.path.dirname(os.path.abspath(self.path))
+        # write to a temporary file first, so that processes never read a partially written cache file
+        with NamedTemporaryFile(mode='wb', dir=directory, delete=False) as temp_file:
+            temp_file.write(token)
+        os.chmod(temp_file.name, 0o600)
+        os.replace(temp_file.name, self.path)
+
+
+def refresh_secret_cache_file(secret_client, secret_names, max_workers, cache_file):
+    """ Retrieves secrets from the Azure Key Vault and caches them, logging rather than raising any exception.
+
+    :param secret_client: Client through which to retrieve the secrets.
+    :param secret_names: Names of Secrets to retrieve.
+    :param max_workers: Maximum number of Secrets that are retrieved at the same time.
+    :param cache_file: Cache file in which to write the secrets.
+    :return: Nothing.
+    """
+    try:
+        cache_file.write(
+            secrets=get_secrets(secret_client=secret_client, secret_names=secret_names, max_workers=max_workers)
+        )
+    except Exception:
+        logger.exception('Cached secrets from the Azure Key Vault could not be refreshed')
+
+
+def load_secrets(secret_client, secret_names, max_workers=8, cache_file=None):
+    """ Retrieves multiple secrets while the settings are loaded, through the cache file if it is configured and
+    contains recently cached secrets, or otherwise concurrently from the Azure Key Vault.
+
+    Once half of the cache file's time-to-live has elapsed, cached secrets are still used, but the cache file is
+    refreshed in a background thread.
+
+    :param secret_client: Client through which to retrieve the secrets.
+    :param secret_names: Names of Secrets to retrieve.
+    :param max_workers: Maximum number of Secrets that are retrieved at the same time.
+    :param cache_file: Cache file in which secrets are cached, or None if secrets are not cached.
+    :return: Dictionary mapping names of Secrets to their values, or to None if they do not exist.
+    """
+    secret_names = list(secret_names)
+    if cache_file is not None:
+        secrets, age = cache_file.read(secret_names=secret_names)
+        if secrets is not None:
+            if age >= cache_file.ttl_secs / 2:
+                Thread(
+                    target=refresh_secret_cache_file,
+                    kwargs={
+                        'secret_client': secret_client,
+                        'secret_names': secret_names,
+                        'max_workers': max_workers,
+                        'cache_file': cache_file
+                    },
+                    name='fdp-key-vault-refresh',
+                    daemon=True
+                ).start()
+            return {secret_name: secrets[secret_name] for secret_name in secret_names}
+    secrets = get_secrets(secret_client=secret_client, secret_names=secret_names, max_workers=max_workers)
+    if cache_file is not None:
+        try:
+            cache_file.write(secrets=secrets)
+        # settings can still be loaded without caching the secrets
+        except OSError:
+            logger.exception('Secrets from the Azure Key Vault could not be cached')
+    return secrets
@@ -41,7 +41,8 @@ TEMPLATES = [TEMPLATE_FIRST_DICT]
 # Database
 # https://docs.djangoproject.com/en/3.1/ref/settings/#databases
 DATABASES['default'] = {
-    'ENGINE': 'django.db.backends.postgresql',
+    # PostgreSQL with health checked persistent connections and pooling, see fdp.backends.postgresql
+    'ENGINE': 'fdp.backends.postgresql',
     'NAME': get_from_environment_var_or_conf_file(
         environment_var=ENV_VAR_FOR_FDP_DATABASE_NAME, conf_file='fdp_database_name.conf', default_val='fdp'
     ),
@@ -56,8 +57,24 @@ DATABASES['default'] = {
     ),
     'PORT': get_from_environment_var_or_conf_file(
         environment_var=ENV_VAR_FOR_FDP_DATABASE_PORT, conf_file='fdp_database_port.conf', default_val='5432'
-    )
+    ),
+    'CONN_MAX_AGE': FDP_DATABASE_CONN_MAX_AGE,
+    'CONN_HEALTH_CHECKS': FDP_DATABASE_CONN_HEALTH_CHECKS,
+    'POOL_SIZE': FDP_DATABASE_POOL_SIZE
 }
+# Read replica, if its host is defined
+fdp_database_replica_host = get_from_environment_var_or_conf_file(
+    environment_var=ENV_VAR_FOR_FDP_DATABASE_REPLICA_HOST, conf_file='fdp_database_replica_host.conf', default_val=''
+)
+if fdp_database_replica_host:
+    DATABASES[FDP_READ_REPLICA_DATABASE] = get_read_replica_database(
+        primary=DATABASES['default'],
+        host=fdp_database_replica_host,
+        port=get_from_environment_var_or_conf_file(
+            environment_var=ENV_VAR_FOR_FDP_DATABASE_REPLICA_PORT, conf_file='fdp_database_replica_port.conf',
+            default_val=''
+        )
+    )
 
 
 # Static files (CSS, JavaScript, Images)
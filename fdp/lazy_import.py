@@ -0,0 +1,121 @@
+"""
+
+Lazy loading of optional Python packages.
+
+Modules are loaded through the standard import system on first access to one of their attributes, so that each module
+is executed only once per process and is shared through sys.modules with any other code that imports it. Exceptions
+defined in lazily loaded modules are therefore the same classes as those raised by the packages.
+
+Example:
+
+    search = lazy_module(module_as_str='dateparser.search')
+    ...
+    search.search_dates(...)
+
+"""
+from importlib import import_module
+from importlib.util import find_spec
+from threading import Lock
+import sys
+
+
+class LazyModule:
+    """ Placeholder for a module that is loaded on first access to one of its attributes.
+
+    """
+    def __init__(self, module_as_str):
+        """ Initializes the placeholder without loading the module.
+
+        :param module_as_str: Fully qualified module as a string, e.g. my_package.my_module.
+        """
+        self._module_as_str = module_as_str
+        self._module = None
+        self._lock = Lock()
+
+    @property
+    def is_loaded(self):
+        """ Checks whether the module has been loaded, either through this placeholder or by any other import.
+
+        :return: True if the module has been loaded, false otherwise.
+        """
+        return self._module is not None or self._module_as_str in sys.modules
+
+    def load(self):
+        """ Loads the module, if it has not yet been loaded.
+
+        :return: Loaded module.
+        """
+        if self._module is None:
+            with self._lock:
+                if self._module is None:
+                    # reuses the module if it was already imported elsewhere
+                    self._module = import_module(self._module_as_str)
+        return self._module
+
+    def __getattr__(self, name):
+        """ Retrieves an attribute of the module, loading the module first if necessary.
+
+        Only called for attributes that are not defined on the placeholder itself.
+
+        :param name: Name of attribute.
+        :return: Attribute of the module.
+        """
+        return getattr(self.load(), name)
+
+    def __repr__(self):
+        """ Retrieves a representation of the placeholder.
+
+        :return: Representation as a string.
+        """
+        return '<LazyModule {m} ({s})>'.format(m=self._module_as_str, s='loaded' if self.is_loaded else 'not loaded')
+
+
+def is_module_available(module_as_str):
+    """ Checks whether a module can be imported, without executing the module itself.
+
+    Parent packages of the module are imported, since their specifications define where the module is found.
+
+    :param module_as_str: Fully qualified module as a string, e.g. my_package.my_module.
+    :return: True if the module can be imported, false otherwise.
+    """
+    if module_as_str in sys.modules:
+        return True
+    try:
+        return find_spec(module_as_str) is not None
+    # some parent package for the module is not installed
+    except (ImportError, ValueError):
+        return False
+
+
+def lazy_module(module_as_str, err_msg=None):
+    """ Retrieves a placeholder for a module that is loaded on first access to one of its attributes.
+
+    :param module_as_str: Fully qualified module as a string, e.g. my_package.my_module.
+    :param err_msg: Exception message if the module is not available. If None, then availability is not checked until
+    the module is loaded.
+    :return: Placeholder for module.
+    """
+    if err_msg is not None and not is_module_available(module_as_str=module_as_str):
+        raise Exception(err_msg)
+    return LazyModule(module_as_str=module_as_str)
+
+
+def load_python_package_module(module_as_str, err_msg, raise_exception):
+    """ Retrieves a placeholder for a module of an optional Python package, if the package is installed.
+
+    The module is loaded on first access to one of its attributes.
+
+    :param module_as_str: Fully qualified module as a string, e.g. my_package.my_module.
+    :param err_msg: Exception message if module is not available.
+    :param raise_exception: True if an exception should be raised if the module cannot be loaded, False if None should
+    be returned.
+    :return: Placeholder for module, or None if raise_exception is False and the module cannot be loaded.
+    """
+    if not is_module_available(module_as_str=module_as_str):
+        # exception should be raised
+        if raise_exception:
+            raise Exception(err_msg)
+        # fail silently
+        else:
+            return None
+    return LazyModule(module_as_str=module_as_str)
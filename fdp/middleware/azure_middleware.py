@@ -1,7 +1,9 @@
 from functools import partial as functools_partial
+from django_otp import DEVICE_ID_SESSION_KEY
 from django_otp.middleware import OTPMiddleware, is_verified as otp_is_verified
 from django.contrib.auth import get_user_model
 from inheritable.models import AbstractConfiguration
+from time import time
 
 
 def is_verified(user):
@@ -32,6 +34,60 @@ class AzureOTPMiddleware(OTPMiddleware):
     See: https://django-two-factor-auth.readthedocs.io/en/stable/
 
     """
+    #: Key in the session through which the result of verifying the user is reused for subsequent requests.
+    verification_session_key = 'fdp_otp_verification'
+
+    @classmethod
+    def forget_verification(cls, request):
+        """ Removes the result of verifying the user from the session, so that the user is verified again through the
+        database on the next request, e.g. after their 2FA devices are removed.
+
+        :param request: Http request object.
+        :return: Nothing.
+        """
+        session = getattr(request, 'session', None)
+        if session is not None and cls.verification_session_key in session:
+            del session[cls.verification_session_key]
+
+    def __get_cached_verification(self, request, user):
+        """ Retrieves the result of verifying the user that was recorded in the session, if it can be reused.
+
+        The result can be reused if it was recorded for the same user, password and 2FA device, and within the number
+        of seconds configured through the FDP_OTP_VERIFICATION_CACHE_SECS setting. Logging out flushes the session.
+
+        :param request: Http request object.
+        :param user: User to verify.
+        :return: Dictionary with the recorded result, or None if it cannot be reused.
+        """
+        if not user.is_authenticated or AbstractConfiguration.otp_verification_cache_secs() <= 0:
+            return None
+        verification = request.session.get(self.verification_session_key)
+        if not isinstance(verification, dict) \
+                or verification.get('user_pk') != user.pk \
+                or verification.get('auth_hash') != user.get_session_auth_hash() \
+                or verification.get('device_id') != request.session.get(DEVICE_ID_SESSION_KEY) \
+                or verification.get('expires', 0) <= time():
+            return None
+        return verification
+
+    def __cache_verification(self, request, user, is_azure_authenticated):
+        """ Records the result of verifying the user in the session.
+
+        :param request: Http request object.
+        :param user: User who was verified.
+        :param is_azure_authenticated: True if the user was authenticated through Azure Active Directory.
+        :return: Nothing.
+        """
+        if user.is_authenticated and AbstractConfiguration.otp_verification_cache_secs() > 0:
+            request.session[self.verification_session_key] = {
+                'user_pk': user.pk,
+                'auth_hash': user.get_session_auth_hash(),
+                # 2FA device was verified if it is still recorded in the session
+                'device_id': request.session.get(DEVICE_ID_SESSION_KEY),
+                'is_azure_authenticated': is_azure_authenticated,
+                'expires': time() + AbstractConfiguration.otp_verification_cache_secs()
+            }
+
     def _verify_user(self, request, user):
         """ Sets the is_verified(...) method and any corresponding properties that are relevant for 2FA verification.
 
@@ -40,19 +96,39 @@ class AzureOTPMiddleware(OTPMiddleware):
         through Azure Active Directory, then the method will use the custom is_verified(...) method that is defined
         above.
 
+        The result of verifying the user is recorded in the session, so that subsequent requests can be verified
+        without checking whether the user was authenticated through Azure Active Directory. The user's 2FA device is
+        still retrieved on each request, so that a device that was deleted is no longer accepted.
+
         :param request: Http request object.
         :param user: User for which to set 2FA verification method and properties.
         :return: User with the relevant 2FA verification method and properties set.
         """
-        user = super(AzureOTPMiddleware, self)._verify_user(request=request, user=user)
+        skip_django_2fa_for_azure = AbstractConfiguration.skip_django_2fa_for_azure()
+        verification = self.__get_cached_verification(request=request, user=user)
+        device = None
+        # user was recently verified in this session
+        if verification is not None and verification['device_id']:
+            # 2FA device may have since been deleted, e.g. through another session
+            device = self._device_from_persistent_id(verification['device_id'])
+            if device is None or device.user_id != user.pk:
+                verification = None
+        if verification is not None:
+            user.otp_device = device
+            user.is_verified = functools_partial(otp_is_verified, user)
+            is_azure_authenticated = verification['is_azure_authenticated']
+        else:
+            user = super(AzureOTPMiddleware, self)._verify_user(request=request, user=user)
+            # if configured to skip 2FA for Azure Active Directory users, then check if this particular user was
+            # authenticated through Azure Active Directory
+            is_azure_authenticated = skip_django_2fa_for_azure \
+                and get_user_model().is_user_azure_authenticated(user=user)
+            self.__cache_verification(request=request, user=user, is_azure_authenticated=is_azure_authenticated)
         # if configured to skip 2FA for Azure Active Directory users
-        if AbstractConfiguration.skip_django_2fa_for_azure():
-            # retrieve the user model
-            user_model = get_user_model()
-            # if this particular user was authenticated through Azure Active Directory
-            if user_model.is_user_azure_authenticated(user=user):
-                # for this particular user, override the default is_verified(...) method that was set by the middleware
-                # defined in the Django Two-Factor Authentication package, and allow the user to skip the Django
-                # implemented 2FA verification step
-                user.is_verified = functools_partial(is_verified, user)
+        # and if this particular user was authenticated through Azure Active Directory
+        if skip_django_2fa_for_azure and is_azure_authenticated:
+            # for this particular user, override the default is_verified(...) method that was set by the middleware
+            # defined in the Django Two-Factor Authentication package, and allow the user to skip the Django
+            # implemented 2FA verification step
+            user.is_verified = functools_partial(is_verified, user)
         return user
@@ -0,0 +1,80 @@
+from django.core.exceptions import MiddlewareNotUsed
+from inheritable.instrumentation import QueryRecorder
+from inheritable.models import AbstractConfiguration
+from json import dumps as json_dumps
+from time import perf_counter
+import logging
+
+
+logger = logging.getLogger(__name__)
+
+
+class SqlInstrumentationMiddleware:
+    """ Records the number of SQL queries, the time spent in the database, the slowest statements, the time spent in
+    Python and the database connection churn while handling each request.
+
+    Measurements are logged as JSON through the fdp.middleware.instrumentation_middleware logger, and are added to
+    responses for host administrators and superusers through the Server-Timing header, so that they are visible in the
+    browser's developer tools.
+
+    Enabled through the FDP_SQL_INSTRUMENTATION setting. Should be the first middleware, so that the time spent in all
+    other middleware is measured.
+
+    See: https://developer.mozilla.org/en-US/docs/Web/HTTP/Headers/Server-Timing
+
+    """
+    def __init__(self, get_response):
+        """ Initializes the middleware, if it is enabled.
+
+        :param get_response: Callable handling the request.
+        """
+        if not AbstractConfiguration.sql_instrumentation():
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+
+    @staticmethod
+    def __can_see_server_timing(request):
+        """ Checks whether the user making a request can see the measurements through the Server-Timing header.
+
+        :param request: Http request object.
+        :return: True if the user can see the measurements, false otherwise.
+        """
+        user = getattr(request, 'user', None)
+        return AbstractConfiguration.sql_instrumentation_server_timing() \
+            and user is not None \
+            and user.is_authenticated \
+            and user.is_active \
+            and (user.is_superuser or (user.is_host and user.is_administrator))
+
+    def __call__(self, request):
+        """ Handles the request while recording its SQL queries.
+
+        :param request: Http request object.
+        :return: Http response object.
+        """
+        start = perf_counter()
+        with QueryRecorder(num_of_slowest=AbstractConfiguration.sql_instrumentation_num_of_slowest()) as recorder:
+            response = self.get_response(request)
+        total_ms = (perf_counter() - start) * 1000
+        python_ms = max(total_ms - recorder.db_ms, 0)
+        resolver_match = getattr(request, 'resolver_match', None)
+        logger.info(
+            json_dumps({
+                'method': request.method,
+                'path': request.path,
+                'view': resolver_match.view_name if resolver_match else None,
+                'status': response.status_code,
+                'num_of_queries': recorder.num_of_queries,
+                'db_ms': round(recorder.db_ms, 3),
+                'python_ms': round(python_ms, 3),
+                'total_ms': round(total_ms, 3),
+                'slowest': recorder.slowest,
+                'connections': recorder.connection_churn
+            })
+        )
+        if self.__can_see_server_timing(request=request):
+            response['Server-Timing'] = \
+                'db;dur={d:.1f};desc="{n} queries", python;dur={p:.1f}, total;dur={t:.1f}'.format(
+                    d=recorder.db_ms, n=recorder.num_of_queries, p=python_ms, t=total_ms
+                )
+        return response
@@ -0,0 +1,37 @@
+from django.core.exceptions import MiddlewareNotUsed
+from inheritable.models import AbstractConfiguration
+from inheritable.replicas import start_tracking_writes, stop_tracking_writes, pin_to_primary
+
+
+class ReadReplicaMiddleware:
+    """ Pins a user's reads to the primary database for the number of seconds configured through
+    FDP_READ_REPLICA_PIN_SECS after the user writes, so that the user sees their own changes while the read replica
+    catches up.
+
+    Enabled if a read replica is defined in the DATABASES setting, see inheritable.replicas. Should be after the session
+    and authentication middleware, so that the pin is recorded in the user's session.
+
+    """
+    def __init__(self, get_response):
+        """ Initializes the middleware, if a read replica is defined.
+
+        :param get_response: Callable handling the request.
+        """
+        if AbstractConfiguration.read_replica_database() is None:
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+
+    def __call__(self, request):
+        """ Handles the request while tracking whether it writes to the database.
+
+        :param request: Http request object.
+        :return: Http response object.
+        """
+        start_tracking_writes()
+        try:
+            response = self.get_response(request)
+        finally:
+            has_written = stop_tracking_writes()
+        if has_written:
+            pin_to_primary(request=request)
+        return response
@@ -1,17 +1,14 @@
 from django.contrib.auth import logout
 from django.shortcuts import redirect
 from fdpuser.models import FdpUser
-from importlib.util import find_spec, module_from_spec
-# check if social-auth-app-django package is installed
+from fdp.lazy_import import lazy_module
+from uuid import uuid4
+# check if social-auth-app-django package is installed, and load its modules on first use
 # see: https://python-social-auth-docs.readthedocs.io/en/latest/configuration/django.html
-social_core_pipeline_user_spec = find_spec('social_core.pipeline.user')
-# social-auth-app-django package is not installed
-if not social_core_pipeline_user_spec:
-    raise Exception('Please install the package: social-auth-app-django')
-# load pipeline.user module in the social-auth-app-django package
-social_core_pipeline_user_module = module_from_spec(social_core_pipeline_user_spec)
-# initialize pipeline.user module
-social_core_pipeline_user_spec.loader.exec_module(social_core_pipeline_user_module)
+social_core_pipeline_user_module = lazy_module(
+    module_as_str='social_core.pipeline.user', err_msg='Please install the package: social-auth-app-django'
+)
+social_core_utils_module = lazy_module(module_as_str='social_core.utils')
 
 
 def get_username(strategy, details, backend, user=None, *args, **kwargs):
@@ -2,11 +2,14 @@ from django.contrib import admin
 from django.contrib.auth.models import Group
 from django.contrib.auth.admin import UserAdmin
 from django.utils.translation import gettext_lazy as _
+from django.utils.html import format_html
+from django.http import HttpResponse, Http404
+from django.urls import path, reverse
 from axes.admin import AccessAttemptAdmin, AccessLogAdmin
 from axes.models import AccessAttempt, AccessLog
 from cspreports.admin import CSPReportAdmin
 from cspreports.models import CSPReport
-from .models import FdpUser, FdpOrganization, PasswordReset, FdpCSPReport
+from .models import FdpUser, FdpOrganization, PasswordReset, FdpCSPReport, RequestProfile
 from .forms import FdpUserChangeForm, FdpUserCreationForm
 from inheritable.admin import FdpInheritableAdmin, ArchivableAdmin, FdpInheritableBaseAdmin, HostOnlyAdmin, \
     HostOnlyBaseAdmin
@@ -131,6 +134,111 @@ class PasswordResetAdmin(admin.ModelAdmin):
     ordering = ['fdp_user__email']
 
 
+@admin.register(RequestProfile)
+class RequestProfileAdmin(HostOnlyBaseAdmin, admin.ModelAdmin):
+    """ Admin interface for profiles of individual requests, through which the statistics recorded through cProfile can
+    be downloaded.
+
+    """
+    _list_display = ['timestamp', 'fdp_user', 'method', 'path', 'status_code', 'total_ms', 'db_ms', 'num_of_queries']
+    list_display = _list_display
+    list_display_links = _list_display
+    list_filter = ['method', 'status_code', 'view_name']
+    search_fields = ['path', 'view_name', 'fdp_user__email']
+    ordering = ['-timestamp']
+    readonly_fields = [
+        'fdp_user', 'timestamp', 'method', 'path', 'view_name', 'status_code', 'total_ms', 'db_ms', 'num_of_queries',
+        'download', 'stats_report', 'sql_timeline_report'
+    ]
+    exclude = ['sql_timeline']
+
+    def get_urls(self):
+        """ Adds the URL through which the statistics recorded through cProfile are downloaded.
+
+        :return: List of URL patterns.
+        """
+        return [
+            path(
+                '<int:pk>/download/',
+                self.admin_site.admin_view(self.download_view),
+                name='fdpuser_requestprofile_download'
+            ),
+        ] + super(RequestProfileAdmin, self).get_urls()
+
+    def download_view(self, request, pk):
+        """ Downloads the statistics recorded through cProfile for a request profile.
+
+        The downloaded file can be read through pstats, e.g. python -m pstats, or visualization tools such as SnakeViz.
+
+        :param request: Http request object.
+        :param pk: Primary key of request profile.
+        :return: Http response object containing the statistics.
+        """
+        request_profile = RequestProfile.objects.filter(pk=pk).first()
+        if request_profile is None or not self.has_view_permission(request=request, obj=request_profile):
+            raise Http404
+        response = HttpResponse(request_profile.stats, content_type='application/octet-stream')
+        response['Content-Disposition'] = 'attachment; filename="request-profile-{p}.prof"'.format(p=pk)
+        return response
+
+    def download(self, obj):
+        """ Link through which the statistics recorded through cProfile are downloaded.
+
+        :param obj: Request profile.
+        :return: Link as HTML.
+        """
+        return format_html(
+            '<a href="{u}">{t}</a>',
+            u=reverse('admin:fdpuser_requestprofile_download', kwargs={'pk': obj.pk}),
+            t=_('Download cProfile statistics')
+        )
+
+    download.short_description = _('Download')
+
+    def stats_report(self, obj):
+        """ Functions in which the most time was spent, as reported by pstats.
+
+        :param obj: Request profile.
+        :return: Report as HTML.
+        """
+        return format_html('<pre>{r}</pre>', r=obj.stats_report)
+
+    stats_report.short_description = _('Statistics')
+
+    def sql_timeline_report(self, obj):
+        """ SQL statements that were executed, in order, with their literals redacted.
+
+        :param obj: Request profile.
+        :return: Timeline as HTML.
+        """
+        return format_html(
+            '<pre>{t}</pre>',
+            t='\n'.join(
+                '{s:>10.1f} ms {d:>8.1f} ms  {q}'.format(s=query['start_ms'], d=query['ms'], q=query['sql'])
+                for query in obj.sql_timeline
+            )
+        )
+
+    sql_timeline_report.short_description = _('SQL timeline')
+
+    def has_add_permission(self, request):
+        """ Disable ability to add request profiles through the admin interface.
+
+        :param request: Http request object.
+        :return: False always.
+        """
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        """ Disable ability to change request profiles through the admin interface.
+
+        :param request: Http request object.
+        :param obj: Request profile that is to be changed.
+        :return: False always.
+        """
+        return False
+
+
 #  Unregister admin for failed logins since it is registered below
 admin.site.unregister(AccessAttempt)
 
@@ -0,0 +1,37 @@
+# Generated by Django 3.1.7 on 2026-10-18 22:32
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fdpuser', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RequestProfile',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('timestamp', models.DateTimeField(auto_now_add=True, help_text='Automatically added timestamp for when the request was profiled', verbose_name='timestamp')),
+                ('method', models.CharField(help_text='HTTP method of the request', max_length=10, verbose_name='method')),
+                ('path', models.TextField(help_text='Path that was requested', verbose_name='path')),
+                ('view_name', models.CharField(blank=True, default='', help_text='Name of the URL pattern that was requested', max_length=254, verbose_name='view')),
+                ('status_code', models.PositiveSmallIntegerField(help_text='HTTP status code of the response', verbose_name='status code')),
+                ('total_ms', models.FloatField(help_text='Number of milliseconds spent handling the request in the view', verbose_name='total milliseconds')),
+                ('db_ms', models.FloatField(help_text='Number of milliseconds spent executing SQL statements', verbose_name='database milliseconds')),
+                ('num_of_queries', models.PositiveIntegerField(help_text='Number of SQL statements that were executed', verbose_name='number of queries')),
+                ('compressed_stats', models.BinaryField(help_text='Compressed statistics recorded through cProfile', verbose_name='compressed statistics')),
+                ('sql_timeline', models.JSONField(blank=True, default=list, help_text='SQL statements that were executed, in order, with their literals redacted', verbose_name='SQL timeline')),
+                ('fdp_user', models.ForeignKey(help_text='FDP user whose request was profiled', on_delete=django.db.models.deletion.CASCADE, related_name='request_profiles', related_query_name='request_profile', to=settings.AUTH_USER_MODEL, verbose_name='FDP user')),
+            ],
+            options={
+                'verbose_name': 'Request profile',
+                'db_table': 'fdp_request_profile',
+                'ordering': ['-timestamp'],
+            },
+        ),
+    ]
@@ -14,6 +14,13 @@ from cspreports.models import CSPReport
 from json import JSONDecodeError, loads as json_loads, dumps as json_dumps
 from ast import literal_eval
 from django.utils.safestring import mark_safe
+from inheritable.instrumentation import QueryRecorder
+from cProfile import Profile
+from pstats import Stats
+from marshal import dumps as marshal_dumps, loads as marshal_loads
+from zlib import compress as zlib_compress, decompress as zlib_decompress
+from io import StringIO
+from time import perf_counter
 
 
 class FdpCSPReport(CSPReport):
@@ -698,3 +705,230 @@ class PasswordReset(models.Model):
         db_table = '{d}password_reset'.format(d=settings.DB_PREFIX)
         verbose_name = _('Password reset')
         ordering = ['timestamp']
+
+
+class RequestProfile(models.Model):
+    """ Profiles of individual requests that host administrators chose to profile, recorded through cProfile.
+
+    Requests are profiled if the FDP_REQUEST_PROFILER setting is True, and a host administrator either sends the
+    X-FDP-Profile header with the request, or enables request profiling for their session on the Settings page.
+
+    Attributes:
+        :fdp_user (fk): FDP user whose request was profiled.
+        :timestamp (datetime): Automatically added timestamp for when the request was profiled.
+        :method (str): HTTP method of the request.
+        :path (str): Path that was requested.
+        :view_name (str): Name of the URL pattern that was requested.
+        :status_code (int): HTTP status code of the response.
+        :total_ms (float): Number of milliseconds spent handling the request in the view.
+        :db_ms (float): Number of milliseconds spent executing SQL statements.
+        :num_of_queries (int): Number of SQL statements that were executed.
+        :compressed_stats (bytes): Compressed statistics recorded through cProfile, in the format read by pstats.
+        :sql_timeline (json): SQL statements that were executed, in order, with their literals redacted.
+
+    Properties:
+        :stats_report (str): Functions in which the most time was spent, as reported by pstats.
+    """
+    #: Key in the session that is True if all requests by the user should be profiled.
+    SESSION_KEY = 'fdp_request_profiler'
+
+    #: Key in the request's META dictionary for the header through which a single request is profiled.
+    HEADER_KEY = 'HTTP_X_FDP_PROFILE'
+
+    #: Number of functions listed in the statistics report.
+    NUM_OF_REPORTED_FUNCTIONS = 50
+
+    fdp_user = models.ForeignKey(
+        FdpUser,
+        on_delete=models.CASCADE,
+        related_name='request_profiles',
+        related_query_name='request_profile',
+        blank=False,
+        null=False,
+        help_text=_('FDP user whose request was profiled'),
+        verbose_name=_('FDP user')
+    )
+
+    timestamp = models.DateTimeField(
+        null=False,
+        blank=False,
+        auto_now_add=True,
+        help_text=_('Automatically added timestamp for when the request was profiled'),
+        verbose_name=_('timestamp')
+    )
+
+    method = models.CharField(
+        null=False,
+        blank=False,
+        max_length=10,
+        help_text=_('HTTP method of the request'),
+        verbose_name=_('method')
+    )
+
+    path = models.TextField(
+        null=False,
+        blank=False,
+        help_text=_('Path that was requested'),
+        verbose_name=_('path')
+    )
+
+    view_name = models.CharField(
+        null=False,
+        blank=True,
+        default='',
+        max_length=settings.MAX_NAME_LEN,
+        help_text=_('Name of the URL pattern that was requested'),
+        verbose_name=_('view')
+    )
+
+    status_code = models.PositiveSmallIntegerField(
+        null=False,
+        blank=False,
+        help_text=_('HTTP status code of the response'),
+        verbose_name=_('status code')
+    )
+
+    total_ms = models.FloatField(
+        null=False,
+        blank=False,
+        help_text=_('Number of milliseconds spent handling the request in the view'),
+        verbose_name=_('total milliseconds')
+    )
+
+    db_ms = models.FloatField(
+        null=False,
+        blank=False,
+        help_text=_('Number of milliseconds spent executing SQL statements'),
+        verbose_name=_('database milliseconds')
+    )
+
+    num_of_queries = models.PositiveIntegerField(
+        null=False,
+        blank=False,
+        help_text=_('Number of SQL statements that were executed'),
+        verbose_name=_('number of queries')
+    )
+
+    compressed_stats = models.BinaryField(
+        null=False,
+        blank=False,
+        editable=False,
+        help_text=_('Compressed statistics recorded through cProfile'),
+        verbose_name=_('compressed statistics')
+    )
+
+    sql_timeline = models.JSONField(
+        null=False,
+        blank=True,
+        default=list,
+        help_text=_('SQL statements that were executed, in order, with their literals redacted'),
+        verbose_name=_('SQL timeline')
+    )
+
+    objects = models.Manager()
+
+    def __str__(self):
+        """Defines string representation for a request profile.
+
+        :return: String representation of a request profile.
+        """
+        return '{m} {p} {a} {d}'.format(m=self.method, p=self.path, a=_('at'), d=self.timestamp)
+
+    @property
+    def stats(self):
+        """ Statistics recorded through cProfile, in the format read by pstats, e.g. python -m pstats.
+
+        :return: Bytes.
+        """
+        return zlib_decompress(bytes(self.compressed_stats))
+
+    @property
+    def stats_report(self):
+        """ Functions in which the most time was spent, as reported by pstats.
+
+        :return: Report as text.
+        """
+        stream = StringIO()
+        stats = Stats(stream=stream)
+        stats.stats = marshal_loads(self.stats)
+        stats.get_top_level_stats()
+        stats.sort_stats('cumulative').print_stats(self.NUM_OF_REPORTED_FUNCTIONS)
+        return stream.getvalue()
+
+    @staticmethod
+    def can_profile(user):
+        """ Checks whether a user can profile requests.
+
+        :param user: User to check.
+        :return: True if user can profile requests, false otherwise.
+        """
+        return AbstractConfiguration.request_profiler() \
+            and user is not None \
+            and user.is_authenticated \
+            and user.is_active \
+            and user.is_host \
+            and user.is_administrator
+
+    @classmethod
+    def is_requested(cls, request):
+        """ Checks whether a request should be profiled.
+
+        Inexpensive if the FDP_REQUEST_PROFILER setting is False, or if profiling was not requested.
+
+        :param request: Http request object.
+        :return: True if request should be profiled, false otherwise.
+        """
+        if not AbstractConfiguration.request_profiler():
+            return False
+        session = getattr(request, 'session', None)
+        if not (request.META.get(cls.HEADER_KEY) or (session is not None and session.get(cls.SESSION_KEY, False))):
+            return False
+        return cls.can_profile(user=getattr(request, 'user', None))
+
+    @classmethod
+    def profile(cls, request, get_response):
+        """ Handles a request while profiling it through cProfile and recording its SQL statements.
+
+        Responses that are rendered lazily, such as template responses, are rendered while profiling.
+
+        :param request: Http request object.
+        :param get_response: Callable without parameters that handles the request and returns a response.
+        :return: Http response object, with the X-FDP-Profile-Id header identifying the recorded profile.
+        """
+        profiler = Profile()
+        start = perf_counter()
+        with QueryRecorder(num_of_slowest=0, record_timeline=True) as recorder:
+            profiler.enable()
+            try:
+                response = get_response()
+                if callable(getattr(response, 'render', None)):
+                    response = response.render()
+            finally:
+                profiler.disable()
+        total_ms = (perf_counter() - start) * 1000
+        profiler.create_stats()
+        resolver_match = getattr(request, 'resolver_match', None)
+        request_profile = cls.objects.create(
+            fdp_user=request.user,
+            method=request.method,
+            path=request.path,
+            view_name=(resolver_match.view_name if resolver_match else '')[:settings.MAX_NAME_LEN],
+            status_code=response.status_code,
+            total_ms=total_ms,
+            db_ms=recorder.db_ms,
+            num_of_queries=recorder.num_of_queries,
+            compressed_stats=zlib_compress(marshal_dumps(profiler.stats)),
+            sql_timeline=recorder.timeline
+        )
+        # delete oldest profiles
+        expired_pks = cls.objects.order_by('-timestamp', '-pk').values_list('pk', flat=True)[
+            AbstractConfiguration.request_profiler_max_profiles():
+        ]
+        cls.objects.filter(pk__in=list(expired_pks)).delete()
+        response['X-FDP-Profile-Id'] = request_profile.pk
+        return response
+
+    class Meta:
+        db_table = '{d}request_profile'.format(d=settings.DB_PREFIX)
+        verbose_name = _('Request profile')
+        ordering = ['-timestamp']
@@ -1,17 +1,22 @@
-from django.test import Client, RequestFactory
+from django.test import Client, RequestFactory, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.db import connection, connections
+from django.contrib.sessions.models import Session
+from django.utils.timezone import now as timezone_now
 from django.utils.translation import ugettext_lazy as _
 from django.urls import reverse, NoReverseMatch
 from django.core.files import File
+from django.core.files.storage import default_storage
 from django.contrib import admin
 from django.conf import settings
 from django.apps import apps
 from django.views.generic.base import RedirectView
-from .models import FdpUser, PasswordReset, FdpOrganization, FdpCSPReport
+from .models import FdpUser, PasswordReset, FdpOrganization, FdpCSPReport, RequestProfile
 from .forms import FdpUserCreationForm, FdpUserChangeForm
 from .views import FdpLoginView
 from bulk.models import BulkImport, FdpImportFile, FdpImportMapping, FdpImportRun
 from bulk.views import DownloadImportFileView
-from inheritable.models import AbstractConfiguration
+from inheritable.models import AbstractConfiguration, AbstractUrlValidator
 from inheritable.tests import AbstractTestCase, local_test_settings_required, azure_test_settings_required, \
     azure_only_test_settings_required
 from sourcing.models import Attachment, Content, ContentPerson
@@ -21,6 +26,20 @@ from core.views import DownloadPersonPhotoView
 from profiles.models import CommandSearch, CommandView, OfficerSearch, OfficerView
 from verifying.models import VerifyContentCase, VerifyPerson, VerifyType
 from fdp.configuration.abstract.constants import CONST_AZURE_AUTH_APP
+from fdp.backends.coalescing_session import SessionStore as CoalescingSessionStore
+from fdp.backends.azure_storage import FakeMediaAzureStorage
+from fdp.middleware.azure_middleware import AzureOTPMiddleware
+from fdp.middleware.instrumentation_middleware import SqlInstrumentationMiddleware
+from inheritable.instrumentation import redact_sql, QueryRecorder
+from fdp.backends.postgresql.base import DatabaseWrapper, ConnectionPool, Database, get_connection_metrics
+from bulk.backends import Backend as WizardBackend
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import HttpResponse
+from json import dumps, loads as json_loads
+from marshal import loads as marshal_loads
+from django_otp import DEVICE_ID_SESSION_KEY
+from django.contrib.sessions.backends.db import SessionStore as DbSessionStore
+from inheritable.views import SecuredSyncView
 from fdp.urlconf.constants import CONST_TWO_FACTOR_PROFILE_URL_NAME, CONST_LOGIN_URL_NAME
 from unittest.mock import patch as mock_patch
 from os import environ
@@ -30,6 +49,11 @@ from two_factor.models import PhoneDevice
 from two_factor.views import LoginView
 from two_factor.admin import AdminSiteOTPRequired
 from axes.models import AccessAttempt
+from datetime import timedelta
+from time import time
+from threading import enumerate as threading_enumerate
+from tempfile import TemporaryDirectory
+from pathlib import Path
 import secrets
 
 
@@ -57,6 +81,20 @@ class FdpUserTestCase(AbstractTestCase):
     (9) Test login view, 2FA, URL patterns and file serving for Microsoft Azure configuration with only AAD
     authentication
 
+    (10) Test that the coalescing session backend only writes changed or significantly extended sessions to the database
+
+    (11) Test that expiring SAS URLs for media files are reused through a single storage instance
+
+    (12) Test that media files are delivered with conditional and range requests, or through the front-end server
+
+    (13) Test that the verification of a user's 2FA device is reused from the session without querying the database
+
+    (14) Test that SQL queries are recorded for each request, and reported to host administrators
+
+    (15) Test that host administrators can profile requests, and download the profiles from the admin interface
+
+    (16) Test that persistent database connections are health checked before reuse, pooled, and counted
+
     """
     def setUp(self):
         """ Configure RECPATCHA to be in test mode.
@@ -1255,3 +1293,406 @@ class FdpUserTestCase(AbstractTestCase):
 
         assert not axes_record_contains(password, axes_attempt_record), "Plain-text login attempt password found in " \
                                                                         "Axes record."
+
+    @local_test_settings_required
+    def test_coalescing_session_backend(self):
+        """ Test that the coalescing session backend writes sessions to the database only when their content changes, or
+        when their expiry is extended significantly.
+
+        :return: Nothing.
+        """
+        print(_('\nStarting test for coalescing session backend'))
+        with override_settings(FDP_SESSION_PERSIST_EXPIRY_FRACTION=0.5):
+            session = CoalescingSessionStore()
+            session['coalescing'] = 'first'
+            session.save()
+            session_key = session.session_key
+            self.assertTrue(Session.objects.filter(session_key=session_key).exists())
+            # unchanged session is renewed only in the cache
+            session = CoalescingSessionStore(session_key=session_key)
+            self.assertEqual(session['coalescing'], 'first')
+            with CaptureQueriesContext(connection) as captured_queries:
+                session.save()
+            self.assertEqual(len(captured_queries), 0)
+            # changed session is written to the database
+            session = CoalescingSessionStore(session_key=session_key)
+            session['coalescing'] = 'second'
+            with CaptureQueriesContext(connection) as captured_queries:
+                session.save()
+            self.assertGreater(len(captured_queries), 0)
+            self.assertEqual(
+                Session.objects.get(session_key=session_key).get_decoded()['coalescing'], 'second'
+            )
+            # expiry that is extended significantly is written to the database
+            session = CoalescingSessionStore(session_key=session_key)
+            self.assertEqual(session['coalescing'], 'second')
+            later = timezone_now() + timedelta(seconds=settings.SESSION_COOKIE_AGE * 0.6)
+            with mock_patch('django.utils.timezone.now', return_value=later):
+                with CaptureQueriesContext(connection) as captured_queries:
+                    session.save()
+            self.assertGreater(len(captured_queries), 0)
+            self.assertEqual(Session.objects.get(session_key=session_key).expire_date, session.get_expiry_date(
+                modification=later
+            ))
+            # deleted session is removed from the cache and the database
+            session.delete()
+            self.assertFalse(Session.objects.filter(session_key=session_key).exists())
+            self.assertFalse(CoalescingSessionStore().exists(session_key=session_key))
+        print(_('\nSuccessfully finished test for coalescing session backend\n\n'))
+
+    @local_test_settings_required
+    def test_sas_expiring_url_reuse(self):
+        """ Test that media files served through Azure Storage use a single storage instance, and that expiring SAS
+        URLs are reused until a fraction of their lifetime remains.
+
+        Azure Storage is simulated through the local file system.
+
+        :return: Nothing.
+        """
+        print(_('\nStarting test for reuse of expiring SAS URLs'))
+        with override_settings(
+            DEFAULT_FILE_STORAGE='fdp.backends.azure_storage.FakeMediaAzureStorage',
+            FDP_AZURE_MEDIA_URL_MIN_REMAINING_FRACTION=0.5
+        ):
+            self.assertIsInstance(default_storage, FakeMediaAzureStorage)
+            storage = default_storage._wrapped
+            storage.expiration_secs = 20
+            name = '{b}reuse.jpg'.format(b=AbstractUrlValidator.PERSON_PHOTO_BASE_URL)
+            other_name = '{b}other.jpg'.format(b=AbstractUrlValidator.PERSON_PHOTO_BASE_URL)
+            first_url = SecuredSyncView.serve_azure_storage_static_file(name=name).url
+            self.assertIn('sig=', first_url)
+            # same storage instance and URL are reused while more than half of the URL's lifetime remains
+            self.assertIs(default_storage._wrapped, storage)
+            self.assertEqual(SecuredSyncView.serve_azure_storage_static_file(name=name).url, first_url)
+            self.assertNotEqual(SecuredSyncView.serve_azure_storage_static_file(name=other_name).url, first_url)
+            with mock_patch('fdp.backends.azure_storage.time', return_value=time() + 9):
+                self.assertEqual(storage.get_sas_expiring_url(name), first_url)
+            # new URL is generated once less than half of the URL's lifetime remains
+            with mock_patch('fdp.backends.azure_storage.time', return_value=time() + 11):
+                self.assertNotEqual(storage.get_sas_expiring_url(name), first_url)
+        print(_('\nSuccessfully finished test for reuse of expiring SAS URLs\n\n'))
+
+    @local_test_settings_required
+    def test_static_file_delivery(self):
+        """ Test that media files served by the Python process support conditional and range requests, and that they
+        can be delivered through the X-Accel-Redirect and X-Sendfile headers.
+
+        :return: Nothing.
+        """
+        print(_('\nStarting test for delivery of media files'))
+        base_url = AbstractUrlValidator.ATTACHMENT_BASE_URL
+        with TemporaryDirectory() as media_root:
+            Path(media_root, base_url).mkdir(parents=True)
+            Path(media_root, base_url, 'delivery.txt').write_bytes(b'0123456789')
+            serve_kwargs = {
+                'path': 'delivery.txt', 'absolute_base_url': settings.MEDIA_URL, 'relative_base_url': base_url,
+                'document_root': media_root
+            }
+            request_factory = RequestFactory()
+            with override_settings(MEDIA_ROOT=media_root, FDP_STATIC_FILE_DELIVERY='python'):
+                print('Checking that entire file is served')
+                response = SecuredSyncView.serve_static_file(request=request_factory.get('/'), **serve_kwargs)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(b''.join(response.streaming_content), b'0123456789')
+                self.assertEqual(response['Accept-Ranges'], 'bytes')
+                etag = response['ETag']
+                last_modified = response['Last-Modified']
+                print('Checking that unmodified file is not served again')
+                response = SecuredSyncView.serve_static_file(
+                    request=request_factory.get('/', HTTP_IF_NONE_MATCH=etag), **serve_kwargs
+                )
+                self.assertEqual(response.status_code, 304)
+                response = SecuredSyncView.serve_static_file(
+                    request=request_factory.get('/', HTTP_IF_MODIFIED_SINCE=last_modified), **serve_kwargs
+                )
+                self.assertEqual(response.status_code, 304)
+                print('Checking that ranges of file are served')
+                for range_header, status_code, content, content_range in [
+                    ('bytes=2-4', 206, b'234', 'bytes 2-4/10'),
+                    ('bytes=7-', 206, b'789', 'bytes 7-9/10'),
+                    ('bytes=-2', 206, b'89', 'bytes 8-9/10'),
+                    ('bytes=20-30', 416, None, 'bytes */10'),
+                ]:
+                    response = SecuredSyncView.serve_static_file(
+                        request=request_factory.get('/', HTTP_RANGE=range_header), **serve_kwargs
+                    )
+                    self.assertEqual(response.status_code, status_code)
+                    self.assertEqual(response['Content-Range'], content_range)
+                    if content is not None:
+                        self.assertEqual(b''.join(response.streaming_content), content)
+                # range is ignored if the file changed
+                response = SecuredSyncView.serve_static_file(
+                    request=request_factory.get('/', HTTP_RANGE='bytes=2-4', HTTP_IF_RANGE='"other"'), **serve_kwargs
+                )
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(b''.join(response.streaming_content), b'0123456789')
+                # ranges of an empty file cannot be satisfied
+                Path(media_root, base_url, 'empty.txt').write_bytes(b'')
+                response = SecuredSyncView.serve_static_file(
+                    request=request_factory.get('/', HTTP_RANGE='bytes=-2'), **dict(serve_kwargs, path='empty.txt')
+                )
+                self.assertEqual(response.status_code, 416)
+                self.assertEqual(response['Content-Range'], 'bytes */0')
+            print('Checking that file is delivered through the front-end server')
+            with override_settings(MEDIA_ROOT=media_root, FDP_STATIC_FILE_DELIVERY='x-accel-redirect'):
+                response = SecuredSyncView.serve_static_file(request=request_factory.get('/'), **serve_kwargs)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.content, b'')
+                self.assertEqual(
+                    response['X-Accel-Redirect'],
+                    '{p}{b}delivery.txt'.format(p=settings.FDP_X_ACCEL_REDIRECT_PREFIX, b=base_url)
+                )
+            with override_settings(MEDIA_ROOT=media_root, FDP_STATIC_FILE_DELIVERY='x-sendfile'):
+                response = SecuredSyncView.serve_static_file(request=request_factory.get('/'), **serve_kwargs)
+                self.assertEqual(response['X-Sendfile'], str(Path(media_root, base_url, 'delivery.txt')))
+        print(_('\nSuccessfully finished test for delivery of media files\n\n'))
+
+    @local_test_settings_required
+    def test_otp_verification_cache(self):
+        """ Test that the verification of a user's 2FA device is reused from the session, until the user's password or
+        2FA device changes, the 2FA device is deleted, or the verification is forgotten.
+
+        :return: Nothing.
+        """
+        print(_('\nStarting test for 2FA verification cached in the session'))
+        fdp_user = self._create_fdp_user(
+            is_host=True, is_administrator=False, is_superuser=False, email_counter=FdpUser.objects.all().count() + 1
+        )
+        totp_device = self._create_2fa_record(user=fdp_user)
+        middleware = AzureOTPMiddleware(get_response=lambda r: None)
+
+        def new_request():
+            """ Creates a request with a new session, in which the user's 2FA device was verified.
+
+            :return: Request.
+            """
+            new_request_with_session = RequestFactory().get('/')
+            new_request_with_session.session = DbSessionStore()
+            new_request_with_session.session[DEVICE_ID_SESSION_KEY] = totp_device.persistent_id
+            return new_request_with_session
+
+        request = new_request()
+
+        def verify(request_to_verify=request):
+            """ Verifies a copy of the user, as loaded for a new request, and counts the queries.
+
+            :param request_to_verify: Request through which to verify the user.
+            :return: Tuple (user, number of queries).
+            """
+            with CaptureQueriesContext(connection) as captured_queries:
+                verified_user = middleware._verify_user(
+                    request=request_to_verify, user=FdpUser.objects.get(pk=fdp_user.pk)
+                )
+            return verified_user, len(captured_queries) - 1
+
+        with override_settings(FDP_OTP_VERIFICATION_CACHE_SECS=300):
+            user, num_of_uncached_queries = verify()
+            self.assertTrue(user.is_verified())
+            user, num_of_queries = verify()
+            self.assertTrue(user.is_verified())
+            # only the device is retrieved, to check that it still exists
+            self.assertEqual(num_of_queries, 1)
+            self.assertGreaterEqual(num_of_uncached_queries, num_of_queries)
+            self.assertEqual(user.otp_device.pk, totp_device.pk)
+            # verification is not reused after it is forgotten, e.g. when 2FA is reset
+            AzureOTPMiddleware.forget_verification(request=request)
+            self.assertEqual(verify()[1], num_of_uncached_queries)
+            self.assertEqual(verify()[1], 1)
+            # verification is not reused after the password changes
+            fdp_user.set_password('{p}changed'.format(p=self._password))
+            fdp_user.save()
+            self.assertEqual(verify()[1], num_of_uncached_queries)
+            # verification is not reused in another session after the device is deleted
+            other_request = new_request()
+            self.assertTrue(verify(request_to_verify=other_request)[0].is_verified())
+            self.assertTrue(verify(request_to_verify=other_request)[0].is_verified())
+            totp_device.delete()
+            user = verify(request_to_verify=other_request)[0]
+            self.assertIsNone(user.otp_device)
+            self.assertFalse(user.is_verified())
+            self.assertFalse(verify()[0].is_verified())
+        with override_settings(FDP_OTP_VERIFICATION_CACHE_SECS=0):
+            self.assertFalse(verify()[0].is_verified())
+        print(_('\nSuccessfully finished test for 2FA verification cached in the session\n\n'))
+
+    @local_test_settings_required
+    def test_sql_instrumentation(self):
+        """ Test that SQL queries are recorded for each request through the instrumentation middleware, logged with
+        their literals redacted, and reported to host administrators through the Server-Timing header.
+
+        :return: Nothing.
+        """
+        print(_('\nStarting test for SQL instrumentation'))
+        self.assertEqual(
+            redact_sql(sql="SELECT * FROM t WHERE name = 'O''Brien' AND id = 42 AND x = %s"),
+            'SELECT * FROM t WHERE name = ? AND id = ? AND x = %s'
+        )
+        num_of_users = FdpUser.objects.all().count() + 1
+        host_admin = self._create_fdp_user(email_counter=num_of_users, **self._host_admin_dict)
+        guest_admin = self._create_fdp_user(email_counter=num_of_users + 1, **self._guest_admin_dict)
+
+        def get_response(request):
+            """ View executing two queries.
+
+            :param request: Http request object.
+            :return: Http response object.
+            """
+            FdpUser.objects.filter(email='Private').exists()
+            FdpOrganization.objects.all().count()
+            return HttpResponse('')
+
+        with override_settings(FDP_SQL_INSTRUMENTATION=False):
+            with self.assertRaises(MiddlewareNotUsed):
+                SqlInstrumentationMiddleware(get_response=get_response)
+        with override_settings(FDP_SQL_INSTRUMENTATION=True, FDP_SQL_INSTRUMENTATION_SERVER_TIMING=True):
+            middleware = SqlInstrumentationMiddleware(get_response=get_response)
+            request = RequestFactory().get('/instrumented/')
+            request.user = host_admin
+            with self.assertLogs('fdp.middleware.instrumentation_middleware', level='INFO') as logs:
+                response = middleware(request)
+            measurements = json_loads(logs.records[0].getMessage())
+            self.assertEqual(measurements['num_of_queries'], 2)
+            self.assertEqual(measurements['path'], '/instrumented/')
+            self.assertNotIn('Private', dumps(measurements['slowest']))
+            self.assertIn('desc="2 queries"', response['Server-Timing'])
+            # measurements are not reported to guest administrators
+            request.user = guest_admin
+            with self.assertLogs('fdp.middleware.instrumentation_middleware', level='INFO'):
+                self.assertFalse(middleware(request).has_header('Server-Timing'))
+        print(_('\nSuccessfully finished test for SQL instrumentation\n\n'))
+
+    @local_test_settings_required
+    def test_request_profiler(self):
+        """ Test that host administrators can profile requests through a header or for their session, that other users
+        cannot, and that the profiles can be downloaded from the admin interface.
+
+        :return: Nothing.
+        """
+        print(_('\nStarting test for request profiler'))
+        num_of_users = FdpUser.objects.all().count() + 1
+        host_admin = self._create_fdp_user(email_counter=num_of_users, **self._host_admin_dict)
+        guest_admin = self._create_fdp_user(email_counter=num_of_users + 1, **self._guest_admin_dict)
+        host_admin_client = self._get_logged_in_client(fdp_user=host_admin)
+        guest_admin_client = self._get_logged_in_client(fdp_user=guest_admin)
+        settings_url = reverse('fdpuser:settings')
+        toggle_url = reverse('fdpuser:toggle_profiler')
+        header = {RequestProfile.HEADER_KEY: '1'}
+        # requests are not profiled unless the profiler is enabled
+        with override_settings(FDP_REQUEST_PROFILER=False):
+            self.assertFalse(host_admin_client.get(settings_url, **header).has_header('X-FDP-Profile-Id'))
+            self.assertEqual(host_admin_client.get(toggle_url).status_code, 403)
+        self.assertFalse(RequestProfile.objects.exists())
+        with override_settings(FDP_REQUEST_PROFILER=True, FDP_REQUEST_PROFILER_MAX_PROFILES=2):
+            # requests are only profiled if asked for
+            self.assertFalse(host_admin_client.get(settings_url).has_header('X-FDP-Profile-Id'))
+            response = host_admin_client.get(settings_url, **header)
+            self.assertEqual(response.status_code, 200)
+            request_profile = RequestProfile.objects.get(pk=response['X-FDP-Profile-Id'])
+            self.assertEqual(request_profile.fdp_user_id, host_admin.pk)
+            self.assertEqual(request_profile.view_name, 'fdpuser:settings')
+            self.assertEqual(len(request_profile.sql_timeline), request_profile.num_of_queries)
+            self.assertIn('function calls', request_profile.stats_report)
+            # only host administrators can profile requests
+            self.assertFalse(guest_admin_client.get(settings_url, **header).has_header('X-FDP-Profile-Id'))
+            self.assertEqual(guest_admin_client.get(toggle_url).status_code, 403)
+            # requests are profiled while profiling is enabled for the session
+            self.assertEqual(host_admin_client.get(toggle_url).status_code, 302)
+            self.assertTrue(host_admin_client.get(settings_url).has_header('X-FDP-Profile-Id'))
+            self.assertEqual(host_admin_client.get(toggle_url).status_code, 302)
+            self.assertFalse(host_admin_client.get(settings_url).has_header('X-FDP-Profile-Id'))
+            # oldest profiles are deleted
+            self.assertEqual(RequestProfile.objects.count(), 2)
+            self.assertFalse(RequestProfile.objects.filter(pk=request_profile.pk).exists())
+            # profiles can be downloaded from the admin interface
+            request_profile = RequestProfile.objects.first()
+            download_url = reverse('admin:fdpuser_requestprofile_download', kwargs={'pk': request_profile.pk})
+            response = host_admin_client.get(download_url)
+            self.assertEqual(response.status_code, 200)
+            self.assertTrue(marshal_loads(response.content))
+            self.assertEqual(
+                host_admin_client.get(
+                    reverse('admin:fdpuser_requestprofile_change', kwargs={'object_id': request_profile.pk})
+                ).status_code,
+                200
+            )
+            self.assertNotEqual(guest_admin_client.get(download_url).status_code, 200)
+        print(_('\nSuccessfully finished test for request profiler\n\n'))
+
+    @local_test_settings_required
+    def test_persistent_database_connections(self):
+        """ Test that persistent database connections are health checked before they are reused, that temporary tables
+        do not survive on reused or pooled connections, that data wizard threads release their connections, and that
+        connection churn is counted.
+
+        :return: Nothing.
+        """
+        print(_('\nStarting test for persistent database connections'))
+        self.assertIsInstance(connection, DatabaseWrapper)
+        connection.ensure_connection()
+        health_check_enabled = connection.health_check_enabled
+        connection.health_check_enabled = True
+        try:
+            num_of_reused = connection.connection_metrics['reused']
+            num_of_process_reused = get_connection_metrics()['reused']
+            with connection.cursor() as cursor:
+                cursor.execute('CREATE TEMP TABLE "fdp_leftover_scores" ("id" integer, "score" integer)')
+            # connection is reused, e.g. by a subsequent request
+            connection.health_check_done = False
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT to_regclass('pg_temp.fdp_leftover_scores')")
+                self.assertIsNone(cursor.fetchone()[0])
+            self.assertEqual(connection.connection_metrics['reused'], num_of_reused + 1)
+            self.assertGreaterEqual(get_connection_metrics()['reused'], num_of_process_reused + 1)
+            # connection is only checked once before it is reused
+            with QueryRecorder() as recorder:
+                FdpOrganization.objects.all().exists()
+            self.assertEqual(recorder.connection_churn, {})
+            connection.health_check_done = False
+            with QueryRecorder() as recorder:
+                FdpOrganization.objects.all().exists()
+            self.assertEqual(recorder.connection_churn, {'reused': 1})
+        finally:
+            connection.health_check_enabled = health_check_enabled
+        # idle connections are reset before they are pooled
+        pool = ConnectionPool(size=1, max_idle_secs=60)
+        conn_params = connection.get_connection_params()
+        first_connection = Database.connect(**conn_params)
+        second_connection = Database.connect(**conn_params)
+        with first_connection.cursor() as cursor:
+            cursor.execute('CREATE TEMP TABLE "fdp_leftover_scores" ("id" integer, "score" integer)')
+        self.assertTrue(pool.put(connection=first_connection))
+        # pool is full
+        self.assertFalse(pool.put(connection=second_connection))
+        self.assertTrue(second_connection.closed)
+        pooled_connection, num_of_failures = pool.get(health_check=True)
+        self.assertIs(pooled_connection, first_connection)
+        self.assertEqual(num_of_failures, 0)
+        with pooled_connection.cursor() as cursor:
+            cursor.execute("SELECT to_regclass('pg_temp.fdp_leftover_scores')")
+            self.assertIsNone(cursor.fetchone()[0])
+        pooled_connection.close()
+        self.assertEqual(pool.get(health_check=True), (None, 0))
+        # data wizard threads release their connections when they end
+        thread_connections = []
+
+        def try_run_sync(backend, task_name, run_id, user_id, post):
+            """ Task connecting to the database.
+
+            :param backend: Django Data Wizard backend running the task.
+            :param task_name: Name of task.
+            :param run_id: Id of run for which task is run.
+            :param user_id: Id of user running task.
+            :param post: Data posted with request starting task.
+            :return: Nothing.
+            """
+            connections['default'].ensure_connection()
+            thread_connections.append(connections['default'])
+
+        with mock_patch.object(WizardBackend, 'try_run_sync', new=try_run_sync):
+            task_id = WizardBackend().run_async(task_name='auto_import', run_id=0, user_id=0, post=None)
+        for thread in threading_enumerate():
+            if thread.name == str(task_id):
+                thread.join()
+        self.assertEqual(len(thread_connections), 1)
+        self.assertIsNone(thread_connections[0].connection)
+        print(_('\nSuccessfully finished test for persistent database connections\n\n'))
@@ -24,4 +24,6 @@ urlpatterns = [
          name='change_password'),
     path(AbstractUrlValidator.FDP_USER_RESET_2FA_URL, views.ResetTwoFactorRedirectView.as_view(),
          name='reset_2fa'),
+    path(AbstractUrlValidator.FDP_USER_TOGGLE_PROFILER_URL, views.ToggleRequestProfilerRedirectView.as_view(),
+         name='toggle_profiler'),
 ]
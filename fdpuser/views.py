@@ -9,11 +9,12 @@ from django.utils.decorators import method_decorator
 from django.conf import settings
 from inheritable.models import AbstractIpAddressValidator, AbstractConfiguration
 from inheritable.views import SecuredSyncTemplateView, SecuredSyncRedirectView
-from .models import PasswordReset, FdpUser
+from .models import PasswordReset, FdpUser, RequestProfile
 from .forms import FdpUserPasswordResetForm, FdpUserPasswordResetWithReCaptchaForm
 from two_factor.views import LoginView
 from two_factor.views.utils import class_view_decorator
 from django_otp import devices_for_user
+from fdp.middleware.azure_middleware import AzureOTPMiddleware
 from formtools.wizard.views import normalize_name
 from csp.decorators import csp_update, csp_replace
 from time import time
@@ -39,7 +40,9 @@ class SettingsTemplateView(SecuredSyncTemplateView):
             'email': u.email,
             'name': u.get_full_name(),
             'role': u.role_txt,
-            'fdp_organization': u.organization_txt
+            'fdp_organization': u.organization_txt,
+            'can_profile_requests': RequestProfile.can_profile(user=u),
+            'is_profiling_requests': self.request.session.get(RequestProfile.SESSION_KEY, False)
         })
         return context
 
@@ -262,6 +265,8 @@ class ResetTwoFactorRedirectView(SecuredSyncRedirectView):
         """
         user = request.user
         response = super(ResetTwoFactorRedirectView, self).dispatch(request, *args, **kwargs)
+        # 2FA verification recorded in the session should not outlive the 2FA devices
+        AzureOTPMiddleware.forget_verification(request=request)
         # Create password reset form
         form = FdpUserPasswordResetForm({'email': user.email})
         if form.is_valid():
@@ -275,6 +280,33 @@ class ResetTwoFactorRedirectView(SecuredSyncRedirectView):
             raise Exception('FDPUserPasswordResetForm was not valid')
 
 
+class ToggleRequestProfilerRedirectView(SecuredSyncRedirectView):
+    """ Trip to server, redirecting to the settings page, enabling or disabling the profiling of all requests by a host
+    administrator for their session.
+
+    """
+    pattern_name = 'fdpuser:settings'
+
+    def test_func(self):
+        """ Ensures that user can profile requests.
+
+        :return: True if user can profile requests, false otherwise.
+        """
+        return super(ToggleRequestProfilerRedirectView, self).test_func() \
+            and RequestProfile.can_profile(user=self.request.user)
+
+    def get_redirect_url(self, *args, **kwargs):
+        """ Enables request profiling for the session if it was disabled, or disables it if it was enabled.
+
+        :param args:
+        :param kwargs:
+        :return: URL for settings page.
+        """
+        session = self.request.session
+        session[RequestProfile.SESSION_KEY] = not session.get(RequestProfile.SESSION_KEY, False)
+        return super(ToggleRequestProfilerRedirectView, self).get_redirect_url(*args, **kwargs)
+
+
 @class_view_decorator(sensitive_post_parameters())
 @class_view_decorator(never_cache)
 class FdpLoginView(LoginView):
@@ -5,7 +5,7 @@ from django.core.exceptions import PermissionDenied
 from reversion.admin import VersionAdmin
 from fdp.settings import SITE_HEADER
 from inheritable.models import Metable
-from .models import Archivable, Confidentiable
+from .models import Archivable, Confidentiable, AbstractConfiguration
 
 
 class FdpInheritableBaseAdmin:
@@ -224,6 +224,16 @@ class FdpInheritableAdmin(FdpInheritableBaseAdmin, VersionAdmin):
     """ Allows for admin interfaces to be versioned, and to have hard-coded permissions.
 
     """
+    def reversion_register(self, model, **kwargs):
+        """ Registers a model with the Django-Reversion package, using the configured serialization format.
+
+        :param model: Model to register.
+        :param kwargs: Keyword arguments for the registration.
+        :return: Nothing.
+        """
+        kwargs.setdefault('format', AbstractConfiguration.get_revision_serialization_format())
+        super(FdpInheritableAdmin, self).reversion_register(model, **kwargs)
+
     @staticmethod
     def __get_filtered_queryset(model, queryset, request):
         """ Retrieves a queryset filtered for the user.
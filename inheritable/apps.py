@@ -3,3 +3,12 @@ from django.apps import AppConfig
 
 class InheritableConfig(AppConfig):
     name = 'inheritable'
+
+    def ready(self):
+        """ Connects signals defined for the inheritable app.
+
+        :return: Nothing.
+        """
+        from .revisions import connect_signals
+        # signals through which records saved during a request are captured for deferred revisions
+        connect_signals()
@@ -0,0 +1,159 @@
+"""
+
+Namespaced caching with version-based invalidation, through the default cache defined in the CACHES setting.
+
+Values are cached under keys that include the name of a namespace, and the namespace's current version. Invalidating a
+namespace increments its version, so that the values previously cached in the namespace are ignored by all processes
+that share the cache, and eventually expire.
+
+Namespaces are only consistent across processes when the default cache is shared, i.e. when FDP_SHARED_CACHE_TYPE is
+configured for file system or database caching.
+
+Example:
+
+    lookups = CacheNamespace(name='lookups')
+    titles = lookups.get_or_set(key='titles', default=lambda: list(Title.objects.all()))
+    ...
+    lookups.invalidate()
+
+See: https://docs.djangoproject.com/en/3.1/topics/cache/#cache-versioning
+
+"""
+from django.core.cache import caches, DEFAULT_CACHE_ALIAS
+from .models import AbstractConfiguration
+from time import time
+
+
+class CacheNamespace:
+    """ Namespace of cached values that can be invalidated together.
+
+    """
+    #: Prefix for the cache keys recording the current version of each namespace.
+    version_key_prefix = 'fdp.namespace.version'
+
+    def __init__(self, name, timeout=None, alias=DEFAULT_CACHE_ALIAS):
+        """ Initializes the namespace.
+
+        :param name: Name of namespace, e.g. lookups.
+        :param timeout: Default number of seconds for which values are cached. If None, then the FDP_SHARED_CACHE_TIMEOUT
+        setting is used.
+        :param alias: Alias of cache defined in the CACHES setting.
+        """
+        self.name = name
+        self.timeout = timeout if timeout is not None else AbstractConfiguration.shared_cache_timeout()
+        self.alias = alias
+
+    @property
+    def cache(self):
+        """ Cache in which values for the namespace are stored.
+
+        :return: Cache.
+        """
+        return caches[self.alias]
+
+    @property
+    def version_key(self):
+        """ Cache key recording the current version of the namespace.
+
+        :return: Cache key.
+        """
+        return '{p}:{n}'.format(p=self.version_key_prefix, n=self.name)
+
+    @staticmethod
+    def __get_initial_version():
+        """ Retrieves the version with which a namespace starts.
+
+        The version is based on the current time, so that if the version of a namespace is evicted from the cache, then
+        values cached with an earlier version are not visible again.
+
+        :return: Version as an integer.
+        """
+        return int(time() * 1000)
+
+    def get_version(self):
+        """ Retrieves the current version of the namespace.
+
+        :return: Version as an integer.
+        """
+        version = self.cache.get(self.version_key)
+        if version is None:
+            # another process may have defined the version in the meantime
+            self.cache.add(self.version_key, self.__get_initial_version(), timeout=None)
+            version = self.cache.get(self.version_key, self.__get_initial_version())
+        return version
+
+    def make_key(self, key):
+        """ Retrieves the cache key for a value in the namespace, excluding the namespace's version.
+
+        :param key: Key identifying the value within the namespace.
+        :return: Cache key.
+        """
+        return '{n}:{k}'.format(n=self.name, k=key)
+
+    def get(self, key, default=None):
+        """ Retrieves a value that is cached in the namespace.
+
+        :param key: Key identifying the value within the namespace.
+        :param default: Value to return if the value is not cached.
+        :return: Cached value, or the default.
+        """
+        return self.cache.get(self.make_key(key=key), default, version=self.get_version())
+
+    def set(self, key, value, timeout=None):
+        """ Caches a value in the namespace.
+
+        :param key: Key identifying the value within the namespace.
+        :param value: Value to cache.
+        :param timeout: Number of seconds for which the value is cached. If None, then the namespace's default is used.
+        :return: Nothing.
+        """
+        self.cache.set(
+            self.make_key(key=key), value, timeout if timeout is not None else self.timeout, version=self.get_version()
+        )
+
+    def set_many(self, data, timeout=None):
+        """ Caches multiple values in the namespace.
+
+        :param data: Dictionary mapping keys identifying values within the namespace to values to cache.
+        :param timeout: Number of seconds for which the values are cached. If None, then the namespace's default is used.
+        :return: Nothing.
+        """
+        self.cache.set_many(
+            {self.make_key(key=key): value for key, value in data.items()},
+            timeout if timeout is not None else self.timeout,
+            version=self.get_version()
+        )
+
+    def get_or_set(self, key, default, timeout=None):
+        """ Retrieves a value that is cached in the namespace, caching it first if it is not yet cached.
+
+        :param key: Key identifying the value within the namespace.
+        :param default: Value to cache, or a callable returning the value to cache.
+        :param timeout: Number of seconds for which the value is cached. If None, then the namespace's default is used.
+        :return: Cached value.
+        """
+        return self.cache.get_or_set(
+            self.make_key(key=key), default, timeout if timeout is not None else self.timeout,
+            version=self.get_version()
+        )
+
+    def delete(self, key):
+        """ Removes a value that is cached in the namespace.
+
+        :param key: Key identifying the value within the namespace.
+        :return: Nothing.
+        """
+        self.cache.delete(self.make_key(key=key), version=self.get_version())
+
+    def invalidate(self):
+        """ Invalidates all values that are cached in the namespace, for all processes sharing the cache.
+
+        :return: New version of the namespace.
+        """
+        try:
+            return self.cache.incr(self.version_key)
+        # version of the namespace is not yet cached, or was evicted
+        except ValueError:
+            version = self.__get_initial_version()
+            self.cache.set(self.version_key, version, timeout=None)
+            return version
@@ -0,0 +1,73 @@
+"""
+
+Django serialization format that compresses JSON, so that it can be stored in a text column.
+
+Used by the Django-Reversion package to reduce the size of the serialized data stored for each version of a record.
+See: https://django-reversion.readthedocs.io/en/stable/api.html#registration-api
+
+Registered in the settings through:
+
+    SERIALIZATION_MODULES = {'compressed_json': 'inheritable.compressed_json', ...}
+
+"""
+from django.core.serializers.json import Serializer as JsonSerializer, Deserializer as JsonDeserializer
+from django.core.serializers.base import DeserializationError
+from base64 import b64encode, b64decode
+from binascii import Error as BinasciiError
+from zlib import compress as zlib_compress, decompress as zlib_decompress, error as ZlibError
+
+
+#: Encoding used for the serialized JSON before it is compressed.
+ENCODING = 'utf-8'
+
+
+#: Encoding used for the compressed and base64-encoded data, so that it can be stored as text.
+ASCII = 'ascii'
+
+
+def compress(json_str):
+    """ Compresses a JSON string into a base64-encoded string.
+
+    :param json_str: JSON string to compress.
+    :return: Base64-encoded string of compressed JSON.
+    """
+    return b64encode(zlib_compress(json_str.encode(ENCODING))).decode(ASCII)
+
+
+def decompress(compressed_str):
+    """ Decompresses a base64-encoded string of compressed JSON into a JSON string.
+
+    :param compressed_str: Base64-encoded string of compressed JSON.
+    :return: JSON string.
+    """
+    if isinstance(compressed_str, bytes):
+        compressed_str = compressed_str.decode(ASCII)
+    return zlib_decompress(b64decode(compressed_str.encode(ASCII))).decode(ENCODING)
+
+
+class Serializer(JsonSerializer):
+    """ Serializes a queryset into compressed and base64-encoded JSON.
+
+    """
+    def getvalue(self):
+        """ Retrieves the compressed and base64-encoded JSON.
+
+        :return: Base64-encoded string of compressed JSON.
+        """
+        return compress(json_str=super(Serializer, self).getvalue())
+
+
+def Deserializer(stream_or_string, **options):
+    """ Deserializes compressed and base64-encoded JSON.
+
+    :param stream_or_string: Stream or string of compressed and base64-encoded JSON.
+    :param options: Keyword arguments passed to the JSON deserializer.
+    :return: Generator of deserialized objects.
+    """
+    if not isinstance(stream_or_string, (bytes, str)):
+        stream_or_string = stream_or_string.read()
+    try:
+        json_str = decompress(compressed_str=stream_or_string)
+    except (BinasciiError, ZlibError, UnicodeError) as err:
+        raise DeserializationError() from err
+    yield from JsonDeserializer(json_str, **options)
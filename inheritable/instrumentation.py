@@ -0,0 +1,166 @@
+"""
+
+Recording of the SQL statements that are executed while handling a request or running a block of code.
+
+Statements are recorded through execution wrappers that are installed on all database connections of the current
+thread, so that the number of statements, the time spent in the database and the slowest statements are known.
+Parameters are never recorded, and literal strings and numbers that are embedded in statements are redacted.
+
+Connection churn, i.e. the number of database connections that were opened, reused, pooled and closed, is also recorded
+for database connections whose backend counts it, see fdp.backends.postgresql.
+
+Example:
+
+    with QueryRecorder() as recorder:
+        ...
+    logger.info('{n} queries in {t} ms'.format(n=recorder.num_of_queries, t=recorder.db_ms))
+
+See: https://docs.djangoproject.com/en/3.1/topics/db/instrumentation/
+
+"""
+from django.db import connections
+from contextlib import ExitStack
+from heapq import heappush, heappushpop
+from itertools import count
+from re import compile as re_compile
+from time import perf_counter
+
+
+#: Literal strings, e.g. 'Smith', and numbers, e.g. 42 or 4.2, that are embedded in SQL statements.
+_SQL_LITERAL_REGEX = re_compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+
+
+def redact_sql(sql):
+    """ Redacts the literal strings and numbers that are embedded in a SQL statement.
+
+    Placeholders for parameters, e.g. %s, are kept as they are.
+
+    :param sql: SQL statement.
+    :return: Redacted SQL statement.
+    """
+    return _SQL_LITERAL_REGEX.sub('?', str(sql))
+
+
+class QueryRecorder:
+    """ Context manager recording the SQL statements that are executed on all database connections of the current
+    thread while in the context.
+
+    """
+    def __init__(self, num_of_slowest=5, record_timeline=False):
+        """ Initializes the recorder.
+
+        :param num_of_slowest: Number of slowest statements to keep.
+        :param record_timeline: True if every statement should be kept in the order in which it was executed.
+        """
+        self.num_of_slowest = num_of_slowest
+        self.record_timeline = record_timeline
+        self.num_of_queries = 0
+        self.db_secs = 0.0
+        self.__slowest = []
+        self.__timeline = []
+        self.__counter = count()
+        self.__exit_stack = None
+        self.__started = None
+        self.__connection_metrics = {}
+        self.connection_churn = {}
+
+    @property
+    def db_ms(self):
+        """ Total time spent executing statements.
+
+        :return: Number of milliseconds.
+        """
+        return self.db_secs * 1000
+
+    @staticmethod
+    def __get_connection_metrics():
+        """ Retrieves the metrics for connection churn that are counted by the database connections of the current
+        thread.
+
+        :return: Dictionary of metrics, summed over all database connections.
+        """
+        metrics = {}
+        for connection in connections.all():
+            for metric, num in getattr(connection, 'connection_metrics', {}).items():
+                metrics[metric] = metrics.get(metric, 0) + num
+        return metrics
+
+    @property
+    def slowest(self):
+        """ Slowest statements that were executed, with their literals redacted.
+
+        :return: List of dictionaries with the keys ms and sql, slowest first.
+        """
+        return [
+            {'ms': round(secs * 1000, 3), 'sql': sql}
+            for secs, _, sql in sorted(self.__slowest, key=lambda item: item[0], reverse=True)
+        ]
+
+    @property
+    def timeline(self):
+        """ Statements that were executed, with their literals redacted, if the timeline is recorded.
+
+        :return: List of dictionaries with the keys start_ms, ms and sql, in the order of execution. The start_ms key is
+        relative to entering the context.
+        """
+        return list(self.__timeline)
+
+    def __call__(self, execute, sql, params, many, context):
+        """ Execution wrapper that times a statement.
+
+        :param execute: Callable executing the statement.
+        :param sql: SQL statement.
+        :param params: Parameters for statement. Never recorded.
+        :param many: True if the statement is executed with multiple sets of parameters.
+        :param context: Dictionary with the connection and cursor.
+        :return: Result of executing the statement.
+        """
+        start = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            secs = perf_counter() - start
+            self.num_of_queries += 1
+            self.db_secs += secs
+            if self.num_of_slowest > 0:
+                # counter breaks ties, so that statements are never compared
+                item = (secs, next(self.__counter), redact_sql(sql=sql))
+                if len(self.__slowest) < self.num_of_slowest:
+                    heappush(self.__slowest, item)
+                elif secs > self.__slowest[0][0]:
+                    heappushpop(self.__slowest, item)
+            if self.record_timeline:
+                self.__timeline.append({
+                    'start_ms': round((start - self.__started) * 1000, 3),
+                    'ms': round(secs * 1000, 3),
+                    'sql': redact_sql(sql=sql)
+                })
+
+    def __enter__(self):
+        """ Starts recording statements.
+
+        :return: Recorder.
+        """
+        self.__started = perf_counter()
+        self.__connection_metrics = self.__get_connection_metrics()
+        self.connection_churn = {}
+        self.__exit_stack = ExitStack()
+        for connection in connections.all():
+            self.__exit_stack.enter_context(connection.execute_wrapper(self))
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """ Stops recording statements.
+
+        :param exc_type: Type of exception raised in the context, if any.
+        :param exc_val: Exception raised in the context, if any.
+        :param exc_tb: Traceback of exception raised in the context, if any.
+        :return: Nothing.
+        """
+        self.__exit_stack.close()
+        self.__exit_stack = None
+        self.connection_churn = {
+            metric: num - self.__connection_metrics.get(metric, 0)
+            for metric, num in self.__get_connection_metrics().items()
+            if num != self.__connection_metrics.get(metric, 0)
+        }
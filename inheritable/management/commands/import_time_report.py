@@ -0,0 +1,149 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from json import dumps as json_dumps
+from subprocess import run, PIPE
+from time import time
+import os
+import sys
+
+
+#: Prefix of the lines written by the Python interpreter when started with the -X importtime option.
+IMPORT_TIME_PREFIX = 'import time:'
+
+
+def parse_import_times(lines):
+    """ Parses the lines written by the Python interpreter when started with the -X importtime option.
+
+    See: https://docs.python.org/3/using/cmdline.html#cmdoption-X
+
+    :param lines: Lines written to standard error by the Python interpreter.
+    :return: List of dictionaries, one for each imported module in the order in which their imports completed, with the
+    keys: module, self_us, cumulative_us and depth. Depth is 0 for modules imported directly.
+    """
+    import_times = []
+    for line in lines:
+        if not line.startswith(IMPORT_TIME_PREFIX):
+            continue
+        columns = line[len(IMPORT_TIME_PREFIX):].split('|')
+        # header line, i.e. import time: self [us] | cumulative | imported package
+        if len(columns) != 3 or not columns[0].strip().isdigit():
+            continue
+        module = columns[2].rstrip()
+        import_times.append({
+            'module': module.strip(),
+            'self_us': int(columns[0]),
+            'cumulative_us': int(columns[1]),
+            # nested imports are indented by two spaces for each level
+            'depth': (len(module) - len(module.lstrip()) - 1) // 2
+        })
+    return import_times
+
+
+class Command(BaseCommand):
+    """ Reports the time taken to import the modules loaded while a process starts, i.e. while Django is set up and the
+    URL configuration is imported, so that regressions in start-up time can be tracked.
+
+    Imports are timed in a new Python interpreter started with the -X importtime option and the current settings module.
+
+    Usage: python manage.py import_time_report [--limit 25] [--format json] [--max-total-ms 5000] [--import module]
+
+    """
+    help = 'Reports the time taken to import the modules loaded while a process starts.'
+
+    def add_arguments(self, parser):
+        """ Adds the command line arguments.
+
+        :param parser: Command line argument parser.
+        :return: Nothing.
+        """
+        parser.add_argument(
+            '--limit',
+            type=int,
+            default=25,
+            help='Number of modules with the longest cumulative import times to report.'
+        )
+        parser.add_argument(
+            '--format',
+            choices=['text', 'json'],
+            default='text',
+            help='Format of the report. JSON is intended to be tracked by continuous integration.'
+        )
+        parser.add_argument(
+            '--max-total-ms',
+            type=float,
+            default=None,
+            help='Fail if the total import time exceeds this number of milliseconds.'
+        )
+        parser.add_argument(
+            '--import',
+            action='append',
+            dest='imports',
+            default=None,
+            help='Module to import once Django is set up. Can be repeated. Defaults to the ROOT_URLCONF setting.'
+        )
+
+    @staticmethod
+    def __get_import_times(imports):
+        """ Starts a new Python interpreter that sets up Django and imports modules, and retrieves its import times.
+
+        :param imports: Modules to import once Django is set up.
+        :return: Tuple (import_times, wall_ms) where import_times is the list of parsed import times, and wall_ms is the
+        number of milliseconds taken by the new Python interpreter.
+        """
+        code = 'import django; django.setup(); import importlib; [importlib.import_module(m) for m in {i!r}]'.format(
+            i=list(imports)
+        )
+        env = dict(os.environ)
+        env['DJANGO_SETTINGS_MODULE'] = env.get('DJANGO_SETTINGS_MODULE', settings.SETTINGS_MODULE)
+        start = time()
+        completed = run(
+            [sys.executable, '-X', 'importtime', '-c', code],
+            stdout=PIPE, stderr=PIPE, env=env, cwd=str(settings.BASE_DIR), universal_newlines=True
+        )
+        wall_ms = (time() - start) * 1000
+        if completed.returncode != 0:
+            raise CommandError(
+                'Django could not be set up in a new Python interpreter: {e}'.format(
+                    e=completed.stderr.strip().splitlines()[-1] if completed.stderr.strip() else completed.returncode
+                )
+            )
+        return parse_import_times(lines=completed.stderr.splitlines()), wall_ms
+
+    def handle(self, *args, **options):
+        """ Reports the import times.
+
+        :param args: Positional arguments.
+        :param options: Keyword arguments.
+        :return: Nothing.
+        """
+        limit = options['limit']
+        if limit < 0:
+            raise CommandError('Limit must be at least 0')
+        import_times, wall_ms = self.__get_import_times(imports=options['imports'] or [settings.ROOT_URLCONF])
+        total_ms = sum(import_time['self_us'] for import_time in import_times) / 1000
+        slowest = sorted(import_times, key=lambda import_time: import_time['cumulative_us'], reverse=True)[:limit]
+        if options['format'] == 'json':
+            self.stdout.write(json_dumps({
+                'total_ms': round(total_ms, 3),
+                'wall_ms': round(wall_ms, 3),
+                'num_of_modules': len(import_times),
+                'slowest': slowest
+            }, indent=2))
+        else:
+            self.stdout.write(
+                'Imported {n} modules in {t:.1f} ms (process took {w:.1f} ms)'.format(
+                    n=len(import_times), t=total_ms, w=wall_ms
+                )
+            )
+            self.stdout.write('{c:>12} {s:>12}  module'.format(c='cumulative', s='self'))
+            for import_time in slowest:
+                self.stdout.write(
+                    '{c:>9.1f} ms {s:>9.1f} ms  {m}'.format(
+                        c=import_time['cumulative_us'] / 1000, s=import_time['self_us'] / 1000, m=import_time['module']
+                    )
+                )
+        max_total_ms = options['max_total_ms']
+        if max_total_ms is not None and total_ms > max_total_ms:
+            raise CommandError(
+                'Total import time of {t:.1f} ms exceeds the maximum of {m:.1f} ms'.format(t=total_ms, m=max_total_ms)
+            )
@@ -1,14 +1,18 @@
-from django.db import models, connection
+from django.db import models, connections, router
 from django.db.models import Q
 from django.http import QueryDict
-from django.core.exceptions import ValidationError, ImproperlyConfigured
+from django.core.exceptions import ValidationError, ImproperlyConfigured, EmptyResultSet
 from django.core.validators import RegexValidator
 from django.conf import settings
 from django.utils.translation import gettext_lazy as _
 from django.utils.timezone import now
 from django.utils._os import safe_join
+from django.contrib.postgres.fields import DateRangeField
+from django.contrib.postgres.indexes import GistIndex
 from fdp.configuration.abstract.constants import CONST_AZURE_AD_PROVIDER
-from datetime import date
+from psycopg2.extras import DateRange
+from calendar import monthrange
+from datetime import date, timedelta
 from os import path
 from cryptography.fernet import Fernet
 from axes.helpers import get_client_ip_address
@@ -17,12 +21,18 @@ from zipfile import ZipFile
 from re import match as re_match
 from abc import abstractmethod
 from importlib import import_module
-from dateparser.search import search_dates
+from fdp.lazy_import import lazy_module
 from posixpath import normpath
 from pathlib import Path
 from os.path import commonprefix, realpath
 
 
+#: Date search through the dateparser package, which is only loaded when dates are first parsed, since loading its
+# language data slows the start of each process.
+# See: https://dateparser.readthedocs.io/en/latest/
+dateparser_search_module = lazy_module(module_as_str='dateparser.search')
+
+
 class Metable(models.Model):
     """ Base class from which all model classes inherit.
 
@@ -1308,6 +1318,9 @@ class AbstractUrlValidator(models.Model):
     # leftmost section of URLs used in the context of person photos, e.g. downloading
     PERSON_PHOTO_BASE_URL = 'person/photo/'
 
+    # leftmost section of URLs used in the context of thumbnails for person photos, e.g. downloading
+    PERSON_PHOTO_THUMBNAIL_BASE_URL = 'person/thumbnail/'
+
     # leftmost section of URLs used in the context of officers, e.g. searching, retrieving results, and viewing officers
     OFFICER_BASE_URL = 'officer/'
 
@@ -1327,6 +1340,25 @@ class AbstractUrlValidator(models.Model):
     # officer
     OFFICER_DOWNLOAD_ALL_FILES_URL = '{d}all/'.format(d=OFFICER_DOWNLOAD_URL)
 
+    # leftmost section of URLs used to asynchronously retrieve sections of officers
+    OFFICER_ASYNC_URL = '{b}async/'.format(b=OFFICER_BASE_URL)
+
+    # relative URL for asynchronously retrieving the payroll of an officer, excludes the portion of the URL that
+    # specifies which officer
+    OFFICER_ASYNC_PAYMENTS_URL = '{a}payments/'.format(a=OFFICER_ASYNC_URL)
+
+    # relative URL for asynchronously retrieving the associates of an officer, excludes the portion of the URL that
+    # specifies which officer
+    OFFICER_ASYNC_RELATIONSHIPS_URL = '{a}relationships/'.format(a=OFFICER_ASYNC_URL)
+
+    # relative URL for asynchronously retrieving the snapshot of an officer, excludes the portion of the URL that
+    # specifies which officer
+    OFFICER_ASYNC_SNAPSHOT_URL = '{a}snapshot/'.format(a=OFFICER_ASYNC_URL)
+
+    # relative URL for asynchronously retrieving the misconducts of an officer, excludes the portion of the URL that
+    # specifies which officer
+    OFFICER_ASYNC_MISCONDUCTS_URL = '{a}misconducts/'.format(a=OFFICER_ASYNC_URL)
+
     # leftmost section of URLs used in the context of commands, e.g. searching, retrieving results, and viewing commands
     COMMAND_BASE_URL = 'command/'
 
@@ -1346,6 +1378,25 @@ class AbstractUrlValidator(models.Model):
     # command
     COMMAND_DOWNLOAD_ALL_FILES_URL = '{d}all/'.format(d=COMMAND_DOWNLOAD_URL)
 
+    # leftmost section of URLs used to asynchronously retrieve sections of commands
+    COMMAND_ASYNC_URL = '{b}async/'.format(b=COMMAND_BASE_URL)
+
+    # relative URL for asynchronously retrieving the current members of a command, excludes the portion of the URL that
+    # specifies which command
+    COMMAND_ASYNC_CURRENT_MEMBERS_URL = '{a}members/current/'.format(a=COMMAND_ASYNC_URL)
+
+    # relative URL for asynchronously retrieving the former members of a command, excludes the portion of the URL that
+    # specifies which command
+    COMMAND_ASYNC_FORMER_MEMBERS_URL = '{a}members/former/'.format(a=COMMAND_ASYNC_URL)
+
+    # relative URL for asynchronously retrieving the misconducts of a command, excludes the portion of the URL that
+    # specifies which command
+    COMMAND_ASYNC_MISCONDUCTS_URL = '{a}misconducts/'.format(a=COMMAND_ASYNC_URL)
+
+    # relative URL for asynchronously retrieving the relationships of a command, excludes the portion of the URL that
+    # specifies which command
+    COMMAND_ASYNC_RELATIONSHIPS_URL = '{a}relationships/'.format(a=COMMAND_ASYNC_URL)
+
     # leftmost section of URLs used in the context of managing FDP users
     FDP_USER_BASE_URL = ''
 
@@ -1364,6 +1415,9 @@ class AbstractUrlValidator(models.Model):
     # relative URL for a user to reset their own 2FA
     FDP_USER_RESET_2FA_URL = '{b}{s}2fa/reset/'.format(b=FDP_USER_BASE_URL, s=FDP_USER_SETTINGS_URL)
 
+    # relative URL for a host administrator to enable or disable request profiling for their session
+    FDP_USER_TOGGLE_PROFILER_URL = '{b}{s}profiler/toggle/'.format(b=FDP_USER_BASE_URL, s=FDP_USER_SETTINGS_URL)
+
     # queryset GET parameter used to identify original search criteria entered by user
     GET_ORIGINAL_PARAM = 'orig'
 
@@ -1417,6 +1471,12 @@ class AbstractUrlValidator(models.Model):
     # name of parameter in JSON used to indicate search criteria
     JSON_SRCH_CRT_PARAM = 'searchCriteria'
 
+    # name of parameter in JSON used to indicate the page of a paginated section
+    JSON_PAGE_PARAM = 'page'
+
+    # name of parameter in JSON used to indicate the sorting of a paginated section
+    JSON_SORT_PARAM = 'sort'
+
     # queryset GET parameter used to indicate that a view is being rendered as a popup
     GET_POPUP_PARAM = 'popup'
 
@@ -1723,7 +1783,7 @@ class AbstractSearchValidator(models.Model):
         languages = settings.DATE_LANGUAGES \
             if hasattr(settings, 'DATE_LANGUAGES') and settings.DATE_LANGUAGES else []
         # dateparser.search.search_dates(...) returns [('2019-12-31', datetime.datetime(2019,...)), ...]
-        matched_tuples = search_dates(search_text, languages=languages, settings=dp_settings)
+        matched_tuples = dateparser_search_module.search_dates(search_text, languages=languages, settings=dp_settings)
         # some dates were found in search text
         if matched_tuples:
             for matched_tuple in matched_tuples:
@@ -1831,6 +1891,29 @@ class AbstractSearchValidator(models.Model):
             in_ids_list_check_sql = cls.EMPTY_SQL_CHECK_FAIL if fail_on_default else cls.EMPTY_SQL_CHECK_PASS
         return in_ids_list_check_sql
 
+    @classmethod
+    def get_overlapping_ids_check_sql(cls, list_of_ids, lhs_of_check, fail_on_default):
+        """ Retrieves a dynamically constructed SQL statement checking whether an array of IDs contains any of a list of
+        IDs.
+
+        :param list_of_ids: List of IDs to check against. Must all be integers.
+        :param lhs_of_check: Left-hand-side of the IDs check specifying the table or table alias, and the array field.
+        E.g. "person_search_document"."title_ids".
+        :param fail_on_default: True if check should fail if no comparisons are to be made
+        (i.e. there are no IDs in the list).
+        :return: String representing dynamically constructed SQL statement.
+        """
+        if list_of_ids:
+            overlapping_ids_check_sql = """
+                {lhs} && ARRAY[{list_of_ids}]::integer[]
+            """.format(
+                lhs=lhs_of_check,
+                list_of_ids=','.join([str(int(id_in_list)) for id_in_list in list_of_ids])
+            )
+        else:
+            overlapping_ids_check_sql = cls.EMPTY_SQL_CHECK_FAIL if fail_on_default else cls.EMPTY_SQL_CHECK_PASS
+        return overlapping_ids_check_sql
+
     class Meta:
         abstract = True
 
@@ -1889,6 +1972,12 @@ class AbstractExactDateBounded(Descriptable):
         :end_year (int): Year of end, use 0 if unknown.
         :end_month (int): Month of end, use 0 if unknown.
         :end_day (int): Day of end, use 0 if unknown.
+        :start_date_key (int): Start date as YYYYMMDD, with unknown components as 0. Maintained when saving.
+        :end_date_key (int): End date as YYYYMMDD, with unknown components as 0. Maintained when saving.
+        :sort_date_key (int): End date key if end year is after start year, otherwise start date key. Maintained when
+        saving.
+        :date_range (daterange): Earliest possible start date through latest possible end date, unbounded where the year
+        is unknown, and empty if both years are unknown. Maintained when saving.
 
     Properties:
         :exact_bounding_dates (str): User-friendly rendering of the exact bounding dates.
@@ -1948,9 +2037,56 @@ class AbstractExactDateBounded(Descriptable):
         verbose_name=_('ending day')
     )
 
+    start_date_key = models.PositiveIntegerField(
+        null=False,
+        blank=False,
+        default=AbstractDateValidator.UNKNOWN_DATE,
+        editable=False,
+        help_text=_(
+            'Start date as YYYYMMDD, with unknown components as {u}'.format(u=AbstractDateValidator.UNKNOWN_DATE)
+        ),
+        verbose_name=_('starting date key')
+    )
+
+    end_date_key = models.PositiveIntegerField(
+        null=False,
+        blank=False,
+        default=AbstractDateValidator.UNKNOWN_DATE,
+        editable=False,
+        help_text=_(
+            'End date as YYYYMMDD, with unknown components as {u}'.format(u=AbstractDateValidator.UNKNOWN_DATE)
+        ),
+        verbose_name=_('ending date key')
+    )
+
+    sort_date_key = models.PositiveIntegerField(
+        null=False,
+        blank=False,
+        default=AbstractDateValidator.UNKNOWN_DATE,
+        editable=False,
+        help_text=_('End date key if end year is after start year, otherwise start date key'),
+        verbose_name=_('sorting date key')
+    )
+
+    date_range = DateRangeField(
+        null=True,
+        blank=True,
+        editable=False,
+        help_text=_('Earliest possible start date through latest possible end date'),
+        verbose_name=_('date range')
+    )
+
     #: Fields that can be used in inheriting classes to order by date
-    order_by_date_fields = [
-        'start_year', 'start_month', 'start_day', 'end_year', 'end_month', 'end_day'
+    order_by_date_fields = ['start_date_key', 'end_date_key']
+
+    #: Fields that are maintained from the individual date components when saving
+    date_key_fields = ['start_date_key', 'end_date_key', 'sort_date_key', 'date_range']
+
+    #: Indexes that can be used in inheriting classes to search by date
+    date_indexes = [
+        models.Index(fields=['start_date_key'], name='%(class)s_start_key'),
+        models.Index(fields=['end_date_key'], name='%(class)s_end_key'),
+        GistIndex(fields=['date_range'], name='%(class)s_range'),
     ]
 
     #: Ascending order for records
@@ -1959,21 +2095,14 @@ class AbstractExactDateBounded(Descriptable):
     #: Descending order for records
     DESCENDING = 'DESC'
 
-    #: Component for ordering by year in raw SQL
-    order_by_sql_year = 'CASE WHEN {t}."end_year" > {t}."start_year" THEN {t}."end_year" ELSE {t}."start_year" END {o}'
+    #: Ordering by end date if end year is after start year, otherwise by start date, in raw SQL
+    order_by_sql = '{t}."sort_date_key" {o}'
 
-    #: Component for ordering by month in raw SQL
-    order_by_sql_month = \
-        'CASE WHEN {t}."end_year" > {t}."start_year" THEN {t}."end_month" ELSE {t}."start_month" END {o}'
-
-    #: Component for ordering by day in raw SQL
-    order_by_sql_day = 'CASE WHEN {t}."end_year" > {t}."start_year" THEN {t}."end_day" ELSE {t}."start_day" END {o}'
-
-    #: Ordering by year, month and day in raw SQL
-    order_by_sql = order_by_sql_year + ', ' + order_by_sql_month + ', ' + order_by_sql_day
+    #: Individual date components from which the date keys and date range are maintained
+    date_component_fields = ['start_year', 'start_month', 'start_day', 'end_year', 'end_month', 'end_day']
 
     #: Fields that can be used in the admin interface to filter by date
-    list_filter_fields = order_by_date_fields
+    list_filter_fields = date_component_fields
 
     #: String representation of the dates in a raw SQL
     sql_dates = """
@@ -2009,74 +2138,9 @@ class AbstractExactDateBounded(Descriptable):
             END  
     """
 
-    #: Identifying date overlap between two unrelated models in raw SQL
-    date_overlap_sql = """    
-        (
-                /* {E} start dates compared with {C} start dates */                                    
-                (
-                        {E}."start_year" > {C}."start_year" 
-                    OR (
-                            {E}."start_year" = {C}."start_year" 
-                            AND {E}."start_month" > {C}."start_month" 
-                            AND {C}."start_month" <> 0
-                    ) 
-                    OR (
-                            {E}."start_year" = {C}."start_year" 
-                            AND {E}."start_month" = {C}."start_month" 
-                            AND {E}."start_day" >= {C}."start_day" 
-                            AND {C}."start_day" <> 0
-                    )
-                )                              
-            AND                              
-                /* {E} start dates compared with {C} end dates */                              
-                (
-                        {E}."start_year" < {C}."end_year" 
-                    OR (
-                            {E}."start_year" = {C}."end_year" 
-                            AND {E}."start_month" < {C}."end_month" 
-                            AND {C}."end_month" <> 0
-                    ) 
-                    OR (
-                            {E}."start_year" = {C}."end_year" 
-                            AND {E}."start_month" = {C}."end_month" 
-                            AND {E}."start_day" <= {C}."end_day"
-                            AND {C}."end_month" <> 0
-                    )
-                )                           
-            AND                              
-                /* {E} end dates compared with {C} start dates */                                    
-                (
-                        {E}."end_year" > {C}."start_year" 
-                    OR (
-                            {E}."end_year" = {C}."start_year" 
-                            AND {E}."end_month" > {C}."start_month" 
-                            AND {C}."start_month" <> 0
-                    )
-                    OR (
-                            {E}."end_year" = {C}."start_year" 
-                            AND {E}."end_month" = {C}."start_month" 
-                            AND {E}."end_day" >= {C}."start_day" 
-                            AND	 {C}."start_day" <> 0
-                    )
-                )                              
-            AND                              
-                /* {E} end dates compared with {C} end dates */                              
-                (
-                        {E}."end_year" < {C}."end_year" 
-                    OR (
-                            {E}."end_year" = {C}."end_year" 
-                            AND {E}."end_month" < {C}."end_month" 
-                            AND {C}."end_month" <> 0
-                    )
-                    OR (
-                            {E}."end_year" = {C}."end_year" 
-                            AND {E}."end_month" = {C}."end_month" 
-                            AND {E}."end_day" <= {C}."end_day" 
-                            AND {C}."end_day" <> 0
-                    )
-                )                              
-        )    
-    """
+    #: Identifying whether the dates of {E} fall within the dates of {C} for two unrelated models in raw SQL, through
+    # their indexed date ranges
+    date_overlap_sql = '{E}."date_range" <@ {C}."date_range"'
 
     def __get_exact_bounding_dates(self):
         """ Retrieve the human-friendly version of the exact "fuzzy" exact starting and ending dates.
@@ -2096,9 +2160,87 @@ class AbstractExactDateBounded(Descriptable):
         """
         return self.__get_exact_bounding_dates()
 
+    @staticmethod
+    def get_date_key(year, month, day):
+        """ Retrieve the ordinal key for a "fuzzy" date, that orders in the same way as its year, month and day.
+
+        :param year: Year component of date, 0 if unknown.
+        :param month: Month component of date, 0 if unknown.
+        :param day: Day component of date, 0 if unknown.
+        :return: Date as YYYYMMDD, with unknown components as 0.
+        """
+        return (int(year) * 10000) + (int(month) * 100) + int(day)
+
+    @staticmethod
+    def get_date_range(start_year, start_month, start_day, end_year, end_month, end_day):
+        """ Retrieve the range from the earliest possible start date through the latest possible end date for "fuzzy"
+        dates.
+
+        Unknown months and days are replaced by the earliest possible month and day for the start date, and by the
+        latest possible month and day for the end date. The range is unbounded where the year is unknown.
+
+        The range is computed in the same way for existing records in the core.0005 and sourcing.0003 migrations.
+
+        :param start_year: Year component of start date, 0 if unknown.
+        :param start_month: Month component of start date, 0 if unknown.
+        :param start_day: Day component of start date, 0 if unknown.
+        :param end_year: Year component of end date, 0 if unknown.
+        :param end_month: Month component of end date, 0 if unknown.
+        :param end_day: Day component of end date, 0 if unknown.
+        :return: Date range, or None if both years are unknown, or if the start date is after the end date.
+        """
+        unknown = AbstractDateValidator.UNKNOWN_DATE
+        if start_year == unknown and end_year == unknown:
+            return None
+        lower = None
+        if start_year != unknown:
+            month = min(max(start_month, 1), 12)
+            lower = date(start_year, month, min(max(start_day, 1), monthrange(start_year, month)[1]))
+        upper = None
+        if end_year != unknown:
+            month = 12 if end_month == unknown else min(end_month, 12)
+            last_day = monthrange(end_year, month)[1]
+            upper = date(end_year, month, last_day if end_day == unknown else min(end_day, last_day))
+        if lower is not None and upper is not None and lower > upper:
+            return None
+        # in the canonical form used by PostgreSQL, so that ranges compare equal after they are saved
+        return DateRange(
+            lower=lower,
+            upper=None if upper is None else upper + timedelta(days=1),
+            bounds='{l})'.format(l='(' if lower is None else '[')
+        )
+
+    def set_date_keys(self):
+        """ Sets the date keys and the date range from the individual date components.
+
+        Called when saving, so must be called before records are created through bulk_create(...).
+
+        :return: Nothing.
+        """
+        self.start_date_key = self.get_date_key(year=self.start_year, month=self.start_month, day=self.start_day)
+        self.end_date_key = self.get_date_key(year=self.end_year, month=self.end_month, day=self.end_day)
+        self.sort_date_key = self.end_date_key if self.end_year > self.start_year else self.start_date_key
+        self.date_range = self.get_date_range(
+            start_year=self.start_year, start_month=self.start_month, start_day=self.start_day,
+            end_year=self.end_year, end_month=self.end_month, end_day=self.end_day
+        )
+
+    def save(self, *args, **kwargs):
+        """ Saves the record after setting its date keys and date range from its individual date components.
+
+        :param args: Positional arguments passed to the model's save(...) method.
+        :param kwargs: Keyword arguments passed to the model's save(...) method.
+        :return: Nothing.
+        """
+        self.set_date_keys()
+        update_fields = kwargs.get('update_fields', None)
+        if update_fields is not None and set(update_fields).intersection(self.date_component_fields):
+            kwargs['update_fields'] = set(update_fields).union(self.date_key_fields)
+        super(AbstractExactDateBounded, self).save(*args, **kwargs)
+
     @classmethod
     def get_start_date_sql(cls, table, start_year, start_month, start_day):
-        """ Retrieve a partial SQL query to filter the complete start date.
+        """ Retrieve a partial SQL query to filter the complete start date through its indexed date key.
 
         :param table: Table or table alias for which to filter start date.
         :param start_year: Start year by which to filter.
@@ -2106,16 +2248,14 @@ class AbstractExactDateBounded(Descriptable):
         :param start_day: Start day by which to filter.
         :return: String containing partial SQL query used to filter the complete start date.
         """
-        return '"{t}"."start_year" = {y} AND "{t}"."start_month" = {m} AND "{t}"."start_day" = {d}'.format(
+        return '"{t}"."start_date_key" = {k}'.format(
             t=table,
-            y=start_year,
-            m=start_month,
-            d=start_day
+            k=cls.get_date_key(year=start_year, month=start_month, day=start_day)
         )
 
     @classmethod
     def get_end_date_sql(cls, table, end_year, end_month, end_day):
-        """ Retrieve a partial SQL query to filter the complete end date.
+        """ Retrieve a partial SQL query to filter the complete end date through its indexed date key.
 
         :param table: Table or table alias for which to filter end date.
         :param end_year: End year by which to filter.
@@ -2123,11 +2263,9 @@ class AbstractExactDateBounded(Descriptable):
         :param end_day: End day by which to filter.
         :return: String containing partial SQL query used to filter the complete end date.
         """
-        return '"{t}"."end_year" = {y} AND "{t}"."end_month" = {m} AND "{t}"."end_day" = {d}'.format(
+        return '"{t}"."end_date_key" = {k}'.format(
             t=table,
-            y=end_year,
-            m=end_month,
-            d=end_day
+            k=cls.get_date_key(year=end_year, month=end_month, day=end_day)
         )
 
     @staticmethod
@@ -2208,7 +2346,7 @@ class AbstractAsOfDateBounded(AbstractExactDateBounded):
     )
 
     #: Fields that can be used in the admin interface to filter by date
-    list_filter_fields = AbstractExactDateBounded.order_by_date_fields + ['as_of']
+    list_filter_fields = AbstractExactDateBounded.list_filter_fields + ['as_of']
 
     def __get_as_of_bounding_dates(self):
         """ Retrieve the human-friendly version of the "fuzzy" as of starting and ending dates.
@@ -2240,18 +2378,72 @@ class AbstractSql(models.Model):
 
     """
     @staticmethod
-    def exec_single_val_sql(sql_query, sql_params):
+    def exec_single_val_sql(sql_query, sql_params, using=None):
         """ Executes a SQL query that retrieves a single value.
 
         :param sql_query: SQL query to execute.
         :param sql_params: Parameters intended for the SQL query.
+        :param using: Alias of database in which to execute SQL query. If None, the database is selected through the
+        database routers in the same manner as for reads through querysets.
         :return: Single value retrieved by SQL query.
         """
-        with connection.cursor() as cursor:
+        with connections[using if using else router.db_for_read(AbstractSql)].cursor() as cursor:
             cursor.execute(sql_query, sql_params)
             row = cursor.fetchone()
         return row[0]
 
+    @staticmethod
+    def get_queryset_sql(queryset):
+        """ Retrieves the SQL query through which a queryset is evaluated, so that it can be embedded in a
+        hand-assembled SQL query, e.g. as a subquery.
+
+        :param queryset: Queryset for which to retrieve SQL query. Should retrieve only primary keys if embedded as a
+        subquery, i.e. through values('pk').
+        :return: Tuple of the SQL query and a list of its parameters.
+        """
+        try:
+            sql_query, sql_params = queryset.query.get_compiler(using=queryset.db).as_sql()
+        except EmptyResultSet:
+            # queryset can never retrieve records, e.g. it is filtered by an empty list, so no SQL is compiled for it
+            return AbstractSql.get_queryset_sql(
+                queryset=queryset.model._base_manager.filter(pk__isnull=True).values('pk')
+            )
+        return sql_query, list(sql_params)
+
+    @staticmethod
+    def exec_inaccessible_counts_sql(linked_querysets, using=None):
+        """ Counts the records linked to a record that are not accessible by a user, for each relation, in a single
+        query.
+
+        Equivalent to evaluating linked.difference(accessible).count() for each relation, but in one round trip.
+
+        :param linked_querysets: Dictionary whose keys identify relations, and whose values are tuples of the queryset
+        of all records linked through the relation, and the queryset of the linked records that are accessible by the
+        user.
+        :param using: Alias of database in which to execute SQL query. If None, the database is selected through the
+        database routers in the same manner as for reads through querysets.
+        :return: Dictionary whose keys identify relations, and whose values are numbers of inaccessible records.
+        """
+        if not linked_querysets:
+            return {}
+        sql_counts = []
+        sql_params = []
+        for linked_queryset, accessible_queryset in linked_querysets.values():
+            sql_linked, linked_params = AbstractSql.get_queryset_sql(queryset=linked_queryset.order_by().values('pk'))
+            sql_accessible, accessible_params = AbstractSql.get_queryset_sql(
+                queryset=accessible_queryset.order_by().values('pk')
+            )
+            sql_counts.append(
+                '(SELECT COUNT(*) FROM (({l}) EXCEPT ({a})) AS "Z{i}")'.format(
+                    l=sql_linked, a=sql_accessible, i=len(sql_counts)
+                )
+            )
+            sql_params += linked_params + accessible_params
+        with connections[using if using else router.db_for_read(AbstractSql)].cursor() as cursor:
+            cursor.execute('SELECT {c};'.format(c=', '.join(sql_counts)), sql_params)
+            row = cursor.fetchone()
+        return dict(zip(linked_querysets.keys(), row))
+
     class Meta:
         abstract = True
 
@@ -2342,6 +2534,9 @@ class AbstractAnySearch(models.Model):
         :temp_table_prefix (str): Prefix that can be used to name temporary tables.
         :create_temp_table_sql (str): SQL statement that can be used to create a temporary table if it does not exist.
         :on_commit_temp_table_sql (str): SQL statement that can be used at the end of a temporary table definition.
+        :score_table_strategy (str): Strategy through which tables of scores are defined, i.e. temporary tables or CTEs.
+        :score_table_end_sql (str): SQL statement that can be used at the end of a table of scores definition.
+        :uses_temp_tables (bool): True if the temporary table portion of query creates temporary tables.
         :temp_table_query (str): SQL definition for temporary table portion of query.
         :sql_from_query (str): SQL definition for FROM and WHERE portions of query.
         :temp_table_params (list): List of parameters for SQL definition for temporary table portion of query.
@@ -2390,6 +2585,14 @@ class AbstractAnySearch(models.Model):
     #: Default secondary date score
     _secondary_date_score = 30
 
+    #: Strategies through which the tables of scores preceding the main query are defined.
+    #: Temporary tables that are created, filled and dropped when the transaction is committed.
+    TEMP_TABLE_STRATEGY = 'temp_tables'
+    #: Common table expressions (WITH queries), so that the search is performed through a single statement.
+    CTE_STRATEGY = 'cte'
+    #: All strategies through which the tables of scores can be defined.
+    SCORE_TABLE_STRATEGIES = (TEMP_TABLE_STRATEGY, CTE_STRATEGY)
+
     #: Name for temporary tables in the database.
     #: Name of Temporary Table for Person table scores in the database.
     _tmp_person_score = '{prefix}person_score{suffix}'
@@ -2629,6 +2832,50 @@ class AbstractAnySearch(models.Model):
         """
         return 'ON COMMIT DROP;'
 
+    @property
+    def score_table_strategy(self):
+        """ Retrieves the strategy through which the tables of scores preceding the main query are defined, configured
+        through the FDP_SEARCH_SCORE_TABLE_STRATEGY setting.
+
+        :return: Either TEMP_TABLE_STRATEGY or CTE_STRATEGY.
+        """
+        strategy = AbstractConfiguration.search_score_table_strategy()
+        return strategy if strategy in self.SCORE_TABLE_STRATEGIES else self.TEMP_TABLE_STRATEGY
+
+    def get_score_table_start_sql(self, table, is_first):
+        """ Retrieves the SQL statement that starts the definition of a table of scores, which is followed by a SELECT
+        statement retrieving the "id" and "score" columns, and then by score_table_end_sql.
+
+        Depending on the strategy, the table of scores is either a temporary table, or a common table expression.
+
+        Compatible with PostgreSQL.
+
+        :param table: Name of table of scores.
+        :param is_first: True if the table of scores is the first to be defined for the query, false otherwise.
+        :return: SQL statement.
+        """
+        if self.score_table_strategy == self.CTE_STRATEGY:
+            return '{w} "{t}" ("id", "score") AS ('.format(w='WITH' if is_first else ',', t=table)
+        return '{c} "{t}" ("id" INTEGER NOT NULL, "score" INTEGER NOT NULL) {o} INSERT INTO "{t}" ("id", "score")' \
+            .format(c=self.create_temp_table_sql, t=table, o=self.on_commit_temp_table_sql)
+
+    @property
+    def score_table_end_sql(self):
+        """ Retrieves the SQL statement that ends the definition of a table of scores.
+
+        :return: SQL statement.
+        """
+        return ')' if self.score_table_strategy == self.CTE_STRATEGY else ';'
+
+    @property
+    def uses_temp_tables(self):
+        """ Checks whether the SQL definition for the temporary table portion of the query creates temporary tables,
+        in which case it cannot be executed on a read replica.
+
+        :return: True if temporary tables are created, false otherwise.
+        """
+        return self.create_temp_table_sql in self.temp_table_query
+
     @classmethod
     def get_unique_table_suffix(cls, user):
         """ Retrieves a suffix that can be appended to a temporary table name, to ensure that it is unique.
@@ -3023,5 +3270,246 @@ class AbstractConfiguration(models.Model):
         """
         return getattr(settings, 'DATA_WIZARD_STATUS_CHECK_SECONDS', 1)
 
+    @staticmethod
+    def defer_revisions():
+        """ Checks whether the necessary settings have been configured to defer the serialization of record versions by
+        the Django-Reversion package, for changes made through the data management wizard.
+
+        Deferring the serialization improves the performance of saving records with many inline forms.
+
+        :return: True if the serialization of record versions should be deferred, false otherwise.
+        """
+        return getattr(settings, 'FDP_DEFER_REVISIONS', False)
+
+    @staticmethod
+    def save_deferred_revisions_in_background():
+        """ Checks whether the necessary settings have been configured to save deferred record versions in a background
+        thread, rather than in the request thread once its transaction has been committed.
+
+        :return: True if deferred record versions should be saved in a background thread, false otherwise.
+        """
+        return getattr(settings, 'FDP_DEFER_REVISIONS_IN_BACKGROUND', True)
+
+    @staticmethod
+    def get_revision_serialization_format():
+        """ Checks the necessary settings to retrieve the serialization format used by the Django-Reversion package to
+        store record versions.
+
+        :return: Name of serialization format.
+        """
+        return getattr(settings, 'FDP_REVISION_SERIALIZATION_FORMAT', 'json')
+
+    @staticmethod
+    def compress_bulk_import_data():
+        """ Checks whether the necessary settings have been configured to record the data imported through the Django
+        Data Wizard package in a compressed format in the bulk import table.
+
+        Compressing the data reduces the size of the bulk import table.
+
+        :return: True if the data should be compressed, false otherwise.
+        """
+        return getattr(settings, 'FDP_BULK_IMPORT_DATA_FORMAT', None) == getattr(
+            settings, 'BULK_IMPORT_COMPRESSED_FORMAT', 'compressed'
+        )
+
+    @staticmethod
+    def bulk_import_retention_days():
+        """ Checks the necessary settings to retrieve the number of days for which the data imported through the Django
+        Data Wizard package is kept in the bulk import table, before it is moved into archive files.
+
+        :return: Number of days, or None if the data should never be archived.
+        """
+        return getattr(settings, 'FDP_BULK_IMPORT_RETENTION_DAYS', None)
+
+    @staticmethod
+    def bulk_import_archive_dir():
+        """ Checks the necessary settings to retrieve the directory into which the data imported through the Django Data
+        Wizard package is archived.
+
+        :return: Path for directory.
+        """
+        return Path(getattr(settings, 'FDP_BULK_IMPORT_ARCHIVE_DIR', settings.BASE_DIR.parent / 'archive'))
+
+    @staticmethod
+    def shared_cache_timeout():
+        """ Checks the necessary settings to retrieve the default number of seconds for which values that are cached in
+        a namespace of the shared cache are kept.
+
+        :return: Number of seconds.
+        """
+        return getattr(settings, 'FDP_SHARED_CACHE_TIMEOUT', 300)
+
+    @staticmethod
+    def officer_profile_section_cache_secs():
+        """ Checks the necessary settings to retrieve the number of seconds for which each section of an officer profile
+        that is retrieved after the page is loaded is cached for the user who retrieved it.
+
+        Sections are not cached if the default cache is a local-memory cache, since invalidating it does not reach the
+        other processes serving requests.
+
+        :return: Number of seconds. May be 0.
+        """
+        # local-memory caching, where each process serving requests has its own cache
+        if str(getattr(settings, 'FDP_SHARED_CACHE_TYPE', 'locmem')).strip().lower() == 'locmem':
+            return 0
+        return getattr(settings, 'FDP_OFFICER_PROFILE_SECTION_CACHE_SECS', 0)
+
+    @staticmethod
+    def deliver_static_files_through_x_accel_redirect():
+        """ Checks whether the necessary settings have been configured for the front-end server to stream user-uploaded
+        media files through the X-Accel-Redirect header, after access to them has been verified.
+
+        :return: True if media files should be delivered through the X-Accel-Redirect header, false otherwise.
+        """
+        return getattr(settings, 'FDP_STATIC_FILE_DELIVERY', None) == getattr(
+            settings, 'STATIC_FILE_DELIVERY_X_ACCEL_REDIRECT', 'x-accel-redirect'
+        )
+
+    @staticmethod
+    def deliver_static_files_through_x_sendfile():
+        """ Checks whether the necessary settings have been configured for the front-end server to stream user-uploaded
+        media files through the X-Sendfile header, after access to them has been verified.
+
+        :return: True if media files should be delivered through the X-Sendfile header, false otherwise.
+        """
+        return getattr(settings, 'FDP_STATIC_FILE_DELIVERY', None) == getattr(
+            settings, 'STATIC_FILE_DELIVERY_X_SENDFILE', 'x-sendfile'
+        )
+
+    @staticmethod
+    def x_accel_redirect_prefix():
+        """ Checks the necessary settings to retrieve the internal URL prefix that the front-end server maps to the
+        media root, when user-uploaded media files are delivered through the X-Accel-Redirect header.
+
+        :return: Internal URL prefix.
+        """
+        return getattr(settings, 'FDP_X_ACCEL_REDIRECT_PREFIX', '/protected-media/')
+
+    @staticmethod
+    def file_access_cache_secs():
+        """ Checks the necessary settings to retrieve the number of seconds for which the files linked from a profile
+        page can be downloaded by the user who viewed the page, without verifying the user's access to each file again.
+
+        :return: Number of seconds. May be 0.
+        """
+        return getattr(settings, 'FDP_FILE_ACCESS_CACHE_SECS', 0)
+
+    @staticmethod
+    def otp_verification_cache_secs():
+        """ Checks the necessary settings to retrieve the number of seconds for which the result of verifying a user's
+        2FA device, and whether the user was authenticated through Azure Active Directory, are reused from the user's
+        session.
+
+        :return: Number of seconds. May be 0.
+        """
+        return getattr(settings, 'FDP_OTP_VERIFICATION_CACHE_SECS', 0)
+
+    @staticmethod
+    def sql_instrumentation():
+        """ Checks the necessary settings to determine whether the SQL queries executed while handling each request are
+        recorded.
+
+        :return: True if SQL queries are recorded, false otherwise.
+        """
+        return getattr(settings, 'FDP_SQL_INSTRUMENTATION', False)
+
+    @staticmethod
+    def sql_instrumentation_num_of_slowest():
+        """ Checks the necessary settings to retrieve the number of slowest SQL statements that are recorded for each
+        request.
+
+        :return: Number of statements.
+        """
+        return getattr(settings, 'FDP_SQL_INSTRUMENTATION_NUM_OF_SLOWEST', 5)
+
+    @staticmethod
+    def sql_instrumentation_server_timing():
+        """ Checks the necessary settings to determine whether the SQL queries recorded for a request are reported to
+        host administrators and superusers through the Server-Timing header.
+
+        :return: True if recorded queries are reported through the Server-Timing header, false otherwise.
+        """
+        return getattr(settings, 'FDP_SQL_INSTRUMENTATION_SERVER_TIMING', True)
+
+    @staticmethod
+    def request_profiler():
+        """ Checks the necessary settings to determine whether host administrators can profile individual requests.
+
+        :return: True if requests can be profiled, false otherwise.
+        """
+        return getattr(settings, 'FDP_REQUEST_PROFILER', False)
+
+    @staticmethod
+    def request_profiler_max_profiles():
+        """ Checks the necessary settings to retrieve the number of request profiles that are kept.
+
+        :return: Number of request profiles.
+        """
+        return getattr(settings, 'FDP_REQUEST_PROFILER_MAX_PROFILES', 100)
+
+    @staticmethod
+    def search_score_table_strategy():
+        """ Checks the necessary settings to retrieve the strategy through which the tables of scores for the data
+        management wizard searches are defined.
+
+        :return: Either 'temp_tables' or 'cte'.
+        """
+        return str(getattr(settings, 'FDP_SEARCH_SCORE_TABLE_STRATEGY', 'temp_tables')).strip().lower()
+
+    @staticmethod
+    def read_replica_database():
+        """ Checks the necessary settings to retrieve the alias of the read replica, to which reads for profile pages,
+        searches, downloads and autocomplete lookups are sent.
+
+        :return: Alias of the read replica, or None if no read replica is defined in the DATABASES setting.
+        """
+        alias = getattr(settings, 'FDP_READ_REPLICA_DATABASE', None)
+        return alias if alias and alias in getattr(settings, 'DATABASES', {}) else None
+
+    @staticmethod
+    def read_replica_pin_secs():
+        """ Checks the necessary settings to retrieve the number of seconds for which a user's reads are sent to the
+        primary database after the user writes.
+
+        :return: Number of seconds. May be 0.
+        """
+        return getattr(settings, 'FDP_READ_REPLICA_PIN_SECS', 15)
+
+    @staticmethod
+    def incident_navigation_secs():
+        """ Checks the necessary settings to retrieve the number of seconds for which the incidents of content, and the
+        persons suggested for each incident, are kept in the user's session while persons are linked to the incidents
+        through the data management wizard.
+
+        :return: Number of seconds. May be 0.
+        """
+        return getattr(settings, 'FDP_INCIDENT_NAVIGATION_SECS', 1800)
+
+    @staticmethod
+    def person_photo_thumbnail_widths():
+        """ Checks the necessary settings to retrieve the widths of the thumbnails that are generated for person photos.
+
+        :return: List of widths in pixels. May be empty.
+        """
+        return list(getattr(settings, 'FDP_PERSON_PHOTO_THUMBNAIL_WIDTHS', []))
+
+    @staticmethod
+    def person_photo_thumbnail_token_secs():
+        """ Checks the necessary settings to retrieve the number of seconds for which the signed links to thumbnails of
+        person photos are valid.
+
+        :return: Number of seconds.
+        """
+        return getattr(settings, 'FDP_PERSON_PHOTO_THUMBNAIL_TOKEN_SECS', 3600)
+
+    @staticmethod
+    def person_photo_thumbnail_cache_secs():
+        """ Checks the necessary settings to retrieve the number of seconds for which browsers may cache thumbnails of
+        person photos.
+
+        :return: Number of seconds.
+        """
+        return getattr(settings, 'FDP_PERSON_PHOTO_THUMBNAIL_CACHE_SECS', 86400)
+
     class Meta:
         abstract = True
@@ -0,0 +1,181 @@
+"""
+
+Routing of reads to a read replica of the database, for views that opt in through the read_replica decorator.
+
+Reads are only sent to the read replica while an opted in view handles a request, and only if a read replica is
+defined in the DATABASES setting under the alias configured through FDP_READ_REPLICA_DATABASE. Writes are always sent
+to the primary database.
+
+A read replica may lag behind the primary database, so users are pinned to the primary database for the number of
+seconds configured through FDP_READ_REPLICA_PIN_SECS after they write, so that they see their own changes. Writes are
+detected by ReadReplicaRouter, and recorded in the user's session by
+fdp.middleware.replica_middleware.ReadReplicaMiddleware.
+
+Temporary tables cannot be created on a read replica, so SQL that creates them must be executed on the primary
+database, e.g. through AbstractSql.exec_single_val_sql(..., using=DEFAULT_DB_ALIAS).
+
+Example:
+
+    @method_decorator(read_replica, name='dispatch')
+    class OfficerDetailView(SecuredSyncDetailView):
+        ...
+
+"""
+from django.db import DEFAULT_DB_ALIAS
+from .models import AbstractConfiguration
+from functools import wraps
+from threading import local
+from time import time
+
+
+#: State of the request handled by the current thread.
+_state = local()
+
+#: Key in the session for the time until which the user's reads are sent to the primary database.
+PINNED_UNTIL_SESSION_KEY = 'fdp_read_replica_pinned_until'
+
+#: Labels of apps whose records are always read from the primary database, since they are written for most requests.
+_primary_app_labels = ('sessions', 'django_cache')
+
+#: Labels of apps whose writes do not pin users to the primary database, since the records are not read back through
+#: the views that opt in to the read replica, e.g. records of searches and views of profiles.
+_unpinned_app_labels = _primary_app_labels + ('admin', 'axes', 'profiles')
+
+
+def start_tracking_writes():
+    """ Starts tracking whether the request handled by the current thread writes to the database.
+
+    :return: Nothing.
+    """
+    _state.has_written = False
+
+
+def stop_tracking_writes():
+    """ Stops tracking whether the request handled by the current thread writes to the database.
+
+    :return: True if the request wrote records that pin the user to the primary database, false otherwise.
+    """
+    has_written = getattr(_state, 'has_written', False)
+    _state.has_written = False
+    return has_written
+
+
+def is_pinned_to_primary(request):
+    """ Checks whether the reads for a user's request are sent to the primary database, because the user recently wrote.
+
+    :param request: Http request object.
+    :return: True if reads are sent to the primary database, false otherwise.
+    """
+    session = getattr(request, 'session', None)
+    return session is not None and session.get(PINNED_UNTIL_SESSION_KEY, 0) > time()
+
+
+def pin_to_primary(request):
+    """ Sends the reads for a user's subsequent requests to the primary database, for the number of seconds configured
+    through FDP_READ_REPLICA_PIN_SECS.
+
+    :param request: Http request object through which the user wrote.
+    :return: Nothing.
+    """
+    pin_secs = AbstractConfiguration.read_replica_pin_secs()
+    session = getattr(request, 'session', None)
+    if pin_secs > 0 and session is not None:
+        session[PINNED_UNTIL_SESSION_KEY] = time() + pin_secs
+
+
+def is_reading_from_read_replica():
+    """ Checks whether reads for the request handled by the current thread are sent to the read replica.
+
+    Values read from the read replica may lag behind the primary database, so should not be cached for other requests.
+
+    :return: True if reads are sent to the read replica, false otherwise.
+    """
+    return getattr(_state, 'read_replica', None) is not None and not getattr(_state, 'has_written', False)
+
+
+def read_replica(view_func):
+    """ Decorator for views whose reads are sent to the read replica.
+
+    Templates for lazily rendered responses are rendered while reads are sent to the read replica, since querysets are
+    evaluated during rendering.
+
+    Reads are sent to the primary database if no read replica is defined, or if the user recently wrote.
+
+    :param view_func: View function, or dispatch(...) method of a class-based view through method_decorator(...).
+    :return: Decorated view function.
+    """
+    @wraps(view_func)
+    def _wrapped_view(request, *args, **kwargs):
+        alias = AbstractConfiguration.read_replica_database()
+        if alias is None or is_pinned_to_primary(request=request):
+            return view_func(request, *args, **kwargs)
+        previous_alias = getattr(_state, 'read_replica', None)
+        _state.read_replica = alias
+        try:
+            response = view_func(request, *args, **kwargs)
+            if callable(getattr(response, 'render', None)) and not response.is_rendered:
+                response.render()
+        finally:
+            _state.read_replica = previous_alias
+        return response
+    return _wrapped_view
+
+
+class ReadReplicaRouter:
+    """ Database router that sends reads to the read replica while views that opt in through the read_replica
+    decorator handle requests, and sends all other reads and all writes to the primary database.
+
+    Once a request writes, its remaining reads are sent to the primary database.
+
+    See: https://docs.djangoproject.com/en/3.1/topics/db/multi-db/#automatic-database-routing
+
+    """
+    def db_for_read(self, model, **hints):
+        """ Selects the database from which to read records.
+
+        :param model: Model class whose records are read.
+        :param hints: Additional information, e.g. the instance through which records are read.
+        :return: Alias of the read replica or the primary database.
+        """
+        alias = getattr(_state, 'read_replica', None)
+        if alias is None or getattr(_state, 'has_written', False) or model._meta.app_label in _primary_app_labels:
+            return DEFAULT_DB_ALIAS
+        return alias
+
+    def db_for_write(self, model, **hints):
+        """ Selects the database to which records are written, and records that the user wrote.
+
+        :param model: Model class whose records are written.
+        :param hints: Additional information, e.g. the instance that is written.
+        :return: Alias of the primary database.
+        """
+        if model._meta.app_label not in _unpinned_app_labels:
+            _state.has_written = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        """ Allows relations between records read from the read replica and the primary database, since both contain
+        the same records.
+
+        :param obj1: First record in relation.
+        :param obj2: Second record in relation.
+        :param hints: Additional information.
+        :return: True if both records were read from either the read replica or the primary database, None otherwise.
+        """
+        aliases = (DEFAULT_DB_ALIAS, AbstractConfiguration.read_replica_database())
+        if obj1._state.db in aliases and obj2._state.db in aliases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        """ Prevents migrations from being applied to the read replica, since it is a copy of the primary database.
+
+        :param db: Alias of database to which migration would be applied.
+        :param app_label: Label of app whose migration would be applied.
+        :param model_name: Name of model that would be migrated.
+        :param hints: Additional information.
+        :return: False for the read replica, None otherwise.
+        """
+        if db == AbstractConfiguration.read_replica_database():
+            return False
+        return None
@@ -0,0 +1,331 @@
+"""
+
+Deferred and batched capture of record versions through the Django-Reversion package.
+
+By default, Django-Reversion serializes every record that is saved during a request, synchronously and inside the
+request. When deferred capture is configured through the FDP_DEFER_REVISIONS setting, only the primary keys of the
+records that were saved during a request are recorded. Once the request's transaction has been committed, the records,
+and the records that Django-Reversion follows from them, are serialized in bulk, so that the versions reflect the
+records as they were committed by the request. The versions are then saved by a background worker.
+
+Deferred revisions that are still waiting to be saved when the process exits are saved before it exits. They are lost if
+the process is killed, e.g. through SIGKILL, so the audit trail may miss the changes from the last requests that a killed
+process handled.
+
+See: https://django-reversion.readthedocs.io/en/stable/
+
+"""
+from django.apps import apps
+from django.core import serializers
+from django.db import connection, transaction
+from django.db.models.signals import post_save, m2m_changed
+from django.utils.encoding import force_str
+from django.utils.timezone import now
+from reversion import is_registered
+from reversion.models import Revision, Version
+from reversion.revisions import _get_options, _get_content_type, _follow_relations_recursive
+from .models import AbstractConfiguration
+from collections import defaultdict, namedtuple
+from contextlib import contextmanager
+from queue import Queue, Empty
+from threading import local, Lock, Thread
+from time import time
+import atexit
+import logging
+
+
+logger = logging.getLogger(__name__)
+
+
+#: Versions that were serialized for the changes captured during a request, and that will be saved in a revision by the
+#: background worker.
+DeferredRevision = namedtuple('DeferredRevision', ('versions', 'user_id', 'comment', 'date_created', 'using'))
+
+
+class _Local(local):
+    """ Thread-local stack of the changes that are being captured.
+
+    """
+    def __init__(self):
+        """ Initializes an empty stack.
+
+        """
+        self.stack = []
+
+
+_local = _Local()
+
+
+#: Queue of deferred revisions waiting to be saved by the background worker.
+_queue = Queue()
+
+
+#: Lock used to start the background worker only once.
+_worker_lock = Lock()
+
+
+#: Background worker thread, or None if it has not yet been started.
+_worker = None
+
+
+#: Maximum number of seconds to wait for the background worker to save deferred revisions when the process exits.
+_exit_timeout_secs = 10
+
+
+def is_capturing():
+    """ Checks whether changes are being captured for a deferred revision in the current thread.
+
+    :return: True if changes are being captured, false otherwise.
+    """
+    return bool(_local.stack)
+
+
+@contextmanager
+def capture_changes():
+    """ Captures the primary keys of the records registered with Django-Reversion that are saved within the context.
+
+    :return: Dictionary mapping model labels to sets of primary keys, that is populated while in the context.
+    """
+    model_pks = defaultdict(set)
+    _local.stack.append(model_pks)
+    try:
+        yield model_pks
+    finally:
+        _local.stack.pop()
+
+
+def _capture(instance):
+    """ Records the primary key of a saved record in the changes being captured.
+
+    :param instance: Record that was saved.
+    :return: Nothing.
+    """
+    if instance.pk is not None and is_registered(instance.__class__):
+        _local.stack[-1][instance._meta.label].add(force_str(instance.pk))
+
+
+def post_save_capture(sender, instance, **kwargs):
+    """ Captures the primary key of a record after it is saved, if changes are being captured.
+
+    :param sender: Model class of the record that was saved.
+    :param instance: Record that was saved.
+    :param kwargs: Additional keyword arguments.
+    :return: Nothing.
+    """
+    if is_capturing():
+        _capture(instance=instance)
+
+
+def m2m_changed_capture(sender, instance, action, reverse, **kwargs):
+    """ Captures the primary key of a record after its many-to-many relationships change, if changes are being captured.
+
+    :param sender: Intermediate model class for the many-to-many relationship.
+    :param instance: Record whose many-to-many relationships changed.
+    :param action: Type of change, e.g. post_add.
+    :param reverse: True if the relationship was changed from its reverse side.
+    :param kwargs: Additional keyword arguments.
+    :return: Nothing.
+    """
+    if is_capturing() and action.startswith('post_') and not reverse:
+        _capture(instance=instance)
+
+
+def connect_signals():
+    """ Connects the signals through which changes are captured.
+
+    :return: Nothing.
+    """
+    post_save.connect(post_save_capture, dispatch_uid='inheritable_revisions_post_save_capture')
+    m2m_changed.connect(m2m_changed_capture, dispatch_uid='inheritable_revisions_m2m_changed_capture')
+
+
+def _get_version(obj, using):
+    """ Serializes a record as an unsaved version, in the same way as Django-Reversion.
+
+    :param obj: Record to serialize.
+    :param using: Database alias on which the version is saved.
+    :return: Unsaved version.
+    """
+    version_options = _get_options(obj.__class__)
+    return Version(
+        content_type=_get_content_type(obj.__class__, using),
+        object_id=force_str(obj.pk),
+        db=using,
+        format=version_options.format,
+        serialized_data=serializers.serialize(
+            version_options.format,
+            (obj,),
+            fields=version_options.fields,
+            use_natural_foreign_keys=version_options.use_natural_foreign_keys,
+        ),
+        object_repr=force_str(obj),
+    )
+
+
+def serialize_versions(model_pks, using):
+    """ Serializes the captured records in bulk, together with the records that Django-Reversion follows from them.
+
+    Records that were deleted after being captured are skipped.
+
+    :param model_pks: Dictionary mapping model labels to sets of primary keys that were captured.
+    :param using: Database alias from which the records are retrieved, and on which the versions are saved.
+    :return: List of unsaved versions.
+    """
+    versions = {}
+    for model_label, pks in model_pks.items():
+        model = apps.get_model(model_label)
+        version_options = _get_options(model)
+        m2m_fields = [f for f in version_options.fields if model._meta.get_field(f).many_to_many]
+        # retrieve all captured records for a model in a single query, and their many-to-many relationships in one
+        # additional query per relationship
+        for obj in model._base_manager.using(using).filter(pk__in=pks).prefetch_related(*m2m_fields):
+            # includes the captured record itself
+            for version_obj in _follow_relations_recursive(obj):
+                version_key = (version_obj._meta.label, force_str(version_obj.pk))
+                if version_key not in versions:
+                    versions[version_key] = _get_version(obj=version_obj, using=using)
+    return list(versions.values())
+
+
+def save_deferred_revision(deferred_revision):
+    """ Saves the serialized versions in a single revision.
+
+    :param deferred_revision: Versions that were serialized for the changes captured during a request.
+    :return: Revision that was saved, or None if there were no versions to save.
+    """
+    using = deferred_revision.using
+    versions = deferred_revision.versions
+    if not versions:
+        return None
+    with transaction.atomic(using=using):
+        revision = Revision(
+            date_created=deferred_revision.date_created or now(),
+            user_id=deferred_revision.user_id,
+            comment=deferred_revision.comment,
+        )
+        revision.save(using=using)
+        for version in versions:
+            version.revision = revision
+        Version.objects.using(using).bulk_create(versions)
+    return revision
+
+
+def _process(deferred_revision):
+    """ Saves a deferred revision that was taken from the queue.
+
+    :param deferred_revision: Versions that were serialized for the changes captured during a request.
+    :return: Nothing.
+    """
+    try:
+        save_deferred_revision(deferred_revision=deferred_revision)
+    except Exception:
+        logger.exception('Deferred revision could not be saved')
+    finally:
+        _queue.task_done()
+
+
+def flush():
+    """ Saves all deferred revisions that are waiting in the queue, in the current thread.
+
+    :return: Number of deferred revisions that were processed.
+    """
+    num_of_processed = 0
+    while True:
+        try:
+            deferred_revision = _queue.get_nowait()
+        except Empty:
+            return num_of_processed
+        _process(deferred_revision=deferred_revision)
+        num_of_processed += 1
+
+
+def _work():
+    """ Background worker that waits for deferred revisions, and saves them together with any others that are waiting
+    in the queue.
+
+    :return: Nothing.
+    """
+    while True:
+        deferred_revision = _queue.get()
+        try:
+            _process(deferred_revision=deferred_revision)
+            flush()
+        finally:
+            # background thread should not hold a database connection while it is idle
+            connection.close()
+
+
+@atexit.register
+def _flush_at_exit():
+    """ Saves the deferred revisions that are still waiting in the queue when the process exits, e.g. when a worker
+    process is recycled, and waits briefly for the background worker to finish the revision that it is saving.
+
+    :return: Nothing.
+    """
+    flush()
+    deadline = time() + _exit_timeout_secs
+    with _queue.all_tasks_done:
+        while _queue.unfinished_tasks and time() < deadline:
+            _queue.all_tasks_done.wait(timeout=max(deadline - time(), 0))
+
+
+def _start_worker():
+    """ Starts the background worker, if it has not yet been started.
+
+    :return: Nothing.
+    """
+    global _worker
+    with _worker_lock:
+        if _worker is None or not _worker.is_alive():
+            _worker = Thread(target=_work, name='fdp-deferred-revisions', daemon=True)
+            _worker.start()
+
+
+def enqueue(deferred_revision):
+    """ Adds a deferred revision to the queue of the background worker.
+
+    If the background worker is disabled through the FDP_DEFER_REVISIONS_IN_BACKGROUND setting, then the deferred
+    revision is saved immediately.
+
+    :param deferred_revision: Versions that were serialized for the changes captured during a request.
+    :return: Nothing.
+    """
+    _queue.put(deferred_revision)
+    if AbstractConfiguration.save_deferred_revisions_in_background():
+        _start_worker()
+    else:
+        flush()
+
+
+def defer(model_pks, user, comment, date_created, using):
+    """ Schedules a revision to be saved for captured changes, once the current transaction has been committed.
+
+    :param model_pks: Dictionary mapping model labels to sets of primary keys that were captured.
+    :param user: User who made the changes. May be None.
+    :param comment: Comment describing the changes.
+    :param date_created: Date and time when the changes were made.
+    :param using: Database alias on which the revision is saved.
+    :return: Nothing.
+    """
+    if not model_pks:
+        return
+    model_pks = {model_label: set(pks) for model_label, pks in model_pks.items()}
+    user_id = getattr(user, 'pk', None) if getattr(user, 'is_authenticated', False) else None
+
+    def serialize_and_enqueue():
+        """ Serializes the captured records as they were committed, and adds them to the queue.
+
+        :return: Nothing.
+        """
+        try:
+            versions = serialize_versions(model_pks=model_pks, using=using)
+        except Exception:
+            logger.exception('Deferred revision could not be serialized')
+            return
+        enqueue(
+            deferred_revision=DeferredRevision(
+                versions=versions, user_id=user_id, comment=comment, date_created=date_created, using=using
+            )
+        )
+
+    transaction.on_commit(serialize_and_enqueue, using=using)
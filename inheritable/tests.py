@@ -8,6 +8,8 @@ from django.conf import settings
 from django.apps import apps
 from fdpuser.models import FdpUser
 from .models import AbstractUrlValidator, AbstractConfiguration
+from .instrumentation import QueryRecorder
+from contextlib import contextmanager
 from json import dumps
 
 
@@ -650,6 +652,47 @@ class AbstractTestCase(TestCase):
             self.assertTrue(str(response.url).startswith(login_startswith))
         return response
 
+    def _get_logged_in_client(self, fdp_user):
+        """ Retrieves a client through which a user is logged in with 2FA.
+
+        :param fdp_user: FDP user to log in.
+        :return: Client.
+        """
+        client = Client(**self._local_client_kwargs)
+        client.logout()
+        response = self._do_login(
+            c=client,
+            username=fdp_user.email,
+            password=self._password,
+            two_factor=self._create_2fa_record(user=fdp_user),
+            login_status_code=200,
+            two_factor_status_code=200,
+            will_login_succeed=True
+        )
+        return response.client
+
+    @contextmanager
+    def assertQueryBudget(self, max_num_of_queries, msg=None):
+        """ Context manager asserting that no more than a number of SQL queries are executed within the context.
+
+        Fails with the slowest statements that were executed, so that the source of a regression can be found.
+
+        :param max_num_of_queries: Maximum number of SQL queries that may be executed.
+        :param msg: Optional description of the code within the context, included if the assertion fails.
+        :return: Query recorder, e.g. to inspect the number of queries that were executed.
+        """
+        with QueryRecorder(num_of_slowest=10) as recorder:
+            yield recorder
+        if recorder.num_of_queries > max_num_of_queries:
+            self.fail(
+                '{m}{n} queries were executed, exceeding the budget of {b}. Slowest statements:\n{s}'.format(
+                    m='{m}: '.format(m=msg) if msg else '',
+                    n=recorder.num_of_queries,
+                    b=max_num_of_queries,
+                    s='\n'.join('{t} ms: {q}'.format(t=slow['ms'], q=slow['sql']) for slow in recorder.slowest)
+                )
+            )
+
     def _do_post(self, c, url, data, expected_status_code, login_startswith):
         """ Use POST method to submit data.
 
@@ -1776,12 +1819,14 @@ class AbstractTestCase(TestCase):
         print(_('\nStarting {s} changing update view {m}-related sub-test for {u} with different '
                 'FDP organization'.format(s=view_txt, m=model_txt, u=user_role[self._label])))
 
-    def _check_if_in_view(self, url, fdp_user, fdp_org):
+    def _check_if_in_view(self, url, fdp_user, fdp_org, async_urls=None):
         """ Checks whether data with different levels of confidentiality appear in a view for a FDP user.
 
         :param url: Url for view.
         :param fdp_user: FDP user accessing view.
         :param fdp_org: FDP organization that may be added to the data.
+        :param async_urls: Optional list of urls through which sections of the view are retrieved asynchronously. The
+        first page of each section is checked together with the view.
         :return: Nothing.
         """
         client = Client(**self._local_client_kwargs)
@@ -1799,6 +1844,11 @@ class AbstractTestCase(TestCase):
         )
         response = self._do_get(c=response.client, url=url, expected_status_code=200, login_startswith=None)
         str_content = str(response.content)
+        for async_url in (async_urls or []):
+            async_response = self._do_async_post(
+                c=response.client, url=async_url, data={}, expected_status_code=200, login_startswith=None
+            )
+            str_content += str(async_response.content)
         # cycle through all permutations of confidentiality for the row for data
         for confidential in self._confidentials:
             should_data_appear = self._can_user_access_data(
@@ -1,7 +1,7 @@
 from django.shortcuts import redirect
 from django.core.exceptions import NON_FIELD_ERRORS
-from django.core.files.storage import get_storage_class
-from django.http import JsonResponse
+from django.core.files.storage import default_storage
+from django.http import JsonResponse, HttpResponse, FileResponse, StreamingHttpResponse, Http404
 from django.views.generic import TemplateView, FormView, RedirectView, ListView, DetailView, View, CreateView, \
     UpdateView
 from django.urls import reverse
@@ -9,15 +9,30 @@ from django.utils.http import quote_plus
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin, AccessMixin
 from two_factor.views.mixins import OTPRequiredMixin
 from django.utils.translation import gettext as _
-from django.views.static import serve
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe
 from django.conf import settings
-from fdpuser.models import FdpUser
+from fdpuser.models import FdpUser, RequestProfile
 from fdp.settings import SITE_HEADER
+from django.db import router
 from reversion.views import RevisionMixin
-from reversion import set_comment as reversion_set_comment
+from reversion.models import Revision
+from reversion import set_comment as reversion_set_comment, get_comment as reversion_get_comment, \
+    get_date_created as reversion_get_date_created, is_active as reversion_is_active, \
+    create_revision as reversion_create_revision
 from .forms import PopupForm
-from .models import Archivable, Confidentiable, AbstractUrlValidator, AbstractJson, JsonError, AbstractFileValidator
+from .models import Archivable, Confidentiable, AbstractUrlValidator, AbstractJson, JsonError, AbstractFileValidator, \
+    AbstractConfiguration
+from .revisions import capture_changes, defer as defer_revision
+from .caching import CacheNamespace
+from contextlib import nullcontext
 from json import loads as json_loads
+from hashlib import sha256
+from pathlib import Path
+from urllib.parse import quote
+import mimetypes
+import posixpath
 
 
 class PostOrGetOnlyMixin(AccessMixin):
@@ -44,7 +59,23 @@ class CoreAccessMixin(OTPRequiredMixin, LoginRequiredMixin, UserPassesTestMixin,
 
     Only POST or GET request methods accepted.
 
+    Requests are profiled if host administrators ask for it, see fdpuser.models.RequestProfile.
+
     """
+    def dispatch(self, request, *args, **kwargs):
+        """ Profiles the request if a host administrator asked for it.
+
+        :param request: Http request object.
+        :param args:
+        :param kwargs:
+        :return: Http response object.
+        """
+        if RequestProfile.is_requested(request=request):
+            return RequestProfile.profile(
+                request=request, get_response=lambda: super(CoreAccessMixin, self).dispatch(request, *args, **kwargs)
+            )
+        return super(CoreAccessMixin, self).dispatch(request, *args, **kwargs)
+
     def test_func(self):
         """ Used to test the user for UserPassesTestMixin.
 
@@ -177,6 +208,58 @@ class SecuredSyncView(CoreAccessMixin, View):
     Only POST or GET request methods accepted.
 
     """
+    @staticmethod
+    def __get_file_access_cache():
+        """ Retrieves the namespace of the shared cache in which the files that users may download without verifying
+        their access again are recorded.
+
+        :return: Cache namespace.
+        """
+        return CacheNamespace(name='file_access', timeout=AbstractConfiguration.file_access_cache_secs())
+
+    @staticmethod
+    def __get_file_access_key(user, name):
+        """ Retrieves the key identifying a user's access to a file in the cache namespace.
+
+        :param user: User who may access file.
+        :param name: Relative path of file including file name and extension.
+        :return: Key.
+        """
+        return '{u}:{h}'.format(u=user.pk, h=sha256(str(name).encode('utf-8')).hexdigest())
+
+    @staticmethod
+    def remember_file_access(user, names):
+        """ Records that a user may download files without verifying their access again, for the number of seconds
+        configured through the FDP_FILE_ACCESS_CACHE_SECS setting.
+
+        Should only be called for files to which the user's access was verified, e.g. the files linked from a profile
+        page that was retrieved through a queryset filtered for the user's access.
+
+        :param user: User who may download files.
+        :param names: Relative paths of files including file names and extensions, or the files themselves.
+        :return: Nothing.
+        """
+        if AbstractConfiguration.file_access_cache_secs() > 0:
+            names = [getattr(name, 'name', name) for name in names]
+            if names:
+                SecuredSyncView.__get_file_access_cache().set_many(
+                    {SecuredSyncView.__get_file_access_key(user=user, name=name): True for name in names}
+                )
+
+    @staticmethod
+    def has_remembered_file_access(user, name):
+        """ Checks whether a user may download a file without verifying their access again.
+
+        :param user: User who is downloading file.
+        :param name: Relative path of file including file name and extension.
+        :return: True if the user's access to the file was recently verified, false otherwise.
+        """
+        if AbstractConfiguration.file_access_cache_secs() <= 0:
+            return False
+        return SecuredSyncView.__get_file_access_cache().get(
+            key=SecuredSyncView.__get_file_access_key(user=user, name=name), default=False
+        )
+
     @staticmethod
     def serve_static_file(request, path, absolute_base_url, relative_base_url, document_root):
         """ Default mechanism to serve a static file, e.g. attachment or person photo, requested by the user.
@@ -207,22 +290,159 @@ class SecuredSyncView(CoreAccessMixin, View):
             err_msg=_('Path is not valid'),
             err_cls=Exception
         )
-        return serve(request, path, document_root=document_root, show_indexes=False)
+        # full path of file, resolved in the same manner as django.views.static.serve(...)
+        path = posixpath.normpath(path).lstrip('/')
+        full_path = Path(safe_join(document_root, path))
+        if not full_path.is_file():
+            raise Http404(_('File does not exist'))
+        stat_result = full_path.stat()
+        etag = SecuredSyncView._get_etag(stat_result=stat_result)
+        last_modified = int(stat_result.st_mtime)
+        # respond with 304 Not Modified or 412 Precondition Failed, if the conditional request headers require it
+        conditional_response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if conditional_response is not None:
+            if conditional_response.status_code == 304:
+                conditional_response['ETag'] = etag
+            return conditional_response
+        content_type, encoding = mimetypes.guess_type(str(full_path))
+        content_type = content_type or 'application/octet-stream'
+        # front-end server streams file, and handles range requests
+        if AbstractConfiguration.deliver_static_files_through_x_accel_redirect():
+            response = HttpResponse(content_type=content_type)
+            response['X-Accel-Redirect'] = quote(
+                '{p}{f}'.format(p=AbstractConfiguration.x_accel_redirect_prefix(), f=path)
+            )
+        elif AbstractConfiguration.deliver_static_files_through_x_sendfile():
+            response = HttpResponse(content_type=content_type)
+            response['X-Sendfile'] = str(full_path)
+        # Python process streams file
+        else:
+            response = SecuredSyncView._get_python_file_response(
+                request=request,
+                full_path=full_path,
+                size=stat_result.st_size,
+                content_type=content_type,
+                etag=etag,
+                last_modified=last_modified
+            )
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+        if encoding:
+            response['Content-Encoding'] = encoding
+        return response
+
+    @staticmethod
+    def _get_etag(stat_result):
+        """ Retrieves an entity tag for a file, based on its modification time and size.
+
+        :param stat_result: Result of calling stat() on the file.
+        :return: Quoted entity tag.
+        """
+        return '"{m:x}-{s:x}"'.format(m=int(stat_result.st_mtime), s=stat_result.st_size)
+
+    @staticmethod
+    def _get_byte_range(request, size, etag, last_modified):
+        """ Retrieves the range of bytes requested for a file through the Range header.
+
+        Only a single range is supported. Requests for multiple ranges are served the entire file.
+
+        :param request: Http request object through which file was selected.
+        :param size: Size of file in bytes.
+        :param etag: Quoted entity tag for the file.
+        :param last_modified: Modification time of the file, as seconds since the epoch.
+        :return: Tuple of first and last byte positions that were requested, None if the entire file should be served,
+        or False if the requested range cannot be satisfied.
+        """
+        range_header = request.META.get('HTTP_RANGE', '').strip()
+        if not range_header.startswith('bytes=') or ',' in range_header:
+            return None
+        # range is ignored if the file changed since the client retrieved its partial copy
+        if_range = request.META.get('HTTP_IF_RANGE', '').strip()
+        if if_range and if_range != etag and parse_http_date_safe(if_range) != last_modified:
+            return None
+        first, sep, last = (p.strip() for p in range_header[len('bytes='):].partition('-'))
+        if not sep or not (first or last) or not all(p.isdigit() for p in (first, last) if p):
+            return None
+        # suffix range, e.g. bytes=-500 for the last 500 bytes
+        if not first:
+            # empty file has no bytes to serve
+            if int(last) == 0 or size == 0:
+                return False
+            return max(size - int(last), 0), size - 1
+        first = int(first)
+        last = min(int(last), size - 1) if last else size - 1
+        if first > last or first >= size:
+            return False
+        return first, last
+
+    @staticmethod
+    def _get_python_file_response(request, full_path, size, content_type, etag, last_modified):
+        """ Retrieves the response through which the Python process streams a file, either in its entirety or for the
+        single range of bytes that was requested.
+
+        :param request: Http request object through which file was selected.
+        :param full_path: Full path of file.
+        :param size: Size of file in bytes.
+        :param content_type: Content type of file.
+        :param etag: Quoted entity tag for the file.
+        :param last_modified: Modification time of the file, as seconds since the epoch.
+        :return: Response streaming file.
+        """
+        byte_range = SecuredSyncView._get_byte_range(
+            request=request, size=size, etag=etag, last_modified=last_modified
+        )
+        # requested range cannot be satisfied
+        if byte_range is False:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = 'bytes */{s}'.format(s=size)
+        # entire file
+        elif byte_range is None:
+            response = FileResponse(full_path.open('rb'), content_type=content_type)
+        # single range of bytes
+        else:
+            first, last = byte_range
+            response = StreamingHttpResponse(
+                SecuredSyncView._read_byte_range(full_path=full_path, first=first, last=last),
+                status=206,
+                content_type=content_type
+            )
+            response['Content-Length'] = str(last - first + 1)
+            response['Content-Range'] = 'bytes {f}-{l}/{s}'.format(f=first, l=last, s=size)
+        response['Accept-Ranges'] = 'bytes'
+        return response
+
+    @staticmethod
+    def _read_byte_range(full_path, first, last):
+        """ Reads a range of bytes from a file in blocks.
+
+        :param full_path: Full path of file.
+        :param first: Position of first byte to read.
+        :param last: Position of last byte to read.
+        :return: Generator of blocks of bytes.
+        """
+        remaining = last - first + 1
+        with full_path.open('rb') as opened_file:
+            opened_file.seek(first)
+            while remaining > 0:
+                block = opened_file.read(min(FileResponse.block_size, remaining))
+                if not block:
+                    break
+                remaining -= len(block)
+                yield block
 
     @staticmethod
     def serve_azure_storage_static_file(name):
         """ Mechanism for Azure Storage account to serve a static file, e.g. attachment or person photo, requested by
         the user.
 
+        The storage backend used to manage user-uploaded media files is instantiated once per process, so that its
+        service client and expiring SAS URLs are reused across requests.
+
         :param name: Relative path of file including file name and extension.
         :return: Redirect to an expiring SAS URL for the file.
         """
-        # class for storage backend used to manage user-uploaded media files
-        media_azure_storage_cls = get_storage_class(settings.DEFAULT_FILE_STORAGE)
-        # instance for storage backend used to manage user-uploaded media files
-        media_azure_storage = media_azure_storage_cls()
         # expiring URL with SAS
-        sas_expiring_url = media_azure_storage.get_sas_expiring_url(name)
+        sas_expiring_url = default_storage.get_sas_expiring_url(name)
         # redirect
         return redirect(sas_expiring_url)
 
@@ -365,7 +585,57 @@ class SecuredSyncDetailView(CoreAccessMixin, ContextDataMixin, DetailView):
         return self._add_context(context)
 
 
-class AdminSyncCreateView(AdminAccessMixin, ContextDataMixin, RevisionMixin, CreateView):
+class DeferredRevisionMixin(RevisionMixin):
+    """ Mixin that wraps a request in a Django-Reversion revision, and optionally defers the serialization of versions.
+
+    If deferred revisions are configured through the FDP_DEFER_REVISIONS setting, then only the primary keys of the
+    records saved during the request are captured. Their versions are serialized in bulk after the request's transaction
+    has been committed, so that the time taken by the request does not depend on the number of records saved.
+
+    See: https://django-reversion.readthedocs.io/en/stable/views.html#revisionmixin
+
+    """
+    def __init__(self, *args, **kwargs):
+        """ Disables the synchronous serialization of versions by Django-Reversion, if revisions are deferred.
+
+        :param args:
+        :param kwargs:
+        """
+        self.revision_manage_manually = AbstractConfiguration.defer_revisions()
+        super(DeferredRevisionMixin, self).__init__(*args, **kwargs)
+
+    def dispatch(self, request, *args, **kwargs):
+        """ Captures the primary keys of records saved during the request, if revisions are deferred.
+
+        :param request: Http request object.
+        :param args:
+        :param kwargs:
+        :return: Response.
+        """
+        # revisions are not deferred, or the request does not create a revision
+        if not (self.revision_manage_manually and self.revision_request_creates_revision(request)):
+            return super(DeferredRevisionMixin, self).dispatch(request, *args, **kwargs)
+        using = self.revision_using or router.db_for_write(Revision)
+        # comment and date set by the view are only available while the revision is active, so start one here if
+        # the request is not already wrapped in a revision
+        revision_context = nullcontext() if reversion_is_active() \
+            else reversion_create_revision(manage_manually=True, using=using, atomic=self.revision_atomic)
+        with revision_context:
+            with capture_changes() as model_pks:
+                response = super(DeferredRevisionMixin, self).dispatch(request, *args, **kwargs)
+            # successful response, so save revision after the transaction is committed
+            if response.status_code < 400:
+                defer_revision(
+                    model_pks=model_pks,
+                    user=request.user,
+                    comment=reversion_get_comment(),
+                    date_created=reversion_get_date_created(),
+                    using=using
+                )
+        return response
+
+
+class AdminSyncCreateView(AdminAccessMixin, ContextDataMixin, DeferredRevisionMixin, CreateView):
     """ Admin only synchronously rendered view to create an object.
 
     Log is in required, and users must be able to view admin only data.
@@ -411,7 +681,7 @@ class AdminAsyncCreateView(AdminSyncCreateView, AsyncContextDataMixin):
         return self._add_async_context(context)
 
 
-class AdminSyncUpdateView(AdminAccessMixin, ContextDataMixin, RevisionMixin, UpdateView):
+class AdminSyncUpdateView(AdminAccessMixin, ContextDataMixin, DeferredRevisionMixin, UpdateView):
     """ Admin only synchronously rendered view to update an object.
 
     Log is in required, and users must be able to view admin only data.
@@ -486,10 +756,10 @@ class AdminAsyncUpdateView(AdminSyncUpdateView, AsyncContextDataMixin):
         return self._add_async_context(context)
 
 
-class AdminAsyncJsonView(AdminAccessMixin, View):
-    """  Admin only view accepting asynchronous requests from which all views accepting asynchronous requests inherit.
+class SecuredAsyncJsonView(CoreAccessMixin, View):
+    """  Secured view accepting asynchronous requests from which all views accepting asynchronous requests inherit.
 
-    Log is in required, and users must be ale to view admin only data.
+    Log in is required, and users must be able to view core data.
 
     Only POST request methods accepted.
 
@@ -561,3 +831,15 @@ class AdminAsyncJsonView(AdminAccessMixin, View):
         str_err = str(err)
         json = JsonError(error='{b} {e}{d}'.format(b=b, e=str_err, d='' if str_err.endswith('.') else '.'))
         return json
+
+
+class AdminAsyncJsonView(AdminAccessMixin, SecuredAsyncJsonView):
+    """  Admin only view accepting asynchronous requests from which all admin only views accepting asynchronous requests
+    inherit.
+
+    Log in is required, and users must be able to view admin only data.
+
+    Only POST request methods accepted.
+
+    """
+    pass
@@ -1,4 +1,5 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_save, post_delete, m2m_changed
 from django.utils.translation import ugettext_lazy as _
 
 
@@ -9,3 +10,14 @@ class ProfilesAppConfig(AppConfig):
     name = 'profiles'
     verbose_name = _('Profile Log')
     verbose_name_plural = _('Profile Logs')
+
+    def ready(self):
+        """ Connects signals through which the cached sections of officer profiles are invalidated.
+
+        :return: Nothing.
+        """
+        from .signals import post_change_officer_profile_data
+        # senders are filtered by app in the receiver, since sections include records from many models
+        post_save.connect(post_change_officer_profile_data)
+        post_delete.connect(post_change_officer_profile_data)
+        m2m_changed.connect(post_change_officer_profile_data)
@@ -0,0 +1,47 @@
+"""
+
+Caching of the sections of officer profiles that are retrieved asynchronously after the page is loaded, such as the
+payroll and misconducts.
+
+Each section of each officer is cached under its own key, for users with the same access to confidential data, i.e.
+the same organization and the same host and administrator privileges. Sections are cached for the number of seconds
+configured through FDP_OFFICER_PROFILE_SECTION_CACHE_SECS, and all cached sections are invalidated when records in the
+core, sourcing or supporting apps are changed, see profiles.signals.
+
+"""
+from inheritable.caching import CacheNamespace
+from inheritable.models import AbstractConfiguration
+
+
+#: Labels of apps whose records are displayed in the sections of officer profiles, or control access to them.
+OFFICER_PROFILE_APP_LABELS = ('core', 'sourcing', 'supporting')
+
+
+def get_officer_section_cache():
+    """ Retrieves the namespace in which the sections of officer profiles are cached.
+
+    :return: Cache namespace.
+    """
+    return CacheNamespace(
+        name='officer_profile_sections', timeout=AbstractConfiguration.officer_profile_section_cache_secs()
+    )
+
+
+def get_officer_section_key(section, pk, user):
+    """ Retrieves the key under which a section of an officer profile is cached for a user.
+
+    The key includes the user's access to confidential data rather than the user, so that a section is shared by users
+    with the same access.
+
+    :param section: Name of section, e.g. payments.
+    :param pk: Primary key used to identify the officer.
+    :param user: User retrieving the section.
+    :return: Key identifying the section within the cache namespace.
+    """
+    return '{s}:{p}:{o}:{h}:{a}'.format(
+        s=section,
+        p=int(pk),
+        o=user.fdp_organization_id or 0,
+        h=int(bool(user.is_host or user.is_superuser)),
+        a=int(bool(user.is_administrator or user.is_superuser))
+    )
@@ -1,5 +1,5 @@
 from inheritable.models import Archivable, AbstractProfileSearch, AbstractSearchValidator
-from core.models import Person, PersonAlias, PersonGrouping, Grouping, GroupingAlias
+from core.models import Grouping, GroupingSearchDocument
 
 
 class GroupingProfileSearch(AbstractProfileSearch):
@@ -28,8 +28,9 @@ class GroupingProfileSearch(AbstractProfileSearch):
         }
 
     def define_sql_query_body(self, user):
-        """ Defines the body of the SQL query, and optionally any preceding temporary tables, used to retrieve groupings
-        matching the parsed search criteria.
+        """ Defines the body of the SQL query used to retrieve groupings matching the parsed search criteria.
+
+        Groupings are scored against their search documents, so that no temporary tables are necessary.
 
         :param user: User performing the search.
         :return: A tuple containing four elements in the following order:
@@ -45,23 +46,21 @@ class GroupingProfileSearch(AbstractProfileSearch):
         # build the query to check against grouping names
         grouping_name_check = AbstractSearchValidator.get_partial_check_sql(
             num_of_checks=num_of_terms,
-            lhs_of_check='"{grouping}"."name"'.format(grouping=Grouping.get_db_table()),
+            lhs_of_check='ZD."name"',
+            is_and=False,
+            fail_on_default=True
+        )
+        # build the query to check against grouping codes
+        grouping_code_check = AbstractSearchValidator.get_partial_check_sql(
+            num_of_checks=num_of_terms,
+            lhs_of_check='ZD."code"',
             is_and=False,
             fail_on_default=True
         )
-        # calculating grouping name score
-        grouping_name_whens = '' if pairings else AbstractSearchValidator.EMPTY_WHEN_INT
-        for pairing in pairings:
-            grouping_name_whens += """
-                WHEN "{grouping}"."name" ILIKE \'%%\' || %s || \'%%\' THEN {score}
-            """.format(
-                grouping=Grouping.get_db_table(),
-                score=self._get_primary_name_score(name=pairing)
-            )
         # build the query to check against grouping alias names
         grouping_alias_check = AbstractSearchValidator.get_partial_check_sql(
             num_of_checks=num_of_terms,
-            lhs_of_check='"{grouping_alias}"."name"'.format(grouping_alias=GroupingAlias.get_db_table()),
+            lhs_of_check='ZDA."name"',
             is_and=False,
             fail_on_default=True
         )
@@ -69,99 +68,43 @@ class GroupingProfileSearch(AbstractProfileSearch):
         grouping_alias_whens = '' if pairings else AbstractSearchValidator.EMPTY_WHEN_INT
         for pairing in pairings:
             grouping_alias_whens += """
-                WHEN "{grouping_alias}"."name" ILIKE \'%%\' || %s || \'%%\' THEN {score}
-            """.format(
-                grouping_alias=GroupingAlias.get_db_table(),
-                score=self._get_primary_alias_score(alias=pairing)
-            )
-        # build the query to check against grouping codes
-        grouping_code_check = AbstractSearchValidator.get_partial_check_sql(
-            num_of_checks=num_of_terms,
-            lhs_of_check='"{grouping}"."code"'.format(grouping=Grouping.get_db_table()),
-            is_and=False,
-            fail_on_default=True
-        )
-        # calculating grouping code score
-        grouping_code_whens = '' if pairings else AbstractSearchValidator.EMPTY_WHEN_INT
-        for pairing in pairings:
-            grouping_code_whens += """
-                WHEN "{grouping}"."code" ILIKE \'%%\' || %s || \'%%\' THEN {score}
-            """.format(
-                grouping=Grouping.get_db_table(),
-                score=self._get_primary_name_score(name=pairing)
-            )
+                WHEN ZDA."name" ILIKE \'%%\' || %s || \'%%\' THEN {score}
+            """.format(score=self._get_primary_alias_score(alias=pairing))
         # FROM portion of the SQL query to retrieve groupings matching search criteria
-        prefix = self.temp_table_prefix
-        suffix = self.unique_table_suffix
         sql_from_query = """
             FROM "{grouping}"
-                LEFT JOIN "{tmp_grouping_score}"
-                ON "{grouping}"."id" = "{tmp_grouping_score}"."id"            
-                LEFT JOIN "{tmp_grouping_alias_score}"
-                ON "{grouping}"."id" = "{tmp_grouping_alias_score}"."id"                    
+                INNER JOIN "{grouping_search_document}" AS ZD
+                ON "{grouping}"."id" = ZD."grouping_id"
+                CROSS JOIN LATERAL (
+                    SELECT MAX(CASE {grouping_alias_whens} ELSE 0 END) AS "score"
+                    FROM unnest(ZD."aliases") AS ZDA("name")
+                    WHERE ({grouping_alias_check})
+                ) ZGA
             WHERE "{grouping}".{active_filter} 
-            AND EXISTS (
-                SELECT 'X' FROM "{person_grouping}"
-                INNER JOIN "{person}"
-                ON "{person_grouping}"."person_id" = "{person}"."id"
-                AND "{person}"."is_law_enforcement" = True
-                WHERE "{person_grouping}"."grouping_id" = "{grouping}"."id"
-            )
+            AND ZD."has_law_enforcement" = True
             AND ( 
-                   ("{tmp_grouping_score}"."id" IS NOT NULL)
-                OR ("{tmp_grouping_alias_score}"."id" IS NOT NULL)                
+                   ({grouping_name_check})
+                OR ({grouping_code_check})
+                OR (ZGA."score" IS NOT NULL)
                 )
         """.format(
-            tmp_grouping_score=self._tmp_grouping_score.format(prefix=prefix, suffix=suffix),
-            tmp_grouping_alias_score=self._tmp_grouping_alias_score.format(prefix=prefix, suffix=suffix),
             grouping=Grouping.get_db_table(),
-            person=Person.get_db_table(),
-            person_alias=PersonAlias.get_db_table(),
-            person_grouping=PersonGrouping.get_db_table(),
-            active_filter=Archivable.ACTIVE_FILTER
-        )
-        # SQL FROM PARAMS
-        from_params = []
-        # Temporary Table portion of the SQL query to retrieve groupings matching search criteria
-        temp_table_query = """
-        {create_temp_table_sql} "{tmp_grouping_score}" ("id" INTEGER NOT NULL, "score" INTEGER NOT NULL)
-        {on_commit_temp_table_sql} INSERT INTO "{tmp_grouping_score}" ("id", "score")
-        SELECT
-            "id" AS "id",
-            CASE {grouping_name_whens} ELSE 0 END 
-            + CASE {grouping_code_whens} ELSE 0 END
-            AS "score"
-        FROM "{grouping}" 
-        WHERE ("{grouping}".{active_filter}) 
-        AND (({grouping_name_check}) OR ({grouping_code_check}));            
-
-        {create_temp_table_sql} "{tmp_grouping_alias_score}" ("id" INTEGER NOT NULL, "score" INTEGER NOT NULL)
-        {on_commit_temp_table_sql} INSERT INTO "{tmp_grouping_alias_score}" ("id", "score")
-        SELECT "grouping_id" AS "id", CASE {grouping_alias_whens} ELSE 0 END AS "score"
-        FROM "{grouping_alias}" WHERE ("{grouping_alias}".{active_filter}) AND ({grouping_alias_check});
-        """.format(
+            grouping_search_document=GroupingSearchDocument.get_db_table(),
             active_filter=Archivable.ACTIVE_FILTER,
-            create_temp_table_sql=self.create_temp_table_sql,
-            on_commit_temp_table_sql=self.on_commit_temp_table_sql,
-            tmp_grouping_score=self._tmp_grouping_score.format(prefix=prefix, suffix=suffix),
-            tmp_grouping_alias_score=self._tmp_grouping_alias_score.format(prefix=prefix, suffix=suffix),
-            grouping=Grouping.get_db_table(),
-            grouping_alias=GroupingAlias.get_db_table(),
-            grouping_name_whens=grouping_name_whens,
-            grouping_name_check=grouping_name_check,
-            grouping_code_whens=grouping_code_whens,
-            grouping_code_check=grouping_code_check,
             grouping_alias_whens=grouping_alias_whens,
             grouping_alias_check=grouping_alias_check,
+            grouping_name_check=grouping_name_check,
+            grouping_code_check=grouping_code_check
         )
-        # TEMP TABLE PARAMS
-        # grouping_name_whens                       pairings
-        # grouping_code_whens                       pairings
-        # grouping_name_checks                      terms
-        # grouping_code_checks                      terms
+        # SQL FROM PARAMS
         # grouping_alias_whens                      pairings
         # grouping_alias_checks                     terms
-        temp_table_params = pairings + pairings + terms + terms + pairings + terms
+        # grouping_name_checks                      terms
+        # grouping_code_checks                      terms
+        from_params = pairings + terms + terms + terms
+        # no temporary tables are necessary
+        temp_table_query = ''
+        temp_table_params = []
         return temp_table_query, sql_from_query, temp_table_params, from_params
 
     def define_sql_query_score(self):
@@ -172,18 +115,56 @@ class GroupingProfileSearch(AbstractProfileSearch):
             1: Parameters for SQL statement for definition for scoring column in main query
 
         """
+        parsed_search_criteria = self.parsed_search_criteria
+        pairings = parsed_search_criteria[self._adjacent_pairings_key]
+        terms = parsed_search_criteria[self._terms_key]
+        num_of_terms = len(terms)
+        # build the query to check against grouping names
+        grouping_name_check = AbstractSearchValidator.get_partial_check_sql(
+            num_of_checks=num_of_terms,
+            lhs_of_check='ZD."name"',
+            is_and=False,
+            fail_on_default=True
+        )
+        # build the query to check against grouping codes
+        grouping_code_check = AbstractSearchValidator.get_partial_check_sql(
+            num_of_checks=num_of_terms,
+            lhs_of_check='ZD."code"',
+            is_and=False,
+            fail_on_default=True
+        )
+        # calculating grouping name score
+        grouping_name_whens = '' if pairings else AbstractSearchValidator.EMPTY_WHEN_INT
+        for pairing in pairings:
+            grouping_name_whens += """
+                WHEN ZD."name" ILIKE \'%%\' || %s || \'%%\' THEN {score}
+            """.format(score=self._get_primary_name_score(name=pairing))
+        # calculating grouping code score
+        grouping_code_whens = '' if pairings else AbstractSearchValidator.EMPTY_WHEN_INT
+        for pairing in pairings:
+            grouping_code_whens += """
+                WHEN ZD."code" ILIKE \'%%\' || %s || \'%%\' THEN {score}
+            """.format(score=self._get_primary_name_score(name=pairing))
         # score the row according to matching criteria
-        prefix = self.temp_table_prefix
-        suffix = self.unique_table_suffix
         sql_score_query = """
-            COALESCE("{tmp_grouping_score}"."score", 0) +
-            COALESCE("{tmp_grouping_alias_score}"."score", 0)
+            CASE 
+                WHEN ({grouping_name_check}) OR ({grouping_code_check}) 
+                THEN CASE {grouping_name_whens} ELSE 0 END + CASE {grouping_code_whens} ELSE 0 END 
+                ELSE 0 
+            END +
+            COALESCE(ZGA."score", 0)
             AS "score" """.format(
-            tmp_grouping_score=self._tmp_grouping_score.format(prefix=prefix, suffix=suffix),
-            tmp_grouping_alias_score=self._tmp_grouping_alias_score.format(prefix=prefix, suffix=suffix),
+            grouping_name_check=grouping_name_check,
+            grouping_code_check=grouping_code_check,
+            grouping_name_whens=grouping_name_whens,
+            grouping_code_whens=grouping_code_whens
         )
         # PARAMS
-        score_params = []
+        # grouping_name_checks                      terms
+        # grouping_code_checks                      terms
+        # grouping_name_whens                       pairings
+        # grouping_code_whens                       pairings
+        score_params = terms + terms + pairings + pairings
         return sql_score_query, score_params
 
     class Meta:
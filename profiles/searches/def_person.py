@@ -1,6 +1,6 @@
 from django.conf import settings
 from inheritable.models import Archivable, AbstractProfileSearch, AbstractSearchValidator
-from core.models import Person, PersonAlias, PersonIdentifier, PersonTitle, PersonGrouping, Grouping, GroupingAlias
+from core.models import Person, PersonSearchDocument
 from supporting.models import County, Title
 
 
@@ -47,8 +47,9 @@ class PersonProfileSearch(AbstractProfileSearch):
         }
 
     def define_sql_query_body(self, user):
-        """ Defines the body of the SQL query, and optionally any preceding temporary tables, used to retrieve persons
-        matching the parsed search criteria.
+        """ Defines the body of the SQL query used to retrieve persons matching the parsed search criteria.
+
+        Persons are scored against their search documents, so that no temporary tables are necessary.
 
         :param user: User performing the search.
         :return: A tuple containing four elements in the following order:
@@ -66,41 +67,28 @@ class PersonProfileSearch(AbstractProfileSearch):
         num_of_terms = len(terms)
         num_of_identifiers = len(identifiers)
         # build the query to check against titles
-        titles_check = AbstractSearchValidator.get_in_ids_list_check_sql(
+        titles_check = AbstractSearchValidator.get_overlapping_ids_check_sql(
             list_of_ids=titles,
-            extra_check=None,
-            lhs_of_check='"{person_title}"."title_id"'.format(person_title=PersonTitle.get_db_table()),
+            lhs_of_check='ZD."title_ids"',
             fail_on_default=True
         )
         # build the query to check against counties
-        counties_check = AbstractSearchValidator.get_in_ids_list_check_sql(
+        counties_check = AbstractSearchValidator.get_overlapping_ids_check_sql(
             list_of_ids=counties,
-            extra_check=None,
-            lhs_of_check='"{grouping_county}"."county_id"'.format(
-                grouping_county=Grouping.get_db_table_for_many_to_many(many_to_many_key=Grouping.counties)
-            ),
+            lhs_of_check='ZD."county_ids"',
             fail_on_default=True
         )
         # build the query to check against person names
         person_name_check = AbstractSearchValidator.get_partial_check_sql(
             num_of_checks=num_of_terms,
-            lhs_of_check='"{person}"."name"'.format(person=Person.get_db_table()),
+            lhs_of_check='ZD."name"',
             is_and=False,
             fail_on_default=True
         )
-        # calculating person name score
-        person_name_whens = '' if pairings else AbstractSearchValidator.EMPTY_WHEN_INT
-        for pairing in pairings:
-            person_name_whens += """
-                WHEN "{person}"."name" ILIKE \'%%\' || %s || \'%%\' THEN {score}
-            """.format(
-                person=Person.get_db_table(),
-                score=self._get_primary_name_score(name=pairing)
-            )
         # build the query to check against person alias names
         person_alias_check = AbstractSearchValidator.get_partial_check_sql(
             num_of_checks=num_of_terms,
-            lhs_of_check='"{person_alias}"."name"'.format(person_alias=PersonAlias.get_db_table()),
+            lhs_of_check='ZDA."name"',
             is_and=False,
             fail_on_default=True
         )
@@ -108,15 +96,25 @@ class PersonProfileSearch(AbstractProfileSearch):
         person_alias_whens = '' if pairings else AbstractSearchValidator.EMPTY_WHEN_INT
         for pairing in pairings:
             person_alias_whens += """
-                WHEN "{person_alias}"."name" ILIKE \'%%\' || %s || \'%%\' THEN {score}
-            """.format(
-                person_alias=PersonAlias.get_db_table(),
-                score=self._get_primary_alias_score(alias=pairing)
-            )
+                WHEN ZDA."name" ILIKE \'%%\' || %s || \'%%\' THEN {score}
+            """.format(score=self._get_primary_alias_score(alias=pairing))
+        # build the query to check against person identifiers
+        person_identifier_check = AbstractSearchValidator.get_partial_check_sql(
+            num_of_checks=num_of_identifiers,
+            lhs_of_check='ZDI."identifier"',
+            is_and=False,
+            fail_on_default=True
+        )
+        # calculating person identifier score
+        person_identifier_whens = '' if identifiers else AbstractSearchValidator.EMPTY_WHEN_INT
+        for identifier in identifiers:
+            person_identifier_whens += """
+                WHEN ZDI."identifier" ILIKE \'%%\' || %s || \'%%\' THEN {score}
+            """.format(score=self._get_primary_identifier_score(identifier=identifier))
         # build the query to check against grouping names
         grouping_name_check = AbstractSearchValidator.get_partial_check_sql(
             num_of_checks=num_of_terms,
-            lhs_of_check='"{grouping}"."name"'.format(grouping=Grouping.get_db_table()),
+            lhs_of_check='ZDG."name"',
             is_and=False,
             fail_on_default=True
         )
@@ -124,15 +122,12 @@ class PersonProfileSearch(AbstractProfileSearch):
         grouping_name_whens = '' if pairings else AbstractSearchValidator.EMPTY_WHEN_INT
         for pairing in pairings:
             grouping_name_whens += """
-                WHEN "{grouping}"."name" ILIKE \'%%\' || %s || \'%%\' THEN {score}
-            """.format(
-                grouping=Grouping.get_db_table(),
-                score=self._get_secondary_name_score(name=pairing)
-            )
+                WHEN ZDG."name" ILIKE \'%%\' || %s || \'%%\' THEN {score}
+            """.format(score=self._get_secondary_name_score(name=pairing))
         # build the query to check against grouping alias names
         grouping_alias_check = AbstractSearchValidator.get_partial_check_sql(
             num_of_checks=num_of_terms,
-            lhs_of_check='"{grouping_alias}"."name"'.format(grouping_alias=GroupingAlias.get_db_table()),
+            lhs_of_check='ZDGA."name"',
             is_and=False,
             fail_on_default=True
         )
@@ -140,27 +135,8 @@ class PersonProfileSearch(AbstractProfileSearch):
         grouping_alias_whens = '' if pairings else AbstractSearchValidator.EMPTY_WHEN_INT
         for pairing in pairings:
             grouping_alias_whens += """
-                WHEN "{grouping_alias}"."name" ILIKE \'%%\' || %s || \'%%\' THEN {score}
-            """.format(
-                grouping_alias=GroupingAlias.get_db_table(),
-                score=self._get_secondary_alias_score(alias=pairing)
-            )
-        # build the query to check against person identifiers
-        person_identifier_check = AbstractSearchValidator.get_partial_check_sql(
-            num_of_checks=num_of_identifiers,
-            lhs_of_check='"{person_identifier}"."identifier"'.format(person_identifier=PersonIdentifier.get_db_table()),
-            is_and=False,
-            fail_on_default=True
-        )
-        # calculating person identifier score
-        person_identifier_whens = '' if identifiers else AbstractSearchValidator.EMPTY_WHEN_INT
-        for identifier in identifiers:
-            person_identifier_whens += """
-                WHEN "{person_identifier}"."identifier" ILIKE \'%%\' || %s || \'%%\' THEN {score}
-            """.format(
-                person_identifier=PersonIdentifier.get_db_table(),
-                score=self._get_primary_identifier_score(identifier=identifier)
-            )
+                WHEN ZDGA."name" ILIKE \'%%\' || %s || \'%%\' THEN {score}
+            """.format(score=self._get_secondary_alias_score(alias=pairing))
         # confidential filter for persons
         confidential_filter = Person.get_confidential_filter(
             user=user,
@@ -172,115 +148,52 @@ class PersonProfileSearch(AbstractProfileSearch):
             prefix=Person.get_db_table(),
         )
         # FROM portion of the SQL query to retrieve persons matching search criteria
-        prefix = self.temp_table_prefix
-        suffix = self.unique_table_suffix
         sql_from_query = """
             FROM "{person}"
-                LEFT JOIN "{tmp_person_score}"
-                ON "{person}"."id" = "{tmp_person_score}"."id"            
-                LEFT JOIN "{tmp_person_alias_score}"
-                ON "{person}"."id" = "{tmp_person_alias_score}"."id"                    
-                LEFT JOIN "{tmp_person_identifier_score}"
-                ON "{person}"."id" = "{tmp_person_identifier_score}"."id"                            
-                LEFT JOIN LATERAL (
-                    SELECT COALESCE("{tmp_grouping_score}"."score",0) AS "score"
-                    FROM "{person_grouping}"
-                    INNER JOIN "{tmp_grouping_score}"
-                    ON "{person_grouping}"."grouping_id" = "{tmp_grouping_score}"."id"                                                                
-                    WHERE "{person}"."id" = "{person_grouping}"."person_id"
-                    AND "{person_grouping}".{active_filter}
+                INNER JOIN "{person_search_document}" AS ZD
+                ON "{person}"."id" = ZD."person_id"
+                CROSS JOIN LATERAL (
+                    SELECT MAX(CASE {person_alias_whens} ELSE 0 END) AS "score"
+                    FROM unnest(ZD."aliases") AS ZDA("name")
+                    WHERE ({person_alias_check})
+                ) ZPA
+                CROSS JOIN LATERAL (
+                    SELECT MAX(CASE {person_identifier_whens} ELSE 0 END) AS "score"
+                    FROM unnest(ZD."identifiers") AS ZDI("identifier")
+                    WHERE ({person_identifier_check})
+                ) ZPI
+                CROSS JOIN LATERAL (
+                    SELECT MAX(CASE {grouping_name_whens} ELSE 0 END) AS "score"
+                    FROM unnest(ZD."grouping_names") AS ZDG("name")
+                    WHERE ({grouping_name_check})
+                ) ZGN
+                CROSS JOIN LATERAL (
+                    SELECT MAX(CASE {grouping_alias_whens} ELSE 0 END) AS "score"
+                    FROM unnest(ZD."grouping_aliases") AS ZDGA("name")
+                    WHERE ({grouping_alias_check})
+                ) ZGA
+                CROSS JOIN LATERAL (
+                    SELECT 
+                        COALESCE(ZGN."score", 0) 
+                        + COALESCE(ZGA."score", 0)
+                        + CASE WHEN ({counties_check}) THEN {county_score} ELSE 0 END 
+                    AS "score"
                 ) ZPG
-                ON true                
-                LEFT JOIN "{person_title}"
-                ON "{person}"."id" = "{person_title}"."person_id"
-                AND ({titles_check})                     
-                AND "{person_title}".{active_filter}
             WHERE "{person}"."is_law_enforcement" = True 
             AND "{person}".{active_filter}
             AND ({confidential_filter})
             AND ( 
-                   ("{tmp_person_score}"."id" IS NOT NULL)
-                OR ("{tmp_person_alias_score}"."id" IS NOT NULL)
-                OR ("{tmp_person_identifier_score}"."id" IS NOT NULL)
+                   ({person_name_check})
+                OR (ZPA."score" IS NOT NULL)
+                OR (ZPI."score" IS NOT NULL)
                 OR (ZPG."score" > 0)
-                OR ("{person_title}"."id" IS NOT NULL)                
+                OR ({titles_check})
                 )
         """.format(
-            tmp_person_score=self._tmp_person_score.format(prefix=prefix, suffix=suffix),
-            tmp_person_identifier_score=self._tmp_person_identifier_score.format(prefix=prefix, suffix=suffix),
-            tmp_grouping_score=self._tmp_grouping_score.format(prefix=prefix, suffix=suffix),
-            tmp_person_alias_score=self._tmp_person_alias_score.format(prefix=prefix, suffix=suffix),
             person=Person.get_db_table(),
-            person_alias=PersonAlias.get_db_table(),
-            person_identifier=PersonIdentifier.get_db_table(),
-            person_grouping=PersonGrouping.get_db_table(),
-            person_title=PersonTitle.get_db_table(),
-            grouping=Grouping.get_db_table(),
+            person_search_document=PersonSearchDocument.get_db_table(),
             active_filter=Archivable.ACTIVE_FILTER,
             confidential_filter=confidential_filter,
-            titles_check=titles_check,
-        )
-        # SQL FROM PARAMS
-        from_params = []
-        # Temporary Table portion of the SQL query to retrieve persons matching search criteria
-        temp_table_query = """
-        {create_temp_table_sql} "{tmp_person_score}" ("id" INTEGER NOT NULL, "score" INTEGER NOT NULL)
-        {on_commit_temp_table_sql} INSERT INTO "{tmp_person_score}" ("id", "score")
-        SELECT "id" AS "id", CASE {person_name_whens} ELSE 0 END AS "score"
-        FROM "{person}" WHERE ({confidential_filter}) AND ("{person}".{active_filter}) AND ({person_name_check});            
-
-        {create_temp_table_sql} "{tmp_person_alias_score}" ("id" INTEGER NOT NULL, "score" INTEGER NOT NULL)
-        {on_commit_temp_table_sql} INSERT INTO "{tmp_person_alias_score}" ("id", "score")
-        SELECT "person_id" AS "id", CASE {person_alias_whens} ELSE 0 END AS "score"
-        FROM "{person_alias}" WHERE ("{person_alias}".{active_filter}) AND ({person_alias_check});
-
-        {create_temp_table_sql} "{tmp_person_identifier_score}" ("id" INTEGER NOT NULL, "score" INTEGER NOT NULL)
-        {on_commit_temp_table_sql} INSERT INTO "{tmp_person_identifier_score}" ("id", "score")
-        SELECT "person_id" AS "id", CASE {person_identifier_whens} ELSE 0 END AS "score"
-        FROM "{person_identifier}" WHERE ("{person_identifier}".{active_filter}) AND ({person_identifier_check});            
-        
-        {create_temp_table_sql} "{tmp_grouping_alias_score}" ("id" INTEGER NOT NULL, "score" INTEGER NOT NULL)
-        {on_commit_temp_table_sql} INSERT INTO "{tmp_grouping_alias_score}" ("id", "score")
-        SELECT "grouping_id" AS "id", CASE {grouping_alias_whens} ELSE 0 END AS "score"
-        FROM "{grouping_alias}" WHERE ("{grouping_alias}".{active_filter}) AND ({grouping_alias_check});
-
-        {create_temp_table_sql} "{tmp_grouping_score}" ("id" INTEGER NOT NULL, "score" INTEGER NOT NULL)
-        {on_commit_temp_table_sql} INSERT INTO "{tmp_grouping_score}" ("id", "score")
-        SELECT 
-            "{grouping}"."id" AS "id", 
-            CASE {grouping_name_whens} ELSE 0 END 
-                + COALESCE("{tmp_grouping_alias_score}"."score", 0) + 
-                + CASE WHEN "{grouping_county}"."id" IS NOT NULL THEN {county_score} ELSE 0 END
-            AS "score"
-        FROM "{grouping}"
-            LEFT JOIN "{tmp_grouping_alias_score}"
-            ON "{grouping}"."id" = "{tmp_grouping_alias_score}"."id"
-            LEFT JOIN "{grouping_county}"
-            ON "{grouping}"."id" = "{grouping_county}"."grouping_id"
-            AND ({counties_check})
-        WHERE ("{grouping}".{active_filter}) 
-        AND (
-               ({grouping_name_check})
-            OR ("{tmp_grouping_alias_score}"."id" IS NOT NULL)
-            OR ("{grouping_county}"."id" IS NOT NULL)
-        );                                                  
-        """.format(
-            confidential_filter=confidential_filter,
-            active_filter=Archivable.ACTIVE_FILTER,
-            create_temp_table_sql=self.create_temp_table_sql,
-            on_commit_temp_table_sql=self.on_commit_temp_table_sql,
-            tmp_person_score=self._tmp_person_score.format(prefix=prefix, suffix=suffix),
-            tmp_person_identifier_score=self._tmp_person_identifier_score.format(prefix=prefix, suffix=suffix),
-            tmp_grouping_score=self._tmp_grouping_score.format(prefix=prefix, suffix=suffix),
-            tmp_grouping_alias_score=self._tmp_grouping_alias_score.format(prefix=prefix, suffix=suffix),
-            tmp_person_alias_score=self._tmp_person_alias_score.format(prefix=prefix, suffix=suffix),
-            person=Person.get_db_table(),
-            person_identifier=PersonIdentifier.get_db_table(),
-            person_alias=PersonAlias.get_db_table(),
-            grouping=Grouping.get_db_table(),
-            grouping_alias=GroupingAlias.get_db_table(),
-            grouping_county=Grouping.get_db_table_for_many_to_many(many_to_many_key=Grouping.counties),
-            person_name_whens=person_name_whens,
             person_name_check=person_name_check,
             person_alias_whens=person_alias_whens,
             person_alias_check=person_alias_check,
@@ -291,22 +204,26 @@ class PersonProfileSearch(AbstractProfileSearch):
             grouping_alias_whens=grouping_alias_whens,
             grouping_alias_check=grouping_alias_check,
             counties_check=counties_check,
-            county_score=self._get_secondary_lookup_score()
+            county_score=self._get_secondary_lookup_score(),
+            titles_check=titles_check
         )
-        # TEMP TABLE PARAMS
-        # person_name_whens                         pairings
-        # person_name_checks                        terms
+        # SQL FROM PARAMS
         # person_alias_whens                        pairings
         # person_alias_checks                       terms
         # person_identifier_whens                   identifiers
         # person_identifier_checks                  identifiers
-        # grouping_alias_whens                      pairings
-        # grouping_alias_checks                     terms
         # grouping_name_whens                       pairings
         # grouping_name_checks                      terms
-        temp_table_params = pairings + terms + pairings + terms + \
+        # grouping_alias_whens                      pairings
+        # grouping_alias_checks                     terms
+        # person_name_checks                        terms
+        from_params = pairings + terms + \
             identifiers + identifiers + \
-            pairings + terms + pairings + terms
+            pairings + terms + pairings + terms + \
+            terms
+        # no temporary tables are necessary
+        temp_table_query = ''
+        temp_table_params = []
         return temp_table_query, sql_from_query, temp_table_params, from_params
 
     def define_sql_query_score(self):
@@ -317,21 +234,36 @@ class PersonProfileSearch(AbstractProfileSearch):
             1: Parameters for SQL statement for definition for scoring column in main query
 
         """
+        parsed_search_criteria = self.parsed_search_criteria
+        pairings = parsed_search_criteria[self._adjacent_pairings_key]
+        terms = parsed_search_criteria[self._terms_key]
+        # build the query to check against person names
+        person_name_check = AbstractSearchValidator.get_partial_check_sql(
+            num_of_checks=len(terms),
+            lhs_of_check='ZD."name"',
+            is_and=False,
+            fail_on_default=True
+        )
+        # calculating person name score
+        person_name_whens = '' if pairings else AbstractSearchValidator.EMPTY_WHEN_INT
+        for pairing in pairings:
+            person_name_whens += """
+                WHEN ZD."name" ILIKE \'%%\' || %s || \'%%\' THEN {score}
+            """.format(score=self._get_primary_name_score(name=pairing))
         # score the row according to matching criteria
-        prefix = self.temp_table_prefix
-        suffix = self.unique_table_suffix
         sql_score_query = """
-            COALESCE("{tmp_person_score}"."score", 0) +
-            COALESCE("{tmp_person_alias_score}"."score", 0) +
-            COALESCE("{tmp_person_identifier_score}"."score", 0) +
-            COALESCE(ZPG."score", 0)
+            CASE WHEN ({person_name_check}) THEN CASE {person_name_whens} ELSE 0 END ELSE 0 END +
+            COALESCE(ZPA."score", 0) +
+            COALESCE(ZPI."score", 0) +
+            ZPG."score"
             AS "score" """.format(
-            tmp_person_score=self._tmp_person_score.format(prefix=prefix, suffix=suffix),
-            tmp_person_identifier_score=self._tmp_person_identifier_score.format(prefix=prefix, suffix=suffix),
-            tmp_person_alias_score=self._tmp_person_alias_score.format(prefix=prefix, suffix=suffix),
+            person_name_check=person_name_check,
+            person_name_whens=person_name_whens
         )
         # PARAMS
-        score_params = []
+        # person_name_checks                        terms
+        # person_name_whens                         pairings
+        score_params = terms + pairings
         return sql_score_query, score_params
 
     class Meta:
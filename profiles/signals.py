@@ -0,0 +1,20 @@
+from django.db import transaction
+from inheritable.models import AbstractConfiguration
+from .caching import OFFICER_PROFILE_APP_LABELS, get_officer_section_cache
+
+
+def post_change_officer_profile_data(sender, **kwargs):
+    """ Invalidates the cached sections of officer profiles after a record that may be displayed in them, or that may
+    control access to them, is saved, deleted or linked.
+
+    :param sender: Model class of the record that was saved or deleted, or the intermediate model class for the
+    many-to-many relation that was changed.
+    :param kwargs: Additional keyword arguments.
+    :return: Nothing.
+    """
+    if sender._meta.app_label in OFFICER_PROFILE_APP_LABELS \
+            and AbstractConfiguration.officer_profile_section_cache_secs() > 0:
+        section_cache = get_officer_section_cache()
+        section_cache.invalidate()
+        # sections rendered before the change was committed may have been cached in the meantime
+        transaction.on_commit(section_cache.invalidate, using=kwargs.get('using'))
@@ -10,15 +10,49 @@ var Fdp = (function (fdpDef, $, w, d) {
 	var commandProfileDef = {};
 
     /**
-     * Initializes interactivity for interface elements for the command profile. Should be called when DOM is ready.
+     * Selector for sections that are retrieved asynchronously, one page at a time.
      */
-	commandProfileDef.init = function () {
-        // init expandable / collapsible sections
-        var collapsibleButtons = "button.collapsible";
-        $(collapsibleButtons).each(function (i, elem) {
+    var _lazySections = "div.lazysec";
+
+    /**
+     * Retrieves a page of a section asynchronously, and replaces the content of the section with it.
+     * @param {Object} div - Section into which to load the page. Must be wrapped in JQuery object.
+     * @param {number} page - Number of the page to retrieve, starting at 1.
+     * @param {string} sort - Key identifying how records in the section are sorted. May be null for the default sorting.
+     */
+    function _loadSection(div, page, sort) {
+        var ajaxData = {};
+        ajaxData[commandProfileDef.jsonPage] = page;
+        if (sort) {
+            ajaxData[commandProfileDef.jsonSort] = sort;
+        }
+        div.data("loaded", true);
+        Fdp.Common.ajax(
+            div.data("url"), /* ajaxUrl */
+            ajaxData, /* ajaxData */
+            true, /* doStringify */
+            function (data) {
+                div.html(data[Fdp.Common.jsonHtml]);
+                _initCollapsibles(div);
+            }, /* onSuccess */
+            false /* isForm */
+        );
+    }
+
+    /**
+     * Initializes the expandable / collapsible sections within a container. Sections that are retrieved asynchronously
+     * are loaded when they are first expanded.
+     * @param {Object} container - Container for the sections. Must be wrapped in JQuery object.
+     */
+    function _initCollapsibles(container) {
+        container.find("button.collapsible").each(function (i, elem) {
             var button = $(elem);
             var div = button.next("div.collapsible");
-            var onStart = function () { };
+            var onStart = function () {
+                if (div.is(_lazySections) && (div.data("loaded") !== true)) {
+                    _loadSection(div, 1, null);
+                }
+            };
             var onComplete = null;
             Fdp.Common.initCollapsible(
                 button, /* button */
@@ -27,6 +61,36 @@ var Fdp = (function (fdpDef, $, w, d) {
                 onComplete /* onComplete */
             );
         });
+    }
+
+    /**
+     * Name of parameter in JSON used to indicate the page of a section that is retrieved asynchronously.
+     */
+    commandProfileDef.jsonPage = null;
+
+    /**
+     * Name of parameter in JSON used to indicate the sorting of a section that is retrieved asynchronously.
+     */
+    commandProfileDef.jsonSort = null;
+
+    /**
+     * Initializes interactivity for interface elements for the command profile. Should be called when DOM is ready.
+     */
+	commandProfileDef.init = function () {
+        // init expandable / collapsible sections
+        var collapsibleButtons = "button.collapsible";
+        _initCollapsibles($(d));
+        // previous or next page of a section is clicked
+        $(d).on("click", _lazySections + " a.secpage", function (event) {
+            event.preventDefault();
+            var link = $(this);
+            _loadSection(link.closest(_lazySections), link.data("page"), link.data("sort"));
+        });
+        // sorting of a section is changed
+        $(d).on("change", _lazySections + " select.secsort", function () {
+            var select = $(this);
+            _loadSection(select.closest(_lazySections), 1, select.val());
+        });
         // expand all button is clicked
         $("#i_expandall").on("click", function () {
             $(collapsibleButtons).each(function (i, elem) {
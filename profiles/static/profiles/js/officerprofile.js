@@ -10,6 +10,51 @@ var Fdp = (function (fdpDef, $, w, d) {
 
 	var officerProfileDef = {};
 
+    /**
+     * Selector for sections that are retrieved asynchronously after the page is loaded.
+     */
+    var _lazySections = "div.lazysec";
+
+    /**
+     * Initializes the expandable / collapsible sections within a container.
+     * @param {Object} container - Container for the sections. Must be wrapped in JQuery object.
+     * @param {Object} photos - Photo carousel that is repositioned when a section is expanded or collapsed. Must be
+     * wrapped in JQuery object.
+     */
+    function _initCollapsibles(container, photos) {
+        container.find("button.collapsible").each(function (i, elem) {
+            var button = $(elem);
+            var div = button.next("div.collapsible");
+            var onStart = function () { photos.slick('setPosition'); };
+            var onComplete = null;
+            Fdp.Common.initCollapsible(
+                button, /* button */
+                div, /* div */
+                onStart, /* onStart */
+                onComplete /* onComplete */
+            );
+        });
+    }
+
+    /**
+     * Retrieves a section asynchronously, and replaces the content of the section with it.
+     * @param {Object} div - Section into which to load the content. Must be wrapped in JQuery object.
+     * @param {Object} photos - Photo carousel that is repositioned when a section is expanded or collapsed. Must be
+     * wrapped in JQuery object.
+     */
+    function _loadSection(div, photos) {
+        Fdp.Common.ajax(
+            div.data("url"), /* ajaxUrl */
+            {}, /* ajaxData */
+            true, /* doStringify */
+            function (data) {
+                div.html(data[Fdp.Common.jsonHtml]);
+                _initCollapsibles(div, photos);
+            }, /* onSuccess */
+            false /* isForm */
+        );
+    }
+
     /**
      * Initializes interactivity for interface elements for the officer profile. Should be called when DOM is ready.
      */
@@ -24,17 +69,10 @@ var Fdp = (function (fdpDef, $, w, d) {
         });
         // init expandable / collapsible sections
         var collapsibleButtons = "button.collapsible";
-        $(collapsibleButtons).each(function (i, elem) {
-            var button = $(elem);
-            var div = button.next("div.collapsible");
-            var onStart = function () { photos.slick('setPosition'); };
-            var onComplete = null;
-            Fdp.Common.initCollapsible(
-                button, /* button */
-                div, /* div */
-                onStart, /* onStart */
-                onComplete /* onComplete */
-            );
+        _initCollapsibles($(d), photos);
+        // retrieve the remaining sections after the identification is displayed
+        $(_lazySections).each(function (i, elem) {
+            _loadSection($(elem), photos);
         });
         // expand all button is clicked
         $("#i_expandall").on("click", function () {
@@ -1,11 +1,29 @@
 from django.utils.translation import ugettext_lazy as _
 from django.urls import reverse
+from django.conf import settings
+from django.contrib.sessions.models import Session
+from django.db import DEFAULT_DB_ALIAS
+from django.http import HttpResponse
+from django.test import RequestFactory, override_settings
+from fdp.middleware.replica_middleware import ReadReplicaMiddleware
+from inheritable.models import AbstractUrlValidator, AbstractConfiguration
+from inheritable.replicas import ReadReplicaRouter, read_replica, PINNED_UNTIL_SESSION_KEY
 from inheritable.tests import AbstractTestCase, local_test_settings_required
 from fdpuser.models import FdpOrganization, FdpUser
-from core.models import Person, PersonIncident, Incident, PersonRelationship, Grouping, PersonGrouping, GroupingIncident
+from core.models import Person, PersonIncident, Incident, PersonRelationship, Grouping, PersonGrouping, \
+    GroupingIncident, GroupingRelationship, PersonAlias, GroupingAlias, PersonSearchDocument, GroupingSearchDocument, \
+    PersonPayment
+from core.search_documents import rebuild_search_documents
+from reversion import create_revision
+from reversion.models import Version
+from .models import OfficerSearch
+from .views import CommandMembersJsonView
+from .caching import get_officer_section_key, get_officer_section_cache
 from sourcing.models import Attachment, Content, ContentPerson, ContentIdentifier, ContentCase
-from supporting.models import PersonRelationshipType, ContentIdentifierType
+from supporting.models import PersonRelationshipType, ContentIdentifierType, GroupingRelationshipType, County, State
 from os.path import splitext
+from json import dumps, loads
+from unittest.mock import patch as mock_patch
 
 
 class ProfileTestCase(AbstractTestCase):
@@ -27,6 +45,23 @@ class ProfileTestCase(AbstractTestCase):
             (D) Attachment has different levels of confidentiality
             (E) Content Identifier has different levels of confidentiality
 
+    (3) Test that the officer and command profile and search results views stay within their query budgets.
+
+    (4) Test that the person and grouping search documents are maintained when records change, and that officer and
+    command searches score against them.
+
+    (5) Test that the person search documents are maintained when persons are reverted or recovered through
+    Django-Reversion, and that officer searches still filter for confidentiality.
+
+    (6) Test that reads for views opted in to the read replica are sent to the read replica, and that users are pinned to
+    the primary database after they write.
+
+    (7) Test that the sections of the command profile are retrieved asynchronously, one page at a time, in the order
+    selected by the user.
+
+    (8) Test that the sections of the officer profile are retrieved asynchronously after the page is loaded, and that
+    each section is cached for users with the same access until data is changed.
+
     """
     #: Dictionary that can be expanded into keyword arguments to define officer profile searching URLs.
     _officer_profile_search_url_dict = {
@@ -46,6 +81,49 @@ class ProfileTestCase(AbstractTestCase):
     #: View name parameter for reverse(...) when generating command profile URL.
     _command_profile_view_name = 'profiles:command'
 
+    #: Maximum number of SQL queries for each profile and search results view.
+    _query_budgets = {
+        'officer_profile': 30,
+        'officer_payments': 12,
+        'officer_relationships': 12,
+        'officer_snapshot': 30,
+        'officer_misconducts': 30,
+        'command_profile': 28,
+        'command_members': 14,
+        'command_misconducts': 20,
+        'command_relationships': 14,
+        'officer_search_results': 16,
+        'command_search_results': 14,
+    }
+
+    @staticmethod
+    def __get_officer_section_urls(pk):
+        """ Retrieves the urls through which sections of an officer profile are retrieved asynchronously.
+
+        :param pk: Primary key for person for which to retrieve the officer profile sections.
+        :return: List of urls.
+        """
+        return [
+            reverse('profiles:{s}'.format(s=section), kwargs={'pk': pk}) for section in (
+                'officer_async_payments', 'officer_async_relationships', 'officer_async_snapshot',
+                'officer_async_misconducts'
+            )
+        ]
+
+    @staticmethod
+    def __get_command_section_urls(pk):
+        """ Retrieves the urls through which sections of a command profile are retrieved asynchronously.
+
+        :param pk: Primary key for grouping for which to retrieve the command profile sections.
+        :return: List of urls.
+        """
+        return [
+            reverse('profiles:{s}'.format(s=section), kwargs={'pk': pk}) for section in (
+                'command_async_relationships', 'command_async_current_members', 'command_async_former_members',
+                'command_async_misconducts'
+            )
+        ]
+
     def __print_profile_download_attachments_with_right_org(self, user_role, view_txt):
         """ Prints into the console the start of a profile download attachments test with matching FDP
         organization.
@@ -737,7 +815,9 @@ class ProfileTestCase(AbstractTestCase):
             # check data for FDP user without FDP org
             self._print_profile_view_start_without_org(user_role=user_role, **print_dict)
             self._check_if_in_view(
-                url=reverse(self._officer_profile_view_name, kwargs={'pk': unrestricted_person.pk}), **check_dict
+                url=reverse(self._officer_profile_view_name, kwargs={'pk': unrestricted_person.pk}),
+                async_urls=self.__get_officer_section_urls(pk=unrestricted_person.pk),
+                **check_dict
             )
             self._print_profile_load_start_without_org(user_role=user_role, **print_dict)
             self._check_if_load_view(
@@ -754,7 +834,11 @@ class ProfileTestCase(AbstractTestCase):
             fdp_user.save()
             # check data for FDP user with FDP org
             self._print_profile_view_start_with_right_org(user_role=user_role, **print_dict)
-            self._check_if_in_view(url=reverse('profiles:officer', kwargs={'pk': unrestricted_person.pk}), **check_dict)
+            self._check_if_in_view(
+                url=reverse('profiles:officer', kwargs={'pk': unrestricted_person.pk}),
+                async_urls=self.__get_officer_section_urls(pk=unrestricted_person.pk),
+                **check_dict
+            )
             self._print_profile_load_start_with_right_org(user_role=user_role, **print_dict)
             self._check_if_load_view(
                 id_map_dict=restricted_persons_dict,
@@ -770,7 +854,11 @@ class ProfileTestCase(AbstractTestCase):
             fdp_user.save()
             # check data for FDP user with FDP org
             self._print_profile_view_start_with_wrong_org(user_role=user_role, **print_dict)
-            self._check_if_in_view(url=reverse('profiles:officer', kwargs={'pk': unrestricted_person.pk}), **check_dict)
+            self._check_if_in_view(
+                url=reverse('profiles:officer', kwargs={'pk': unrestricted_person.pk}),
+                async_urls=self.__get_officer_section_urls(pk=unrestricted_person.pk),
+                **check_dict
+            )
             self._print_profile_load_start_with_wrong_org(user_role=user_role, **print_dict)
             self._check_if_load_view(
                 id_map_dict=restricted_persons_dict,
@@ -813,7 +901,9 @@ class ProfileTestCase(AbstractTestCase):
             # check data for FDP user without FDP org
             self._print_profile_view_start_without_org(user_role=user_role, **print_dict)
             self._check_if_in_view(
-                url=reverse(self._command_profile_view_name, kwargs={'pk': unrestricted_grouping.pk}), **check_dict
+                url=reverse(self._command_profile_view_name, kwargs={'pk': unrestricted_grouping.pk}),
+                async_urls=self.__get_command_section_urls(pk=unrestricted_grouping.pk),
+                **check_dict
             )
             # change FDP user's organization
             fdp_user.fdp_organization = fdp_org
@@ -822,7 +912,9 @@ class ProfileTestCase(AbstractTestCase):
             # check data for FDP user with FDP org
             self._print_profile_view_start_with_right_org(user_role=user_role, **print_dict)
             self._check_if_in_view(
-                url=reverse('profiles:command', kwargs={'pk': unrestricted_grouping.pk}), **check_dict
+                url=reverse('profiles:command', kwargs={'pk': unrestricted_grouping.pk}),
+                async_urls=self.__get_command_section_urls(pk=unrestricted_grouping.pk),
+                **check_dict
             )
             # change FDP user's organization
             fdp_user.fdp_organization = other_fdp_org
@@ -831,7 +923,9 @@ class ProfileTestCase(AbstractTestCase):
             # check data for FDP user with FDP org
             self._print_profile_view_start_with_wrong_org(user_role=user_role, **print_dict)
             self._check_if_in_view(
-                url=reverse('profiles:command', kwargs={'pk': unrestricted_grouping.pk}), **check_dict
+                url=reverse('profiles:command', kwargs={'pk': unrestricted_grouping.pk}),
+                async_urls=self.__get_command_section_urls(pk=unrestricted_grouping.pk),
+                **check_dict
             )
         # remove persons with different confidentiality levels
         self.__delete_persons_for_command_related_data()
@@ -866,7 +960,9 @@ class ProfileTestCase(AbstractTestCase):
             # check data for FDP user without FDP org
             self._print_profile_view_start_without_org(user_role=user_role, **print_dict)
             self._check_if_in_view(
-                url=reverse(self._officer_profile_view_name, kwargs={'pk': unrestricted_person.pk}), **check_dict
+                url=reverse(self._officer_profile_view_name, kwargs={'pk': unrestricted_person.pk}),
+                async_urls=self.__get_officer_section_urls(pk=unrestricted_person.pk),
+                **check_dict
             )
             # change FDP user's organization
             fdp_user.fdp_organization = fdp_org
@@ -875,7 +971,9 @@ class ProfileTestCase(AbstractTestCase):
             # check data for FDP user with FDP org
             self._print_profile_view_start_with_right_org(user_role=user_role, **print_dict)
             self._check_if_in_view(
-                url=reverse(self._officer_profile_view_name, kwargs={'pk': unrestricted_person.pk}), **check_dict
+                url=reverse(self._officer_profile_view_name, kwargs={'pk': unrestricted_person.pk}),
+                async_urls=self.__get_officer_section_urls(pk=unrestricted_person.pk),
+                **check_dict
             )
             # change FDP user's organization
             fdp_user.fdp_organization = other_fdp_org
@@ -884,7 +982,9 @@ class ProfileTestCase(AbstractTestCase):
             # check data for FDP user with FDP org
             self._print_profile_view_start_with_wrong_org(user_role=user_role, **print_dict)
             self._check_if_in_view(
-                url=reverse(self._officer_profile_view_name, kwargs={'pk': unrestricted_person.pk}), **check_dict
+                url=reverse(self._officer_profile_view_name, kwargs={'pk': unrestricted_person.pk}),
+                async_urls=self.__get_officer_section_urls(pk=unrestricted_person.pk),
+                **check_dict
             )
         # remove incidents with different confidentiality levels
         self.__delete_incidents_for_officer_related_data()
@@ -919,7 +1019,9 @@ class ProfileTestCase(AbstractTestCase):
             # check data for FDP user without FDP org
             self._print_profile_view_start_without_org(user_role=user_role, **print_dict)
             self._check_if_in_view(
-                url=reverse(self._command_profile_view_name, kwargs={'pk': unrestricted_grouping.pk}), **check_dict
+                url=reverse(self._command_profile_view_name, kwargs={'pk': unrestricted_grouping.pk}),
+                async_urls=self.__get_command_section_urls(pk=unrestricted_grouping.pk),
+                **check_dict
             )
             # change FDP user's organization
             fdp_user.fdp_organization = fdp_org
@@ -928,7 +1030,9 @@ class ProfileTestCase(AbstractTestCase):
             # check data for FDP user with FDP org
             self._print_profile_view_start_with_right_org(user_role=user_role, **print_dict)
             self._check_if_in_view(
-                url=reverse(self._command_profile_view_name, kwargs={'pk': unrestricted_grouping.pk}), **check_dict
+                url=reverse(self._command_profile_view_name, kwargs={'pk': unrestricted_grouping.pk}),
+                async_urls=self.__get_command_section_urls(pk=unrestricted_grouping.pk),
+                **check_dict
             )
             # change FDP user's organization
             fdp_user.fdp_organization = other_fdp_org
@@ -937,7 +1041,9 @@ class ProfileTestCase(AbstractTestCase):
             # check data for FDP user with FDP org
             self._print_profile_view_start_with_wrong_org(user_role=user_role, **print_dict)
             self._check_if_in_view(
-                url=reverse(self._command_profile_view_name, kwargs={'pk': unrestricted_grouping.pk}), **check_dict
+                url=reverse(self._command_profile_view_name, kwargs={'pk': unrestricted_grouping.pk}),
+                async_urls=self.__get_command_section_urls(pk=unrestricted_grouping.pk),
+                **check_dict
             )
         # remove incidents with different confidentiality levels
         self.__delete_incidents_for_command_related_data()
@@ -972,7 +1078,9 @@ class ProfileTestCase(AbstractTestCase):
             # check data for FDP user without FDP org
             self._print_profile_view_start_without_org(user_role=user_role, **print_dict)
             self._check_if_in_view(
-                url=reverse(self._officer_profile_view_name, kwargs={'pk': unrestricted_person.pk}), **check_dict
+                url=reverse(self._officer_profile_view_name, kwargs={'pk': unrestricted_person.pk}),
+                async_urls=self.__get_officer_section_urls(pk=unrestricted_person.pk),
+                **check_dict
             )
             self.__print_profile_download_attachments_without_org(user_role=user_role, view_txt='officer')
             self.__check_if_in_officer_profile_attachment_downloads(pk=unrestricted_person.pk, **check_dict)
@@ -983,7 +1091,9 @@ class ProfileTestCase(AbstractTestCase):
             # check data for FDP user with FDP org
             self._print_profile_view_start_with_right_org(user_role=user_role, **print_dict)
             self._check_if_in_view(
-                url=reverse(self._officer_profile_view_name, kwargs={'pk': unrestricted_person.pk}), **check_dict
+                url=reverse(self._officer_profile_view_name, kwargs={'pk': unrestricted_person.pk}),
+                async_urls=self.__get_officer_section_urls(pk=unrestricted_person.pk),
+                **check_dict
             )
             self.__print_profile_download_attachments_with_right_org(user_role=user_role, view_txt='officer')
             self.__check_if_in_officer_profile_attachment_downloads(pk=unrestricted_person.pk, **check_dict)
@@ -994,7 +1104,9 @@ class ProfileTestCase(AbstractTestCase):
             # check data for FDP user with FDP org
             self._print_profile_view_start_with_wrong_org(user_role=user_role, **print_dict)
             self._check_if_in_view(
-                url=reverse(self._officer_profile_view_name, kwargs={'pk': unrestricted_person.pk}), **check_dict
+                url=reverse(self._officer_profile_view_name, kwargs={'pk': unrestricted_person.pk}),
+                async_urls=self.__get_officer_section_urls(pk=unrestricted_person.pk),
+                **check_dict
             )
             self.__print_profile_download_attachments_with_wrong_org(user_role=user_role, view_txt='officer')
             self.__check_if_in_officer_profile_attachment_downloads(pk=unrestricted_person.pk, **check_dict)
@@ -1031,7 +1143,9 @@ class ProfileTestCase(AbstractTestCase):
             # check data for FDP user without FDP org
             self._print_profile_view_start_without_org(user_role=user_role, **print_dict)
             self._check_if_in_view(
-                url=reverse(self._command_profile_view_name, kwargs={'pk': unrestricted_grouping.pk}), **check_dict
+                url=reverse(self._command_profile_view_name, kwargs={'pk': unrestricted_grouping.pk}),
+                async_urls=self.__get_command_section_urls(pk=unrestricted_grouping.pk),
+                **check_dict
             )
             self.__print_profile_download_attachments_without_org(user_role=user_role, view_txt='command')
             self.__check_if_in_command_profile_attachment_downloads(pk=unrestricted_grouping.pk, **check_dict)
@@ -1042,7 +1156,9 @@ class ProfileTestCase(AbstractTestCase):
             # check data for FDP user with FDP org
             self._print_profile_view_start_with_right_org(user_role=user_role, **print_dict)
             self._check_if_in_view(
-                url=reverse(self._command_profile_view_name, kwargs={'pk': unrestricted_grouping.pk}), **check_dict
+                url=reverse(self._command_profile_view_name, kwargs={'pk': unrestricted_grouping.pk}),
+                async_urls=self.__get_command_section_urls(pk=unrestricted_grouping.pk),
+                **check_dict
             )
             self.__print_profile_download_attachments_with_right_org(user_role=user_role, view_txt='command')
             self.__check_if_in_command_profile_attachment_downloads(pk=unrestricted_grouping.pk, **check_dict)
@@ -1053,7 +1169,9 @@ class ProfileTestCase(AbstractTestCase):
             # check data for FDP user with FDP org
             self._print_profile_view_start_with_wrong_org(user_role=user_role, **print_dict)
             self._check_if_in_view(
-                url=reverse(self._command_profile_view_name, kwargs={'pk': unrestricted_grouping.pk}), **check_dict
+                url=reverse(self._command_profile_view_name, kwargs={'pk': unrestricted_grouping.pk}),
+                async_urls=self.__get_command_section_urls(pk=unrestricted_grouping.pk),
+                **check_dict
             )
             self.__print_profile_download_attachments_with_wrong_org(user_role=user_role, view_txt='command')
             self.__check_if_in_command_profile_attachment_downloads(pk=unrestricted_grouping.pk, **check_dict)
@@ -1090,7 +1208,9 @@ class ProfileTestCase(AbstractTestCase):
             # check data for FDP user without FDP org
             self._print_profile_view_start_without_org(user_role=user_role, **print_dict)
             self._check_if_in_view(
-                url=reverse(self._officer_profile_view_name, kwargs={'pk': unrestricted_person.pk}), **check_dict
+                url=reverse(self._officer_profile_view_name, kwargs={'pk': unrestricted_person.pk}),
+                async_urls=self.__get_officer_section_urls(pk=unrestricted_person.pk),
+                **check_dict
             )
             # change FDP user's organization
             fdp_user.fdp_organization = fdp_org
@@ -1099,7 +1219,9 @@ class ProfileTestCase(AbstractTestCase):
             # check data for FDP user with FDP org
             self._print_profile_view_start_with_right_org(user_role=user_role, **print_dict)
             self._check_if_in_view(
-                url=reverse(self._officer_profile_view_name, kwargs={'pk': unrestricted_person.pk}), **check_dict
+                url=reverse(self._officer_profile_view_name, kwargs={'pk': unrestricted_person.pk}),
+                async_urls=self.__get_officer_section_urls(pk=unrestricted_person.pk),
+                **check_dict
             )
             # change FDP user's organization
             fdp_user.fdp_organization = other_fdp_org
@@ -1108,7 +1230,9 @@ class ProfileTestCase(AbstractTestCase):
             # check data for FDP user with FDP org
             self._print_profile_view_start_with_wrong_org(user_role=user_role, **print_dict)
             self._check_if_in_view(
-                url=reverse(self._officer_profile_view_name, kwargs={'pk': unrestricted_person.pk}), **check_dict
+                url=reverse(self._officer_profile_view_name, kwargs={'pk': unrestricted_person.pk}),
+                async_urls=self.__get_officer_section_urls(pk=unrestricted_person.pk),
+                **check_dict
             )
         # remove contents with different confidentiality levels
         self.__delete_contents_for_officer_related_data()
@@ -1143,7 +1267,9 @@ class ProfileTestCase(AbstractTestCase):
             # check data for FDP user without FDP org
             self._print_profile_view_start_without_org(user_role=user_role, **print_dict)
             self._check_if_in_view(
-                url=reverse(self._command_profile_view_name, kwargs={'pk': unrestricted_grouping.pk}), **check_dict
+                url=reverse(self._command_profile_view_name, kwargs={'pk': unrestricted_grouping.pk}),
+                async_urls=self.__get_command_section_urls(pk=unrestricted_grouping.pk),
+                **check_dict
             )
             # change FDP user's organization
             fdp_user.fdp_organization = fdp_org
@@ -1152,7 +1278,9 @@ class ProfileTestCase(AbstractTestCase):
             # check data for FDP user with FDP org
             self._print_profile_view_start_with_right_org(user_role=user_role, **print_dict)
             self._check_if_in_view(
-                url=reverse(self._command_profile_view_name, kwargs={'pk': unrestricted_grouping.pk}), **check_dict
+                url=reverse(self._command_profile_view_name, kwargs={'pk': unrestricted_grouping.pk}),
+                async_urls=self.__get_command_section_urls(pk=unrestricted_grouping.pk),
+                **check_dict
             )
             # change FDP user's organization
             fdp_user.fdp_organization = other_fdp_org
@@ -1161,7 +1289,9 @@ class ProfileTestCase(AbstractTestCase):
             # check data for FDP user with FDP org
             self._print_profile_view_start_with_wrong_org(user_role=user_role, **print_dict)
             self._check_if_in_view(
-                url=reverse(self._command_profile_view_name, kwargs={'pk': unrestricted_grouping.pk}), **check_dict
+                url=reverse(self._command_profile_view_name, kwargs={'pk': unrestricted_grouping.pk}),
+                async_urls=self.__get_command_section_urls(pk=unrestricted_grouping.pk),
+                **check_dict
             )
         # remove contents with different confidentiality levels
         self.__delete_contents_for_command_related_data()
@@ -1196,7 +1326,9 @@ class ProfileTestCase(AbstractTestCase):
             # check data for FDP user without FDP org
             self._print_profile_view_start_without_org(user_role=user_role, **print_dict)
             self._check_if_in_view(
-                url=reverse(self._officer_profile_view_name, kwargs={'pk': unrestricted_person.pk}), **check_dict
+                url=reverse(self._officer_profile_view_name, kwargs={'pk': unrestricted_person.pk}),
+                async_urls=self.__get_officer_section_urls(pk=unrestricted_person.pk),
+                **check_dict
             )
             # change FDP user's organization
             fdp_user.fdp_organization = fdp_org
@@ -1205,7 +1337,9 @@ class ProfileTestCase(AbstractTestCase):
             # check data for FDP user with FDP org
             self._print_profile_view_start_with_right_org(user_role=user_role, **print_dict)
             self._check_if_in_view(
-                url=reverse(self._officer_profile_view_name, kwargs={'pk': unrestricted_person.pk}), **check_dict
+                url=reverse(self._officer_profile_view_name, kwargs={'pk': unrestricted_person.pk}),
+                async_urls=self.__get_officer_section_urls(pk=unrestricted_person.pk),
+                **check_dict
             )
             # change FDP user's organization
             fdp_user.fdp_organization = other_fdp_org
@@ -1214,7 +1348,9 @@ class ProfileTestCase(AbstractTestCase):
             # check data for FDP user with FDP org
             self._print_profile_view_start_with_wrong_org(user_role=user_role, **print_dict)
             self._check_if_in_view(
-                url=reverse(self._officer_profile_view_name, kwargs={'pk': unrestricted_person.pk}), **check_dict
+                url=reverse(self._officer_profile_view_name, kwargs={'pk': unrestricted_person.pk}),
+                async_urls=self.__get_officer_section_urls(pk=unrestricted_person.pk),
+                **check_dict
             )
         # remove content identifiers with different confidentiality levels
         self.__delete_content_identifiers_for_officer_related_data()
@@ -1249,7 +1385,9 @@ class ProfileTestCase(AbstractTestCase):
             # check data for FDP user without FDP org
             self._print_profile_view_start_without_org(user_role=user_role, **print_dict)
             self._check_if_in_view(
-                url=reverse(self._command_profile_view_name, kwargs={'pk': unrestricted_grouping.pk}), **check_dict
+                url=reverse(self._command_profile_view_name, kwargs={'pk': unrestricted_grouping.pk}),
+                async_urls=self.__get_command_section_urls(pk=unrestricted_grouping.pk),
+                **check_dict
             )
             # change FDP user's organization
             fdp_user.fdp_organization = fdp_org
@@ -1258,7 +1396,9 @@ class ProfileTestCase(AbstractTestCase):
             # check data for FDP user with FDP org
             self._print_profile_view_start_with_right_org(user_role=user_role, **print_dict)
             self._check_if_in_view(
-                url=reverse(self._command_profile_view_name, kwargs={'pk': unrestricted_grouping.pk}), **check_dict
+                url=reverse(self._command_profile_view_name, kwargs={'pk': unrestricted_grouping.pk}),
+                async_urls=self.__get_command_section_urls(pk=unrestricted_grouping.pk),
+                **check_dict
             )
             # change FDP user's organization
             fdp_user.fdp_organization = other_fdp_org
@@ -1267,7 +1407,9 @@ class ProfileTestCase(AbstractTestCase):
             # check data for FDP user with FDP org
             self._print_profile_view_start_with_wrong_org(user_role=user_role, **print_dict)
             self._check_if_in_view(
-                url=reverse(self._command_profile_view_name, kwargs={'pk': unrestricted_grouping.pk}), **check_dict
+                url=reverse(self._command_profile_view_name, kwargs={'pk': unrestricted_grouping.pk}),
+                async_urls=self.__get_command_section_urls(pk=unrestricted_grouping.pk),
+                **check_dict
             )
         # remove content identifiers with different confidentiality levels
         self.__delete_content_identifiers_for_command_related_data()
@@ -1313,3 +1455,483 @@ class ProfileTestCase(AbstractTestCase):
         self.__test_content_identifier_for_command_profile_views(fdp_org=fdp_org, other_fdp_org=other_fdp_org)
         print(_('\nSuccessfully finished test for for Command Profile view for '
                 'all permutations of user roles, confidentiality levels and relevant models\n\n'))
+
+    @local_test_settings_required
+    def test_query_budgets(self):
+        """ Test that the officer and command profile and search results views stay within their query budgets.
+
+        :return: Nothing
+        """
+        print(_('\nStarting test for query budgets of profile views'))
+        fdp_user = self._create_fdp_user(email_counter=FdpUser.objects.all().count() + 1, **self._host_admin_dict)
+        grouping = Grouping.objects.create(name='BudgetCommand')
+        incident = Incident.objects.create(description='BudgetIncident', **self._not_confidential_dict)
+        content = Content.objects.create(name='BudgetContent', **self._not_confidential_dict)
+        attachment = Attachment.objects.create(
+            name='BudgetAttachment', file='{b}budget.txt'.format(b=AbstractUrlValidator.ATTACHMENT_BASE_URL),
+            **self._not_confidential_dict
+        )
+        content.attachments.add(attachment)
+        GroupingIncident.objects.create(grouping=grouping, incident=incident)
+        for i in range(3):
+            person = Person.objects.create(
+                name='BudgetOfficer{i}'.format(i=i), **self._is_law_dict, **self._not_confidential_dict
+            )
+            PersonGrouping.objects.create(person=person, grouping=grouping)
+            PersonIncident.objects.create(person=person, incident=incident)
+            ContentPerson.objects.create(person=person, content=content)
+        client = self._get_logged_in_client(fdp_user=fdp_user)
+        for key, url in (
+            ('officer_profile', reverse(self._officer_profile_view_name, kwargs={'pk': person.pk})),
+            ('command_profile', reverse(self._command_profile_view_name, kwargs={'pk': grouping.pk})),
+        ):
+            with self.assertQueryBudget(self._query_budgets[key], msg=key) as recorder:
+                response = client.get(url)
+            self.assertEqual(response.status_code, 200)
+            print(_('{k} executed {n} queries'.format(k=key, n=recorder.num_of_queries)))
+        for key, url in (
+            ('officer_payments', reverse('profiles:officer_async_payments', kwargs={'pk': person.pk})),
+            ('officer_relationships', reverse('profiles:officer_async_relationships', kwargs={'pk': person.pk})),
+            ('officer_snapshot', reverse('profiles:officer_async_snapshot', kwargs={'pk': person.pk})),
+            ('officer_misconducts', reverse('profiles:officer_async_misconducts', kwargs={'pk': person.pk})),
+            ('command_members', reverse('profiles:command_async_current_members', kwargs={'pk': grouping.pk})),
+            ('command_misconducts', reverse('profiles:command_async_misconducts', kwargs={'pk': grouping.pk})),
+            ('command_relationships', reverse('profiles:command_async_relationships', kwargs={'pk': grouping.pk})),
+        ):
+            with self.assertQueryBudget(self._query_budgets[key], msg=key) as recorder:
+                response = client.post(url, dumps({}), content_type='application/json')
+            self.assertEqual(response.status_code, 200)
+            self.assertTrue(loads(response.content)[AbstractUrlValidator.JSON_DAT_PARAM])
+            print(_('{k} executed {n} queries'.format(k=key, n=recorder.num_of_queries)))
+        for key, url_dict in (
+            ('officer_search_results', self._officer_profile_search_url_dict),
+            ('command_search_results', self._command_profile_search_url_dict),
+        ):
+            response = client.post(url_dict['search_url'], {'search': 'Budget'})
+            self.assertEqual(response.status_code, 302)
+            with self.assertQueryBudget(self._query_budgets[key], msg=key) as recorder:
+                response = client.get(response.url)
+            self.assertEqual(response.status_code, 200)
+            self.assertIn('Budget', str(response.content))
+            print(_('{k} executed {n} queries'.format(k=key, n=recorder.num_of_queries)))
+        print(_('\nSuccessfully finished test for query budgets of profile views\n\n'))
+
+    @local_test_settings_required
+    def test_search_documents(self):
+        """ Test that the person and grouping search documents are maintained when records change, and that officer and
+        command searches score against them.
+
+        :return: Nothing
+        """
+        print(_('\nStarting test for search documents'))
+        fdp_user = self._create_fdp_user(email_counter=FdpUser.objects.all().count() + 1, **self._host_admin_dict)
+        grouping = Grouping.objects.create(name='Documented  Precinct', code='DP1')
+        person = Person.objects.create(name='Documented Officer', **self._is_law_dict, **self._not_confidential_dict)
+        other_person = Person.objects.create(name='Other Officer', **self._is_law_dict, **self._not_confidential_dict)
+        self.assertEqual(PersonSearchDocument.objects.get(person=person).name, 'documented officer')
+        self.assertFalse(GroupingSearchDocument.objects.get(grouping=grouping).has_law_enforcement)
+        # links to groupings, and aliases for persons and groupings
+        PersonGrouping.objects.create(person=person, grouping=grouping)
+        alias = PersonAlias.objects.create(person=other_person, name='Nicknamed')
+        GroupingAlias.objects.create(grouping=grouping, name='Old Precinct')
+        document = PersonSearchDocument.objects.get(person=person)
+        self.assertEqual(document.grouping_names, ['documented precinct'])
+        self.assertEqual(document.grouping_aliases, ['old precinct'])
+        self.assertEqual(PersonSearchDocument.objects.get(person=other_person).aliases, ['nicknamed'])
+        grouping_document = GroupingSearchDocument.objects.get(grouping=grouping)
+        self.assertTrue(grouping_document.has_law_enforcement)
+        self.assertEqual((grouping_document.code, grouping_document.aliases), ('dp1', ['old precinct']))
+        # archived aliases and renamed groupings
+        alias.is_archived = True
+        alias.save()
+        self.assertEqual(PersonSearchDocument.objects.get(person=other_person).aliases, [])
+        grouping.name = 'Renamed Precinct'
+        grouping.save()
+        self.assertEqual(PersonSearchDocument.objects.get(person=person).grouping_names, ['renamed precinct'])
+        # visibility is restricted by organization access
+        self.assertEqual(
+            PersonSearchDocument.objects.get(person=person).visibility, PersonSearchDocument.VISIBLE_TO_ALL
+        )
+        person.fdp_organizations.add(FdpOrganization.objects.create(name='Documented organization'))
+        self.assertEqual(PersonSearchDocument.objects.get(person=person).visibility, PersonSearchDocument.RESTRICTED)
+        person.fdp_organizations.clear()
+        self.assertEqual(
+            PersonSearchDocument.objects.get(person=person).visibility, PersonSearchDocument.VISIBLE_TO_ALL
+        )
+        # links that are cleared from their reverse side
+        fdp_organization = FdpOrganization.objects.create(name='Cleared organization')
+        person.fdp_organizations.add(fdp_organization)
+        self.assertEqual(PersonSearchDocument.objects.get(person=person).visibility, PersonSearchDocument.RESTRICTED)
+        fdp_organization.persons.clear()
+        self.assertEqual(
+            PersonSearchDocument.objects.get(person=person).visibility, PersonSearchDocument.VISIBLE_TO_ALL
+        )
+        county = County.objects.create(name='Documented County', state=State.objects.create(name='Documented State'))
+        grouping.counties.add(county)
+        self.assertEqual(PersonSearchDocument.objects.get(person=person).county_ids, [county.pk])
+        county.groupings.clear()
+        self.assertEqual(PersonSearchDocument.objects.get(person=person).county_ids, [])
+        # rebuilding search documents recreates them in the same way
+        documents = list(PersonSearchDocument.objects.filter(person__in=[person, other_person]).values())
+        PersonSearchDocument.objects.all().delete()
+        GroupingSearchDocument.objects.all().delete()
+        rebuild_search_documents()
+        self.assertEqual(
+            list(PersonSearchDocument.objects.filter(person__in=[person, other_person]).values()), documents
+        )
+        # searches are scored against the search documents
+        client = self._get_logged_in_client(fdp_user=fdp_user)
+        for url_dict, search, expected, unexpected in (
+            (self._officer_profile_search_url_dict, 'renamed precinct', 'Documented Officer', 'Other Officer'),
+            (self._officer_profile_search_url_dict, 'other', 'Other Officer', 'Documented Officer'),
+            (self._command_profile_search_url_dict, 'old precinct', 'Renamed Precinct', 'Documented  Precinct'),
+        ):
+            response = client.post(url_dict['search_url'], {'search': search})
+            self.assertEqual(response.status_code, 302)
+            response = client.get(response.url)
+            self.assertEqual(response.status_code, 200)
+            self.assertIn(expected, str(response.content))
+            self.assertNotIn(unexpected, str(response.content))
+        # search documents are removed with their records
+        person_pk = person.pk
+        person.delete()
+        self.assertFalse(PersonSearchDocument.objects.filter(person_id=person_pk).exists())
+        self.assertFalse(GroupingSearchDocument.objects.get(grouping=grouping).has_law_enforcement)
+        print(_('\nSuccessfully finished test for search documents\n\n'))
+
+    @local_test_settings_required
+    def test_reverted_search_documents(self):
+        """ Test that the person search documents are maintained when persons are reverted or recovered through
+        Django-Reversion, and that officer searches still filter for confidentiality.
+
+        :return: Nothing
+        """
+        print(_('\nStarting test for search documents of reverted persons'))
+        fdp_user = self._create_fdp_user(
+            is_host=True, is_administrator=False, is_superuser=False, email_counter=FdpUser.objects.all().count() + 1
+        )
+        with create_revision():
+            person = Person.objects.create(
+                name='Reverted Officer', for_admin_only=True, for_host_only=False, **self._is_law_dict
+            )
+        admin_only_version = Version.objects.get_for_object(person).get()
+        person.for_admin_only = False
+        person.save()
+        self.assertEqual(
+            PersonSearchDocument.objects.get(person=person).visibility, PersonSearchDocument.VISIBLE_TO_ALL
+        )
+        # reverting saves the person exactly as it was versioned
+        admin_only_version.revert()
+        self.assertTrue(Person.objects.get(pk=person.pk).for_admin_only)
+        self.assertEqual(PersonSearchDocument.objects.get(person=person).visibility, PersonSearchDocument.RESTRICTED)
+        # searches filter for confidentiality, even if the search document is out of date
+        PersonSearchDocument.objects.filter(person=person).update(visibility=PersonSearchDocument.VISIBLE_TO_ALL)
+        client = self._get_logged_in_client(fdp_user=fdp_user)
+        response = client.post(self._officer_profile_search_url_dict['search_url'], {'search': 'reverted officer'})
+        self.assertEqual(response.status_code, 302)
+        response = client.get(response.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('Reverted Officer', str(response.content))
+        # recovering a deleted person recreates its search document
+        person_pk = person.pk
+        person.delete()
+        self.assertFalse(PersonSearchDocument.objects.filter(person_id=person_pk).exists())
+        admin_only_version.revert()
+        self.assertTrue(PersonSearchDocument.objects.filter(person_id=person_pk).exists())
+        print(_('\nSuccessfully finished test for search documents of reverted persons\n\n'))
+
+    @local_test_settings_required
+    def test_read_replica_routing(self):
+        """ Test that reads for views opted in to the read replica are sent to the read replica, and that users are pinned
+        to the primary database after they write.
+
+        :return: Nothing
+        """
+        print(_('\nStarting test for read replica routing'))
+        router = ReadReplicaRouter()
+        replica_alias = settings.FDP_READ_REPLICA_DATABASE
+        databases = dict(settings.DATABASES)
+        databases[replica_alias] = dict(databases[DEFAULT_DB_ALIAS])
+        request_factory = RequestFactory()
+        routed = []
+
+        def record_reads(request, writes=()):
+            """ View recording the databases from which persons and sessions are read, after optionally writing.
+
+            :param request: Http request object.
+            :param writes: Model classes for which to write.
+            :return: Http response object.
+            """
+            for model in writes:
+                router.db_for_write(model)
+            routed.append((router.db_for_read(Person), router.db_for_read(Session)))
+            return HttpResponse()
+
+        read_replica_view = read_replica(record_reads)
+        # without a read replica, all reads are sent to the primary database
+        request = request_factory.get('/')
+        request.session = {}
+        read_replica_view(request)
+        self.assertEqual(routed.pop(), (DEFAULT_DB_ALIAS, DEFAULT_DB_ALIAS))
+        with override_settings(DATABASES=databases):
+            middleware = ReadReplicaMiddleware(get_response=read_replica_view)
+            # reads are only sent to the read replica from opted in views, and never for sessions
+            self.assertEqual(router.db_for_read(Person), DEFAULT_DB_ALIAS)
+            middleware(request)
+            self.assertEqual(routed.pop(), (replica_alias, DEFAULT_DB_ALIAS))
+            self.assertNotIn(PINNED_UNTIL_SESSION_KEY, request.session)
+            # records of searches do not pin users to the primary database
+            middleware = ReadReplicaMiddleware(get_response=lambda r: read_replica_view(r, writes=(OfficerSearch,)))
+            middleware(request)
+            self.assertEqual(routed.pop(), (replica_alias, DEFAULT_DB_ALIAS))
+            self.assertNotIn(PINNED_UNTIL_SESSION_KEY, request.session)
+            # other writes send the remaining reads, and the reads for subsequent requests, to the primary database
+            middleware = ReadReplicaMiddleware(get_response=lambda r: read_replica_view(r, writes=(Person,)))
+            middleware(request)
+            self.assertEqual(routed.pop(), (DEFAULT_DB_ALIAS, DEFAULT_DB_ALIAS))
+            self.assertIn(PINNED_UNTIL_SESSION_KEY, request.session)
+            ReadReplicaMiddleware(get_response=read_replica_view)(request)
+            self.assertEqual(routed.pop(), (DEFAULT_DB_ALIAS, DEFAULT_DB_ALIAS))
+            # users are no longer pinned once the window has passed
+            request.session[PINNED_UNTIL_SESSION_KEY] = 0
+            ReadReplicaMiddleware(get_response=read_replica_view)(request)
+            self.assertEqual(routed.pop(), (replica_alias, DEFAULT_DB_ALIAS))
+            # records may be related across databases, but migrations are not applied to the read replica
+            person = Person.objects.create(name='Replicated Officer', **self._is_law_dict, **self._not_confidential_dict)
+            grouping = Grouping.objects.create(name='Replicated Precinct', code='RP1')
+            grouping._state.db = replica_alias
+            self.assertTrue(router.allow_relation(person, grouping))
+            self.assertFalse(router.allow_migrate(replica_alias, 'core'))
+            self.assertIsNone(router.allow_migrate(DEFAULT_DB_ALIAS, 'core'))
+        print(_('\nSuccessfully finished test for read replica routing\n\n'))
+
+    @local_test_settings_required
+    def test_command_profile_sections(self):
+        """ Test that the sections of the command profile are retrieved asynchronously, one page at a time, in the order
+        selected by the user.
+
+        :return: Nothing
+        """
+        print(_('\nStarting test for command profile sections'))
+        fdp_user = self._create_fdp_user(email_counter=FdpUser.objects.all().count() + 1, **self._host_admin_dict)
+        grouping = Grouping.objects.create(name='SectionCommand')
+        other_grouping = Grouping.objects.create(name='SectionOtherCommand')
+        empty_grouping = Grouping.objects.create(name='SectionEmptyCommand')
+        for name in ('SectionOfficerC', 'SectionOfficerA', 'SectionOfficerB'):
+            person = Person.objects.create(name=name, **self._is_law_dict, **self._not_confidential_dict)
+            PersonGrouping.objects.create(person=person, grouping=grouping, is_inactive=False)
+        person = Person.objects.create(name='SectionFormerOfficer', **self._is_law_dict, **self._not_confidential_dict)
+        PersonGrouping.objects.create(person=person, grouping=grouping, is_inactive=True)
+        PersonGrouping.objects.create(person=person, grouping=other_grouping, is_inactive=False)
+        incident = Incident.objects.create(description='SectionIncident', **self._not_confidential_dict)
+        GroupingIncident.objects.create(grouping=grouping, incident=incident)
+        relationship_type = GroupingRelationshipType.objects.create(name='SectionRelationshipType')
+        for i in range(2):
+            GroupingRelationship.objects.create(
+                subject_grouping=grouping, type=relationship_type, object_grouping=other_grouping
+            )
+        client = self._get_logged_in_client(fdp_user=fdp_user)
+
+        def get_section(view_name, pk, data):
+            """ Retrieves a page of a section of the command profile.
+
+            :param view_name: Name of view through which the section is retrieved.
+            :param pk: Primary key of command.
+            :param data: Dictionary of page and sorting submitted for the section.
+            :return: Dictionary of JSON data returned for the section.
+            """
+            section_response = client.post(
+                reverse('profiles:{v}'.format(v=view_name), kwargs={'pk': pk}), dumps(data),
+                content_type='application/json'
+            )
+            self.assertEqual(section_response.status_code, 200)
+            return loads(section_response.content)
+
+        # only the number of records in each section is retrieved with the profile
+        response = client.get(reverse(self._command_profile_view_name, kwargs={'pk': grouping.pk}))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.context['object'].command_section_counts,
+            {'active_members': 3, 'inactive_members': 1, 'misconducts': 1, 'relationships': 1}
+        )
+        self.assertNotIn('SectionOfficer', str(response.content))
+        self.assertNotIn('SectionIncident', str(response.content))
+        # members are paginated and sorted
+        page_param = AbstractUrlValidator.JSON_PAGE_PARAM
+        sort_param = AbstractUrlValidator.JSON_SORT_PARAM
+        with mock_patch.object(CommandMembersJsonView, 'paginate_by', 2):
+            data = get_section(
+                view_name='command_async_current_members', pk=grouping.pk, data={page_param: 1, sort_param: 'name'}
+            )[AbstractUrlValidator.JSON_DAT_DAT_PARAM]
+            self.assertEqual((data['count'], data['num_of_pages'], data[sort_param]), (3, 2, 'name'))
+            html = data[AbstractUrlValidator.JSON_HTM_DAT_PARAM]
+            self.assertLess(html.index('SectionOfficerA'), html.index('SectionOfficerB'))
+            self.assertNotIn('SectionOfficerC', html)
+            self.assertNotIn('SectionFormerOfficer', html)
+            data = get_section(
+                view_name='command_async_current_members', pk=grouping.pk, data={page_param: 2, sort_param: 'name'}
+            )[AbstractUrlValidator.JSON_DAT_DAT_PARAM]
+            self.assertIn('SectionOfficerC', data[AbstractUrlValidator.JSON_HTM_DAT_PARAM])
+            self.assertNotIn('SectionOfficerA', data[AbstractUrlValidator.JSON_HTM_DAT_PARAM])
+            # unknown sorting falls back to the default sorting
+            data = get_section(
+                view_name='command_async_current_members', pk=grouping.pk, data={sort_param: 'unknown'}
+            )[AbstractUrlValidator.JSON_DAT_DAT_PARAM]
+            self.assertEqual((data[page_param], data[sort_param]), (1, 'date'))
+        data = get_section(
+            view_name='command_async_former_members', pk=grouping.pk, data={}
+        )[AbstractUrlValidator.JSON_DAT_DAT_PARAM]
+        self.assertEqual(data['count'], 1)
+        self.assertIn('SectionFormerOfficer', data[AbstractUrlValidator.JSON_HTM_DAT_PARAM])
+        # misconducts and relationships
+        data = get_section(
+            view_name='command_async_misconducts', pk=grouping.pk, data={}
+        )[AbstractUrlValidator.JSON_DAT_DAT_PARAM]
+        self.assertEqual(data['count'], 1)
+        self.assertIn('SectionIncident', data[AbstractUrlValidator.JSON_HTM_DAT_PARAM])
+        data = get_section(
+            view_name='command_async_relationships', pk=grouping.pk, data={}
+        )[AbstractUrlValidator.JSON_DAT_DAT_PARAM]
+        self.assertEqual(data['count'], 1)
+        self.assertIn('SectionOtherCommand', data[AbstractUrlValidator.JSON_HTM_DAT_PARAM])
+        self.assertIn('SectionRelationshipType', data[AbstractUrlValidator.JSON_HTM_DAT_PARAM])
+        # sections cannot be retrieved for groupings without officers
+        json = get_section(view_name='command_async_current_members', pk=empty_grouping.pk, data={})
+        self.assertTrue(json[AbstractUrlValidator.JSON_ERR_PARAM])
+        print(_('\nSuccessfully finished test for command profile sections\n\n'))
+
+    @local_test_settings_required
+    def test_officer_profile_sections(self):
+        """ Test that the sections of the officer profile are retrieved asynchronously after the page is loaded, and
+        that each section is cached for users with the same access until data is changed.
+
+        :return: Nothing
+        """
+        print(_('\nStarting test for officer profile sections'))
+        num_of_users = FdpUser.objects.all().count() + 1
+        fdp_user = self._create_fdp_user(email_counter=num_of_users, **self._host_admin_dict)
+        guest_user = self._create_fdp_user(
+            is_host=False, is_administrator=False, is_superuser=False, email_counter=num_of_users + 1
+        )
+        officer = Person.objects.create(name='SectionOfficer', **self._is_law_dict, **self._not_confidential_dict)
+        other_officer = Person.objects.create(
+            name='SectionOtherOfficer', **self._is_law_dict, **self._not_confidential_dict
+        )
+        host_only_officer = Person.objects.create(
+            name='SectionHostOnlyOfficer', for_admin_only=False, for_host_only=True, **self._is_law_dict
+        )
+        PersonPayment.objects.create(person=officer, base_salary=12345)
+        PersonRelationship.objects.create(
+            subject_person=officer, object_person=other_officer, type=PersonRelationshipType.objects.all()[0]
+        )
+        incident = Incident.objects.create(description='SectionIncident', **self._not_confidential_dict)
+        PersonIncident.objects.create(person=officer, incident=incident)
+        content = Content.objects.create(name='SectionContent', **self._not_confidential_dict)
+        content.incidents.add(incident)
+        ContentCase.objects.create(content=content)
+        ContentIdentifier.objects.create(
+            content=content,
+            identifier='SectionCaseIdentifier',
+            content_identifier_type=ContentIdentifierType.objects.all()[0],
+            **self._not_confidential_dict
+        )
+        unlinked_content = Content.objects.create(
+            name='SectionUnlinkedContent', description='SectionUnlinkedSummary', **self._not_confidential_dict
+        )
+        ContentPerson.objects.create(person=officer, content=unlinked_content)
+        client = self._get_logged_in_client(fdp_user=fdp_user)
+
+        def get_section(view_name, pk, for_client):
+            """ Retrieves a section of the officer profile.
+
+            :param view_name: Name of view through which the section is retrieved.
+            :param pk: Primary key of officer.
+            :param for_client: Client through which the section is retrieved.
+            :return: Dictionary of JSON data returned for the section.
+            """
+            section_response = for_client.post(
+                reverse('profiles:{v}'.format(v=view_name), kwargs={'pk': pk}), dumps({}),
+                content_type='application/json'
+            )
+            self.assertEqual(section_response.status_code, 200)
+            return loads(section_response.content)
+
+        def get_section_html(view_name):
+            """ Retrieves the rendered section of the officer profile for the host administrator.
+
+            :param view_name: Name of view through which the section is retrieved.
+            :return: Rendered section.
+            """
+            json = get_section(view_name=view_name, pk=officer.pk, for_client=client)
+            return json[AbstractUrlValidator.JSON_DAT_DAT_PARAM][AbstractUrlValidator.JSON_HTM_DAT_PARAM]
+
+        # only the identification is retrieved with the profile
+        response = client.get(reverse(self._officer_profile_view_name, kwargs={'pk': officer.pk}))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('SectionOfficer', str(response.content))
+        for text in ('12345', 'SectionOtherOfficer', 'SectionIncident', 'SectionCaseIdentifier', 'SectionUnlinked'):
+            self.assertNotIn(text, str(response.content))
+        with override_settings(FDP_OFFICER_PROFILE_SECTION_CACHE_SECS=0):
+            self.assertIn('12345', get_section_html(view_name='officer_async_payments'))
+            self.assertIn('SectionOtherOfficer', get_section_html(view_name='officer_async_relationships'))
+            self.assertIn('SectionCaseIdentifier', get_section_html(view_name='officer_async_snapshot'))
+            html = get_section_html(view_name='officer_async_misconducts')
+            self.assertIn('SectionIncident', html)
+            self.assertIn('SectionUnlinkedSummary', html)
+            # changes that bypass signals are visible when sections are not cached
+            Incident.objects.filter(pk=incident.pk).update(description='SectionUncachedIncident')
+            self.assertIn('SectionUncachedIncident', get_section_html(view_name='officer_async_misconducts'))
+        # sections are not cached in a local-memory cache, since it cannot be invalidated for other processes
+        with override_settings(FDP_OFFICER_PROFILE_SECTION_CACHE_SECS=300, FDP_SHARED_CACHE_TYPE='locmem'):
+            self.assertEqual(AbstractConfiguration.officer_profile_section_cache_secs(), 0)
+        with override_settings(FDP_OFFICER_PROFILE_SECTION_CACHE_SECS=300, FDP_SHARED_CACHE_TYPE='database'):
+            self.assertIn('SectionUncachedIncident', get_section_html(view_name='officer_async_misconducts'))
+            # changes that bypass signals are not visible while the section is cached
+            Incident.objects.filter(pk=incident.pk).update(description='SectionStaleIncident')
+            self.assertNotIn('SectionStaleIncident', get_section_html(view_name='officer_async_misconducts'))
+            # cached sections are invalidated when data is changed
+            incident.description = 'SectionChangedIncident'
+            incident.save()
+            self.assertIn('SectionChangedIncident', get_section_html(view_name='officer_async_misconducts'))
+            # sections are cached separately for users with different access
+            guest_client = self._get_logged_in_client(fdp_user=guest_user)
+            self.assertIn(
+                '12345',
+                get_section(view_name='officer_async_payments', pk=officer.pk, for_client=guest_client)[
+                    AbstractUrlValidator.JSON_DAT_DAT_PARAM
+                ][AbstractUrlValidator.JSON_HTM_DAT_PARAM]
+            )
+            self.assertNotEqual(
+                get_officer_section_key(section='payments', pk=officer.pk, user=fdp_user),
+                get_officer_section_key(section='payments', pk=officer.pk, user=guest_user)
+            )
+            # sections cannot be retrieved for inaccessible officers, even if they are cached for other users
+            json = get_section(view_name='officer_async_payments', pk=host_only_officer.pk, for_client=client)
+            self.assertFalse(json.get(AbstractUrlValidator.JSON_ERR_PARAM, False))
+            json = get_section(view_name='officer_async_payments', pk=host_only_officer.pk, for_client=guest_client)
+            self.assertTrue(json[AbstractUrlValidator.JSON_ERR_PARAM])
+
+            def get_guest_misconducts_html():
+                """ Retrieves the rendered misconducts of the officer for the guest.
+
+                :return: Rendered section.
+                """
+                return get_section(view_name='officer_async_misconducts', pk=officer.pk, for_client=guest_client)[
+                    AbstractUrlValidator.JSON_DAT_DAT_PARAM
+                ][AbstractUrlValidator.JSON_HTM_DAT_PARAM]
+
+            # cached sections are no longer displayed to users who lose access to the data in them
+            self.assertIn('SectionChangedIncident', get_guest_misconducts_html())
+            incident.for_host_only = True
+            incident.save()
+            self.assertNotIn('SectionChangedIncident', get_guest_misconducts_html())
+            self.assertIn('SectionChangedIncident', get_section_html(view_name='officer_async_misconducts'))
+            # sections read from the read replica are not cached
+            section_key = get_officer_section_key(section='payments', pk=officer.pk, user=fdp_user)
+            get_officer_section_cache().invalidate()
+            with mock_patch('profiles.views.is_reading_from_read_replica', return_value=True):
+                self.assertIn('12345', get_section_html(view_name='officer_async_payments'))
+            self.assertIsNone(get_officer_section_cache().get(key=section_key))
+            self.assertIn('12345', get_section_html(view_name='officer_async_payments'))
+            self.assertIsNotNone(get_officer_section_cache().get(key=section_key))
+        print(_('\nSuccessfully finished test for officer profile sections\n\n'))
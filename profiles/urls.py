@@ -20,6 +20,26 @@ urlpatterns = [
         views.OfficerDownloadAllFilesView.as_view(),
         name='officer_download_all_files'
     ),
+    path(
+        '{u}<int:pk>'.format(u=AbstractUrlValidator.OFFICER_ASYNC_PAYMENTS_URL),
+        views.OfficerPaymentsJsonView.as_view(),
+        name='officer_async_payments'
+    ),
+    path(
+        '{u}<int:pk>'.format(u=AbstractUrlValidator.OFFICER_ASYNC_RELATIONSHIPS_URL),
+        views.OfficerRelationshipsJsonView.as_view(),
+        name='officer_async_relationships'
+    ),
+    path(
+        '{u}<int:pk>'.format(u=AbstractUrlValidator.OFFICER_ASYNC_SNAPSHOT_URL),
+        views.OfficerSnapshotJsonView.as_view(),
+        name='officer_async_snapshot'
+    ),
+    path(
+        '{u}<int:pk>'.format(u=AbstractUrlValidator.OFFICER_ASYNC_MISCONDUCTS_URL),
+        views.OfficerMisconductsJsonView.as_view(),
+        name='officer_async_misconducts'
+    ),
     path(AbstractUrlValidator.COMMAND_SEARCH_URL, views.CommandSearchFormView.as_view(), name='command_search'),
     path(
         AbstractUrlValidator.COMMAND_SEARCH_RESULTS_URL,
@@ -31,5 +51,25 @@ urlpatterns = [
         '{u}<int:pk>'.format(u=AbstractUrlValidator.COMMAND_DOWNLOAD_ALL_FILES_URL),
         views.CommandDownloadAllFilesView.as_view(),
         name='command_download_all_files'
+    ),
+    path(
+        '{u}<int:pk>'.format(u=AbstractUrlValidator.COMMAND_ASYNC_CURRENT_MEMBERS_URL),
+        views.CommandMembersJsonView.as_view(is_inactive=False),
+        name='command_async_current_members'
+    ),
+    path(
+        '{u}<int:pk>'.format(u=AbstractUrlValidator.COMMAND_ASYNC_FORMER_MEMBERS_URL),
+        views.CommandMembersJsonView.as_view(is_inactive=True),
+        name='command_async_former_members'
+    ),
+    path(
+        '{u}<int:pk>'.format(u=AbstractUrlValidator.COMMAND_ASYNC_MISCONDUCTS_URL),
+        views.CommandMisconductsJsonView.as_view(),
+        name='command_async_misconducts'
+    ),
+    path(
+        '{u}<int:pk>'.format(u=AbstractUrlValidator.COMMAND_ASYNC_RELATIONSHIPS_URL),
+        views.CommandRelationshipsJsonView.as_view(),
+        name='command_async_relationships'
     )
 ]
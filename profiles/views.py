@@ -1,16 +1,24 @@
 from inheritable.models import AbstractUrlValidator, AbstractSearchValidator, AbstractDateValidator, \
-    AbstractFileValidator
+    AbstractFileValidator, AbstractConfiguration
 from inheritable.views import SecuredSyncFormView, SecuredSyncListView, SecuredSyncDetailView, SecuredSyncView, \
-    SecuredSyncTemplateView
+    SecuredSyncTemplateView, SecuredAsyncJsonView, AsyncContextDataMixin
+from inheritable.replicas import read_replica, is_reading_from_read_replica
+from abc import abstractmethod
 from django.conf import settings
+from django.core.paginator import Paginator
+from django.db import DEFAULT_DB_ALIAS
+from django.template.loader import render_to_string
+from django.utils.decorators import method_decorator
 from django.utils.translation import gettext as _
 from django.utils.http import urlquote, urlunquote
 from django.urls import reverse
 from django.http import QueryDict, HttpResponse
 from .models import OfficerSearch, OfficerView, CommandSearch, CommandView
 from .forms import OfficerSearchForm, CommandSearchForm
-from inheritable.models import Archivable, AbstractSql, AbstractImport
+from .caching import get_officer_section_cache, get_officer_section_key
+from inheritable.models import Archivable, AbstractSql, AbstractImport, JsonData
 from core.models import Person, PersonIdentifier, PersonGrouping, Grouping, GroupingAlias
+from core.thumbnails import get_thumbnail_urls
 from sourcing.models import Content, ContentPerson, ContentPersonAllegation
 from supporting.models import Allegation
 # Load a customized algorithm for person searches
@@ -122,6 +130,7 @@ class OfficerSearchFormView(SecuredSyncFormView):
         return super(OfficerSearchFormView, self).form_valid(form=form)
 
 
+@method_decorator(read_replica, name='dispatch')
 class OfficerSearchResultsListView(SecuredSyncListView):
     """ Page that allows users to browse search results displaying a filtered and paginated list of officers.
 
@@ -267,10 +276,14 @@ class OfficerSearchResultsListView(SecuredSyncListView):
         self.__define_count_query()
         # define the select version of the searching query
         self.__define_select_query()
+        # temporary tables cannot be created on a read replica, so searches that use them are performed on the primary
+        using = DEFAULT_DB_ALIAS if self.__search_class.uses_temp_tables else None
         # perform count query
-        persons_count = AbstractSql.exec_single_val_sql(sql_query=self._sql_count_query, sql_params=self._count_params)
+        persons_count = AbstractSql.exec_single_val_sql(
+            sql_query=self._sql_count_query, sql_params=self._count_params, using=using
+        )
         # perform select query
-        persons = Person.objects.raw(self._sql_select_query, self._select_params)
+        persons = Person.objects.db_manager(using).raw(self._sql_select_query, self._select_params)
         self.__count = persons_count
         self.__result_list = persons
 
@@ -311,26 +324,16 @@ class OfficerSearchResultsListView(SecuredSyncListView):
         return self.__result_list
 
 
-class OfficerDetailView(SecuredSyncDetailView):
+@method_decorator(read_replica, name='dispatch')
+class OfficerDetailView(SecuredSyncDetailView, AsyncContextDataMixin):
     """ Page that displays the profile for an officer.
 
+    Only the identification of the officer is retrieved when the page is loaded. The payroll, associates, snapshot and
+    misconducts are retrieved asynchronously after the page is loaded, see AbstractOfficerSectionJsonView.
+
     """
     template_name = 'officer.html'
     model = Person
-    #: Dictionary keys for the profile snapshots section
-    #: Content case identifiers key in the dictionary for the profile snapshots section
-    __identifiers_key = 'ids'
-    #: Number of cases key in the dictionary for the profile snapshots section
-    __num_cases_key = 'num_of_cases'
-    #: Total for settlement amounts for cases key in the dictionary for the profile snapshots section
-    __settlement_amount_total_key = 'settlement_amount_total'
-    #: Dictionary keys for the profile parsed content section
-    #: Attachments key in the dictionary for the profile parsed content section
-    __attachments_key = 'attachments'
-    #: String representing name key in the dictionary for the profile parsed content section
-    __strings_key = 'strs'
-    #: Links key in the dictionary for the profile parsed content section
-    __links_key = 'links'
 
     def get_context_data(self, **kwargs):
         """ Adds the title, description and search form to the view context.
@@ -342,6 +345,12 @@ class OfficerDetailView(SecuredSyncDetailView):
         request = self.request
         user = request.user
         OfficerView.objects.create_officer_view(person=self.object, fdp_user=user, request=request)
+        # access to the officer's photos was verified when the officer was retrieved, so link to their thumbnails
+        for officer_photo in self.object.officer_photos:
+            officer_photo.thumbnail_urls = get_thumbnail_urls(person_photo=officer_photo, user=user)
+        SecuredSyncView.remember_file_access(
+            user=user, names=[officer_photo.photo for officer_photo in self.object.officer_photos]
+        )
         back_link = request.GET.get(AbstractUrlValidator.GET_PREV_URL_PARAM, None)
         context.update({
             'title': _('Officer Profile'),
@@ -350,15 +359,177 @@ class OfficerDetailView(SecuredSyncDetailView):
             else '{url}?{querystring}'.format(
                 url=reverse('profiles:officer_search_results'), querystring=urlunquote(back_link)
             ),
-            'has_attachments': len(Person.get_officer_attachments(pk=self.object.pk, user=user)) > 0,
-            'identifiers_key': self.__identifiers_key,
-            'num_cases_key': self.__num_cases_key,
-            'settlement_amount_total_key': self.__settlement_amount_total_key,
-            'attachments_key': self.__attachments_key,
-            'strings_key': self.__strings_key,
-            'links_key': self.__links_key
+            'has_attachments': Person.has_officer_attachments(pk=self.object.pk, user=user)
         })
-        return context
+        return self._add_async_context(context)
+
+    def get_object(self, queryset=None):
+        """ Add additional properties to retrieved officer object such as their start date in the most recent command,
+        and the most recent command's name.
+
+        :param queryset: Queryset from which officer object is retreived.
+        :return: Officer object with additional properties.
+        """
+        obj = super(OfficerDetailView, self).get_object(queryset=queryset)
+        # COMMAND
+        officer_end_date = None
+        officer_start_date = None
+        officer_command = None
+        # if the officer has commands, then cycle through and find the first active person-grouping link
+        # assumes that commands are already ordered by date
+        if obj.officer_commands:
+            officer_command = obj.officer_commands.pop(0)
+            if officer_command.is_inactive:
+                officer_end_date = AbstractDateValidator.get_display_text_from_date(
+                    year=officer_command.end_year,
+                    month=officer_command.end_month,
+                    day=officer_command.end_day,
+                    prefix=''
+                )
+            else:
+                officer_start_date = AbstractDateValidator.get_display_text_from_date(
+                    year=officer_command.start_year,
+                    month=officer_command.start_month,
+                    day=officer_command.start_day,
+                    prefix=''
+                )
+        obj.officer_start_date = officer_start_date
+        obj.officer_end_date = officer_end_date
+        obj.officer_command = officer_command
+        # RANK
+        officer_title = None
+        # if the officer has titles, then cycle through and find the first person-title link
+        # assumes that titles are already ordered by date
+        if obj.officer_titles:
+            officer_title = obj.officer_titles.pop(0)
+        obj.officer_title = officer_title
+        return obj
+
+    def get_queryset(self):
+        """ Filters the queryset for a particular user (depending on whether the user is an administrator, etc.)
+
+        :return: Filtered queryset from which officer will be retrieved.
+        """
+        pk = self.kwargs['pk']
+        user = self.request.user
+        qs = Person.get_officer_profile_queryset(pk=pk, user=user)
+        return qs
+
+
+class AbstractOfficerSectionJsonView(SecuredAsyncJsonView):
+    """ Abstract definition of methods and attributes used to asynchronously retrieve a section of the officer profile
+    after the page is loaded.
+
+    All classes retrieving a section of the officer profile inherit from this class, e.g. the class used to
+    asynchronously retrieve the payroll of an officer.
+
+    Each rendered section is cached under its own key, see profiles.caching.
+
+    """
+    #: Template through which the section is rendered.
+    template_name = None
+    #: Name of the section, identifying it in the cache.
+    section = None
+
+    @abstractmethod
+    def _get_section_context(self, pk, user):
+        """ Retrieves the context through which the section is rendered.
+
+        :param pk: Primary key used to identify the officer.
+        :param user: User accessing the section.
+        :return: Tuple of the dictionary of context, and the list of files linked from the section.
+        """
+        pass
+
+    @abstractmethod
+    def _get_specific_error_message(self):
+        """ Retrieves an error message that is specific to the class inheriting from the parent abstract class.
+
+        Error message should be a message indicating that asynchronous retrieval of the specific section (e.g.
+        misconducts) has failed.
+
+        :return: String representation of the specific error message.
+        """
+        pass
+
+    def __get_section(self, pk, user):
+        """ Renders the section.
+
+        :param pk: Primary key used to identify the officer.
+        :param user: User accessing the section.
+        :return: Dictionary containing the rendered section, and the names of the files linked from it.
+        """
+        context, files = self._get_section_context(pk=pk, user=user)
+        return {
+            'html': render_to_string(self.template_name, context=context, request=self.request),
+            'files': [getattr(f, 'name', f) for f in files]
+        }
+
+    def post(self, request, *args, **kwargs):
+        """ Retrieves the section, from the cache if it was recently rendered for a user with the same access.
+
+        :param request: Http request object.
+        :param args: Ignored.
+        :param kwargs: Keyword arguments including the primary key of the officer.
+        :return: JSON formatted response containing the rendered section or an error that was encountered.
+        """
+        try:
+            pk = kwargs['pk']
+            user = request.user
+            # officer must be accessible
+            if not Person.get_officer_profile_queryset(pk=pk, user=user).filter(pk=pk).exists():
+                raise Exception(_('Officer is not accessible'))
+            section = None
+            if AbstractConfiguration.officer_profile_section_cache_secs() > 0:
+                section_cache = get_officer_section_cache()
+                key = get_officer_section_key(section=self.section, pk=pk, user=user)
+                # read replica may lag behind the primary database, so sections read from it are not cached
+                if is_reading_from_read_replica():
+                    section = section_cache.get(key=key)
+                else:
+                    section = section_cache.get_or_set(key=key, default=lambda: self.__get_section(pk=pk, user=user))
+            if section is None:
+                section = self.__get_section(pk=pk, user=user)
+            # access to the files linked from the section was verified when they were retrieved
+            SecuredSyncView.remember_file_access(user=user, names=section['files'])
+            json = JsonData(data={AbstractUrlValidator.JSON_HTM_DAT_PARAM: section['html']})
+        except Exception as err:
+            json = self.jsonify_error(err=err, b=self._get_specific_error_message())
+        return self.render_to_response(json=json)
+
+
+@method_decorator(read_replica, name='dispatch')
+class OfficerPaymentsJsonView(AbstractOfficerSectionJsonView):
+    """ Asynchronously retrieves the payroll of an officer.
+
+    """
+    template_name = 'officer_payments.html'
+    section = 'payments'
+
+    def _get_section_context(self, pk, user):
+        """ Retrieves the context through which the payroll is rendered.
+
+        :param pk: Primary key used to identify the officer.
+        :param user: User accessing the payroll.
+        :return: Tuple of the dictionary of context, and the list of files linked from the payroll.
+        """
+        return {'officer_payments': list(Person.get_officer_payments_queryset(pk=pk, user=user))}, []
+
+    def _get_specific_error_message(self):
+        """ Retrieves an error message indicating that the payroll could not be retrieved.
+
+        :return: String representation of error message.
+        """
+        return _('Could not retrieve payroll. Please reload the page.')
+
+
+@method_decorator(read_replica, name='dispatch')
+class OfficerRelationshipsJsonView(AbstractOfficerSectionJsonView):
+    """ Asynchronously retrieves the associates of an officer.
+
+    """
+    template_name = 'officer_relationships.html'
+    section = 'relationships'
 
     @staticmethod
     def __record_relationship(rel_dict, relationship, is_accessing_object):
@@ -379,6 +550,132 @@ class OfficerDetailView(SecuredSyncDetailView):
         else:
             rel_dict[dict_key]['num'] += 1
 
+    def _get_section_context(self, pk, user):
+        """ Retrieves the context through which the associates are rendered.
+
+        :param pk: Primary key used to identify the officer.
+        :param user: User accessing the associates.
+        :return: Tuple of the dictionary of context, and the list of files linked from the associates.
+        """
+        rel_dict = {}
+        for relationship in Person.get_officer_relationships_queryset(pk=pk, user=user, for_object_person=False):
+            self.__record_relationship(rel_dict=rel_dict, relationship=relationship, is_accessing_object=True)
+        for relationship in Person.get_officer_relationships_queryset(pk=pk, user=user, for_object_person=True):
+            self.__record_relationship(rel_dict=rel_dict, relationship=relationship, is_accessing_object=False)
+        return {'officer_relationships': list(rel_dict.values())}, []
+
+    def _get_specific_error_message(self):
+        """ Retrieves an error message indicating that the associates could not be retrieved.
+
+        :return: String representation of error message.
+        """
+        return _('Could not retrieve associates. Please reload the page.')
+
+
+@method_decorator(read_replica, name='dispatch')
+class OfficerSnapshotJsonView(AbstractOfficerSectionJsonView):
+    """ Asynchronously retrieves the snapshot of an officer, i.e. a summary of the cases linked to the officer.
+
+    """
+    template_name = 'officer_snapshot.html'
+    section = 'snapshot'
+    #: Dictionary keys for the profile snapshots section
+    #: Content case identifiers key in the dictionary for the profile snapshots section
+    __identifiers_key = 'ids'
+    #: Number of cases key in the dictionary for the profile snapshots section
+    __num_cases_key = 'num_of_cases'
+    #: Total for settlement amounts for cases key in the dictionary for the profile snapshots section
+    __settlement_amount_total_key = 'settlement_amount_total'
+
+    @classmethod
+    def __parse_content_for_snapshot(cls, content, snapshot_dict):
+        """ Parses content linked to incidents for the Snapshot section of the officer's profile.
+
+        :param content: Content to which lawsuit may be linked.
+        :param snapshot_dict: Existing dictionary storing case content data for the Snapshot section.
+        :return: Nothing.
+        """
+        content_case = getattr(content, 'officer_content_case', None)
+        # a case is linked to this content
+        if content_case:
+            # settlement amount
+            settlement_amount = content_case.settlement_amount
+            # get case identifiers
+            case_ids = [
+                '{i}{x}'.format(
+                    i=x.identifier,
+                    x=' ({o}{a})'.format(
+                        o=content_case.outcome,
+                        a='' if not settlement_amount else ' {d}{m}'.format(d=_('$'), m=settlement_amount)
+                    ) if content_case and content_case.outcome else ''
+                ) for x in content.officer_content_identifiers
+            ]
+            # adding case into snapshot section based on type
+            case_type = _('Other') if not content.type else content.type
+            if case_type not in snapshot_dict:
+                snapshot_dict[case_type] = {
+                    cls.__identifiers_key: case_ids,
+                    cls.__num_cases_key: 1,
+                    cls.__settlement_amount_total_key: 0 if not settlement_amount else settlement_amount
+                }
+            else:
+                snapshot_dict[case_type][cls.__num_cases_key] += 1
+                snapshot_dict[case_type][cls.__identifiers_key].extend(case_ids)
+                if settlement_amount:
+                    snapshot_dict[case_type][cls.__settlement_amount_total_key] += settlement_amount
+
+    def _get_section_context(self, pk, user):
+        """ Retrieves the context through which the snapshot is rendered.
+
+        :param pk: Primary key used to identify the officer.
+        :param user: User accessing the snapshot.
+        :return: Tuple of the dictionary of context, and the list of files linked from the snapshot.
+        """
+        snapshot_dict = {}
+        # content directly connected to misconducts
+        for misconduct in Person.get_officer_misconducts_queryset(pk=pk, user=user):
+            for content in misconduct.incident.officer_contents:
+                self.__parse_content_for_snapshot(content=content, snapshot_dict=snapshot_dict)
+        # content without incidents
+        for content_person in Person.get_officer_contents_queryset(pk=pk, user=user):
+            self.__parse_content_for_snapshot(content=content_person.content, snapshot_dict=snapshot_dict)
+        # split the snapshot section into 3 roughly even sized lists
+        snapshot_dict_keys = list(snapshot_dict.keys())
+        k, m = divmod(len(snapshot_dict_keys), 3)
+        return {
+            'snapshot_dict_keys': list(
+                snapshot_dict_keys[i * k + min(i, m):(i + 1) * k + min(i + 1, m)] for i in range(3)
+            ),
+            'officer_snapshot_dict': snapshot_dict,
+            'identifiers_key': self.__identifiers_key,
+            'num_cases_key': self.__num_cases_key,
+            'settlement_amount_total_key': self.__settlement_amount_total_key
+        }, []
+
+    def _get_specific_error_message(self):
+        """ Retrieves an error message indicating that the snapshot could not be retrieved.
+
+        :return: String representation of error message.
+        """
+        return _('Could not retrieve snapshot. Please reload the page.')
+
+
+@method_decorator(read_replica, name='dispatch')
+class OfficerMisconductsJsonView(AbstractOfficerSectionJsonView):
+    """ Asynchronously retrieves the misconducts of an officer, including the content linked to the officer that is not
+    linked to any of the officer's incidents.
+
+    """
+    template_name = 'officer_misconducts.html'
+    section = 'misconducts'
+    #: Dictionary keys for the profile parsed content section
+    #: Attachments key in the dictionary for the profile parsed content section
+    __attachments_key = 'attachments'
+    #: String representing name key in the dictionary for the profile parsed content section
+    __strings_key = 'strs'
+    #: Links key in the dictionary for the profile parsed content section
+    __links_key = 'links'
+
     @classmethod
     def __get_dict_for_parsed_content(cls, existing_dict, str_rep, link, attachments):
         """ Retrieve a dictionary representing parsed content that will be rendered in the officer profile template.
@@ -433,43 +730,6 @@ class OfficerDetailView(SecuredSyncDetailView):
             attachments=[a for a in content.officer_attachments]
         )
 
-    @classmethod
-    def __parse_content_for_snapshot(cls, content, snapshot_dict):
-        """ Parses content linked to incidents for the Snapshot section of the officer's profile.
-
-        :param content: Content to which lawsuit may be linked.
-        :param snapshot_dict: Existing dictionary storing case content data for the Snapshot section.
-        :return: Nothing.
-        """
-        content_case = getattr(content, 'officer_content_case', None)
-        # a case is linked to this content
-        if content_case:
-            # settlement amount
-            settlement_amount = content_case.settlement_amount
-            # get case identifiers
-            case_ids = [
-                '{i}{x}'.format(
-                    i=x.identifier,
-                    x=' ({o}{a})'.format(
-                        o=content_case.outcome,
-                        a='' if not settlement_amount else ' {d}{m}'.format(d=_('$'), m=settlement_amount)
-                    ) if content_case and content_case.outcome else ''
-                ) for x in content.officer_content_identifiers
-            ]
-            # adding case into snapshot section based on type
-            case_type = _('Other') if not content.type else content.type
-            if case_type not in snapshot_dict:
-                snapshot_dict[case_type] = {
-                    cls.__identifiers_key: case_ids,
-                    cls.__num_cases_key: 1,
-                    cls.__settlement_amount_total_key: 0 if not settlement_amount else settlement_amount
-                }
-            else:
-                snapshot_dict[case_type][cls.__num_cases_key] += 1
-                snapshot_dict[case_type][cls.__identifiers_key].extend(case_ids)
-                if settlement_amount:
-                    snapshot_dict[case_type][cls.__settlement_amount_total_key] += settlement_amount
-
     @staticmethod
     def __parse_content_person_allegations_for_profile(content_person_allegations_dict, content_person_allegation):
         """ Parses content person allegations for the Misconduct and Content sections of the officer profile.
@@ -508,69 +768,35 @@ class OfficerDetailView(SecuredSyncDetailView):
             d='' if not discipline_date else '{o}{d}'.format(o=_('On '), d=discipline_date.strftime('%m-%d-%Y')),
             c=', ' if discipline_date and penalty_received else '',
             r=penalty_received
-        )
-        # penalty already added
-        if penalty_str not in content_person_penalties_list:
-            content_person_penalties_list.append(penalty_str)
-
-    def get_object(self, queryset=None):
-        """ Add additional properties to retrieved officer object such as their start date in the most recent command,
-        and the most recent command's name.
-
-        :param queryset: Queryset from which officer object is retreived.
-        :return: Officer object with additional properties.
-        """
-        obj = super(OfficerDetailView, self).get_object(queryset=queryset)
-        # COMMAND
-        officer_end_date = None
-        officer_start_date = None
-        officer_command = None
-        # if the officer has commands, then cycle through and find the first active person-grouping link
-        # assumes that commands are already ordered by date
-        if obj.officer_commands:
-            officer_command = obj.officer_commands.pop(0)
-            if officer_command.is_inactive:
-                officer_end_date = AbstractDateValidator.get_display_text_from_date(
-                    year=officer_command.end_year,
-                    month=officer_command.end_month,
-                    day=officer_command.end_day,
-                    prefix=''
-                )
-            else:
-                officer_start_date = AbstractDateValidator.get_display_text_from_date(
-                    year=officer_command.start_year,
-                    month=officer_command.start_month,
-                    day=officer_command.start_day,
-                    prefix=''
-                )
-        obj.officer_start_date = officer_start_date
-        obj.officer_end_date = officer_end_date
-        obj.officer_command = officer_command
-        # RANK
-        officer_title = None
-        # if the officer has titles, then cycle through and find the first person-title link
-        # assumes that titles are already ordered by date
-        if obj.officer_titles:
-            officer_title = obj.officer_titles.pop(0)
-        obj.officer_title = officer_title
-        # CONTENT
-        snapshot_dict = {}
+        )
+        # penalty already added
+        if penalty_str not in content_person_penalties_list:
+            content_person_penalties_list.append(penalty_str)
+
+    def _get_section_context(self, pk, user):
+        """ Retrieves the context through which the misconducts are rendered.
+
+        :param pk: Primary key used to identify the officer.
+        :param user: User accessing the misconducts.
+        :return: Tuple of the dictionary of context, and the list of files linked from the misconducts.
+        """
+        officer_attachments = []
         # content directly connected to misconducts
-        for misconduct in obj.officer_misconducts:
+        officer_misconducts = list(Person.get_officer_misconducts_queryset(pk=pk, user=user))
+        for misconduct in officer_misconducts:
             misconduct.parsed_officer_content_person_allegations = {}
             misconduct.parsed_officer_content_person_penalties = []
             misconduct.parsed_officer_contents = {}
             misconduct.parsed_officer_content_types = []
             # contents in misconduct
             for content in misconduct.incident.officer_contents:
-                # parse for snapshots section
-                self.__parse_content_for_snapshot(content=content, snapshot_dict=snapshot_dict)
                 # parse for misconducts and contents sections
                 self.__parse_content_for_profile(
                     content_dict=misconduct.parsed_officer_contents,
                     content_dict_keys=misconduct.parsed_officer_content_types,
                     content=content
                 )
+                officer_attachments.extend([a.file for a in content.officer_attachments if a.file])
                 # content person in content
                 for content_person in content.officer_content_persons:
                     # allegations in content person
@@ -586,11 +812,11 @@ class OfficerDetailView(SecuredSyncDetailView):
                             content_person_penalty=content_person_penalty
                         )
         # content without incidents
-        for content_person in obj.officer_contents:
+        officer_contents = list(Person.get_officer_contents_queryset(pk=pk, user=user))
+        for content_person in officer_contents:
             content_person.parsed_officer_content_person_allegations = {}
             content_person.parsed_officer_content_person_penalties = []
-            # parse for snapshots section
-            self.__parse_content_for_snapshot(content=content_person.content, snapshot_dict=snapshot_dict)
+            officer_attachments.extend([a.file for a in content_person.content.officer_attachments if a.file])
             # allegations in content
             for content_person_allegation in content_person.officer_allegations:
                 self.__parse_content_person_allegations_for_profile(
@@ -603,33 +829,23 @@ class OfficerDetailView(SecuredSyncDetailView):
                     content_person_penalties_list=content_person.parsed_officer_content_person_penalties,
                     content_person_penalty=content_person_penalty
                 )
-        # split the snapshot section into 3 roughly even sized lists
-        snapshot_dict_keys = list(snapshot_dict.keys())
-        k, m = divmod(len(snapshot_dict_keys), 3)
-        obj.snapshot_dict_keys = list(
-            snapshot_dict_keys[i * k + min(i, m):(i + 1) * k + min(i + 1, m)] for i in range(3)
-        )
-        obj.officer_snapshot_dict = snapshot_dict
-        # RELATIONSHIPS
-        rel_dict = {}
-        for relationship in obj.officer_subject_person_relationships:
-            self.__record_relationship(rel_dict=rel_dict, relationship=relationship, is_accessing_object=True)
-        for relationship in obj.officer_object_person_relationships:
-            self.__record_relationship(rel_dict=rel_dict, relationship=relationship, is_accessing_object=False)
-        obj.officer_relationships = list(rel_dict.values())
-        return obj
+        return {
+            'officer_misconducts': officer_misconducts,
+            'officer_contents': officer_contents,
+            'attachments_key': self.__attachments_key,
+            'strings_key': self.__strings_key,
+            'links_key': self.__links_key
+        }, officer_attachments
 
-    def get_queryset(self):
-        """ Filters the queryset for a particular user (depending on whether the user is an administrator, etc.)
+    def _get_specific_error_message(self):
+        """ Retrieves an error message indicating that the misconducts could not be retrieved.
 
-        :return: Filtered queryset from which officer will be retrieved.
+        :return: String representation of error message.
         """
-        pk = self.kwargs['pk']
-        user = self.request.user
-        qs = Person.get_officer_profile_queryset(pk=pk, user=user)
-        return qs
+        return _('Could not retrieve misconducts. Please reload the page.')
 
 
+@method_decorator(read_replica, name='dispatch')
 class OfficerDownloadAllFilesView(SecuredSyncView):
     """ View that allows users to download all files for a particular officer.
 
@@ -739,6 +955,7 @@ class CommandSearchFormView(SecuredSyncFormView):
         return super(CommandSearchFormView, self).form_valid(form=form)
 
 
+@method_decorator(read_replica, name='dispatch')
 class CommandSearchResultsListView(SecuredSyncListView):
     """ Page that allows users to browse search results displaying a filtered and paginated list of commands.
 
@@ -873,13 +1090,16 @@ class CommandSearchResultsListView(SecuredSyncListView):
         self.__define_count_query()
         # define the select version of the searching query
         self.__define_select_query()
+        # temporary tables cannot be created on a read replica, so searches that use them are performed on the primary
+        using = DEFAULT_DB_ALIAS if self.__search_class.uses_temp_tables else None
         # perform count query
         groupings_count = AbstractSql.exec_single_val_sql(
             sql_query=self._sql_count_query,
-            sql_params=self._count_params
+            sql_params=self._count_params,
+            using=using
         )
         # perform select query
-        groupings = Grouping.objects.raw(self._sql_select_query, self._select_params)
+        groupings = Grouping.objects.db_manager(using).raw(self._sql_select_query, self._select_params)
         self.__count = groupings_count
         self.__result_list = groupings
 
@@ -920,19 +1140,17 @@ class CommandSearchResultsListView(SecuredSyncListView):
         return self.__result_list
 
 
-class CommandDetailView(SecuredSyncDetailView):
+@method_decorator(read_replica, name='dispatch')
+class CommandDetailView(SecuredSyncDetailView, AsyncContextDataMixin):
     """ Page that displays the profile for a command.
 
+    Only the identification, the summary of allegations and the number of records in each remaining section are
+    retrieved when the page is loaded. The members, misconducts and relationships are retrieved asynchronously, one page
+    at a time, when their sections are expanded, see AbstractCommandSectionJsonView.
+
     """
     template_name = 'command.html'
     model = Grouping
-    #: Dictionary keys for the profile parsed content section
-    #: Attachments key in the dictionary for the profile parsed content section
-    __attachments_key = 'attachments'
-    #: String representing name key in the dictionary for the profile parsed content section
-    __strings_key = 'strs'
-    #: Links key in the dictionary for the profile parsed content section
-    __links_key = 'links'
 
     def get_context_data(self, **kwargs):
         """ Adds the title, description and search form to the view context.
@@ -952,120 +1170,24 @@ class CommandDetailView(SecuredSyncDetailView):
             else '{url}?{querystring}'.format(
                 url=reverse('profiles:command_search_results'), querystring=urlunquote(back_link)
             ),
-            'has_attachments': len(Grouping.get_command_attachments(pk=self.object.pk, user=user)) > 0,
-            'max_person_groupings': Grouping.max_person_groupings,
-            'attachments_key': self.__attachments_key,
-            'strings_key': self.__strings_key,
-            'links_key': self.__links_key
+            'has_attachments': Grouping.has_command_attachments(pk=self.object.pk, user=user),
+            'json_page': AbstractUrlValidator.JSON_PAGE_PARAM,
+            'json_sort': AbstractUrlValidator.JSON_SORT_PARAM
         })
-        return context
-
-    @staticmethod
-    def __record_relationship(rel_dict, relationship, is_accessing_object):
-        """ Records a grouping relationship in the relationship dictionary.
-
-        :param rel_dict: Relationship dictionary in which to record grouping relationship.
-        :param relationship: Grouping relationship that should be recorded.
-        :param is_accessing_object: True if object grouping is the other grouping, false if subject grouping is the
-        other grouping.
-        :return: Nothing.
-        """
-        pk = relationship.type_id
-        other_grouping_pk = relationship.object_grouping_id if is_accessing_object else relationship.subject_grouping_id
-        other_grouping_name = \
-            relationship.object_grouping.name if is_accessing_object else relationship.subject_grouping.name
-        other_grouping_id = relationship.object_grouping.pk if is_accessing_object else relationship.subject_grouping.pk
-        dict_key = (pk, other_grouping_pk)
-        if dict_key not in rel_dict:
-            rel_dict[dict_key] = {
-                'grouping_id': other_grouping_id,
-                'grouping': other_grouping_name,
-                'relationship': relationship.type.name,
-                'num': 1
-            }
-        else:
-            rel_dict[dict_key]['num'] += 1
-
-    @classmethod
-    def __parse_content_for_profile(cls, content_dict, content_dict_keys, content):
-        """ Parses content for the Misconduct sections of the command profile.
-
-        :param content_dict: Existing dictionary storing already parsed contents.
-        :param content_dict_keys: Existing list storing keys for already parsed content types.
-        :param content: Content to parse.
-        :return: Nothing.
-        """
-        content_case = getattr(content, 'command_content_case', None)
-        # a case is linked to this content
-        if content_case:
-            identifiers = content.command_content_identifiers
-            parsed_identifiers = '' if not identifiers else ', '.join([x.identifier for x in identifiers])
-            content_type = _('Other case') if not content.type else content.type
-            content_str = '{n}{i}'.format(
-                n=content_type,
-                i='' if not parsed_identifiers else ' ({i})'.format(i=parsed_identifiers)
-            )
-        # no case is linked to this content
-        else:
-            content_type = _('Other') if not content.type else content.type
-            content_str = content_type
-        # string representing content
-        if content_str not in content_dict_keys:
-            content_dict_keys.append(content_str)
-        if content_str not in content_dict:
-            content_dict[content_str] = {}
-        content_dict[content_str] = cls.__get_dict_for_parsed_content(
-            existing_dict=content_dict[content_str],
-            str_rep=content_str,
-            link=content.link,
-            attachments=[a for a in content.command_attachments]
-        )
-
-    @classmethod
-    def __get_dict_for_parsed_content(cls, existing_dict, str_rep, link, attachments):
-        """ Retrieve a dictionary representing parsed content that will be rendered in the command profile template.
-
-        :param existing_dict: Existing dictionary with which to merge new data.
-        :param str_rep: String representing content in the template.
-        :param link: Link for content in the template.
-        :param attachments: List of attachments for content.
-        :return: Dictionary representing parsed content.
-        """
-        prev_str_reps = existing_dict.get(cls.__strings_key, [])
-        prev_attachments = existing_dict.get(cls.__attachments_key, [])
-        prev_links = existing_dict.get(cls.__links_key, [])
-        if attachments:
-            prev_attachments.extend(attachments)
-        prev_links.append(link if link else None)
-        prev_str_reps.append(str_rep if str_rep else _('Unnamed'))
-        return {cls.__attachments_key: prev_attachments, cls.__strings_key: prev_str_reps, cls.__links_key: prev_links}
+        return self._add_async_context(context)
 
     def get_object(self, queryset=None):
-        """ Add additional properties to retrieved command object such as their relationships.
+        """ Add additional properties to retrieved command object such as the number of records in each section.
 
         :param queryset: Queryset from which command object is retrieved.
         :return: Command object with additional properties.
         """
         obj = super(CommandDetailView, self).get_object(queryset=queryset)
-        # content directly connected to misconducts
-        for misconduct in obj.command_misconducts:
-            misconduct.parsed_command_contents = {}
-            misconduct.parsed_command_content_types = []
-            # contents in misconduct
-            for content in misconduct.incident.command_contents:
-                # parse for misconducts and contents sections
-                self.__parse_content_for_profile(
-                    content_dict=misconduct.parsed_command_contents,
-                    content_dict_keys=misconduct.parsed_command_content_types,
-                    content=content
-                )
-        # RELATIONSHIPS
-        rel_dict = {}
-        for relationship in obj.command_subject_grouping_relationships:
-            self.__record_relationship(rel_dict=rel_dict, relationship=relationship, is_accessing_object=True)
-        for relationship in obj.command_object_grouping_relationships:
-            self.__record_relationship(rel_dict=rel_dict, relationship=relationship, is_accessing_object=False)
-        obj.command_relationships = list(rel_dict.values())
+        user = self.request.user
+        # number of members and misconducts
+        obj.command_section_counts = Grouping.get_command_section_counts(pk=obj.pk, user=user)
+        # number of relationships
+        obj.command_section_counts['relationships'] = len(Grouping.get_command_relationships(pk=obj.pk))
         # counts by allegation for grouping
         obj.command_allegation_counts = self.__get_allegation_counts(grouping_id=obj.pk)
         return obj
@@ -1148,10 +1270,324 @@ class CommandDetailView(SecuredSyncDetailView):
         :return: Filtered queryset from which command will be retrieved.
         """
         user = self.request.user
-        qs = Grouping.get_command_profile_queryset(user=user)
+        qs = Grouping.get_command_summary_queryset(user=user)
         return qs
 
 
+class AbstractCommandSectionJsonView(SecuredAsyncJsonView):
+    """ Abstract definition of methods and attributes used to asynchronously retrieve a section of the command profile,
+    one page at a time.
+
+    All classes retrieving a section of the command profile inherit from this class, e.g. the class used to
+    asynchronously retrieve the misconducts of a command.
+
+    """
+    #: Template through which a page of the section is rendered.
+    template_name = None
+    #: Number of records that are displayed on each page of the section.
+    paginate_by = 50
+
+    @abstractmethod
+    def _get_sort_options(self):
+        """ Retrieves the options through which the records in the section can be sorted.
+
+        :return: List of tuples, each with the key identifying the option, the localized label for the option, and the
+        list of fields by which the records are ordered. The first option is used by default.
+        """
+        pass
+
+    @abstractmethod
+    def _get_section_records(self, pk, user, order_by):
+        """ Retrieves the records in the section, that can be accessed by the user.
+
+        :param pk: Primary key used to identify the command.
+        :param user: User accessing the section.
+        :param order_by: List of fields by which the records are ordered.
+        :return: Ordered queryset or list of records.
+        """
+        pass
+
+    @abstractmethod
+    def _get_specific_error_message(self):
+        """ Retrieves an error message that is specific to the class inheriting from the parent abstract class.
+
+        Error message should be a message indicating that asynchronous retrieval of the specific section (e.g.
+        misconducts) has failed.
+
+        :return: String representation of the specific error message.
+        """
+        pass
+
+    def _get_section_context(self, page):
+        """ Retrieves additional context through which a page of the section is rendered.
+
+        :param page: Page of records in the section.
+        :return: Dictionary of additional context.
+        """
+        return {}
+
+    def post(self, request, *args, **kwargs):
+        """ Retrieves a page of the section, in the order selected by the user.
+
+        :param request: Http request object through which the page and order were submitted.
+        :param args: Ignored.
+        :param kwargs: Keyword arguments including the primary key of the command.
+        :return: JSON formatted response containing the rendered page or an error that was encountered.
+        """
+        try:
+            pk = kwargs['pk']
+            user = request.user
+            post_data = self.get_post_data(request)
+            sort_options = self._get_sort_options()
+            sort = post_data.get(AbstractUrlValidator.JSON_SORT_PARAM, None)
+            order_by = next((o for k, l, o in sort_options if k == sort), None)
+            # unknown sorting, so sort by default
+            if order_by is None:
+                sort, _label, order_by = sort_options[0]
+            # command must be accessible
+            if not Grouping.get_command_summary_queryset(user=user).filter(pk=pk).exists():
+                raise Exception(_('Command is not accessible'))
+            paginator = Paginator(
+                self._get_section_records(pk=pk, user=user, order_by=order_by), self.paginate_by
+            )
+            page = paginator.get_page(post_data.get(AbstractUrlValidator.JSON_PAGE_PARAM, 1))
+            context = {
+                'page': page,
+                'sort': sort,
+                'sort_options': [(k, l) for k, l, o in sort_options]
+            }
+            context.update(self._get_section_context(page=page))
+            json = JsonData(data={
+                AbstractUrlValidator.JSON_HTM_DAT_PARAM: render_to_string(
+                    self.template_name, context=context, request=request
+                ),
+                AbstractUrlValidator.JSON_PAGE_PARAM: page.number,
+                AbstractUrlValidator.JSON_SORT_PARAM: sort,
+                'num_of_pages': paginator.num_pages,
+                'count': paginator.count
+            })
+        except Exception as err:
+            json = self.jsonify_error(err=err, b=self._get_specific_error_message())
+        return self.render_to_response(json=json)
+
+
+@method_decorator(read_replica, name='dispatch')
+class CommandMembersJsonView(AbstractCommandSectionJsonView):
+    """ Asynchronously retrieves the current or former members of a command, one page at a time.
+
+    """
+    template_name = 'command_members.html'
+    #: True if former members are retrieved, false if current members are retrieved.
+    is_inactive = False
+
+    def _get_sort_options(self):
+        """ Retrieves the options through which the members can be sorted.
+
+        :return: List of tuples, each with the key identifying the option, the localized label for the option, and the
+        list of fields by which the members are ordered. The first option is used by default.
+        """
+        return [
+            ('date', _('Most recent first'), ['-sort_date_key', 'person__name', 'pk']),
+            ('date_asc', _('Oldest first'), ['sort_date_key', 'person__name', 'pk']),
+            ('name', _('Name'), ['person__name', '-sort_date_key', 'pk'])
+        ]
+
+    def _get_section_records(self, pk, user, order_by):
+        """ Retrieves the members of the command, that can be accessed by the user.
+
+        :param pk: Primary key used to identify the command.
+        :param user: User accessing the members.
+        :param order_by: List of fields by which the members are ordered.
+        :return: Ordered person grouping queryset.
+        """
+        return Grouping.get_command_members_queryset(pk=pk, user=user, is_inactive=self.is_inactive).order_by(
+            *order_by
+        )
+
+    def _get_specific_error_message(self):
+        """ Retrieves an error message indicating that members could not be retrieved.
+
+        :return: String representation of error message.
+        """
+        return _('Could not retrieve members. Please reload the page.')
+
+    def _get_section_context(self, page):
+        """ Retrieves additional context through which a page of members is rendered.
+
+        :param page: Page of members.
+        :return: Dictionary of additional context.
+        """
+        return {'is_inactive': self.is_inactive}
+
+
+@method_decorator(read_replica, name='dispatch')
+class CommandMisconductsJsonView(AbstractCommandSectionJsonView):
+    """ Asynchronously retrieves the misconducts of a command, one page at a time.
+
+    """
+    template_name = 'command_misconducts.html'
+    #: Dictionary keys for the profile parsed content section
+    #: Attachments key in the dictionary for the profile parsed content section
+    __attachments_key = 'attachments'
+    #: String representing name key in the dictionary for the profile parsed content section
+    __strings_key = 'strs'
+    #: Links key in the dictionary for the profile parsed content section
+    __links_key = 'links'
+
+    def _get_sort_options(self):
+        """ Retrieves the options through which the misconducts can be sorted.
+
+        :return: List of tuples, each with the key identifying the option, the localized label for the option, and the
+        list of fields by which the misconducts are ordered. The first option is used by default.
+        """
+        return [
+            ('date', _('Most recent first'), ['-incident__sort_date_key', '-pk']),
+            ('date_asc', _('Oldest first'), ['incident__sort_date_key', 'pk'])
+        ]
+
+    def _get_section_records(self, pk, user, order_by):
+        """ Retrieves the misconducts of the command, that can be accessed by the user.
+
+        :param pk: Primary key used to identify the command.
+        :param user: User accessing the misconducts.
+        :param order_by: List of fields by which the misconducts are ordered.
+        :return: Ordered grouping incident queryset.
+        """
+        return Grouping.get_command_misconducts_queryset(pk=pk, user=user).order_by(*order_by)
+
+    def _get_specific_error_message(self):
+        """ Retrieves an error message indicating that misconducts could not be retrieved.
+
+        :return: String representation of error message.
+        """
+        return _('Could not retrieve misconducts. Please reload the page.')
+
+    @classmethod
+    def __parse_content_for_profile(cls, content_dict, content_dict_keys, content):
+        """ Parses content for the Misconduct sections of the command profile.
+
+        :param content_dict: Existing dictionary storing already parsed contents.
+        :param content_dict_keys: Existing list storing keys for already parsed content types.
+        :param content: Content to parse.
+        :return: Nothing.
+        """
+        content_case = getattr(content, 'command_content_case', None)
+        # a case is linked to this content
+        if content_case:
+            identifiers = content.command_content_identifiers
+            parsed_identifiers = '' if not identifiers else ', '.join([x.identifier for x in identifiers])
+            content_type = _('Other case') if not content.type else content.type
+            content_str = '{n}{i}'.format(
+                n=content_type,
+                i='' if not parsed_identifiers else ' ({i})'.format(i=parsed_identifiers)
+            )
+        # no case is linked to this content
+        else:
+            content_type = _('Other') if not content.type else content.type
+            content_str = content_type
+        # string representing content
+        if content_str not in content_dict_keys:
+            content_dict_keys.append(content_str)
+        if content_str not in content_dict:
+            content_dict[content_str] = {}
+        content_dict[content_str] = cls.__get_dict_for_parsed_content(
+            existing_dict=content_dict[content_str],
+            str_rep=content_str,
+            link=content.link,
+            attachments=[a for a in content.command_attachments]
+        )
+
+    @classmethod
+    def __get_dict_for_parsed_content(cls, existing_dict, str_rep, link, attachments):
+        """ Retrieve a dictionary representing parsed content that will be rendered in the command profile template.
+
+        :param existing_dict: Existing dictionary with which to merge new data.
+        :param str_rep: String representing content in the template.
+        :param link: Link for content in the template.
+        :param attachments: List of attachments for content.
+        :return: Dictionary representing parsed content.
+        """
+        prev_str_reps = existing_dict.get(cls.__strings_key, [])
+        prev_attachments = existing_dict.get(cls.__attachments_key, [])
+        prev_links = existing_dict.get(cls.__links_key, [])
+        if attachments:
+            prev_attachments.extend(attachments)
+        prev_links.append(link if link else None)
+        prev_str_reps.append(str_rep if str_rep else _('Unnamed'))
+        return {cls.__attachments_key: prev_attachments, cls.__strings_key: prev_str_reps, cls.__links_key: prev_links}
+
+    def _get_section_context(self, page):
+        """ Parses the content for a page of misconducts, and remembers the user's access to the attachments linked
+        from them.
+
+        :param page: Page of misconducts.
+        :return: Dictionary of additional context.
+        """
+        misconducts = list(page.object_list)
+        command_attachments = []
+        # content directly connected to misconducts
+        for misconduct in misconducts:
+            misconduct.parsed_command_contents = {}
+            misconduct.parsed_command_content_types = []
+            # contents in misconduct
+            for content in misconduct.incident.command_contents:
+                # parse for misconducts and contents sections
+                self.__parse_content_for_profile(
+                    content_dict=misconduct.parsed_command_contents,
+                    content_dict_keys=misconduct.parsed_command_content_types,
+                    content=content
+                )
+                command_attachments.extend([a.file for a in content.command_attachments if a.file])
+        # access to the attachments linked from the page was verified when they were retrieved
+        SecuredSyncView.remember_file_access(user=self.request.user, names=command_attachments)
+        return {
+            'misconducts': misconducts,
+            'attachments_key': self.__attachments_key,
+            'strings_key': self.__strings_key,
+            'links_key': self.__links_key
+        }
+
+
+@method_decorator(read_replica, name='dispatch')
+class CommandRelationshipsJsonView(AbstractCommandSectionJsonView):
+    """ Asynchronously retrieves the relationships of a command with other commands, one page at a time.
+
+    """
+    template_name = 'command_relationships.html'
+
+    def _get_sort_options(self):
+        """ Retrieves the options through which the relationships can be sorted.
+
+        :return: List of tuples, each with the key identifying the option, the localized label for the option, and the
+        list of keys by which the relationships are ordered. The first option is used by default.
+        """
+        return [
+            ('name', _('Command'), ['grouping', 'relationship']),
+            ('relationship', _('Relationship'), ['relationship', 'grouping'])
+        ]
+
+    def _get_section_records(self, pk, user, order_by):
+        """ Retrieves the relationships of the command.
+
+        :param pk: Primary key used to identify the command.
+        :param user: User accessing the relationships.
+        :param order_by: List of keys by which the relationships are ordered.
+        :return: Ordered list of relationships.
+        """
+        return sorted(
+            Grouping.get_command_relationships(pk=pk),
+            key=lambda r: tuple(str(r[k]).lower() for k in order_by)
+        )
+
+    def _get_specific_error_message(self):
+        """ Retrieves an error message indicating that relationships could not be retrieved.
+
+        :return: String representation of error message.
+        """
+        return _('Could not retrieve relationships. Please reload the page.')
+
+
+@method_decorator(read_replica, name='dispatch')
 class CommandDownloadAllFilesView(SecuredSyncView):
     """ View that allows users to download all files for a particular command.
 
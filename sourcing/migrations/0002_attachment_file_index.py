@@ -0,0 +1,19 @@
+# Generated by Django 3.1.7 on 2026-10-18 22:07
+
+from django.db import migrations, models
+import inheritable.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sourcing', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='attachment',
+            name='file',
+            field=models.FileField(blank=True, db_index=True, help_text='Uploaded file as the attachment. Should be less than 100MB. Ignore if linking an attachment via the web.', max_length=254, upload_to='attm/%Y/%m/%d/%H/%M/%S/', validators=[inheritable.models.AbstractFileValidator.validate_attachment_file_size, inheritable.models.AbstractFileValidator.validate_attachment_file_extension]),
+        ),
+    ]
@@ -0,0 +1,88 @@
+# Generated by Django 3.1.7 on 2026-10-18 22:38
+
+import django.contrib.postgres.fields.ranges
+import django.contrib.postgres.indexes
+from django.db import migrations, models
+
+
+#: Key for a date from its year, month and day components in raw SQL, see AbstractExactDateBounded.get_date_key(...)
+DATE_KEY_SQL = '"{p}_year" * 10000 + "{p}_month" * 100 + "{p}_day"'
+
+#: First day of the month of a date in raw SQL
+FIRST_OF_MONTH_SQL = 'make_date("{p}_year", {m}, 1)'
+
+#: Number of days in the month of a date in raw SQL
+DAYS_IN_MONTH_SQL = "EXTRACT(DAY FROM {f} + INTERVAL '1 month' - INTERVAL '1 day')::integer"
+
+
+def get_backfill_sql(table):
+    """ Retrieves the SQL statement setting the date keys and date range from the individual date components for
+    existing records, in the same way as AbstractExactDateBounded.set_date_keys(...).
+
+    :param table: Name of table for which to set date keys and date range.
+    :return: SQL statement.
+    """
+    start_first = FIRST_OF_MONTH_SQL.format(p='start', m='LEAST(GREATEST("start_month", 1), 12)')
+    start_days = DAYS_IN_MONTH_SQL.format(f=start_first)
+    end_first = FIRST_OF_MONTH_SQL.format(
+        p='end', m='CASE WHEN "end_month" = 0 THEN 12 ELSE LEAST("end_month", 12) END'
+    )
+    end_days = DAYS_IN_MONTH_SQL.format(f=end_first)
+    lower = 'CASE WHEN "start_year" = 0 THEN NULL ELSE {f} + LEAST(GREATEST("start_day", 1), {d}) - 1 END'.format(
+        f=start_first, d=start_days
+    )
+    upper = 'CASE WHEN "end_year" = 0 THEN NULL ELSE {f} + LEAST(CASE WHEN "end_day" = 0 THEN {d} ELSE "end_day" ' \
+            'END, {d}) - 1 END'.format(f=end_first, d=end_days)
+    return """
+        UPDATE "{t}" SET
+            "start_date_key" = {s},
+            "end_date_key" = {e},
+            "sort_date_key" = CASE WHEN "end_year" > "start_year" THEN {e} ELSE {s} END,
+            "date_range" = CASE
+                WHEN ("start_year" = 0 AND "end_year" = 0) OR ({l}) > ({u}) THEN NULL
+                ELSE daterange({l}, {u}, '[]')
+            END
+    """.format(t=table, s=DATE_KEY_SQL.format(p='start'), e=DATE_KEY_SQL.format(p='end'), l=lower, u=upper)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sourcing', '0002_attachment_file_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='contentcase',
+            name='date_range',
+            field=django.contrib.postgres.fields.ranges.DateRangeField(blank=True, editable=False, help_text='Earliest possible start date through latest possible end date', null=True, verbose_name='date range'),
+        ),
+        migrations.AddField(
+            model_name='contentcase',
+            name='end_date_key',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='End date as YYYYMMDD, with unknown components as 0', verbose_name='ending date key'),
+        ),
+        migrations.AddField(
+            model_name='contentcase',
+            name='sort_date_key',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='End date key if end year is after start year, otherwise start date key', verbose_name='sorting date key'),
+        ),
+        migrations.AddField(
+            model_name='contentcase',
+            name='start_date_key',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Start date as YYYYMMDD, with unknown components as 0', verbose_name='starting date key'),
+        ),
+        migrations.RunSQL(sql=get_backfill_sql(table='fdp_content_case'), reverse_sql=migrations.RunSQL.noop),
+        migrations.AddIndex(
+            model_name='contentcase',
+            index=models.Index(fields=['start_date_key'], name='contentcase_start_key'),
+        ),
+        migrations.AddIndex(
+            model_name='contentcase',
+            index=models.Index(fields=['end_date_key'], name='contentcase_end_key'),
+        ),
+        migrations.AddIndex(
+            model_name='contentcase',
+            index=django.contrib.postgres.indexes.GistIndex(fields=['date_range'], name='contentcase_range'),
+        ),
+    ]
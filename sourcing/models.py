@@ -48,7 +48,8 @@ class Attachment(Confidentiable, Descriptable):
             AbstractFileValidator.validate_attachment_file_size,
             AbstractFileValidator.validate_attachment_file_extension
         ],
-        max_length=AbstractFileValidator.MAX_ATTACHMENT_FILE_LEN
+        max_length=AbstractFileValidator.MAX_ATTACHMENT_FILE_LEN,
+        db_index=True
     )
 
     extension = models.CharField(
@@ -589,6 +590,7 @@ class ContentCase(Archivable, AbstractExactDateBounded):
         db_table = '{d}content_case'.format(d=settings.DB_PREFIX)
         verbose_name = _('content case')
         ordering = ['content']
+        indexes = AbstractExactDateBounded.date_indexes
 
 
 class ContentPerson(Archivable, Descriptable, Linkable, AbstractKnownInfo):
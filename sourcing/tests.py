@@ -1,5 +1,8 @@
 from django.utils.translation import ugettext_lazy as _
+from django.core.cache import cache
+from django.test import override_settings
 from inheritable.models import AbstractUrlValidator
+from inheritable.views import SecuredSyncView
 from inheritable.tests import AbstractTestCase, local_test_settings_required
 from fdpuser.models import FdpOrganization, FdpUser
 from core.models import Person
@@ -20,6 +23,8 @@ class SourcingTestCase(AbstractTestCase):
 
     (2) Test for Download Attachment View for all permutations of user roles and confidentiality levels.
 
+    (3) Test that a user's access to a file is remembered only for that user, and only while configured.
+
     """
     @classmethod
     def setUpTestData(cls):
@@ -790,3 +795,37 @@ class SourcingTestCase(AbstractTestCase):
         self.__test_download_attachment_view(fdp_org=fdp_org, other_fdp_org=other_fdp_org)
         print(_('\nSuccessfully finished test for Download Attachment view for all permutations of user roles and '
                 'confidentiality levels\n\n'))
+
+    @local_test_settings_required
+    def test_remembered_file_access(self):
+        """ Test that a user's access to a file is remembered only for that user, and only while configured through the
+        FDP_FILE_ACCESS_CACHE_SECS setting.
+
+        :return: Nothing
+        """
+        print(_('\nStarting test for remembered file access'))
+        cache.clear()
+        num_of_users = FdpUser.objects.all().count() + 1
+        fdp_user = self._create_fdp_user(
+            is_host=True, is_administrator=False, is_superuser=False, email_counter=num_of_users
+        )
+        other_fdp_user = self._create_fdp_user(
+            is_host=True, is_administrator=False, is_superuser=False, email_counter=num_of_users + 1
+        )
+        attachment = Attachment.objects.create(
+            name='RememberedAttachment',
+            file='{b}{f}'.format(b=AbstractUrlValidator.ATTACHMENT_BASE_URL, f='remembered.txt')
+        )
+        name = attachment.file.name
+        self.assertFalse(SecuredSyncView.has_remembered_file_access(user=fdp_user, name=name))
+        with override_settings(FDP_FILE_ACCESS_CACHE_SECS=0):
+            SecuredSyncView.remember_file_access(user=fdp_user, names=[attachment.file])
+        self.assertFalse(SecuredSyncView.has_remembered_file_access(user=fdp_user, name=name))
+        with override_settings(FDP_FILE_ACCESS_CACHE_SECS=60):
+            SecuredSyncView.remember_file_access(user=fdp_user, names=[attachment.file])
+            self.assertTrue(SecuredSyncView.has_remembered_file_access(user=fdp_user, name=name))
+            self.assertFalse(SecuredSyncView.has_remembered_file_access(user=other_fdp_user, name=name))
+        with override_settings(FDP_FILE_ACCESS_CACHE_SECS=0):
+            self.assertFalse(SecuredSyncView.has_remembered_file_access(user=fdp_user, name=name))
+        cache.clear()
+        print(_('\nSuccessfully finished test for remembered file access\n\n'))
@@ -22,13 +22,17 @@ class DownloadAttachmentView(SecuredSyncView):
             user = request.user
             # value that will be in attachment's file field
             file_field_value = '{b}{p}'.format(b=AbstractUrlValidator.ATTACHMENT_BASE_URL, p=path)
-            # attachments filtered for direct confidentiality
-            partially_filtered_queryset = Attachment.active_objects.all().filter_for_confidential_by_user(user=user)
-            # attachments filtered for indirect confidentiality
-            filtered_queryset = Attachment.filter_for_admin(queryset=partially_filtered_queryset, user=user)
-            # attachment is not accessible by user
-            if file_field_value and not filtered_queryset.filter(file=file_field_value).exists():
-                raise Exception(_('User does not have access to attachment'))
+            # user's access to attachment was not recently verified, e.g. while retrieving a profile linking to it
+            if not self.has_remembered_file_access(user=user, name=file_field_value):
+                # attachment identified through its indexed file field
+                partially_filtered_queryset = Attachment.active_objects.filter(file=file_field_value)
+                # attachment filtered for direct confidentiality
+                partially_filtered_queryset = partially_filtered_queryset.filter_for_confidential_by_user(user=user)
+                # attachment filtered for indirect confidentiality
+                filtered_queryset = Attachment.filter_for_admin(queryset=partially_filtered_queryset, user=user)
+                # attachment is not accessible by user
+                if file_field_value and not filtered_queryset.exists():
+                    raise Exception(_('User does not have access to attachment'))
             # if hosted in Microsoft Azure, storing attachments in an Azure Storage account is required
             if AbstractConfiguration.is_using_azure_configuration():
                 return self.serve_azure_storage_static_file(name=file_field_value)